@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+
+""" Reverse index of the output breakout categories of measure results.
+
+Measure results are broken out by region, building type, end use, and
+(optionally) fuel type output categories, each defined as a mapping from the
+category name to the list of input region, building type, end use, or fuel
+names that it covers (e.g., 'out_break_czones' in 'UsefulVars'). Finding the
+category of a given input name by scanning each mapping takes time in
+proportion to the number of categories, and is repeated for each measure and
+each of its contributing microsegments. This module instead inverts each
+mapping once, such that the categories of an input name are found directly.
+"""
+
+
+# End use categories that are further broken out by fuel type
+FUEL_BREAK_ENDUSES = (
+    "Heating (Equip.)", "Cooling (Equip.)", "Heating (Env.)",
+    "Cooling (Env.)", "Water Heating", "Cooking")
+# End use categories for supply-side heating/cooling microsegments
+EQUIP_ENDUSES = ("Heating (Equip.)", "Cooling (Equip.)")
+# End use categories for demand-side heating/cooling microsegments
+ENV_ENDUSES = ("Heating (Env.)", "Cooling (Env.)")
+
+
+def invert(categories):
+    """Map each input name to the output categories that cover it.
+
+    Args:
+        categories (dict): Input names covered by each output category (as
+            a list, or as a string for a single input name).
+
+    Returns:
+        Dict with the output categories that cover each input name, in the
+        order of the output categories.
+    """
+    index = {}
+    for cat, names in categories.items():
+        if isinstance(names, str):
+            names = [names]
+        for name in names:
+            cats = index.setdefault(name, [])
+            if cat not in cats:
+                cats.append(cat)
+    return index
+
+
+class BreakoutIndex(object):
+    """Reverse index of region, building type, end use, and fuel categories.
+
+    Attributes:
+        czones (dict): Region categories that cover each region.
+        bldgtypes (dict): Building type categories that cover each building
+            type or structure type.
+        bldg_struct (dict): Building type category of each building type and
+            structure type ('new' or 'existing') pair.
+        enduses (dict): End use categories that cover each end use.
+        fuels (dict): Fuel type categories that cover each fuel.
+        czone_order (dict): Position of each region category.
+        bldgtype_order (dict): Position of each building type category.
+        enduse_order (dict): Position of each end use category.
+        fuel_detail (boolean): Flag for detailed fuel type breakouts (e.g.,
+            'Propane' and 'Biomass' rather than 'Non-Electric').
+    """
+
+    def __init__(self, czones, bldgtypes, enduses, fuels):
+        self.czones, self.bldgtypes, self.enduses, self.fuels = [
+            invert(x) for x in [czones, bldgtypes, enduses, fuels]]
+        # Building type categories also cover the structure types; where
+        # several categories cover a building type and structure type pair,
+        # the last applies
+        self.bldg_struct = {}
+        for cat, names in bldgtypes.items():
+            if isinstance(names, str):
+                names = [names]
+            for bldg in names:
+                for struct in names:
+                    self.bldg_struct[(bldg, struct)] = cat
+        # Positions of the categories, used to list the categories of a set
+        # of input names in output order
+        self.czone_order, self.bldgtype_order, self.enduse_order = [
+            {cat: pos for pos, cat in enumerate(x)} for x in [
+                czones, bldgtypes, enduses]]
+        self.fuel_detail = len(fuels.keys()) > 2
+
+    def categories(self, index, order, names):
+        """Find the output categories that cover any of a set of input names.
+
+        Args:
+            index (dict): Output categories that cover each input name.
+            order (dict): Position of each output category.
+            names (list): Input names.
+
+        Returns:
+            List of output categories, in output order.
+        """
+        cats = set()
+        for name in names:
+            cats.update(index.get(name, []))
+        return sorted(cats, key=lambda x: order[x])
+
+    def key_chain(self, key_list):
+        """Find the output categories of a contributing microsegment.
+
+        Args:
+            key_list (tuple): Contributing microsegment key chain.
+
+        Returns:
+            Tuple of the region, building type, end use, and fuel type (the
+            fuel being reduced by the microsegment, or '' where fuel type is
+            not broken out) output categories of the microsegment.
+
+        Raises:
+            KeyError: If the microsegment is not covered by a category.
+        """
+        # Where several categories cover the region, the last applies
+        out_cz = self.czones[key_list[1]][-1]
+        out_bldg = self.bldg_struct[(key_list[2], key_list[-1])]
+        out_eu = self.key_chain_enduse(key_list)
+        # If applicable, establish breakout of fuel type that is being
+        # reduced (e.g., through efficiency or fuel switching away from
+        # the fuel)
+        if len(self.fuels) != 0 and out_eu in FUEL_BREAK_ENDUSES:
+            for f in self.fuels[key_list[3]]:
+                # Special handling for other fuel tech., under detailed fuel
+                # type breakouts; this tech. may fit into multiple fuel cats.
+                if self.fuel_detail and key_list[3] == "other fuel":
+                    # Assign coal/kerosene tech.
+                    if f == "Distillate/Other" and (
+                        key_list[-2] is not None and any([
+                            x in key_list[-2] for x in [
+                            "coal", "kerosene"]])):
+                        out_fuel_save = f
+                    # Assign wood tech.
+                    elif f == "Biomass" and (
+                        key_list[-2] is not None and "wood" in
+                            key_list[-2]):
+                        out_fuel_save = f
+                    # All other tech. goes to propane
+                    elif f == "Propane":
+                        out_fuel_save = f
+                else:
+                    out_fuel_save = f
+        else:
+            out_fuel_save = ""
+        return out_cz, out_bldg, out_eu, out_fuel_save
+
+    def key_chain_enduse(self, key_list):
+        """Find the end use output category of a contributing microsegment.
+
+        Notes:
+            The 'other' microsegment end use may map to either the
+            'Refrigeration' output breakout or the 'Other' output breakout,
+            depending on the technology type. 'Supply' side heating/cooling
+            microsegments map to the 'Heating (Equip.)'/'Cooling (Equip.)'
+            end uses, while primary 'demand' side heating/cooling
+            microsegments map to the 'Heating (Env.)'/'Cooling (Env.)' end
+            uses; 'demand' side heating/cooling microsegments that represent
+            waste heat from lights are categorized as part of the 'Lighting'
+            end use.
+
+        Args:
+            key_list (tuple): Contributing microsegment key chain.
+
+        Returns:
+            End use output category of the microsegment.
+
+        Raises:
+            KeyError: If the microsegment is not covered by a category.
+        """
+        if key_list[4] == "other":
+            if key_list[5] == "freezers":
+                return "Refrigeration"
+            else:
+                return "Other"
+        out_eu, last = None, -1
+        covering = self.enduses.get(key_list[4], [])
+        # Where several categories cover the end use, the last that applies
+        # to the microsegment's technology type is used
+        for eu in covering:
+            if (eu in EQUIP_ENDUSES and key_list[5] == "supply") or (
+                eu in ENV_ENDUSES and key_list[5] == "demand" and
+                key_list[0] == "primary") or (
+                    eu not in EQUIP_ENDUSES + ENV_ENDUSES):
+                out_eu, last = eu, self.enduse_order[eu]
+        # Waste heat from lights is assigned to 'Lighting' unless every
+        # category after the last that applies covers the end use
+        if "lighting gain" in key_list and (
+                len(self.enduse_order) - 1 - last) > len([
+                eu for eu in covering if self.enduse_order[eu] > last]):
+            out_eu = "Lighting"
+        if out_eu is None:
+            raise KeyError(
+                "No output end use category for microsegment " +
+                str(key_list))
+        return out_eu
+
+    def measure(self, m):
+        """Find the output categories that a measure applies to.
+
+        Args:
+            m (object): Measure with climate zone, building type, end use,
+                technology, and technology type attributes.
+
+        Returns:
+            Lists of the measure's region, building type, and end use output
+            categories, in output order.
+        """
+        czones = self.categories(
+            self.czones, self.czone_order, m.climate_zone)
+        bldgtypes = self.categories(
+            self.bldgtypes, self.bldgtype_order, m.bldg_type)
+        end_uses = []
+        for euse in self.categories(
+                self.enduses, self.enduse_order, m.end_use["primary"]):
+            # * Note: classify special freezers ECM case as
+            # 'Refrigeration'; classify 'supply' side heating/cooling
+            # ECMs as 'Heating (Equip.)'/'Cooling (Equip.)' and
+            # 'demand' side heating/cooling ECMs as 'Envelope'
+            if (euse == "Refrigeration" and (
+                "refrigeration" in m.end_use["primary"] or
+                "freezers" in m.technology)) or (
+                euse != "Refrigeration" and ((
+                    euse in EQUIP_ENDUSES and
+                    "supply" in m.technology_type["primary"]) or (
+                    euse in ENV_ENDUSES and
+                    "demand" in m.technology_type["primary"]) or (
+                    euse not in EQUIP_ENDUSES + ENV_ENDUSES))):
+                end_uses.append(euse)
+        # Assign secondary heating/cooling microsegments that represent
+        # waste heat from lights to the 'Lighting' end use category, listed
+        # after any category found for the first end use output category
+        if m.end_use["secondary"] is not None and any([
+                x in m.end_use["secondary"] for x in [
+                "heating", "cooling"]]) and len(self.enduse_order) != 0:
+            first = len(end_uses) != 0 and \
+                self.enduse_order[end_uses[0]] == 0
+            if "Lighting" in end_uses and not (
+                    first and end_uses[0] == "Lighting"):
+                end_uses.remove("Lighting")
+            if "Lighting" not in end_uses:
+                end_uses.insert(1 if first else 0, "Lighting")
+        return czones, bldgtypes, end_uses
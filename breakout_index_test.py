@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+""" Tests for the reverse index of output breakout categories """
+
+# Import code to be tested
+import breakout_index
+
+# Import needed packages
+import unittest
+from collections import OrderedDict
+
+
+class BreakoutIndexTest(unittest.TestCase):
+    """Test output breakout categories of key chains and measures.
+
+    Attributes:
+        index (object): Reverse index of sample output breakout categories,
+            with detailed fuel type breakouts.
+        index_basic (object): Reverse index of sample output breakout
+            categories, without fuel type breakouts.
+    """
+
+    def setUp(self):
+        """Set sample output breakout categories."""
+        czones = OrderedDict([
+            ("AIA CZ1", "AIA_CZ1"), ("AIA CZ2", ["AIA_CZ2"])])
+        bldgtypes = OrderedDict([
+            ('Residential (New)', [
+                'new', 'single family home', 'mobile home']),
+            ('Residential (Existing)', [
+                'existing', 'single family home', 'mobile home']),
+            ('Commercial (New)', ['new', 'assembly', 'other']),
+            ('Commercial (Existing)', ['existing', 'assembly', 'other'])])
+        enduses = OrderedDict([
+            ('Heating (Equip.)', ["heating", "secondary heating"]),
+            ('Cooling (Equip.)', ["cooling"]),
+            ('Heating (Env.)', ["heating", "secondary heating"]),
+            ('Cooling (Env.)', ["cooling"]),
+            ('Lighting', ["lighting"]),
+            ('Water Heating', ["water heating"]),
+            ('Refrigeration', ["refrigeration", "other"]),
+            ('Other', ["MELs", "other"])])
+        fuels = OrderedDict([
+            ('Electric', ["electricity"]),
+            ('Natural Gas', ["natural gas"]),
+            ('Propane', ["other fuel"]),
+            ('Distillate/Other', ['distillate', 'other fuel']),
+            ('Biomass', ["other fuel"])])
+        self.index = breakout_index.BreakoutIndex(
+            czones, bldgtypes, enduses, fuels)
+        self.index_basic = breakout_index.BreakoutIndex(
+            czones, bldgtypes, enduses, {})
+
+    def test_key_chain(self):
+        """Test the output categories of contributing microsegments."""
+        self.assertEqual(self.index.key_chain((
+            "primary", "AIA_CZ1", "single family home", "electricity",
+            "heating", "supply", "ASHP", "new")), (
+            "AIA CZ1", "Residential (New)", "Heating (Equip.)", "Electric"))
+        self.assertEqual(self.index_basic.key_chain((
+            "primary", "AIA_CZ2", "assembly", "natural gas", "cooling",
+            "demand", "windows", "existing")), (
+            "AIA CZ2", "Commercial (Existing)", "Cooling (Env.)", ""))
+        # Waste heat from lights maps to 'Lighting'
+        self.assertEqual(self.index.key_chain((
+            "secondary", "AIA_CZ2", "assembly", "electricity", "heating",
+            "demand", "lighting gain", "existing"))[2], "Lighting")
+        # 'Other' end use maps to 'Refrigeration' only for freezers
+        self.assertEqual([self.index.key_chain((
+            "primary", "AIA_CZ1", "mobile home", "electricity", "other",
+            tech, None, "existing"))[2] for tech in ["freezers", "MELs"]],
+            ["Refrigeration", "Other"])
+        # Other fuel technologies map to detailed fuel types by technology
+        self.assertEqual([self.index.key_chain((
+            "primary", "AIA_CZ1", "single family home", "other fuel",
+            "heating", "supply", tech, "new"))[3] for tech in [
+            "wood stove", "coal furnace", "furnace (LPG)", None]],
+            ["Biomass", "Distillate/Other", "Propane", "Propane"])
+        # Microsegments outside of all categories raise an error
+        with self.assertRaises(KeyError):
+            self.index.key_chain((
+                "primary", "AIA_CZ3", "single family home", "electricity",
+                "heating", "supply", "ASHP", "new"))
+
+    def test_measure(self):
+        """Test the output categories that measures apply to."""
+        class Measure(object):
+            climate_zone = ["AIA_CZ2", "AIA_CZ1"]
+            bldg_type = ["single family home", "assembly"]
+            technology = ["freezers"]
+            technology_type = {"primary": ["supply"]}
+            end_use = {"primary": ["other", "heating"],
+                       "secondary": ["heating"]}
+
+        m = Measure()
+        self.assertEqual(self.index.measure(m), (
+            ["AIA CZ1", "AIA CZ2"],
+            ["Residential (New)", "Residential (Existing)",
+             "Commercial (New)", "Commercial (Existing)"],
+            ["Heating (Equip.)", "Lighting", "Refrigeration", "Other"]))
+        m.technology, m.technology_type = ["windows"], {"primary": ["demand"]}
+        m.end_use = {"primary": ["cooling", "lighting"], "secondary": None}
+        self.assertEqual(self.index.measure(m)[2], [
+            "Cooling (Env.)", "Lighting"])
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
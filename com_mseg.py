@@ -5,7 +5,9 @@ import numpy.lib.recfunctions as recfn
 import re
 import csv
 import json
-import io
+import grouped_rows
+import eia_import
+import itertools
 
 
 class EIAData(object):
@@ -157,6 +159,131 @@ class CommercialTranslationDicts(object):
                                 }
 
 
+# Key columns by which to group the rows of the commercial building data
+# (KDBOUT), the service demand data (KSDOUT), and the thermal load
+# components data, in the order in which their codes are given in
+# selecting data
+catg_keys = ['Label', 'Division', 'BldgType', 'EndUse', 'Fuel']
+sd_keys = ['r', 'b', 's', 'f']
+load_keys = ['CDIV', 'BLDG', 'ENDUSE']
+
+
+class ServiceDemandData(object):
+    """Service demand data grouped by microsegment, with parsed names.
+
+    The service demand data are reported for many variants (vintage,
+    efficiency level, etc.) of each technology, identified only by the
+    text in the 'Description' column. The generalized technology name of
+    each row is found once here, for all of the data, rather than with a
+    regex search of each row selected for each microsegment.
+
+    Attributes:
+        rows (grouped_rows.GroupedRows): Service demand data grouped by
+            census division, building type, end use, and fuel type.
+        names (numpy.ndarray): Generalized technology name of each row of
+            the data (an empty string for placeholder and blank rows).
+        lt_names (numpy.ndarray): Generalized technology name of each row
+            of the data, with the modifier text of linear fluorescent
+            bulb types also removed (for the lighting end use).
+    """
+
+    def __init__(self, sd_array):
+        self.rows = grouped_rows.GroupedRows(sd_array, sd_keys)
+        # Parse each distinct description once
+        parsed = {desc: sd_tech_name(desc) for desc in
+                  np.unique(sd_array['Description']).tolist()}
+        self.names = np.array(
+            [parsed[desc] for desc in sd_array['Description'].tolist()],
+            dtype=sd_array['Description'].dtype)
+        self.lt_names = np.array(
+            [lfl_tech_name(name) for name in self.names.tolist()],
+            dtype=sd_array['Description'].dtype)
+
+    def select(self, sel, lighting=False):
+        """Select the service demand data for a microsegment.
+
+        Args:
+            sel (list): A list of integers that specifies the desired
+                census division, building type, end use, and fuel type.
+            lighting (bool): Whether to use the technology names for the
+                lighting end use.
+
+        Returns:
+            A numpy structured array of the service demand data for the
+            microsegment, excluding placeholder and blank rows, and an
+            array of the generalized technology names of its rows.
+        """
+        idx = self.rows.indices(sel[0], sel[1], sel[2], sel[3])
+        names = (self.lt_names if lighting else self.names)[idx]
+        keep = (names != '')
+        return self.rows.data[idx[keep]], names[keep]
+
+
+def sd_tech_name(description):
+    """Find the generalized technology name of a service demand row.
+
+    Args:
+        description (str): Text in the 'Description' column of a row of
+            the service demand data.
+
+    Returns:
+        The technology name without any text describing the vintage or
+        efficiency level, or an empty string for placeholder and blank
+        rows, which should be removed.
+    """
+
+    # Identify the technology name from the 'Description' column in
+    # the data using a regex set up to match any text '.+?' that
+    # appears before the first occurrence of one or more spaces
+    # followed by a 2 and three other numbers (i.e., 2009 or 2035)
+    tech_name = re.search(r'.+?(?=\s+2[0-9]{3})', description)
+
+    # Also check the special case where the technology name is so
+    # long that the year number is partially truncated at the end
+    # of the string
+    exc_tech_name = re.search(r'.+?(?=\s+2[0-9]{1,2}$)', description)
+
+    # If the regex matched, return the matching text, which describes
+    # the technology without scenario-specific text like '2003
+    # installed base'
+    if tech_name:
+        return tech_name.group(0)
+    # Else check to see if the description indicates a placeholder
+    # row or is an empty string, either of which should be removed
+    # before the technologies are summarized
+    elif re.search('placeholder', description):
+        return ''
+    elif re.search(r'^(?![\s\S])', description):
+        return ''
+    # Else check for a special case where the year in the technology
+    # name sought by the tech_name regex didn't match because the year
+    # in the name is partially truncated at the end of the technology
+    # name string
+    elif exc_tech_name:
+        return exc_tech_name.group(0)
+    # Implicitly, if the text does not match either regex, it is
+    # assumed that it does not need to be edited
+    else:
+        return description
+
+
+def lfl_tech_name(name):
+    """Remove the modifier text from linear fluorescent bulb type names.
+
+    Args:
+        name (str): Generalized technology name (e.g., 'T8 F32
+            Commodity').
+
+    Returns:
+        The 'T# F##' part of a linear fluorescent bulb type name (e.g.,
+        'T8 F32'); other names are returned as is.
+    """
+    tech_name = re.search('^(T[0-9] F[0-9]{2})', name)
+    if tech_name:
+        return tech_name.group(0)
+    return name
+
+
 def json_interpreter(key_series):
     """Convert strings in JSON database into codes for data extraction.
 
@@ -253,10 +380,11 @@ def sd_mseg_percent(sd_array, sel, yrs):
     where the end use has available service demand data.
 
     Args:
-        sd_array (numpy.ndarray): Service demand data for commercial
-            building equipment, specified by technology, building
-            vintage, performance level, and the other microsegment
-            parameters that appear in 'sel'.
+        sd_array (numpy.ndarray or ServiceDemandData): Service demand
+            data for commercial building equipment, specified by
+            technology, building vintage, performance level, and the
+            other microsegment parameters that appear in 'sel', or the
+            data grouped by microsegment with parsed technology names.
         sel (list): A list of integers that specifies the desired
             census division, building type, end use, and fuel type.
         yrs (list): A list of integers representing the range of years
@@ -272,79 +400,28 @@ def sd_mseg_percent(sd_array, sel, yrs):
     # Convert the years list from a list of integers to a list of strings
     yrs = [str(yr) for yr in yrs]
 
-    # Filter service demand data based on the specified census
-    # division, building type, end use, and fuel type
-    filtered = sd_array[np.all([sd_array['r'] == sel[0],
-                                sd_array['b'] == sel[1],
-                                sd_array['s'] == sel[2],
-                                sd_array['f'] == sel[3]], axis=0)]
-
-    # Initialize list of rows to remove from 'filtered' based on a
-    # regex search of the 'Description' text
-    rows_to_remove = []
-
-    # Replace technology descriptions in the array 'filtered' with
-    # generalized names, removing any text describing the vintage or
-    # efficiency level and preparing to delete placeholder rows
-    # (placeholder rows are in the data as imported)
-    for idx, row in enumerate(filtered):
-
-        # Identify the technology name from the 'Description' column in
-        # the data using a regex set up to match any text '.+?' that
-        # appears before the first occurrence of one or more spaces
-        # followed by a 2 and three other numbers (i.e., 2009 or 2035)
-        tech_name = re.search(r'.+?(?=\s+2[0-9]{3})', row['Description'])
-
-        # Also check the special case where the technology name is so
-        # long that the year number is partially truncated at the end
-        # of the string
-        exc_tech_name = re.search(
-            r'.+?(?=\s+2[0-9]{1,2}$)',
-            row['Description'])
-
-        # If the regex matched, overwrite the original description with
-        # the matching text, which describes the technology without
-        # scenario-specific text like '2003 installed base'
-        if tech_name:
-            filtered['Description'][idx] = tech_name.group(0)
-        # Else check to see if the description indicates a placeholder
-        # row, which should be deleted before the technologies are
-        # summarized and returned from this function
-        elif re.search('placeholder', row['Description']):
-            rows_to_remove.append(idx)
-        # Else check to see if the description is an empty string,
-        # and if so, add it to the list of rows to remove
-        elif re.search(r'^(?![\s\S])', row['Description']):
-            rows_to_remove.append(idx)
-        # Else check for a special case where the year in the
-        # technology name sought by the tech_name regex didn't match
-        # because the year in the name is partially truncated at
-        # the end of the technology name string
-        elif exc_tech_name:
-            filtered['Description'][idx] = exc_tech_name.group(0)
-        # Implicitly, if the text does not match either regex, it
-        # is assumed that it does not need to be edited or removed
-
-    # Delete the placeholder rows from the filtered array
-    filtered = np.delete(filtered, rows_to_remove, 0)
-
-    # Special filtering for lighting to drop special modifier text
-    # in the descriptions of linear fluorescent bulb types (e.g.,
-    # replace 'T8 F32 Commodity' with 'T8 F32') now that year
-    # details have been removed
-    if sel[2] == CommercialTranslationDicts().endusedict['lighting']:
-        for idx, row in enumerate(filtered):
-            # Identify linear fluorescent types
-            tech_name = re.search('^(T[0-9] F[0-9]{2})', row['Description'])
-            if tech_name:
-                filtered['Description'][idx] = tech_name.group(0)
+    # Group the service demand data by microsegment and parse their
+    # technology descriptions, if not already done (e.g., by walk)
+    if not isinstance(sd_array, ServiceDemandData):
+        sd_array = ServiceDemandData(sd_array)
+
+    # Select the service demand data for the specified census division,
+    # building type, end use, and fuel type, with placeholder and blank
+    # rows removed, along with generalized names for the descriptions of
+    # these rows that exclude any text describing the vintage or
+    # efficiency level; for lighting, the special modifier text in the
+    # names of linear fluorescent bulb types is also removed (e.g., 'T8
+    # F32 Commodity' is replaced with 'T8 F32')
+    filtered, filtered_names = sd_array.select(
+        sel, sel[2] == CommercialTranslationDicts().endusedict['lighting'])
 
     # Because different technologies are sometimes coded with the same
     # technology type number (especially in lighting, where lighting
     # types are often differentiated by vintage and technology type
     # numbers), technologies must be identified using the simplified
-    # names now recorded in the 'Description' field
-    technames = list(np.unique(filtered['Description']))
+    # names in 'filtered_names' (the 'Description' field of the selected
+    # rows is left unmodified)
+    technames = list(np.unique(filtered_names))
 
     # Truncate the technology names to 43 characters to match the
     # truncated strings used for the cost, performance, and lifetime data
@@ -359,7 +436,7 @@ def sd_mseg_percent(sd_array, sel, yrs):
     for idx, name in enumerate(technames):
 
         # Extract entries for a given technology type number
-        entries = filtered[filtered['Description'] == name]
+        entries = filtered[filtered_names == name]
 
         # Calculate the sum of all year columns and write it to the
         # appropriate row in the tval array (note that the recfn module
@@ -392,10 +469,11 @@ def catg_data_selector(db_array, sel, section_label, yrs):
     if applicable, end use/MEL type, and fuel type.
 
     Args:
-        db_array (numpy.ndarray): An array of commercial building data,
-            including total energy use by end use/fuel type and all
-            MELs types, new and surviving square footage, and other
-            parameters.
+        db_array (numpy.ndarray or grouped_rows.GroupedRows): An array
+            of commercial building data, including total energy use by
+            end use/fuel type and all MELs types, new and surviving
+            square footage, and other parameters, or its rows grouped by
+            label, census division, building type, end use, and fuel type.
         sel (list): A list of integers that specifies the desired
             census division, building type, end use, and fuel type.
         section_label (str): The name of the particular data to be extracted.
@@ -412,17 +490,14 @@ def catg_data_selector(db_array, sel, section_label, yrs):
     # section label, and then filter further based on the specified
     # division, building type, end use, and fuel type - unless the
     # section_label indicates square footage data, which are specified
-    # by only census division and building type
+    # by only census division and building type (grouping the rows of
+    # the data by these codes first, if not already grouped)
+    db_array = grouped_rows.grouped(db_array, catg_keys)
     if 'SurvFloorTotal' in section_label or 'CMNewFloorSpace' in section_label:
-        filtered = db_array[np.all([db_array['Label'] == section_label,
-                                    db_array['Division'] == sel[0],
-                                    db_array['BldgType'] == sel[1]], axis=0)]
+        filtered = db_array.select(section_label, sel[0], sel[1])
     else:
-        filtered = db_array[np.all([db_array['Label'] == section_label,
-                                    db_array['Division'] == sel[0],
-                                    db_array['BldgType'] == sel[1],
-                                    db_array['EndUse'] == sel[2],
-                                    db_array['Fuel'] == sel[3]], axis=0)]
+        filtered = db_array.select(section_label, sel[0], sel[1],
+                                   sel[2], sel[3])
 
     # Adjust years reported based on the pivot year
     filtered['Year'] = filtered['Year'] + UsefulVars().pivot_year
@@ -460,17 +535,20 @@ def data_handler(db_array, sd_array, load_array, key_series, sd_end_uses, yrs):
     TBTU (10^12 BTU) to MMBTU (10^6 BTU.)
 
     Args:
-        db_array (numpy.ndarray): An array of commercial building data,
-            including total energy use by end use/fuel type and all
-            MELs types, new and surviving square footage, and other
-            parameters.
-        sd_array (numpy.ndarray): Service demand data for commercial
-            building equipment, given by technology and performance level.
-        load_array (numpy.ndarray): Thermal load components data
-            (i.e., energy exchange between buildings and their
-            surroundings through walls, foundations, etc.) for
-            commercial buildings, specified by census division,
-            building type, and heating/cooling season.
+        db_array (numpy.ndarray or grouped_rows.GroupedRows): An array
+            of commercial building data, including total energy use by
+            end use/fuel type and all MELs types, new and surviving
+            square footage, and other parameters, or its grouped rows
+            (see catg_data_selector).
+        sd_array (numpy.ndarray or ServiceDemandData): Service demand
+            data for commercial building equipment, given by technology
+            and performance level, or the data grouped by microsegment
+            with parsed technology names.
+        load_array (numpy.ndarray or grouped_rows.GroupedRows): Thermal
+            load components data (i.e., energy exchange between buildings
+            and their surroundings through walls, foundations, etc.) for
+            commercial buildings, specified by census division, building
+            type, and heating/cooling season, or its grouped rows.
         key_series (list): The set of strings that describe the
             current terminal node in the JSON database for which data
             should be generated.
@@ -521,11 +599,8 @@ def data_handler(db_array, sd_array, load_array, key_series, sd_end_uses, yrs):
         # and building type (note that in the case of these thermal
         # load microsegments, the final field in idx_series has the
         # text to select the correct thermal load component column)
-        tl_multiplier = load_array[np.all([
-            load_array['CDIV'] == idx_series[0],
-            load_array['BLDG'] == idx_series[1],
-            load_array['ENDUSE'] == idx_series[2]],
-            axis=0)][idx_series[-1]]
+        tl_multiplier = grouped_rows.grouped(load_array, load_keys).select(
+            idx_series[0], idx_series[1], idx_series[2])[idx_series[-1]]
         # N.B. tl_multiplier is a 1x1 numpy array
 
         # Multiply together the thermal load multiplier and energy use
@@ -619,6 +694,15 @@ def walk(db_array, sd_array, load_array, sd_end_uses, json_db,
     the location of the terminal node and then call the appropriate
     functions to process the imported data. """
 
+    # Group the rows of the input data once (at the top of the dict) by
+    # the codes used in selecting the data for each leaf node, and parse
+    # the service demand technology descriptions, such that the data
+    # for each leaf node are found with lookups
+    db_array = grouped_rows.grouped(db_array, catg_keys)
+    load_array = grouped_rows.grouped(load_array, load_keys)
+    if not isinstance(sd_array, ServiceDemandData):
+        sd_array = ServiceDemandData(sd_array)
+
     # Explore data structure from current level
     for key, item in json_db.items():
 
@@ -730,7 +814,8 @@ def dtype_array(data_file_path, delim_char=',', hl=None):
         return comb_dtypes
 
 
-def data_import(data_file_path, dtype_list, delim_char=',', hl=None, cols=[]):
+def data_import(data_file_path, dtype_list=None, delim_char=',', hl=None,
+                cols=[], cache=True):
     """Import data and convert to a numpy structured array.
 
     Read the contents of a data file with a header line and convert
@@ -739,26 +824,36 @@ def data_import(data_file_path, dtype_list, delim_char=',', hl=None, cols=[]):
     file. If specified, skip lines at the beginning of the file, for the
     case where informational content appears there instead. Also support
     capture of only the specified columns from the original data file.
+    If no dtype definition is provided, it is determined from the header
+    line and the first row of data in the same pass through the file (as
+    in dtype_array for files without lines to skip).
+
+    The file is read only once, with any NULL characters removed as it
+    is read, and the rows of data are converted in chunks (see
+    eia_import.fill_array). The resultant array is cached next to the
+    data file, such that the file is not parsed again until its contents,
+    the import settings, or the import code (this module) change.
 
     Args:
         data_file_path (str): The full path to the data file to be imported.
-        dtype_list (list): A list of tuples with each tuple containing two
-            entries, a column heading string, and a string defining the
-            data type for that column. Formatted as a numpy dtype list.
+        dtype_list (list, optional): A list of tuples with each tuple
+            containing two entries, a column heading string, and a string
+            defining the data type for that column. Formatted as a numpy
+            dtype list.
         delim_char (str, optional): The delimiting character, defaults to ','.
         hl (int, optional): The number of header lines to skip from the
             top of the file before reading data.
         cols (list): A list of numbers representing the indices for the
             positions of the columns retained in the dtype definition
             (and thus the columns to include from each row of the data).
+        cache (bool, optional): Whether to reuse/write the cached array.
 
     Returns:
         A numpy structured array of the imported data file with the
         columns specified by dtype_list.
     """
 
-    # Open the target CSV formatted data file
-    with open(data_file_path) as thefile:
+    def parse():
         # For some cooking equipment descriptions in the service demand
         # data, 11 inches is encoded as 11", which by default leaves
         # the closing double-quote character in the description strings
@@ -766,32 +861,17 @@ def data_import(data_file_path, dtype_list, delim_char=',', hl=None, cols=[]):
         # escape character before the " denoting inches, the text will
         # be handled correctly by csv.reader
         if re.match('.*KSDOUT', re.escape(data_file_path)):
-            cont = thefile.read().replace('11"', '11\\"')
-            thefile = io.StringIO(cont)
+            replace_text = [('11"', '11\\"')]
+        else:
+            replace_text = []
 
-        # This use of csv.reader assumes that the default setting of
-        # quotechar '"' is appropriate; the skipinitialspace option
-        # ensures proper reading of double-quoted text strings in the
-        # AEO data that have the delimiter inside them (e.g., cooking
-        # equipment descriptions); the loop which csv.reader is called
-        # is used to detect NULL characters and act appropriately (by
-        # removing them prior to converting to a csv.reader object)
-        # if they are encountered
-        if '\0' in open(data_file_path).read():  # NULL bytes detected
-            filecont = csv.reader((x.replace('\0', '') for x in thefile),
-                                  delimiter=delim_char, skipinitialspace=True,
-                                  escapechar='\\')
-        else:  # No NULL bytes, proceed normally
-            filecont = csv.reader(thefile,
-                                  delimiter=delim_char, skipinitialspace=True,
-                                  escapechar='\\')
-
-        # Create list to be populated with tuples of each row of data
-        # from the data file
-        data = []
-
-        # Skip first line of the file
-        next(filecont)
+        # Read the lines of the file once, removing any NULL characters
+        # as they are read
+        lines = eia_import.read_lines(data_file_path, replace_text)
+
+        # Read the first line of the file
+        header_names = [entry.strip() for entry in next(csv.reader(
+            [next(lines)], delimiter=delim_char))]
 
         # If a number of header lines to skip (variable 'hl') is
         # specified, skip those lines, plus one to accommodate
@@ -800,39 +880,53 @@ def data_import(data_file_path, dtype_list, delim_char=',', hl=None, cols=[]):
         # target for these lines of code).
         if hl:
             for i in range(0, hl + 1):
-                next(filecont)
+                next(lines)
+
+        # If no dtype definition is provided, use the first row of
+        # data to determine the dtype of each column
+        dtypes = dtype_list
+        lines_read = []
+        if dtypes is None:
+            lines_read.append(next(lines))
+            dtypes = list(zip(header_names, [dtype_eval(col) for col in next(
+                csv.reader(lines_read, delimiter=delim_char))]))
+
+        # Parse the remaining lines of the file; this use of csv.reader
+        # assumes that the default setting of quotechar '"' is
+        # appropriate; the skipinitialspace option ensures proper reading
+        # of double-quoted text strings in the AEO data that have the
+        # delimiter inside them (e.g., cooking equipment descriptions)
+        filecont = csv.reader(
+            itertools.chain(lines_read, lines), delimiter=delim_char,
+            skipinitialspace=True, escapechar='\\')
 
         # Import the data, skipping lines that are not the correct length
-        for row in filecont:
-            if len(tuple(row)) == len(dtype_list):
-                data.append(tuple(row))
-            # If there are specific columns of interest specified, select
-            # only those columns from the row of data and append the result
-            elif cols:
-                shorter = [row[i] for i in cols]
-                data.append(tuple(shorter))
-
-        # Convert data into numpy structured array, using the
-        # try/catch in the case where the data include the string 'NA',
-        # which has to be changed to an 'nan' to be able to be coerced
-        # to a float or integer by np.array
-        try:
-            final_struct = np.array(data, dtype=dtype_list)
-        # Targeted error "ValueError: could not convert string to float: 'NA'"
-        except ValueError:
-            for i, row in enumerate(data):
-                row = list(row)  # Make row mutable
-                for k, entry in enumerate(row):
-                    # Replace 'NA' with 'nan'
-                    if entry == 'NA':
-                        row[k] = 'nan'
-                # Overwrite existing tuple with new tuple
-                data[i] = tuple(row)
-            # With the 'NA' strings replaced, create the numpy array as
-            # originally desired
-            final_struct = np.array(data, dtype=dtype_list)
-
-        return final_struct
+        def rows():
+            for row in filecont:
+                if len(tuple(row)) == len(dtypes):
+                    yield tuple(row)
+                # If there are specific columns of interest specified,
+                # select only those columns from the row of data
+                elif cols:
+                    yield tuple([row[i] for i in cols])
+
+        # In the case where the data include the string 'NA' (targeted
+        # error "ValueError: could not convert string to float: 'NA'"),
+        # change 'NA' to 'nan' to be able to coerce it to a float
+        def fix(chunk, dtypes):
+            chunk = [tuple('nan' if entry == 'NA' else entry
+                           for entry in row) for row in chunk]
+            return chunk, dtypes
+
+        # Convert data into numpy structured array in chunks
+        return eia_import.fill_array(rows(), dtypes, fix)
+
+    if not cache:
+        return parse()
+    return eia_import.cached_import(data_file_path, {
+        'importer': 'com_mseg', 'dtype_list': dtype_list,
+        'delim_char': delim_char, 'hl': hl, 'cols': list(cols)}, parse,
+        [__file__])
 
 
 def str_cleaner(data_array, column_name, return_str_len=False):
@@ -1082,18 +1176,15 @@ def main():
     eiadata = EIAData()
 
     # Import EIA AEO 'KSDOUT' service demand file
-    serv_dtypes = dtype_array(eiadata.serv_dmd)
-    serv_data = data_import(eiadata.serv_dmd, serv_dtypes)
+    serv_data = data_import(eiadata.serv_dmd)
     serv_data = str_cleaner(serv_data, 'Description')
 
     # Import EIA AEO 'KDBOUT' additional data file
-    catg_dtypes = dtype_array(eiadata.catg_dmd)
-    catg_data = data_import(eiadata.catg_dmd, catg_dtypes)
+    catg_data = data_import(eiadata.catg_dmd)
     catg_data = str_cleaner(catg_data, 'Label')
 
     # Import thermal loads data
-    load_dtypes = dtype_array(handyvars.com_tloads, '\t')
-    load_data = data_import(handyvars.com_tloads, load_dtypes, '\t')
+    load_data = data_import(handyvars.com_tloads, None, '\t')
 
     # Import and process onsite generation from KDGENOUT.txt
     onsite_gen = onsite_prep(eiadata.com_generation)
@@ -3,6 +3,7 @@
 # Import commercial microsegments code to use some of its data
 # reading and processing functions
 import com_mseg as cm
+import grouped_rows
 
 import numpy as np
 import numpy.lib.recfunctions as recfn
@@ -105,6 +106,99 @@ class UsefulDicts(object):
             'refrigeration': 'Refrigeration'}
 
 
+# Key columns by which to group the rows of the technology data and the
+# service demand data, in the order in which their codes are given in
+# selecting data (the technology data 'r' column gives the building type
+# for some end uses and the census division for others)
+tech_keys = ['s', 'f', 'r']
+
+
+class TechnologyData(object):
+    """Technology data grouped by microsegment, with parsed names.
+
+    The cost, performance, and lifetime data are reported for several
+    performance levels of each technology, identified only by the text
+    in the 'technology name' column. The generalized technology name of
+    each row is found once here, for all of the data, rather than with
+    regex searches of the rows selected for each microsegment for each
+    technology in the microsegment.
+
+    Attributes:
+        rows (grouped_rows.GroupedRows): Technology data grouped by end
+            use, fuel type, and census division or building type.
+        names (numpy.ndarray): Generalized technology name of each row of
+            the data (None for placeholder rows).
+    """
+
+    def __init__(self, tech_data):
+        self.rows = grouped_rows.GroupedRows(tech_data, tech_keys)
+        # Parse each distinct technology name once
+        parsed = {name: tech_name_key(name) for name in
+                  np.unique(tech_data['technology name']).tolist()}
+        self.names = np.array(
+            [parsed[name] for name in
+             tech_data['technology name'].tolist()], dtype=object)
+
+    def select(self, sel):
+        """Select the technology data for a microsegment.
+
+        Args:
+            sel (list): A list of integers indicating the microsegment.
+
+        Returns:
+            A numpy structured array of the technology data for the
+            microsegment and an array of the generalized technology names
+            of its rows.
+        """
+        # Determine whether the data indicated in the 'r' column
+        # indicates building type or census division based on the end
+        # use indicated (building type for ventilation, lighting, and
+        # refrigeration)
+        if sel[2] in [4, 6, 7]:
+            tmp = sel[1]  # use building type
+        else:
+            tmp = sel[0]  # use census division
+        idx = self.rows.indices(sel[2], sel[3], tmp)
+        return self.rows.data[idx], self.names[idx]
+
+
+def tech_name_key(name):
+    """Find the generalized technology name of a technology data row.
+
+    Args:
+        name (str): Text in the 'technology name' column of a row of the
+            technology data.
+
+    Returns:
+        The technology name without scenario-specific text like '2020
+        high' or '2009 installed base' (and, for linear fluorescent
+        lighting, without modifier text), or None for placeholder rows.
+    """
+
+    # Identify the technology name using a regex set up to match any
+    # text '.+?' that appears before the first occurrence of a space
+    # followed by a 2 and three other numbers (e.g., 2009 or 2035)
+    tech_name = re.search(r'.+?(?=\s2[0-9]{3})', name)
+
+    # If the regex matched, check the matching text to see if it
+    # corresponds to a linear fluorescent lighting technology
+    # represented in the format 'T# F##', e.g., 'T8 F96'; if it does,
+    # return just the 'T# F##' string without any additional modifier
+    # text (e.g., 'T8 F96 High Output'); if not, return the text that
+    # matched originally
+    if tech_name:
+        lfl_tech_name = re.search('^(T[0-9] F[0-9]{2})',
+                                  tech_name.group(0))
+        if lfl_tech_name:
+            return lfl_tech_name.group(0)
+        return tech_name.group(0)
+    # Else, if the technology name is not from a placeholder row,
+    # return the entire name text
+    elif not re.search('placeholder', name):
+        return name
+    return None
+
+
 def units_id(sel, flag):
     """Provides a units text string for a specified microsegment.
 
@@ -156,21 +250,14 @@ def tech_data_selector(tech_data, sel):
     indices generated from the text indices at the leaf nodes of the
     input microsegments JSON. Each group of data extracted by this
     function will correspond to multiple technologies and performance
-    levels and will require further processing. """
-
-    # Determine whether the data indicated in the 'r' column indicates
-    # building type or census division based on the end use indicated
-    # (building type for ventilation, lighting, and refrigeration)
-    if sel[2] in [4, 6, 7]:
-        tmp = sel[1]  # use building type
-    else:
-        tmp = sel[0]  # use census division
+    levels and will require further processing. The technology data
+    can also be given grouped by microsegment (see TechnologyData). """
 
     # Filter technology data based on the specified census
     # division or building type, end use, and fuel type
-    filtered = tech_data[np.all([tech_data['r'] == tmp,
-                                 tech_data['s'] == sel[2],
-                                 tech_data['f'] == sel[3]], axis=0)]
+    if not isinstance(tech_data, TechnologyData):
+        tech_data = TechnologyData(tech_data)
+    filtered, _ = tech_data.select(sel)
 
     return filtered
 
@@ -184,14 +271,14 @@ def sd_data_selector(sd_data, sel, years):
     summed across the three specified markets (column named 'd'), with
     rows for each technology and performance level combination and
     columns for each year, and 2) a list of technology names for
-    each row of the service demand numpy array (the other output). """
+    each row of the service demand numpy array (the other output).
+    The service demand data can also be given with their rows grouped
+    by census division, building type, end use, and fuel type. """
 
     # Filter service demand data based on the specified census
     # division, building type, end use, and fuel type
-    filtered = sd_data[np.all([sd_data['r'] == sel[0],
-                               sd_data['b'] == sel[1],
-                               sd_data['s'] == sel[2],
-                               sd_data['f'] == sel[3]], axis=0)]
+    filtered = grouped_rows.grouped(sd_data, cm.sd_keys).select(
+        sel[0], sel[1], sel[2], sel[3])
 
     # Identify each technology and performance level using the text
     # in the description field since the technology type and vintage
@@ -223,7 +310,7 @@ def sd_data_selector(sd_data, sel, years):
     return sd, technames
 
 
-def single_tech_selector(tech_array, specific_name):
+def single_tech_selector(tech_array, specific_name, tech_names=None):
     """Extracts a single technology from tech data for an entire microsegment.
 
     Each microsegment is comprised of multiple technologies. Cost,
@@ -239,6 +326,8 @@ def single_tech_selector(tech_array, specific_name):
             performance scenarios for each technology applicable to
             that microsegment.
         specific_name (type): The name of the technology to be extracted.
+        tech_names (numpy.ndarray): Generalized technology name of each
+            row of tech_array (see tech_name_key), if already found.
 
     Returns:
         A numpy structured array with the same columns as other tech
@@ -246,50 +335,17 @@ def single_tech_selector(tech_array, specific_name):
         indicated by specific_name.
     """
 
-    # Initialize a list of rows to remove from the numpy array
-    # that do not correspond to the specified technology
-    rows_to_remove = []
-
-    for idx, row in enumerate(tech_array):
-        # Identify the technology name from the 'technology name' column
-        # in the data using a regex set up to match any text '.+?' that
-        # appears before the first occurrence of a space followed by a
-        # 2 and three other numbers (i.e., 2009 or 2035)
-        tech_name = re.search(r'.+?(?=\s2[0-9]{3})', row['technology name'])
-
-        # If the technology name regex returned a match, check if there
-        # is a match for a linear fluorescent lighting technology; in
-        # either case (either the linear fluorescent or the more
-        # generic technology name regex), if the match is not the same
-        # as the name passed to the function, remove the row
-        if tech_name:
-            # Test whether the technology name corresponds to a linear
-            # fluorescent lighting technology in the format 'T# F##',
-            # e.g., 'T8 F96', and if it does, extract just that string
-            # without any additional text (e.g., 'T8 F96 High Output')
-            lfl_tech_name = re.search('^(T[0-9] F[0-9]{2})',
-                                      tech_name.group(0))
-            if lfl_tech_name:
-                if lfl_tech_name.group(0) != specific_name:
-                    rows_to_remove.append(idx)
-            elif tech_name.group(0) != specific_name:
-                rows_to_remove.append(idx)
-        # If there's no match, the technology might not have a year
-        # included as part of its name, but it nonetheless should be
-        # checked to see if it matches the name passed to the function
-        # and removed if there is not a match
-        elif row['technology name'] != specific_name:
-            rows_to_remove.append(idx)
-        # Else check to see if the description indicates a placeholder
-        # row, which should be deleted before the technologies are
-        # summarized and returned from this function
-        elif re.search('placeholder', row['technology name']):
-            rows_to_remove.append(idx)
-        # Implicitly, if the text does not match any regex, it is
-        # assumed that it does not need to be edited or removed
-
-    # Delete the placeholder rows
-    result = np.delete(tech_array, rows_to_remove, 0)
+    # Find the generalized technology name of each row, which excludes
+    # scenario-specific text (and is None for placeholder rows), if not
+    # already found
+    if tech_names is None:
+        tech_names = np.array([tech_name_key(name) for name in
+                               tech_array['technology name'].tolist()],
+                              dtype=object)
+
+    # Keep only the rows whose generalized name matches the specified
+    # technology
+    result = tech_array[tech_names == specific_name]
 
     return result
 
@@ -547,7 +603,7 @@ def life_extractor(single_tech_array, years):
     return final_dict
 
 
-def tech_names_extractor(tech_array):
+def tech_names_extractor(tech_array, tech_names=None):
     """Creates a list of unique technology "names" for a microsegment.
 
     Text strings are used to identify which cost, performance, and
@@ -561,6 +617,8 @@ def tech_names_extractor(tech_array):
             performance, and lifetime data for (typically multiple)
             performance scenarios for each technology applicable to
             that microsegment.
+        tech_names (numpy.ndarray): Generalized technology name of each
+            row of tech_array (see tech_name_key), if already found.
 
     Returns:
         A list of strings, where each string represents a technology
@@ -568,39 +626,15 @@ def tech_names_extractor(tech_array):
         details like "2020 high" or "2009 installed base".
     """
 
-    # Create empty list to be populated with technology names
-    technames = []
-
-    for row in tech_array:
-        # Identify the technology name from the 'technology name' column
-        # in the data using a regex set up to match any text '.+?' that
-        # appears before the first occurrence of a space followed by a
-        # 2 and three other numbers (e.g., 2009 or 2035)
-        tech_name = re.search(r'.+?(?=\s2[0-9]{3})', row['technology name'])
-
-        # If the regex matched, check the matching text to see if it
-        # corresponds to a linear fluorescent lighting technology
-        # represented in the format 'T# F##', e.g., 'T8 F96'; if it does,
-        # extract from the match just the 'T# F##' string without any
-        # additional modifier text (e.g., 'T8 F96 High Output'); if not,
-        # add the text that matched originally, which describes the
-        # technology without scenario-specific text like '2003 installed
-        # base' to the technames list
-        if tech_name:
-            lfl_tech_name = re.search('^(T[0-9] F[0-9]{2})',
-                                      tech_name.group(0))
-            if lfl_tech_name:
-                technames.append(lfl_tech_name.group(0))
-            else:
-                technames.append(tech_name.group(0))
-        # Else, if the technology name is not from a placeholder row,
-        # add the entire name text to the technames list
-        else:
-            if not re.search('placeholder', row['technology name']):
-                technames.append(row['technology name'])
+    # Find the generalized technology name of each row, if not
+    # already found
+    if tech_names is None:
+        tech_names = [tech_name_key(name) for name in
+                      tech_array['technology name'].tolist()]
 
-    # Reduce the list to only the unique entries
-    technames = list(np.unique(technames))
+    # Reduce the names to only the unique entries, excluding placeholder
+    # rows
+    technames = list(np.unique([x for x in tech_names if x is not None]))
 
     return technames
 
@@ -703,11 +737,14 @@ def mseg_technology_handler(
     electronics, and "other").
 
     Args:
-        tech_data (numpy.ndarray): Imported EIA technology characteristics
-            data, with multiple efficiency levels for each technology,
-            including technology cost, performance, and service lifetime.
-        sd_data (numpy.ndarray): Imported EIA service demand data specified
-            over the same efficiency levels for each technology.
+        tech_data (numpy.ndarray or TechnologyData): Imported EIA
+            technology characteristics data, with multiple efficiency
+            levels for each technology, including technology cost,
+            performance, and service lifetime, or the data grouped by
+            microsegment with parsed technology names.
+        sd_data (numpy.ndarray or grouped_rows.GroupedRows): Imported EIA
+            service demand data specified over the same efficiency levels
+            for each technology, or its rows grouped by microsegment.
         tpp_data (numpy.ndarray): A numpy structured array of the
             EIA commercial market time preference premium data.
         sf_data (numpy.ndarray): Imported EIA data including square
@@ -733,7 +770,11 @@ def mseg_technology_handler(
 
     # From the imported EIA data, extract the technology and service
     # demand data for the microsegment identified by 'sel'
-    filtered_tech_data = tech_data_selector(tech_data, sel)
+    # (grouping the technology data by microsegment and parsing their
+    # technology names first, if not already done, e.g., by walk)
+    if not isinstance(tech_data, TechnologyData):
+        tech_data = TechnologyData(tech_data)
+    filtered_tech_data, filtered_tech_names = tech_data.select(sel)
     (filtered_sd_data, sd_names_list) = sd_data_selector(sd_data, sel, years)
 
     # Use the 'units_id' function to extract the performance units for
@@ -744,7 +785,8 @@ def mseg_technology_handler(
 
     # Identify the names (as strings) of all of the technologies
     # included in this microsegment
-    tech_names_list = tech_names_extractor(filtered_tech_data)
+    tech_names_list = tech_names_extractor(
+        filtered_tech_data, filtered_tech_names)
 
     # Preallocate a list of non-matching technology names for this microsegment
     mseg_non_matching_names = []
@@ -756,7 +798,8 @@ def mseg_technology_handler(
     for tech in tech_names_list:
         # Extract the cost, performance, and lifetime data specific
         # to a single technology, given by 'tech'
-        single_tech_data = single_tech_selector(filtered_tech_data, tech)
+        single_tech_data = single_tech_selector(
+            filtered_tech_data, tech, filtered_tech_names)
 
         # Extract the cost data in a dict format with 'typical' and
         # 'best' cost cases
@@ -847,11 +890,13 @@ def walk(tech_data, serv_data, tpp_data, db_data, years, json_db, eu_map,
     that function and calling json_interpreter within the function.
 
     Args:
-        tech_data (numpy.ndarray): A numpy structured array of the
-            EIA technology data, including the cost, performance,
-            and lifetime of individual technologies.
-        serv_data (numpy.ndarray): A numpy structured array of the
-            EIA service demand data.
+        tech_data (numpy.ndarray or TechnologyData): A numpy structured
+            array of the EIA technology data, including the cost,
+            performance, and lifetime of individual technologies, or the
+            data grouped by microsegment with parsed technology names.
+        serv_data (numpy.ndarray or grouped_rows.GroupedRows): A numpy
+            structured array of the EIA service demand data, or its rows
+            grouped by microsegment.
         tpp_data (numpy.ndarray): A numpy structured array of the
             EIA commercial market time preference premium data.
         db_data (numpy.ndarray): An array of commercial building data,
@@ -875,6 +920,13 @@ def walk(tech_data, serv_data, tpp_data, db_data, years, json_db, eu_map,
         and a list of all technology names that did not find a match.
     """
 
+    # Group the technology and service demand data once (at the top of
+    # the dict) by microsegment and parse the technology names, such
+    # that the data for each leaf node are found with lookups
+    if not isinstance(tech_data, TechnologyData):
+        tech_data = TechnologyData(tech_data)
+    serv_data = grouped_rows.grouped(serv_data, cm.sd_keys)
+
     # Explore data structure from current level
     for key, item in json_db.items():
 
@@ -1074,13 +1126,11 @@ def main():
     tech_data = cm.str_cleaner(tech_data, 'technology name')
 
     # Import EIA AEO 'KSDOUT' service demand data
-    serv_dtypes = cm.dtype_array(cm.EIAData().serv_dmd)
-    serv_data = cm.data_import(cm.EIAData().serv_dmd, serv_dtypes)
+    serv_data = cm.data_import(cm.EIAData().serv_dmd)
     serv_data, tval = cm.str_cleaner(serv_data, 'Description', True)
 
     # Import EIA AEO 'KDBOUT' additional data file
-    catg_dtypes = cm.dtype_array(cm.EIAData().catg_dmd)
-    catg_data = cm.data_import(cm.EIAData().catg_dmd, catg_dtypes)
+    catg_data = cm.data_import(cm.EIAData().catg_dmd)
     catg_data = cm.str_cleaner(catg_data, 'Label')
 
     # Import EIA AEO 'kprem' time preference premium data
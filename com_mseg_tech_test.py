@@ -3970,6 +3970,32 @@ class TechnologyNameListExtractorTest(CommonUnitTest):
                 self.tech_names[idx])
 
 
+class TechnologyDataGroupingTest(CommonUnitTest):
+    """ Test that technology data grouped by microsegment with parsed
+    technology names (as done once in walk) yield the same technology
+    data, names, and single technology data for each microsegment """
+
+    def test_grouped_technology_data(self):
+        tech_data = cmt.TechnologyData(self.tech_data)
+        for idx, sel in enumerate(self.data_to_select):
+            tech_array, tech_names = tech_data.select(sel)
+            np.testing.assert_array_equal(tech_array,
+                                          self.selected_tech_data[idx])
+            names = cmt.tech_names_extractor(tech_array, tech_names)
+            self.assertCountEqual(names, self.tech_names[idx])
+            for name in names:
+                np.testing.assert_array_equal(
+                    cmt.single_tech_selector(tech_array, name, tech_names),
+                    cmt.single_tech_selector(tech_array, name))
+
+    def test_technology_name_parsing(self):
+        self.assertEqual(cmt.tech_name_key('rooftop_AC 2003 installed base'),
+                         'rooftop_AC')
+        self.assertEqual(cmt.tech_name_key('T8 F96 High Output 2020 high'),
+                         'T8 F96')
+        self.assertIsNone(cmt.tech_name_key('placeholder'))
+
+
 class TechnologyDataHandlerTest(CommonUnitTest):
     """ Test the combined performance of several functions within a
     single overarching function that produces a formatted dict of
@@ -12,6 +12,9 @@ import itertools
 import os
 import csv
 import re
+import tempfile
+from unittest import mock
+import eia_import
 
 
 # Skip this test if the EIA files are not expected, indicated by the
@@ -192,6 +195,84 @@ class StructuredArrayStringProcessingTest(unittest.TestCase):
             self.string_format3_clean)
 
 
+class DataImportTest(unittest.TestCase):
+    """ Test that the single-pass import of KSDOUT- and KDBOUT-like data
+    files yields the arrays produced by the previous import, which
+    determined the dtype in a separate pass (dtype_array) and converted
+    all rows of the file at once """
+
+    # Define sample KSDOUT rows, including a description with the
+    # delimiter and an 11" dimension inside double quotes, an 'NA'
+    # value (after the first chunk of rows), a NULL character, and a
+    # trailing informational line
+    ksd_text = (
+        'r,b,s,f,d,t,v,Description,Eff,2010,2011\n'
+        '1,1,1,1,1,1,1, electric_res-heater 2003 installed base,'
+        '1.0,2.5,2.6\n'
+        '1,2,7,2,1,2,1, "Range, 4 burner, Oven, 11" griddle",0.4,NA,1.1\n'
+        '2,1,1,1\0,1,1,2, comm_GSHP-heat 2010 typical,3.2,0.7,0.8\n'
+        'Service demand in trillion Btu\n')
+
+    # Define the array yielded by the previous import of the KSDOUT rows
+    ksd_array = np.array([
+        (1, 1, 1, 1, 1, 1, 1, 'electric_res-heater 2003 installed base',
+         1.0, 2.5, 2.6),
+        (1, 2, 7, 2, 1, 2, 1, 'Range, 4 burner, Oven, 11" griddle',
+         0.4, np.nan, 1.1),
+        (2, 1, 1, 1, 1, 1, 2, 'comm_GSHP-heat 2010 typical',
+         3.2, 0.7, 0.8)],
+        dtype=[('r', '<i4'), ('b', '<i4'), ('s', '<i4'), ('f', '<i4'),
+               ('d', '<i4'), ('t', '<i4'), ('v', '<i4'),
+               ('Description', '<U50'), ('Eff', '<f8'), ('2010', '<f8'),
+               ('2011', '<f8')])
+
+    # Define sample KDBOUT rows, including an 'NA' value, a NULL
+    # character, and a trailing informational line
+    kdb_text = (
+        'Division,BldgType,EndUse,Fuel,Year,Amount,Label\n'
+        '1,1,1,1,21,1.5,EndUseConsump\n'
+        '1,1,1,1\0,22,NA,EndUseConsump\n'
+        '2,3,7,2,21,0.2,SurfaceArea\n'
+        'Trillion Btu\n')
+
+    # Define the array yielded by the previous import of the KDBOUT rows
+    kdb_array = np.array([
+        (1, 1, 1, 1, 21, 1.5, 'EndUseConsump'),
+        (1, 1, 1, 1, 22, np.nan, 'EndUseConsump'),
+        (2, 3, 7, 2, 21, 0.2, 'SurfaceArea')],
+        dtype=[('Division', '<i4'), ('BldgType', '<i4'), ('EndUse', '<i4'),
+               ('Fuel', '<i4'), ('Year', '<i4'), ('Amount', '<f8'),
+               ('Label', '<U50')])
+
+    def setUp(self):
+        # Write the sample rows to temporary data files
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.files = {}
+        for name, text in [('KSDOUT.txt', self.ksd_text),
+                           ('KDBOUT.txt', self.kdb_text)]:
+            self.files[name] = os.path.join(self.tmp_dir.name, name)
+            with open(self.files[name], 'w') as fh:
+                fh.write(text)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    # Test import with the dtype determined in the same pass and with
+    # the dtype determined by dtype_array, converting two rows at a time
+    def test_data_import(self):
+        with mock.patch.object(eia_import, 'CHUNK_ROWS', 2):
+            for name, expected in [('KSDOUT.txt', self.ksd_array),
+                                   ('KDBOUT.txt', self.kdb_array)]:
+                for dtype_list in [None, cm.dtype_array(self.files[name])]:
+                    imported = cm.data_import(
+                        self.files[name], dtype_list, cache=False)
+                    # Compare by column, such that 'nan' values match
+                    self.assertEqual(imported.dtype, expected.dtype)
+                    for col in expected.dtype.names:
+                        np.testing.assert_array_equal(
+                            imported[col], expected[col])
+
+
 class CommonUnitTest(unittest.TestCase):
     """ For simplicity and completeness in testing all possible cases
     for the subsequent tests, set up a common unittest.TestCase subclass
@@ -916,6 +997,28 @@ class PercentageCalculationTest(CommonUnitTest):
         self.assertEqual(self.f, self.technames[2])
         self.assertEqual(self.h, self.technames[3])
 
+    # Test that service demand data grouped by microsegment with parsed
+    # technology names (as done once in walk) yield the same output
+    def test_service_demand_data_grouped(self):
+        sd_data = cm.ServiceDemandData(self.sample_sd_array)
+        for idx, sel in enumerate(self.selections):
+            (_, pct, names) = cm.sd_mseg_percent(sd_data, sel, self.years)
+            self.assertEqual(names, self.technames[idx])
+            if idx < len(self.sd_percentages):
+                np.testing.assert_allclose(
+                    pct, self.sd_percentages[idx], atol=1e-5)
+
+    # Test generalized technology names parsed from the descriptions
+    def test_service_demand_tech_names(self):
+        self.assertEqual(cm.sd_tech_name('rooftop_AC 2003 installed base'),
+                         'rooftop_AC')
+        self.assertEqual(cm.sd_tech_name('T8 F32 Commodity 20'),
+                         'T8 F32 Commodity')
+        self.assertEqual(cm.sd_tech_name('placeholder'), '')
+        self.assertEqual(cm.sd_tech_name(''), '')
+        self.assertEqual(cm.sd_tech_name('wood stove'), 'wood stove')
+        self.assertEqual(cm.lfl_tech_name('T8 F32 Commodity'), 'T8 F32')
+
     # Test energy percentage contribution calculation (correcting for
     # potential floating point precision problems)
     def test_service_demand_percentage_conversion(self):
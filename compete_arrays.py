@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+
+""" Flat-array storage of measure competition data.
+
+Measure competition data (the 'mseg_adjust' markets information written out
+for each measure by ecm_prep.py) are nested dicts whose leaves are mostly
+dicts of float values by year, one such leaf for each stock, energy, carbon,
+and cost variable of each contributing microsegment key chain. Pickling
+these data in full means run.py must unpickle every year value for every
+measure and then deep copy the whole tree to separate the data that will be
+adjusted by the measure competition from the data that will not.
+
+This module instead writes the year values of each such leaf as a row in a
+single 2-D array per measure (saved as a .npy file), alongside a gzipped
+pickle of the remaining structure of the data in which each leaf is replaced
+by its row number. Loading the data memory-maps the array and represents each
+leaf as a read-only view of its row, and a copy-on-write layer over the
+loaded data copies only those branches of the data (e.g., the data for each
+contributing microsegment key chain) that are read by the competition, as
+plain dicts that are then read and changed at the speed of any other dict.
+"""
+
+import gzip
+import pickle
+import numpy
+from os import path, replace
+from collections.abc import Mapping, MutableMapping
+
+
+def rows_path(comp_file):
+    """Set the path to the array of year values for a competition data file.
+
+    Args:
+        comp_file (str): Path to the gzipped competition data file for a
+            measure (e.g., '<measure name>.pkl.gz').
+
+    Returns:
+        Path to the .npy file with the year values of the measure's data.
+    """
+    return path.splitext(path.splitext(comp_file)[0])[0] + ".npy"
+
+
+def write_compete_data(comp_data, comp_file, years):
+    """Write measure competition data to an index and an array of rows.
+
+    Note:
+        The array of rows is written first, such that an interrupted write
+        leaves the index of the previous version of the data (if any) with
+        no rows to point to rather than pointing to the wrong rows.
+
+    Args:
+        comp_data (dict): Competition data for a measure, by adoption scheme.
+        comp_file (str): Path to the gzipped competition data file to write.
+        years (list): Years that key the dicts of values to store as rows.
+    """
+    # Replace all dicts of float values by year with row markers, collecting
+    # the values of these dicts as rows along the way
+    years, rows = list(years), []
+    tree = index_rows(comp_data, years, rows)
+    rows_file = rows_path(comp_file)
+    with open(rows_file + ".tmp", "wb") as npo:
+        numpy.save(npo, numpy.array(rows, dtype=float).reshape(
+            len(rows), len(years)))
+    replace(rows_file + ".tmp", rows_file)
+    with gzip.open(comp_file + ".tmp", 'w') as zp:
+        pickle.dump(CompeteIndex(years, len(rows), tree), zp, -1)
+    replace(comp_file + ".tmp", comp_file)
+
+
+def index_rows(data, years, rows):
+    """Replace dicts of float values by year with markers for array rows.
+
+    Args:
+        data: Competition data (or a branch/leaf of these data).
+        years (list): Years that key the dicts of values to store as rows.
+        rows (list): Rows of year values recorded so far (updated in place).
+
+    Returns:
+        Copy of the input data with each dict of float values by year
+        replaced by a marker of its position in the rows list.
+    """
+    if not isinstance(data, Mapping):
+        return data
+    # Only dicts with exactly the expected years, in order, and Python float
+    # values are stored as rows; any other values (e.g., integers or
+    # arrays of sampled values) are pickled as is, such that the values
+    # read back in are unchanged in type
+    elif len(data) == len(years) and list(data.keys()) == years and all([
+            type(x) is float for x in data.values()]):
+        rows.append(list(data.values()))
+        return YearRow(len(rows) - 1)
+    else:
+        return {k: index_rows(v, years, rows) for k, v in data.items()}
+
+
+def load_compete_data(comp_file):
+    """Load measure competition data, memory-mapping rows of year values.
+
+    Args:
+        comp_file (str): Path to the gzipped competition data file.
+
+    Returns:
+        Competition data for a measure, by adoption scheme. Data that were
+        written with a flat array of rows have their year values represented
+        by read-only views of the (memory-mapped) rows; data that were
+        pickled in full are returned as is.
+    """
+    with gzip.open(comp_file, 'r') as zp:
+        comp_data = pickle.load(zp)
+    if isinstance(comp_data, CompeteIndex):
+        comp_data = comp_data.expand(rows_path(comp_file))
+
+    return comp_data
+
+
+def to_dict(data):
+    """Convert competition data views (if any) to plain, independent dicts.
+
+    Args:
+        data: Competition data (or a branch/leaf of these data).
+
+    Returns:
+        Copy of the data with all views replaced by dicts.
+    """
+    # Read all year values of a row at once
+    if isinstance(data, YearRowVals):
+        return dict(zip(data.col_map, data.rows[data.row].tolist()))
+    elif isinstance(data, Mapping):
+        return {k: to_dict(v) for k, v in data.items()}
+    elif isinstance(data, (list, numpy.ndarray)):
+        return data.copy()
+    else:
+        return data
+
+
+class YearRow(object):
+    """Marker for a dict of values by year that is stored as an array row.
+
+    Attributes:
+        row (int): Position of the row in the array of year values.
+    """
+
+    __slots__ = ("row",)
+
+    def __init__(self, row):
+        self.row = row
+
+    def __reduce__(self):
+        return (YearRow, (self.row,))
+
+
+class CompeteIndex(object):
+    """Structure of measure competition data, pointing to rows of values.
+
+    Attributes:
+        years (list): Years that key the dicts of values stored as rows.
+        n_rows (int): Number of rows of year values.
+        tree (dict): Competition data, with YearRow markers in place of the
+            dicts of values by year that are stored as rows.
+    """
+
+    def __init__(self, years, n_rows, tree):
+        self.years = years
+        self.n_rows = n_rows
+        self.tree = tree
+
+    def expand(self, rows_file):
+        """Replace row markers with read-only views of the array rows.
+
+        Args:
+            rows_file (str): Path to the .npy file with the year values.
+
+        Returns:
+            Competition data with views of the year values in place of the
+            row markers.
+        """
+        # Empty arrays cannot be memory-mapped
+        if self.n_rows == 0:
+            rows = numpy.zeros((0, len(self.years)))
+        else:
+            rows = numpy.load(rows_file, mmap_mode="r")
+        if rows.shape != (self.n_rows, len(self.years)):
+            raise ValueError(
+                "Year values in '" + rows_file + "' do not match the "
+                "competition data index (expected " + str(self.n_rows) +
+                " rows of " + str(len(self.years)) + " years)")
+        col_map = {yr: n for n, yr in enumerate(self.years)}
+
+        def walk(data):
+            if isinstance(data, YearRow):
+                return YearRowVals(rows, data.row, col_map)
+            elif isinstance(data, dict):
+                return {k: walk(v) for k, v in data.items()}
+            else:
+                return data
+
+        return walk(self.tree)
+
+
+class YearRowVals(Mapping):
+    """Read-only dict-like view of a row of values by year.
+
+    Attributes:
+        rows (numpy.ndarray): Array of year values (typically memory-mapped).
+        row (int): Position of the row in the array.
+        col_map (dict): Column of each year in the array.
+    """
+
+    __slots__ = ("rows", "row", "col_map")
+
+    def __init__(self, rows, row, col_map):
+        self.rows = rows
+        self.row = row
+        self.col_map = col_map
+
+    def __getitem__(self, yr):
+        # Return Python floats, as were stored
+        return self.rows.item(self.row, self.col_map[yr])
+
+    def __iter__(self):
+        return iter(self.col_map)
+
+    def __len__(self):
+        return len(self.col_map)
+
+    def __contains__(self, yr):
+        return yr in self.col_map
+
+    def __copy__(self):
+        return dict(self.items())
+
+    def __deepcopy__(self, memo):
+        return dict(self.items())
+
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
+
+
+class CompetedLayer(MutableMapping):
+    """Copy-on-write layer over (a branch of) measure competition data.
+
+    Note:
+        Values read from the layer are drawn from the underlying data until
+        they are set through the layer, after which the values set are
+        read instead; the underlying data are never changed. Branches of the
+        underlying data are wrapped in their own layers when first read, down
+        to the number of levels given by 'depth'; branches below these levels
+        and dicts of values by year (rows) are instead copied in full to plain
+        dicts when first read, such that repeated reads of their values are
+        plain dict reads. Mutable leaf values (lists or arrays) are copied
+        when first read, such that in-place changes to these values also
+        leave the underlying data unchanged.
+
+    Attributes:
+        base (dict): Underlying (uncompeted) data.
+        over (dict): Branch layers, branch copies, and values set through
+            the layer.
+        dropped (set): Keys of the underlying data deleted through the layer.
+        depth (int): Levels of branches below the layer that are wrapped in
+            layers of their own (None for all levels).
+    """
+
+    __slots__ = ("base", "over", "dropped", "depth")
+
+    def __init__(self, base, depth=None):
+        self.base = base
+        self.over = {}
+        self.dropped = set()
+        self.depth = depth
+
+    def __getitem__(self, key):
+        if key in self.over:
+            return self.over[key]
+        elif key in self.dropped:
+            raise KeyError(key)
+        val = self.base[key]
+        if isinstance(val, YearRowVals) or (
+                isinstance(val, Mapping) and self.depth == 0):
+            val = to_dict(val)
+        elif isinstance(val, Mapping):
+            val = CompetedLayer(
+                val, None if self.depth is None else self.depth - 1)
+        elif isinstance(val, (list, numpy.ndarray)):
+            val = val.copy()
+        else:
+            # Immutable values are read through from the underlying data
+            return val
+        self.over[key] = val
+        return val
+
+    def __setitem__(self, key, val):
+        self.over[key] = val
+        self.dropped.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.over.pop(key, None)
+        if key in self.base:
+            self.dropped.add(key)
+
+    def __iter__(self):
+        for key in self.base:
+            if key not in self.dropped:
+                yield key
+        for key in self.over:
+            if key not in self.base:
+                yield key
+
+    def __len__(self):
+        return sum(1 for key in self)
+
+    def __contains__(self, key):
+        return key in self.over or (
+            key not in self.dropped and key in self.base)
+
+    def __copy__(self):
+        return to_dict(self)
+
+    def __deepcopy__(self, memo):
+        return to_dict(self)
+
+    def __reduce__(self):
+        return (dict, (to_dict(self),))
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+""" Tests for flat-array storage of measure competition data """
+
+# Import code to be tested
+import compete_arrays
+
+# Import needed packages
+import unittest
+import tempfile
+import gzip
+import pickle
+import copy
+import numpy
+from os import path
+
+
+class CompeteArraysTest(unittest.TestCase):
+    """Test writing, loading, and competing measure competition data.
+
+    Attributes:
+        tmp_dir (object): Temporary folder for competition data.
+        comp_file (str): Path to the competition data file for a measure.
+        years (list): Years that key the dicts of values stored as rows.
+        comp_data (dict): Sample competition data, keyed by adoption scheme.
+    """
+
+    def setUp(self):
+        """Set sample competition data and a file to write them to."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.comp_file = path.join(
+            self.tmp_dir.name, "Sample Measure v1.0.pkl.gz")
+        self.years = ["2020", "2021"]
+        key = str(("primary", "AIA_CZ1", "single family home",
+                   "electricity", "heating", "supply", "ASHP", "new"))
+        self.comp_data = {
+            "Technical potential": {
+                "contributing mseg keys and values": {
+                    key: {
+                        "stock": {
+                            "total": {
+                                "all": {"2020": 10.0, "2021": 11.0},
+                                "measure": {"2020": 1.0, "2021": 2.0}}},
+                        "energy": {
+                            "total": {
+                                "baseline": {"2020": 5.5, "2021": 6.5},
+                                "efficient": {
+                                    "2020": numpy.array([4.0, 4.5]),
+                                    "2021": numpy.array([5.0, 5.5])}}},
+                        "lifetime": {
+                            "baseline": {"2020": 15, "2021": 15},
+                            "measure": 20},
+                        "sub-market scaling": 1}},
+                "competed choice parameters": {},
+                "secondary mseg adjustments": {
+                    "market share": {
+                        "original energy (total captured)": {}}}}}
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        """Test that loaded data match the data written, values and types."""
+        compete_arrays.write_compete_data(
+            self.comp_data, self.comp_file, self.years)
+        self.assertTrue(path.isfile(compete_arrays.rows_path(self.comp_file)))
+        comp_data = compete_arrays.load_compete_data(self.comp_file)
+        msu = comp_data["Technical potential"][
+            "contributing mseg keys and values"]
+        msu_in = self.comp_data["Technical potential"][
+            "contributing mseg keys and values"]
+        for key in msu_in.keys():
+            # Float year values are read from array rows
+            self.assertIsInstance(
+                msu[key]["stock"]["total"]["all"],
+                compete_arrays.YearRowVals)
+            self.assertEqual(msu[key]["stock"], msu_in[key]["stock"])
+            self.assertIs(type(msu[key]["stock"]["total"]["all"]["2021"]),
+                          float)
+            # Integer and array year values are kept as is
+            self.assertIs(type(msu[key]["lifetime"]["baseline"]["2020"]), int)
+            numpy.testing.assert_array_equal(
+                msu[key]["energy"]["total"]["efficient"]["2021"],
+                msu_in[key]["energy"]["total"]["efficient"]["2021"])
+            self.assertEqual(msu[key]["sub-market scaling"], 1)
+        self.assertEqual(compete_arrays.to_dict(
+            comp_data["Technical potential"]["secondary mseg adjustments"]),
+            self.comp_data["Technical potential"][
+                "secondary mseg adjustments"])
+
+    def test_competed_layer(self):
+        """Test that changes to the competed layer leave base data as is."""
+        compete_arrays.write_compete_data(
+            self.comp_data, self.comp_file, self.years)
+        uncompeted = compete_arrays.load_compete_data(
+            self.comp_file)["Technical potential"]
+        competed = compete_arrays.CompetedLayer(uncompeted)
+        key = list(uncompeted["contributing mseg keys and values"].keys())[0]
+        adj = competed["contributing mseg keys and values"][key]
+        adj["stock"]["total"]["all"]["2021"] = 3.0
+        adj["energy"]["total"]["efficient"]["2020"] *= 2
+        adj["competed share"] = {"2020": 0.5, "2021": 0.5}
+        del adj["sub-market scaling"]
+        # Competed data reflect the changes
+        self.assertEqual(adj["stock"]["total"]["all"],
+                         {"2020": 10.0, "2021": 3.0})
+        numpy.testing.assert_array_equal(
+            adj["energy"]["total"]["efficient"]["2020"], [8.0, 9.0])
+        self.assertIn("competed share", adj)
+        self.assertNotIn("sub-market scaling", adj)
+        # Uncompeted data do not
+        base = uncompeted["contributing mseg keys and values"][key]
+        self.assertEqual(base["stock"]["total"]["all"]["2021"], 11.0)
+        numpy.testing.assert_array_equal(
+            base["energy"]["total"]["efficient"]["2020"], [4.0, 4.5])
+        self.assertNotIn("competed share", base)
+        self.assertIn("sub-market scaling", base)
+        # Copies of the competed data are plain dicts
+        self.assertIsInstance(copy.deepcopy(adj)["stock"]["total"]["all"],
+                              dict)
+
+    def test_competed_layer_depth(self):
+        """Test that branches below the layer depth are copied as dicts."""
+        compete_arrays.write_compete_data(
+            self.comp_data, self.comp_file, self.years)
+        uncompeted = compete_arrays.load_compete_data(
+            self.comp_file)["Technical potential"]
+        key = list(uncompeted["contributing mseg keys and values"].keys())[0]
+        # Rows of year values are copied to dicts at any depth
+        competed = compete_arrays.CompetedLayer(uncompeted)
+        adj = competed["contributing mseg keys and values"][key]
+        self.assertIsInstance(adj, compete_arrays.CompetedLayer)
+        self.assertIs(type(adj["stock"]["total"]["all"]), dict)
+        # Key chain data are copied to plain dicts in full when first read
+        competed = compete_arrays.CompetedLayer(uncompeted, depth=1)
+        self.assertIsInstance(competed["contributing mseg keys and values"],
+                              compete_arrays.CompetedLayer)
+        adj = competed["contributing mseg keys and values"][key]
+        self.assertIs(type(adj), dict)
+        self.assertIs(type(adj["stock"]["total"]["all"]), dict)
+        adj["stock"]["total"]["all"]["2021"] = 3.0
+        adj["energy"]["total"]["efficient"]["2020"] *= 2
+        self.assertIs(competed["contributing mseg keys and values"][key], adj)
+        # Uncompeted data are unchanged
+        base = uncompeted["contributing mseg keys and values"][key]
+        self.assertEqual(base["stock"]["total"]["all"]["2021"], 11.0)
+        numpy.testing.assert_array_equal(
+            base["energy"]["total"]["efficient"]["2020"], [4.0, 4.5])
+
+    def test_pickled_data(self):
+        """Test that data pickled in full are loaded as is."""
+        with gzip.open(self.comp_file, 'w') as zp:
+            pickle.dump(self.comp_data, zp, -1)
+        comp_data = compete_arrays.load_compete_data(self.comp_file)
+        self.assertIs(type(comp_data["Technical potential"][
+            "contributing mseg keys and values"]), dict)
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
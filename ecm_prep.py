@@ -4,7 +4,8 @@ import re
 import itertools
 import json
 from collections import OrderedDict
-from os import listdir, getcwd, stat, path
+from collections.abc import Mapping
+from os import listdir, getcwd, stat, path, makedirs, replace, remove
 from os.path import isfile, join
 import copy
 import warnings
@@ -14,9 +15,22 @@ import pickle
 from functools import reduce  # forward compatibility for Python 3
 import operator
 from argparse import ArgumentParser
-from ast import literal_eval
+import multiprocessing
+import hashlib
+import sys
+from array import array
+import mseg_shards
+import compete_arrays
+import key_chains
+import summary_store
+import sector_shapes
+import stock_turnover
 # from datetime import datetime
 
+# Input data made available to worker processes in parallel measure
+# preparation (see 'prepare_measures')
+prep_shared_data = None
+
 
 class MyEncoder(json.JSONEncoder):
     """Convert numpy arrays to list for JSON serializing."""
@@ -26,6 +40,9 @@ class MyEncoder(json.JSONEncoder):
         # Case where object to be serialized is numpy array
         if isinstance(obj, numpy.ndarray):
             return obj.tolist()
+        # Case where object to be serialized is array-backed baseline data
+        elif isinstance(obj, MsegYearVals):
+            return dict(obj.items())
         # All other cases
         else:
             return super(MyEncoder, self).default(obj)
@@ -51,11 +68,14 @@ class UsefulInputFiles(object):
             analysis engine.
         ecm_prep_env_cf (tuple): Prepared envelope/HVAC package measure
             attributes data with effects of HVAC removed (isolate envelope).
-        ecm_prep_shapes (tuple): Prepared measure sector shapes data.
+        ecm_prep_shapes (tuple): Prepared measure sector shapes data (index
+            of the binary shapes files in the folder of the same name).
         ecm_prep_env_cf_shapes (tuple): Prepared envelope/HVAC package measure
             sector shapes data with effects of HVAC removed (isolate envelope).
         ecm_compete_data (tuple): Folder with contributing microsegment data
             needed to run measure competition in the analysis engine.
+        ecm_prep_cache (tuple): Folder with previously prepared measure data,
+            keyed by the inputs used to prepare each measure.
         ecm_eff_fs_splt_data (tuple): Folder with data needed to determine the
             fuel splits of efficient case results for fuel switching measures.
         run_setup (str): Names of active measures that should be run in
@@ -194,6 +214,7 @@ class UsefulInputFiles(object):
         self.ecm_prep_env_cf_shapes = (
             "supporting_data", "ecm_prep_env_cf_shapes.json")
         self.ecm_compete_data = ("supporting_data", "ecm_competition_data")
+        self.ecm_prep_cache = ("supporting_data", "ecm_prep_cache")
         self.ecm_eff_fs_splt_data = ("supporting_data", "eff_fs_splt_data")
         self.run_setup = "run_setup.json"
         self.cpi_data = ("supporting_data", "convert_data", "cpi.csv")
@@ -284,6 +305,8 @@ class UsefulVars(object):
         discount_rate (float): Rate to use in discounting costs/savings.
         nsamples (int): Number of samples to draw from probability distribution
             on measure inputs.
+        trn_batch (int): Number of microsegments whose stock turnover is
+            found in one batch when preparing a measure's markets.
         regions (string): User region settings.
         aeo_years (list): Modeling time horizon.
         aeo_years_summary (list): Reduced set of snapshot years in the horizon.
@@ -318,6 +341,8 @@ class UsefulVars(object):
             non-electric fuels (for heating, cooling, WH, and cooking).
         out_break_in (OrderedDict): Breaks out key measure results by
             climate zone, building sector, and end use.
+        key_chains (object): Table of parsed contributing microsegment key
+            chains.
         cconv_topkeys_map (dict): Maps measure cost units to top-level keys in
             an input cost conversion data dict.
         tech_units_rmv (list): Flags baseline performance units that cannot
@@ -350,6 +375,7 @@ class UsefulVars(object):
         tsv_metrics_data (str): Includes information on max/min net system load
             hours, peak/take net system load windows, and peak days by EMM
             region/season, as well as days of year to attribute to each season.
+        tsv_hour_index (dict): Day of year and hour of day for each hour.
         tsv_hourly_price (dict): Dict for storing hourly price factors.
         tsv_hourly_emissions (dict): Dict for storing hourly emissions factors.
         tsv_hourly_lafs (dict): Dict for storing annual energy, cost, and
@@ -373,6 +399,7 @@ class UsefulVars(object):
             self.adopt_schemes = opts.adopt_scn_restrict
         self.discount_rate = 0.07
         self.nsamples = 100
+        self.trn_batch = 250
         self.regions = opts.alt_regions
         # Load metadata including AEO year range
         with open(path.join(base_dir, handyfiles.metadata), 'r') as aeo_yrs:
@@ -1184,6 +1211,9 @@ class UsefulVars(object):
                 elif elem not in current_level:
                     current_level[elem] = OrderedDict()
                 current_level = current_level[elem]
+        # Table of parsed contributing microsegment key chains, used in
+        # merging measures into packages
+        self.key_chains = key_chains.KeyChainTable()
         self.cconv_bybldg_units = [
             "$/ft^2 glazing", "$/ft^2 roof", "$/ft^2 wall",
             "$/ft^2 footprint", "$/ft^2 floor", "$/occupant", "$/node"]
@@ -1464,14 +1494,18 @@ class UsefulVars(object):
                             "6A": 10,
                             "6B": 17,
                             "7": 31}
-                    },
-                    "hourly index": list(enumerate(
-                        itertools.product(range(365), range(24))))
+                    }
                 }
             else:
                 self.tsv_metrics_data = None
                 self.emm_name_num_map = {
                     name: (ind + 1) for ind, name in enumerate(valid_regions)}
+            # Day of year and hour of day (both indexed from zero) for each
+            # of the 8760 hours of the year, used to select the hours that
+            # time-sensitive features and metrics apply to
+            self.tsv_hour_index = {
+                "day": numpy.repeat(numpy.arange(365), 24),
+                "hour": numpy.tile(numpy.arange(24), 365)}
             self.tsv_hourly_price, self.tsv_hourly_emissions = ({
                 reg: None for reg in valid_regions
             } for n in range(2))
@@ -1887,6 +1921,856 @@ class EPlusGlobals(object):
         return eplus_vintage_weights
 
 
+class MsegYearBlock(object):
+    """Class of year-keyed baseline data values with a shared set of years.
+
+    Attributes:
+        years (tuple): Year keys shared by all rows of the block.
+        cols (dict): Column of the block data for each year key.
+        rows (array): Flat buffer of row values accumulated while the
+            baseline data are read in (None once the block is frozen).
+        data (numpy.ndarray): Block data (rows = year-keyed leaves of the
+            baseline data, columns = years).
+        col_map (dict): Columns for previously requested sets of years.
+    """
+
+    def __init__(self, years):
+        self.years = years
+        self.cols = {yr: ind for ind, yr in enumerate(years)}
+        self.rows = array("d")
+        self.data = None
+        self.col_map = {}
+
+    def add_row(self, vals):
+        """Add a row of year values to the block.
+
+        Args:
+            vals (iterable): Values for each of the block's year keys.
+
+        Returns:
+            Row number of the added values.
+        """
+        self.rows.extend(vals)
+        return (len(self.rows) // len(self.years)) - 1
+
+    def freeze(self):
+        """Move accumulated row values into the block data array."""
+        if self.rows is not None:
+            self.data = numpy.frombuffer(self.rows, dtype=float).reshape(
+                -1, len(self.years))
+            self.rows = None
+
+    def find_cols(self, years):
+        """Find the block data columns for a given set of years.
+
+        Args:
+            years (list): Year keys to find columns for.
+
+        Returns:
+            Array of block data columns in the order of the given years.
+        """
+        years = tuple(years)
+        try:
+            return self.col_map[years]
+        except KeyError:
+            self.col_map[years] = numpy.array(
+                [self.cols[yr] for yr in years], dtype=int)
+            return self.col_map[years]
+
+
+class MsegYearVals(Mapping):
+    """Read-only view of a single year-keyed leaf of the baseline data.
+
+    Note:
+        Behaves as the {year: value} dict it replaces, but values are held
+        in a row of a shared 2D array (see 'MsegStore'); copies and
+        serialized forms of the view are plain dicts.
+
+    Attributes:
+        block (object): Block of year-keyed values the leaf belongs to.
+        row (int): Row of the block data that holds the leaf values.
+    """
+
+    __slots__ = ("block", "row")
+
+    def __init__(self, block, row):
+        self.block = block
+        self.row = row
+
+    def __getitem__(self, yr):
+        return self.block.data.item(self.row, self.block.cols[yr])
+
+    def __iter__(self):
+        return iter(self.block.years)
+
+    def __len__(self):
+        return len(self.block.years)
+
+    def __contains__(self, yr):
+        return yr in self.block.cols
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def __copy__(self):
+        return dict(self.items())
+
+    def __deepcopy__(self, memo):
+        return dict(self.items())
+
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
+
+    def vec(self, years):
+        """Find the leaf values for a given set of years as a vector.
+
+        Args:
+            years (list): Year keys to find values for.
+
+        Returns:
+            Array of leaf values in the order of the given years.
+        """
+        return self.block.data[self.row, self.block.find_cols(years)]
+
+
+class MsegStore(object):
+    """Class of compact, array-backed baseline microsegment data.
+
+    Note:
+        Baseline stock/energy and cost/performance/lifetime data are read in
+        with each terminal {year: value} dict replaced by a view onto a row of
+        a 2D array that is shared by all leaves with the same year keys; the
+        nested dict levels above the leaves are retained and serve as the key
+        chain index into these rows. Vector versions of the year-keyed data
+        are then drawn directly from the arrays (see 'yr_vec'). The baseline
+        stock, energy, and carbon totals of each key chain remain vectors
+        through the stock turnover and partitioning of the microsegment; the
+        partitioned results are converted to year-keyed dicts once, as they
+        are added to the measure's markets (which remain year-keyed dicts).
+
+    Attributes:
+        blocks (dict): Blocks of year-keyed values, keyed by year keys.
+    """
+
+    def __init__(self):
+        self.blocks = {}
+
+    def year_vals_hook(self, obj):
+        """Convert terminal year-keyed dicts read from JSON to array views.
+
+        Note:
+            Used as the 'object_hook' argument to json.load(s), such that
+            leaves are moved into the arrays as the baseline data are read.
+
+        Args:
+            obj (dict): Dict decoded from JSON.
+
+        Returns:
+            View onto the array-backed dict values if dict keys are all years
+            and values are all numeric; otherwise, the original dict.
+        """
+        if obj and all((len(k) == 4 and k.isdigit()) for k in obj.keys()) \
+                and all(type(v) in [int, float] for v in obj.values()):
+            years = tuple(obj.keys())
+            try:
+                block = self.blocks[years]
+            except KeyError:
+                block = self.blocks[years] = MsegYearBlock(years)
+            return MsegYearVals(block, block.add_row(obj.values()))
+        else:
+            return obj
+
+    def freeze(self):
+        """Finalize all block data arrays once baseline data are read in."""
+        for block in self.blocks.values():
+            block.freeze()
+
+    @staticmethod
+    def loads(text):
+        """Read JSON baseline data into a store of their own.
+
+        Args:
+            text (str): JSON text of baseline data.
+
+        Returns:
+            Baseline data with year-keyed leaves backed by arrays.
+        """
+        store = MsegStore()
+        data = json.loads(text, object_hook=store.year_vals_hook)
+        store.freeze()
+        return data
+
+    @staticmethod
+    def yr_vec(vals, years):
+        """Find year-keyed values as a vector over a given set of years.
+
+        Args:
+            vals (dict): Year-keyed values (dict or array-backed view), or
+                values already found as a vector over the given years.
+            years (list): Year keys to find values for.
+
+        Returns:
+            Array of values in the order of the given years.
+
+        Raises:
+            ValueError: If values are not all scalars (e.g., sampled values).
+        """
+        if isinstance(vals, MsegYearVals):
+            return vals.vec(years)
+        elif isinstance(vals, numpy.ndarray):
+            return vals
+        vec = numpy.array([vals[yr] for yr in years], dtype=float)
+        if vec.ndim != 1:
+            raise ValueError("Year-keyed values are not all scalars")
+        return vec
+
+    @staticmethod
+    def yr_dict(vec, years):
+        """Convert a vector of values back to a year-keyed dict.
+
+        Args:
+            vec (numpy.ndarray): Values in the order of the given years.
+            years (list): Year keys for the values.
+
+        Returns:
+            Dict of values keyed by year.
+        """
+        return dict(zip(years, vec.tolist()))
+
+
+class BaselineMsegCache(object):
+    """Class of measure-independent baseline microsegment results.
+
+    Note:
+        Many measures draw on the same baseline microsegment key chains
+        (e.g., measure variants at different performance levels, or copies
+        of measures with public health costs or typical efficiency levels);
+        the baseline data found for a key chain, the new/existing stock
+        split for its region, building type, and structure type, and its
+        baseline stock, energy, and carbon totals do not depend on the
+        measure and are found once per preparation run (and per worker
+        process) rather than once per measure.
+
+    Attributes:
+        data (dict): Previously found results, keyed by the type of result,
+            the key chain, and any options that bear on the result.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, calc, *args):
+        """Find a cached result, calculating and caching it if new.
+
+        Note:
+            Cached results are shared across measures and must not be
+            modified by the caller.
+
+        Args:
+            key (tuple): Type of result, key chain, and relevant options.
+            calc (function): Function that calculates the result.
+            args: Arguments to the function that calculates the result.
+
+        Returns:
+            Cached result.
+        """
+        try:
+            return self.data[key]
+        except KeyError:
+            val = self.data[key] = calc(*args)
+            return val
+
+    @staticmethod
+    def find_base(mskeys, msegs, msegs_cpl, region_cpl_mapping):
+        """Find the baseline data for a microsegment key chain.
+
+        Args:
+            mskeys (tuple): Microsegment key chain.
+            msegs (dict): Baseline microsegment stock and energy use.
+            msegs_cpl (dict): Baseline technology cost, performance, and
+                lifetime.
+            region_cpl_mapping (dict): Census divisions and the states in
+                each, where cost/performance/lifetime data are broken out by
+                census division but stock/energy data are broken out by
+                state (otherwise empty).
+
+        Returns:
+            Baseline cost/performance/lifetime, stock/energy, and floor area
+            data for the key chain, and the number of key chain levels that
+            match the baseline data (stock/energy data are empty if the key
+            chain does not match the data in full).
+
+        Raises:
+            ValueError: If the state of the key chain does not map to a
+                single census division.
+        """
+        base_cpl, mseg, mseg_sqft_stock = msegs_cpl, msegs, msegs
+        # In cases where baseline cost/performance/lifetime data and/or
+        # baseline stock/energy market size data are formatted as nested
+        # dicts, loop recursively through dict levels until appropriate
+        # terminal value is reached
+        for i in range(0, len(mskeys)):
+            # For use of state regions, cost/performance/lifetime data
+            # are broken out by census division; map the state of the
+            # current microsegment to the census division it belongs to,
+            # to enable retrieval of the cost/performance/lifetime data
+            if (i == 1) and region_cpl_mapping:
+                mskeys_cpl_map = [
+                    x[0] for x in region_cpl_mapping.items() if
+                    mskeys[1] in x[1]][0]
+                # Mapping should yield single string for census division
+                if not isinstance(mskeys_cpl_map, str):
+                    raise ValueError("State " + mskeys[1] +
+                                     " could not be mapped to a census "
+                                     "division for the purpose of "
+                                     "retrieving baseline cost, "
+                                     "performance, and lifetime data")
+            else:
+                mskeys_cpl_map = ''
+
+            # Check whether baseline microsegment cost/performance/lifetime
+            # data are in dict format and current key is in dict keys; if
+            # so, proceed further with the recursive loop. * Note: dict key
+            # hierarchies and syntax are assumed to be consistent across
+            # all measure and baseline cost/performance/lifetime and
+            # stock/energy market data, with the exception of state data,
+            # where cost/performance/lifetime data are broken out by
+            # census divisions and must be mapped to the state breakouts
+            # used in the stock_energy market data
+            if (isinstance(base_cpl, dict) and (
+                (mskeys[i] in base_cpl.keys()) or (
+                 mskeys_cpl_map and mskeys_cpl_map in base_cpl.keys())) or
+                mskeys[i] in [
+                    "primary", "secondary", "new", "existing", None]):
+                # Skip over "primary", "secondary", "new", and "existing"
+                # keys in updating baseline stock/energy, cost and lifetime
+                # information (this information is not broken out by these
+                # categories)
+                if mskeys[i] not in [
+                        "primary", "secondary", "new", "existing", None]:
+
+                    # Restrict base cost/performance/lifetime dict to key
+                    # chain info.
+                    if mskeys_cpl_map:
+                        base_cpl = base_cpl[mskeys_cpl_map]
+                    else:
+                        base_cpl = base_cpl[mskeys[i]]
+
+                    # Restrict stock/energy dict to key chain info.
+                    mseg = mseg[mskeys[i]]
+
+                    # Restrict ft^2 floor area dict to key chain info.
+                    if i < 3:  # Note: ft^2 floor area broken out 2 levels
+                        mseg_sqft_stock = mseg_sqft_stock[mskeys[i]]
+            # If no key match, stop the loop
+            else:
+                if mskeys[i] is not None:
+                    mseg = {}
+                return base_cpl, mseg, mseg_sqft_stock, i
+
+        return base_cpl, mseg, mseg_sqft_stock, len(mskeys)
+
+    @staticmethod
+    def find_new_frac(mskeys, bldg_sect, mseg_sqft_stock, years):
+        """Find the new or existing fraction of the stock by year.
+
+        Args:
+            mskeys (tuple): Microsegment key chain.
+            bldg_sect (str): Building sector of the key chain.
+            mseg_sqft_stock (dict): Baseline floor area and number of
+                buildings data for the key chain's region and building type.
+            years (list): Modeling time horizon.
+
+        Returns:
+            New building construction data and the fraction of the stock
+            (by year) in the key chain's structure type.
+        """
+        new_constr = {"annual new": {}, "total new": {},
+                      "total": {}, "new fraction": {}}
+        # Update new building construction information
+        for yr in years:
+            # Find new and total buildings (residential) or square footage
+            # (commercial) for current year
+            if bldg_sect == "residential":
+                new_constr["annual new"][yr] = \
+                    mseg_sqft_stock["new homes"][yr]
+                new_constr["total"][yr] = \
+                    mseg_sqft_stock["total homes"][yr]
+            else:
+                new_constr["annual new"][yr] = \
+                    mseg_sqft_stock["new square footage"][yr]
+                new_constr["total"][yr] = \
+                    mseg_sqft_stock["total square footage"][yr]
+
+        # Find fraction of total new buildings in each year.
+        # Note: in each year, this fraction is calculated by summing
+        # the annual new building/floor space figures for all
+        # preceding years
+        for yr in years:
+            # Find cumulative total of new building/floor space stock
+            if yr == years[0]:
+                new_constr["total new"][yr] = \
+                    new_constr["annual new"][yr]
+            else:
+                # Handle case where data for previous year are
+                # unavailable; set to current year's data
+                try:
+                    new_constr["total new"][yr] = \
+                        new_constr["annual new"][yr] + \
+                        new_constr["total new"][str(int(yr) - 1)]
+                except KeyError:
+                    new_constr["total new"][yr] = \
+                        new_constr["annual new"][yr]
+            # Calculate new vs. existing fraction of stock
+            if new_constr["total new"][yr] <= new_constr["total"][yr]:
+                new_constr["new fraction"][yr] = \
+                    new_constr["total new"][yr] / \
+                    new_constr["total"][yr]
+            else:
+                new_constr["new fraction"][yr] = 1
+
+        # Determine the fraction to use in scaling down the stock,
+        # energy, and carbon microsegments to the applicable structure
+        # type indicated in the microsegment key chain (e.g., new
+        # structures or existing structures)
+        if mskeys[-1] == "new":
+            new_existing_frac = {key: val for key, val in
+                                 new_constr["new fraction"].items()}
+        else:
+            new_existing_frac = {key: (1 - val) for key, val in
+                                 new_constr["new fraction"].items()}
+
+        return new_constr, new_existing_frac
+
+    @staticmethod
+    def find_totals(mskeys, bldg_sect, sqft_subst, mseg, mseg_sqft_stock,
+                    sf_to_house, new_existing_frac, site_source_conv_base,
+                    intensity_carb_base, years):
+        """Find the baseline stock, energy, and carbon totals by year.
+
+        Args:
+            mskeys (tuple): Microsegment key chain.
+            bldg_sect (str): Building sector of the key chain.
+            sqft_subst (int): Flag for use of ft^2 floor area as stock.
+            mseg (dict): Baseline stock/energy data for the key chain.
+            mseg_sqft_stock (dict): Baseline floor area and number of
+                buildings data for the key chain's region and building type.
+            sf_to_house (dict): Conversion from ft^2 floor area to number of
+                homes by year, or None if no conversion applies.
+            new_existing_frac (dict): New or existing fraction of the stock
+                by year.
+            site_source_conv_base (dict): Baseline site-source energy
+                conversion factors by year.
+            intensity_carb_base (dict): Baseline carbon intensities by year.
+            years (list): Modeling time horizon.
+
+        Returns:
+            Vectors of baseline stock (None for secondary microsegments),
+            energy, and carbon totals over the modeling time horizon.
+        """
+        yr_vec = MsegStore.yr_vec
+        # New/existing stock fraction, by year
+        new_existing_vec = yr_vec(new_existing_frac, years)
+
+        # Total stock
+        if mskeys[0] == 'secondary':
+            add_stock_vec = None
+        elif sqft_subst == 1:  # Use ft^2 floor area in lieu of # units
+            # For residential envelope microsegments, stock is
+            # converted to a per house (per "unit") basis to facilitate
+            # comparison and packaging with res. equipment measures
+            add_stock_vec = yr_vec(mseg_sqft_stock[
+                "total square footage"], years) * new_existing_vec * 1000000
+            if sf_to_house is not None:
+                add_stock_vec = add_stock_vec * yr_vec(sf_to_house, years)
+        else:
+            add_stock_vec = yr_vec(mseg["stock"], years) * new_existing_vec
+
+        # If the baseline technology is a heat pump in the residential
+        # sector, account for the fact that EIA divides all heat pump
+        # stocks by 2 when separately considered across the heating
+        # and cooling services; note that per unit stock costs for
+        # these technologies are treated in the same way by EIA and
+        # were also multiplied by 2 above
+        if bldg_sect == "residential" and (
+                mskeys[-2] is not None and "HP" in mskeys[-2]):
+            if add_stock_vec is None:
+                add_stock_vec = numpy.zeros(len(years))
+            add_stock_vec = add_stock_vec * 2
+
+        # Total energy use
+        add_energy_vec = yr_vec(mseg["energy"], years) * yr_vec(
+            site_source_conv_base, years) * new_existing_vec
+        # Total carbon emissions
+        add_carb_vec = add_energy_vec * yr_vec(intensity_carb_base, years)
+
+        return add_stock_vec, add_energy_vec, add_carb_vec
+
+
+class TSVArrayData(object):
+    """Class of hourly time-sensitive data held in a memory-mapped array.
+
+    Note:
+        Time-sensitive load, price, and emissions data are distributed as
+        gzipped JSON, where each 8760 hourly shape is a list of values; the
+        data are converted once to a 2D array file (rows = hourly shapes,
+        columns = hours of the year) and a JSON index that keeps the original
+        dict structure with each hourly shape replaced by its array row. Once
+        converted, the data are loaded by memory-mapping the array file, such
+        that hourly shapes are only read from disk as they are used.
+
+    Attributes:
+        gz_file (string): Path to the gzipped JSON time-sensitive data.
+        index_file (string): Path to the JSON index of the array data.
+        array_file (string): Path to the array data (.npy).
+    """
+
+    def __init__(self, gz_file):
+        self.gz_file = gz_file
+        self.index_file = path.splitext(gz_file)[0] + "_index.json"
+        self.array_file = path.splitext(gz_file)[0] + "_hourly.npy"
+
+    def converted(self):
+        """Check whether up-to-date converted data are available.
+
+        Returns:
+            True if index and array files exist and are no older than the
+            gzipped JSON data; otherwise False.
+        """
+        return all([isfile(x) and stat(x).st_mtime >= stat(
+            self.gz_file).st_mtime for x in [
+            self.index_file, self.array_file]])
+
+    def convert(self):
+        """Convert gzipped JSON data to array and index files."""
+        with gzip.GzipFile(self.gz_file, 'r') as zip_ref:
+            data = json.loads(zip_ref.read().decode('utf-8'))
+        # Hourly shapes to write to the array file, in row order
+        shapes = []
+
+        def index_shapes(obj):
+            # Replace each hourly shape with its row in the array file
+            if isinstance(obj, dict):
+                return {k: index_shapes(v) for k, v in obj.items()}
+            elif isinstance(obj, list) and len(obj) == 8760 and all(
+                    type(x) in [int, float] for x in obj):
+                shapes.append(obj)
+                return {"hourly row": len(shapes) - 1}
+            else:
+                return obj
+        index = index_shapes(data)
+        # Write array and index to temporary files that replace any previous
+        # files once complete, such that partially written data are not used
+        arr = numpy.lib.format.open_memmap(
+            self.array_file + ".tmp", mode="w+", dtype=float,
+            shape=(len(shapes), 8760))
+        for row, shape in enumerate(shapes):
+            arr[row] = shape
+        arr.flush()
+        del arr
+        with open(self.index_file + ".tmp", "w") as jso:
+            json.dump(index, jso)
+        replace(self.array_file + ".tmp", self.array_file)
+        replace(self.index_file + ".tmp", self.index_file)
+
+    def load(self):
+        """Load time-sensitive data, converting them first if needed.
+
+        Returns:
+            Time-sensitive data in the structure of the original JSON, with
+            each hourly shape a row of the memory-mapped array data.
+        """
+        if not self.converted():
+            self.convert()
+        arr = numpy.load(self.array_file, mmap_mode="r")
+        with open(self.index_file, 'r') as jsi:
+            return json.load(jsi, object_hook=lambda x: arr[x["hourly row"]]
+                             if list(x.keys()) == ["hourly row"] else x)
+
+
+class MeasurePrepCache(object):
+    """Class of prepared measure data keyed by the inputs used to prepare it.
+
+    Note:
+        Prepared measure markets are stored under a hash of the measure
+        definition, the user options that bear on results, and digests of
+        each input file the measure draws on and of the local modules used
+        to prepare it (EMM/state baseline data shards are represented by the
+        digests of their contents); a prepared measure is thus only reused
+        when none of these have changed since it was prepared.
+
+    Attributes:
+        base_dir (string): Base directory.
+        handyfiles (object): Input files of use across Measure methods.
+        cache_dir (string): Folder with the prepared measure data files.
+        index (dict): For each measure name, the key and input file digests
+            of the data last used for the measure in 'ecm_prep.json'.
+        file_digests (dict): Digests of input files already read in the run.
+        opts_excl (list): User options with no bearing on prepared results.
+        modules (dict): Paths to the local modules used in preparing
+            measures (those loaded from files under the base directory),
+            keyed by module file path relative to the base directory.
+    """
+
+    def __init__(self, base_dir, handyfiles):
+        self.base_dir = base_dir
+        self.handyfiles = handyfiles
+        self.cache_dir = path.join(base_dir, *handyfiles.ecm_prep_cache)
+        # Import index of cached data last used for each measure (if file
+        # does not exist, provide empty dict as substitute)
+        try:
+            with open(path.join(
+                    self.cache_dir, "index.json"), 'r') as ci:
+                self.index = json.load(ci)
+        except (FileNotFoundError, ValueError):
+            self.index = {}
+        self.file_digests = {}
+        self.opts_excl = ["verbose", "workers", "compact_json"]
+        # Changes to the code of this module or the local modules it
+        # imports (directly or through other local modules) bear on results;
+        # local modules are all loaded modules with source files under the
+        # base directory (excluding any installed packages found there)
+        base_dir_full = path.join(path.abspath(base_dir), "")
+        self.modules = {}
+        for mod in list(sys.modules.values()):
+            mod_file = getattr(mod, "__file__", None)
+            if mod_file is None or not mod_file.endswith(".py"):
+                continue
+            mod_file = path.abspath(mod_file)
+            if mod_file.startswith(base_dir_full) and not any([
+                    x in mod_file for x in ["site-packages", "dist-packages"]]):
+                self.modules[path.relpath(mod_file, base_dir_full)] = mod_file
+
+    def find_inputs(self, meas_dict, opts):
+        """Find the input files that bear on a measure's prepared data.
+
+        Args:
+            meas_dict (dict): Measure definition.
+            opts (object): Stores user-specified execution options.
+
+        Returns:
+            Sorted list of paths to the input files used in preparing the
+            measure, including this module and the local modules it uses.
+        """
+        hf = self.handyfiles
+        # Input files used in preparing all measures
+        inputs = [
+            hf.msegs_in, hf.msegs_cpl_in, hf.metadata, hf.cost_convert_in,
+            hf.cap_facts, hf.cbecs_sf_byvint, hf.cpi_data, hf.ss_data,
+            hf.hp_convert_rates, hf.iecc_reg_map]
+        # Input files that are specific to the user's option settings
+        inputs.extend([getattr(hf, x) for x in [
+            "ss_data_nonfs", "ss_data_altreg", "ss_data_altreg_nonfs",
+            "ash_emm_map", "aia_altreg_map"] if
+            getattr(hf, x, None) is not None])
+        if opts.health_costs is not False:
+            inputs.append(hf.health_data)
+        if opts.tsv_metrics is not False:
+            inputs.extend([
+                hf.tsv_metrics_data_tot_ref, hf.tsv_metrics_data_net_ref,
+                hf.tsv_metrics_data_tot_hr, hf.tsv_metrics_data_net_hr])
+        # Time sensitive valuation data (read in for EMM regions only)
+        tsv_feat = meas_dict.get("tsv_features", None)
+        if opts.alt_regions == "EMM" and (
+                tsv_feat is not None or opts.tsv_metrics is not False or
+                opts.sect_shapes is True):
+            # TSV data are stored in zipped files
+            inputs.extend([
+                path.splitext(path.join(*x))[0] + '.gz' for x in [
+                    hf.tsv_load_data, hf.tsv_cost_data, hf.tsv_carbon_data,
+                    hf.tsv_cost_data_nonfs, hf.tsv_carbon_data_nonfs] if
+                x is not None])
+        # Custom savings shape data for the measure
+        if isinstance(tsv_feat, dict) and "shape" in tsv_feat.keys() and \
+                isinstance(tsv_feat["shape"], dict) and \
+                "custom_annual_savings" in tsv_feat["shape"].keys():
+            inputs.append(hf.tsv_shape_data + (
+                tsv_feat["shape"]["custom_annual_savings"],))
+        # Ensure all paths are strings relative to the base directory
+        inputs = [path.join(*x) if isinstance(x, tuple) else x
+                  for x in inputs]
+        # EMM/state baseline data are read from shards (see 'mseg_shards'),
+        # which are represented by their manifest
+        if opts.alt_regions in ['EMM', 'State']:
+            inputs.append(mseg_shards.manifest_path(path.join(
+                *hf.msegs_in)))
+        # Changes to the preparation routine itself also bear on results
+        inputs.extend(self.modules.keys())
+
+        return sorted(set(inputs))
+
+    def find_digests(self, meas_dict, opts):
+        """Find digests of the input files that bear on a measure.
+
+        Args:
+            meas_dict (dict): Measure definition.
+            opts (object): Stores user-specified execution options.
+
+        Returns:
+            Dict of input file digests, keyed by input file path.
+        """
+        digests = {}
+        for fp in self.find_inputs(meas_dict, opts):
+            # Hash each input file only once per run
+            if fp not in self.file_digests.keys():
+                # Represent EMM/state baseline data shards by the digests of
+                # their contents recorded in the shard manifest (rather than
+                # by the manifest file, which need not change with the data)
+                if fp == mseg_shards.manifest_path(path.join(
+                        *self.handyfiles.msegs_in)):
+                    self.file_digests[fp] = mseg_shards.shards_digest(
+                        path.join(self.base_dir, *self.handyfiles.msegs_in))
+                else:
+                    self.file_digests[fp] = self.file_digest(fp)
+            digests[fp] = self.file_digests[fp]
+
+        return digests
+
+    def file_digest(self, fp):
+        """Find the digest of an input file or module.
+
+        Args:
+            fp (string): Path to the input file or module (relative to the
+                base directory).
+
+        Returns:
+            Hexadecimal SHA-256 hash of the file contents, or None if the
+            file is missing (missing files are flagged by the routines that
+            read them).
+        """
+        # Read modules from their own locations
+        if fp in self.modules.keys():
+            fp_full = self.modules[fp]
+        else:
+            fp_full = path.join(self.base_dir, fp)
+        file_hash = hashlib.sha256()
+        try:
+            with open(fp_full, 'rb') as fh:
+                for chunk in iter(lambda: fh.read(1 << 20), b""):
+                    file_hash.update(chunk)
+        except FileNotFoundError:
+            return None
+
+        return file_hash.hexdigest()
+
+    def find_key(self, meas_dict, opts, pkg_ctrb=False):
+        """Find the key to store a measure's prepared data under.
+
+        Args:
+            meas_dict (dict): Measure definition.
+            opts (object): Stores user-specified execution options.
+            pkg_ctrb (boolean): Flag for measures that contribute to a
+                package being prepared in the current run.
+
+        Returns:
+            Hexadecimal hash of the measure definition, relevant user
+            options, and input file digests.
+        """
+        key_data = {
+            "definition": meas_dict,
+            "options": {k: v for k, v in vars(opts).items() if
+                        k not in self.opts_excl},
+            "inputs": self.find_digests(meas_dict, opts),
+            "package contributor": pkg_ctrb}
+
+        return hashlib.sha256(json.dumps(
+            key_data, sort_keys=True, cls=MyEncoder).encode(
+            'utf-8')).hexdigest()
+
+    def inputs_changed(self, meas_dict, opts):
+        """Check whether a measure's input files changed since it was prepared.
+
+        Args:
+            meas_dict (dict): Measure definition.
+            opts (object): Stores user-specified execution options.
+
+        Returns:
+            True if the measure's input files differ from those its most
+            recently prepared data reflect (or these are unknown).
+        """
+        return meas_dict["name"] not in self.index.keys() or \
+            self.index[meas_dict["name"]]["inputs"] != self.find_digests(
+                meas_dict, opts)
+
+    def load(self, m, key):
+        """Restore a measure's prepared markets from the cache.
+
+        Args:
+            m (object): Measure object that has not yet been prepared.
+            key (string): Key the measure's prepared data are stored under.
+
+        Returns:
+            True if prepared data were found and restored, False otherwise.
+        """
+        try:
+            with gzip.open(path.join(
+                    self.cache_dir, key + ".pkl.gz"), 'r') as zp:
+                meas_state = pickle.load(zp)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return False
+        # Restore all measure attributes set during preparation
+        m.__dict__.update(meas_state)
+
+        return True
+
+    def save(self, m, key):
+        """Store a measure's prepared markets in the cache.
+
+        Args:
+            m (object): Measure object with prepared markets.
+            key (string): Key to store the measure's prepared data under.
+        """
+        makedirs(self.cache_dir, exist_ok=True)
+        # Exclude run-wide variables and user options, which are set anew
+        # whenever the measure is initialized
+        meas_state = {k: v for k, v in m.__dict__.items() if
+                      k not in ["handyvars", "usr_opts"]}
+        # Write to a temporary file first so that interrupted runs do not
+        # leave behind partial cache entries
+        cache_file = path.join(self.cache_dir, key + ".pkl.gz")
+        with gzip.open(cache_file + ".tmp", 'w') as zp:
+            pickle.dump(meas_state, zp, -1)
+        replace(cache_file + ".tmp", cache_file)
+        # Remove the data previously stored for the measure, which the index
+        # no longer references once the new data are recorded (unless the
+        # index references the same data for another measure)
+        key_prev = self.index.get(m.name, {}).get("key")
+        if key_prev is not None and key_prev != key and key_prev not in [
+                x[1]["key"] for x in self.index.items() if x[0] != m.name]:
+            try:
+                remove(path.join(self.cache_dir, key_prev + ".pkl.gz"))
+            except FileNotFoundError:
+                pass
+
+    def record(self, meas_dict, opts, key):
+        """Record the key and input digests of a measure's prepared data.
+
+        Args:
+            meas_dict (dict): Measure definition.
+            opts (object): Stores user-specified execution options.
+            key (string): Key the measure's prepared data are stored under.
+        """
+        self.index[meas_dict["name"]] = {
+            "key": key, "inputs": self.find_digests(meas_dict, opts)}
+
+    def write_index(self):
+        """Write the index of cached data used for each measure.
+
+        Note:
+            Cached data files the index does not reference (e.g., data for
+            measures whose definitions or inputs have since changed, or from
+            interrupted writes) are removed.
+        """
+        makedirs(self.cache_dir, exist_ok=True)
+        with open(path.join(self.cache_dir, "index.json"), 'w') as ci:
+            json.dump(self.index, ci, indent=2, sort_keys=True)
+        keys_used = [x["key"] for x in self.index.values()]
+        for fn in listdir(self.cache_dir):
+            if (fn.endswith(".pkl.gz") and fn[:-len(".pkl.gz")] not in
+                    keys_used) or fn.endswith(".pkl.gz.tmp"):
+                remove(path.join(self.cache_dir, fn))
+
+
 class Measure(object):
     """Set up a class representing efficiency measures as objects.
 
@@ -1911,7 +2795,8 @@ class Measure(object):
             c) 'mseg_out_break': master microsegment breakdowns by key
                variables (climate zone, building class, end use)
         sector_shapes (dict): Sector-level hourly baseline and efficient load
-            shapes by adopt scheme, EMM region, and year
+            shapes by adopt scheme (as SectorShapes arrays indexed by EMM
+            region and year)
     """
 
     def __init__(
@@ -2364,7 +3249,7 @@ class Measure(object):
                 "in ECM '" + self.name + "'")
 
     def fill_mkts(self, msegs, msegs_cpl, convert_data, tsv_data_init, opts,
-                  ctrb_ms_pkg_prep, tsv_data_nonfs):
+                  ctrb_ms_pkg_prep, tsv_data_nonfs, base_cache=None):
         """Fill in a measure's market microsegments using EIA baseline data.
 
         Args:
@@ -2379,6 +3264,9 @@ class Measure(object):
                 to active packages in the preparation run.
             tsv_data_nonfs (dict): If applicable, base-case TSV data to apply
                 to non-fuel switching measures under a high decarb. scenario.
+            base_cache (object): Measure-independent baseline microsegment
+                results shared across the measures in the run (if None,
+                results are cached for the current measure only).
 
         Returns:
             Updated measure stock, energy/carbon, and cost market microsegment
@@ -2435,6 +3323,11 @@ class Measure(object):
         # stock
         sqft_subst = 0
 
+        # If no cache of baseline microsegment results is shared across
+        # measures, cache results for the current measure only
+        if base_cache is None:
+            base_cache = BaselineMsegCache()
+
         # Establish a flag for a commercial lighting case where the user has
         # not specified secondary end use effects on heating and cooling.  In
         # this case, secondary effects are added automatically by adjusting
@@ -2483,7 +3376,7 @@ class Measure(object):
             calc_sect_shapes = False
 
         # Fill in sector baseline/efficient 8760 shapes attribute across all
-        # applicable regions for the measure with a list of 8760 zeros (if
+        # applicable regions for the measure with arrays of 8760 zeros (if
         # necessary).
         if calc_sect_shapes is True:
             # Find applicable region list (ensure it is in list format)s
@@ -2492,10 +3385,8 @@ class Measure(object):
             else:
                 grid_regions = copy.deepcopy(self.climate_zone)
             for a_s in self.handyvars.adopt_schemes:
-                self.sector_shapes[a_s] = {reg: {yr: {
-                    "baseline": [0 for x in range(8760)],
-                    "efficient": [0 for x in range(8760)]} for yr in
-                    self.handyvars.aeo_years_summary} for reg in grid_regions}
+                self.sector_shapes[a_s] = sector_shapes.SectorShapes(
+                    grid_regions, self.handyvars.aeo_years_summary)
 
         # Find all possible microsegment key chains.  First, determine all
         # "primary" microsegment key chains, where "primary" refers to the
@@ -2569,10 +3460,26 @@ class Measure(object):
                 "secondary")
             ms_iterable.extend(ms_iterable_second)
 
+        # Initialize a list of the microsegments that are recorded below for
+        # partitioning in batches (see 'fill_mseg_mkts')
+        mseg_parts = []
+
         # Loop through discovered key chains to find needed performance/cost
         # and stock/energy information for measure
         for ind, mskeys in enumerate(ms_iterable):
 
+            # Partition the recorded microsegments once a full batch has been
+            # recorded, or before moving on from primary to secondary
+            # microsegments (the stock turnover of secondary microsegments
+            # depends on the partitioning of all primary microsegments)
+            if mseg_parts and (
+                    len(mseg_parts) == self.handyvars.trn_batch or
+                    mskeys[0] != mseg_parts[-1]["mskeys"][0]):
+                self.fill_mseg_mkts(
+                    mseg_parts, ms_lists, opts, ctrb_ms_pkg_prep,
+                    calc_sect_shapes)
+                mseg_parts = []
+
             # Set building sector for the current microsegment
             if mskeys[2] in [
                     "single family home", "mobile home", "multi family home"]:
@@ -2961,78 +3868,24 @@ class Measure(object):
                     cost_energy_meas = {yr: (val + phc_dat[yr]) for yr, val in
                                         cost_energy_meas.items()}
 
-            # Initialize cost/performance/lifetime, stock/energy, square
-            # footage, and new building fraction variables for the baseline
-            # microsegment associated with the current key chain
-            base_cpl = msegs_cpl
-            mseg = msegs
-            mseg_sqft_stock = msegs
-            new_constr = {"annual new": {}, "total new": {},
-                          "total": {}, "new fraction": {}}
+            # Find cost/performance/lifetime, stock/energy, and square
+            # footage data for the baseline microsegment associated with the
+            # current key chain, and the number of key chain levels that
+            # match these data (found once per key chain across measures)
+            base_cpl, mseg, mseg_sqft_stock, n_base_levels = base_cache.get(
+                ("baseline", mskeys), base_cache.find_base, mskeys, msegs,
+                msegs_cpl, self.handyvars.region_cpl_mapping)
 
             # Initialize a variable for measure relative performance (broken
             # out by year in modeling time horizon)
             rel_perf = {}
 
-            # In cases where measure and baseline cost/performance/lifetime
-            # data and/or baseline stock/energy market size data are formatted
-            # as nested dicts, loop recursively through dict levels until
-            # appropriate terminal value is reached
+            # In cases where measure cost/performance/lifetime data are
+            # formatted as nested dicts, loop recursively through the dict
+            # levels that match the baseline data until appropriate terminal
+            # value is reached
             for i in range(0, len(mskeys)):
-                # For use of state regions, cost/performance/lifetime data
-                # are broken out by census division; map the state of the
-                # current microsegment to the census division it belongs to,
-                # to enable retrieval of the cost/performance/lifetime data
-                if (i == 1) and self.handyvars.region_cpl_mapping:
-                    mskeys_cpl_map = [
-                        x[0] for x in
-                        self.handyvars.region_cpl_mapping.items() if
-                        mskeys[1] in x[1]][0]
-                    # Mapping should yield single string for census division
-                    if not isinstance(mskeys_cpl_map, str):
-                        raise ValueError("State " + mskeys[1] +
-                                         " could not be mapped to a census "
-                                         "division for the purpose of "
-                                         "retrieving baseline cost, "
-                                         "performance, and lifetime data")
-                else:
-                    mskeys_cpl_map = ''
-
-                # Check whether baseline microsegment cost/performance/lifetime
-                # data are in dict format and current key is in dict keys; if
-                # so, proceed further with the recursive loop. * Note: dict key
-                # hierarchies and syntax are assumed to be consistent across
-                # all measure and baseline cost/performance/lifetime and
-                # stock/energy market data, with the exception of state data,
-                # where cost/performance/lifetime data are broken out by
-                # census divisions and must be mapped to the state breakouts
-                # used in the stock_energy market data
-                if (isinstance(base_cpl, dict) and (
-                    (mskeys[i] in base_cpl.keys()) or (
-                     mskeys_cpl_map and mskeys_cpl_map in base_cpl.keys())) or
-                    mskeys[i] in [
-                        "primary", "secondary", "new", "existing", None]):
-                    # Skip over "primary", "secondary", "new", and "existing"
-                    # keys in updating baseline stock/energy, cost and lifetime
-                    # information (this information is not broken out by these
-                    # categories)
-                    if mskeys[i] not in [
-                            "primary", "secondary", "new", "existing", None]:
-
-                        # Restrict base cost/performance/lifetime dict to key
-                        # chain info.
-                        if mskeys_cpl_map:
-                            base_cpl = base_cpl[mskeys_cpl_map]
-                        else:
-                            base_cpl = base_cpl[mskeys[i]]
-
-                        # Restrict stock/energy dict to key chain info.
-                        mseg = mseg[mskeys[i]]
-
-                        # Restrict ft^2 floor area dict to key chain info.
-                        if i < 3:  # Note: ft^2 floor area broken out 2 levels
-                            mseg_sqft_stock = mseg_sqft_stock[mskeys[i]]
-
+                if i < n_base_levels:
                     # Handle a superfluous 'undefined' key in the ECM
                     # cost, performance, and lifetime fields that is generated
                     # by the 'Add ECM' web form in certain cases *** NOTE: WILL
@@ -3355,10 +4208,9 @@ class Measure(object):
                                 'broken out by ALL ' + err_message +
                                 str(break_keys))
 
-                # If no key match, break the loop
+                # If no key match, break the loop (baseline stock/energy
+                # data for the key chain are empty)
                 else:
-                    if mskeys[i] is not None:
-                        mseg = {}
                     break
 
             # Continue loop if key chain doesn't yield "stock"/"energy" keys
@@ -4461,17 +5313,8 @@ class Measure(object):
                         "Invalid performance or cost units for ECM '" +
                         self.name + "'")
 
-                # Set stock turnover info. and consumer choice info. to
-                # appropriate building type
+                # Set consumer choice info. to appropriate building type
                 if bldg_sect == "residential":
-                    # Update new building construction information
-                    for yr in self.handyvars.aeo_years:
-                        # Find new and total buildings for current year
-                        new_constr["annual new"][yr] = \
-                            mseg_sqft_stock["new homes"][yr]
-                        new_constr["total"][yr] = \
-                            mseg_sqft_stock["total homes"][yr]
-
                     # Update technology choice parameters needed to choose
                     # between multiple efficient technology options that
                     # access this baseline microsegment. For the residential
@@ -4488,16 +5331,19 @@ class Measure(object):
                                 "consumer choice"]["competed market share"][
                                     "parameters"]["b1"].items()]):
                                 raise ValueError
+                            # Choice parameters are drawn from the last year
+                            # of the modeling time horizon
+                            choice_yr = self.handyvars.aeo_years[-1]
                             choice_params = {
                                 "b1": {
                                     key: base_cpl["consumer choice"][
                                         "competed market share"]["parameters"][
-                                        "b1"][yr] for key in
+                                        "b1"][choice_yr] for key in
                                     self.handyvars.aeo_years},
                                 "b2": {
                                     key: base_cpl["consumer choice"][
                                         "competed market share"]["parameters"][
-                                        "b2"][yr] for key in
+                                        "b2"][choice_yr] for key in
                                     self.handyvars.aeo_years}}
                             # Add to count of primary microsegment key chains
                             # with valid consumer choice data
@@ -4526,14 +5372,6 @@ class Measure(object):
                                     key: self.handyvars.deflt_choice[1] for
                                     key in self.handyvars.aeo_years}}
                 else:
-                    # Update new building construction information
-                    for yr in self.handyvars.aeo_years:
-                        # Find new and total square footage for current year
-                        new_constr["annual new"][yr] = \
-                            mseg_sqft_stock["new square footage"][yr]
-                        new_constr["total"][yr] = \
-                            mseg_sqft_stock["total square footage"][yr]
-
                     # Update technology choice parameters needed to choose
                     # between multiple efficient technology options that
                     # access this baseline microsegment. For the commercial
@@ -4573,43 +5411,16 @@ class Measure(object):
                                                  "distributions"][
                                                  "refrigeration"]}
 
-                # Find fraction of total new buildings in each year.
-                # Note: in each year, this fraction is calculated by summing
-                # the annual new building/floor space figures for all
-                # preceding years
-                for yr in self.handyvars.aeo_years:
-                    # Find cumulative total of new building/floor space stock
-                    if yr == self.handyvars.aeo_years[0]:
-                        new_constr["total new"][yr] = \
-                            new_constr["annual new"][yr]
-                    else:
-                        # Handle case where data for previous year are
-                        # unavailable; set to current year's data
-                        try:
-                            new_constr["total new"][yr] = \
-                                new_constr["annual new"][yr] + \
-                                new_constr["total new"][str(int(yr) - 1)]
-                        except KeyError:
-                            new_constr["total new"][yr] = \
-                                new_constr["annual new"][yr]
-                    # Calculate new vs. existing fraction of stock
-                    if new_constr["total new"][yr] <= new_constr["total"][yr]:
-                        new_constr["new fraction"][yr] = \
-                            new_constr["total new"][yr] / \
-                            new_constr["total"][yr]
-                    else:
-                        new_constr["new fraction"][yr] = 1
-
-                # Determine the fraction to use in scaling down the stock,
-                # energy, and carbon microsegments to the applicable structure
-                # type indicated in the microsegment key chain (e.g., new
-                # structures or existing structures)
-                if mskeys[-1] == "new":
-                    new_existing_frac = {key: val for key, val in
-                                         new_constr["new fraction"].items()}
-                else:
-                    new_existing_frac = {key: (1 - val) for key, val in
-                                         new_constr["new fraction"].items()}
+                # Find new building construction information and the fraction
+                # to use in scaling down the stock, energy, and carbon
+                # microsegments to the applicable structure type indicated in
+                # the microsegment key chain (e.g., new structures or existing
+                # structures); these are found once per region, building type,
+                # and structure type across measures
+                new_constr, new_existing_frac = base_cache.get(
+                    ("new fraction", mskeys[1], mskeys[2], mskeys[-1]),
+                    base_cache.find_new_frac, mskeys, bldg_sect,
+                    mseg_sqft_stock, self.handyvars.aeo_years)
 
                 # Update bass diffusion parameters needed to determine the
                 # fraction of the baseline microsegment that will be captured
@@ -4635,53 +5446,28 @@ class Measure(object):
                 # microsegments make no contribution to the stock calculation,
                 # as they only affect energy/carbon and associated costs.
 
-                # Total stock
-                if mskeys[0] == 'secondary':
-                    add_stock = dict.fromkeys(self.handyvars.aeo_years, 0)
-                elif sqft_subst == 1:  # Use ft^2 floor area in lieu of # units
-                    # For residential envelope microsegments, stock is
-                    # converted to a per house (per "unit") basis to facilitate
-                    # comparison and packaging with res. equipment measures;
-                    # the required conversion factor was already calculated
-                    # above and applied to the stock costs for these
-                    # microsegments, and is reused here for the stock
-                    if sf_to_house_key and sf_to_house_key in \
-                            self.handyvars.sf_to_house.keys():
-                        add_stock = {
-                            key: val * new_existing_frac[key] *
-                            self.handyvars.sf_to_house[sf_to_house_key][key] *
-                            1000000 for key, val in mseg_sqft_stock[
-                                "total square footage"].items()
-                            if key in self.handyvars.aeo_years}
-                    else:
-                        add_stock = {
-                            key: val * new_existing_frac[key] * 1000000 for
-                            key, val in mseg_sqft_stock[
-                                "total square footage"].items()
-                            if key in self.handyvars.aeo_years}
-                else:
-                    add_stock = {
-                        key: val * new_existing_frac[key] for key, val in
-                        mseg["stock"].items() if key in
-                        self.handyvars.aeo_years}
-
-                # If the baseline technology is a heat pump in the residential
-                # sector, account for the fact that EIA divides all heat pump
-                # stocks by 2 when separately considered across the heating
-                # and cooling services; note that per unit stock costs for
-                # these technologies are treated in the same way by EIA and
-                # were also multiplied by 2 above
-                if bldg_sect == "residential" and (
-                        mskeys[-2] is not None and "HP" in mskeys[-2]):
-                    add_stock = {yr: add_stock[yr] * 2 for
-                                 yr in self.handyvars.aeo_years}
-
-                # Total energy use
-                add_energy = {
-                    key: val * site_source_conv_base[key] *
-                    new_existing_frac[key] for key, val in mseg[
-                        "energy"].items() if key in
-                    self.handyvars.aeo_years}
+                # Set short name for the modeling time horizon
+                yrs = self.handyvars.aeo_years
+                # Total stock, energy use, and carbon emissions; these are
+                # found once per key chain across measures, given the use of
+                # ft^2 floor area as stock (and its conversion to a per house
+                # basis), the site energy setting, and the carbon intensity
+                # data in use. The totals are kept as vectors over the time
+                # horizon through the stock turnover and partitioning of the
+                # microsegment (see 'fill_mseg_mkts'); the cached vectors are
+                # shared across measures and must not be modified in place
+                add_stock_vec, add_energy_vec, add_carb_vec = base_cache.get(
+                    ("totals", mskeys, sqft_subst,
+                     sf_to_house_key is not None,
+                     opts is not None and opts.site_energy is True,
+                     carb_int_dat is self.handyvars.carb_int_nonfs),
+                    base_cache.find_totals, mskeys, bldg_sect, sqft_subst,
+                    mseg, mseg_sqft_stock, self.handyvars.sf_to_house.get(
+                        sf_to_house_key) if sf_to_house_key else None,
+                    new_existing_frac, site_source_conv_base,
+                    intensity_carb_base, yrs)
+                if add_stock_vec is None:
+                    add_stock_vec = numpy.zeros(len(yrs))
                 # Total lighting energy use for climate zone, building type,
                 # and structure type of current primary lighting
                 # microsegment (used to adjust secondary effects)
@@ -4689,12 +5475,7 @@ class Measure(object):
                     energy_total_scnd = self.find_scnd_overlp(
                         new_existing_frac, site_source_conv_base, reduce(
                             operator.getitem, mskeys[1:5], msegs),
-                        energy_tot=dict.fromkeys(
-                            self.handyvars.aeo_years, 0))
-                # Total carbon emissions
-                add_carb = {key: val * intensity_carb_base[key]
-                            for key, val in add_energy.items()
-                            if key in self.handyvars.aeo_years}
+                        energy_tot=dict.fromkeys(yrs, 0))
 
                 # Check for time-sensitive efficiency valuation (e.g., a
                 # measure has time sensitive features and/or the user has
@@ -4754,556 +5535,41 @@ class Measure(object):
                     # Set baseline load shapes to zero in cases where these
                     # fractions have been calculated
                     if calc_sect_shapes is True and tsv_shapes is not None:
-                        tsv_shapes["baseline"] = [0 for x in range(8760)]
+                        tsv_shapes["baseline"] = numpy.zeros(8760)
                     # Set baseline TSV scaling fractions to 1
                     for x in ["energy", "cost", "carbon"]:
                         tsv_scale_fracs[x]["baseline"] = 1
 
-                for adopt_scheme in self.handyvars.adopt_schemes:
-                    # Update total, competed, and efficient stock, energy,
-                    # carbon and baseline/measure cost info. based on adoption
-                    # scheme
-                    [add_stock_total, add_energy_total, add_carb_total,
-                     add_stock_total_meas, add_energy_total_eff,
-                     add_carb_total_eff, add_stock_compete, add_energy_compete,
-                     add_carb_compete, add_stock_compete_meas,
-                     add_energy_compete_eff, add_carb_compete_eff,
-                     add_stock_cost, add_energy_cost, add_carb_cost,
-                     add_stock_cost_meas, add_energy_cost_eff,
-                     add_carb_cost_eff, add_stock_cost_compete,
-                     add_energy_cost_compete, add_carb_cost_compete,
-                     add_stock_cost_compete_meas, add_energy_cost_compete_eff,
-                     add_carb_cost_compete_eff, add_fs_energy_eff_remain,
-                     add_fs_carb_eff_remain, add_fs_energy_cost_eff_remain,
-                     mkt_scale_frac_fin] = \
-                        self.partition_microsegment(
-                            adopt_scheme, diffuse_params, mskeys, bldg_sect,
-                            sqft_subst, mkt_scale_frac, new_constr, add_stock,
-                            add_energy, add_carb, cost_base, cost_meas,
-                            cost_energy_base, cost_energy_meas, rel_perf,
-                            life_base, life_meas, site_source_conv_base,
-                            site_source_conv_meas, intensity_carb_base,
-                            intensity_carb_meas, energy_total_scnd,
-                            tsv_scale_fracs, tsv_shapes, opts,
-                            contrib_mseg_key, ctrb_ms_pkg_prep, hp_rate,
-                            retro_rate_mseg, calc_sect_shapes)
-
-                    # Remove double counted stock and stock cost for equipment
-                    # measures that apply to more than one end use that
-                    # includes heating or cooling. In these cases, always
-                    # anchor stock/cost on heating end use tech., provided
-                    # heating is included, because they are generally
-                    # of greatest interest for the stock of measures like
-                    # ASHPs and span fuels (e.g., electric resistance, gas
-                    # furnace, oil furnace, etc.). If heating is not covered,
-                    # anchor on the cooling end use technologies. This
-                    # adjustment covers heat pump measures as well as HVAC
-                    # controls measures that apply across heating/cooling
-                    # (and possibly other) end uses
-                    if sqft_subst != 1 and len(ms_lists[3]) > 1 and ((
-                        "heating" in ms_lists[3] and
-                        "heating" not in mskeys) or (
-                        "heating" not in ms_lists[3] and
-                        "cooling" in ms_lists[3] and
-                            "cooling" not in mskeys)):
-                        add_stock_total, add_stock_compete, \
-                            add_stock_total_meas, add_stock_compete_meas, \
-                            add_stock_cost, add_stock_cost_compete, \
-                            add_stock_cost_meas, \
-                            add_stock_cost_compete_meas = ({
-                                yr: 0 for yr in self.handyvars.aeo_years}
-                                for n in range(8))
-
-                    # Combine stock/energy/carbon/cost/lifetime updating info.
-                    # into a dict. Note that baseline lighting lifetimes are
-                    # adjusted by the stock of the contributing microsegment
-                    # such that a total weighted baseline lifetime may be
-                    # calculated below for the measure across all contributing
-                    # microsegments
-                    add_dict = {
-                        "stock": {
-                            "total": {
-                                "all": add_stock_total,
-                                "measure": add_stock_total_meas},
-                            "competed": {
-                                "all": add_stock_compete,
-                                "measure": add_stock_compete_meas}},
-                        "energy": {
-                            "total": {
-                                "baseline": add_energy_total,
-                                "efficient": add_energy_total_eff},
-                            "competed": {
-                                "baseline": add_energy_compete,
-                                "efficient": add_energy_compete_eff}},
-                        "carbon": {
-                            "total": {
-                                "baseline": add_carb_total,
-                                "efficient": add_carb_total_eff},
-                            "competed": {
-                                "baseline": add_carb_compete,
-                                "efficient": add_carb_compete_eff}},
-                        "cost": {
-                            "stock": {
-                                "total": {
-                                    "baseline": add_stock_cost,
-                                    "efficient": add_stock_cost_meas},
-                                "competed": {
-                                    "baseline": add_stock_cost_compete,
-                                    "efficient": add_stock_cost_compete_meas}},
-                            "energy": {
-                                "total": {
-                                    "baseline": add_energy_cost,
-                                    "efficient": add_energy_cost_eff},
-                                "competed": {
-                                    "baseline": add_energy_cost_compete,
-                                    "efficient": add_energy_cost_compete_eff}},
-                            "carbon": {
-                                "total": {
-                                    "baseline": add_carb_cost,
-                                    "efficient": add_carb_cost_eff},
-                                "competed": {
-                                    "baseline": add_carb_cost_compete,
-                                    "efficient": add_carb_cost_compete_eff}}},
-                        "lifetime": {
-                            "baseline": {
-                                yr: life_base[yr] * add_stock_total[yr] for
-                                yr in self.handyvars.aeo_years},
-                            "measure": life_meas}}
-
-                    # Using the key chain for the current microsegment,
-                    # determine the output climate zone, building type, and end
-                    # use breakout categories to which the current microsegment
-                    # applies
-
-                    # Establish applicable climate zone breakout
-                    for cz in self.handyvars.out_break_czones.items():
-                        if mskeys[1] in cz[1]:
-                            out_cz = cz[0]
-                    # Establish applicable building type breakout
-                    for bldg in self.handyvars.out_break_bldgtypes.items():
-                        if all([x in bldg[1] for x in [
-                                mskeys[2], mskeys[-1]]]):
-                            out_bldg = bldg[0]
-                    # Establish applicable end use breakout
-                    for eu in self.handyvars.out_break_enduses.items():
-                        # * Note: The 'other' microsegment end
-                        # use may map to either the 'Refrigeration' output
-                        # breakout or the 'Other' output breakout, depending on
-                        # the technology type specified in the measure
-                        # definition. Also note that 'supply' side
-                        # heating/cooling microsegments map to the
-                        # 'Heating (Equip.)'/'Cooling (Equip.)' end uses, while
-                        # 'demand' side heating/cooling microsegments map to
-                        # the 'Heating (Env.)'/'Cooling (Env.) end use, with
-                        # the exception of 'demand' side heating/cooling
-                        # microsegments that represent waste heat from lights -
-                        # these are categorized as part of the 'Lighting' end
-                        # use
-                        if mskeys[4] == "other":
-                            if mskeys[5] == "freezers":
-                                out_eu = "Refrigeration"
-                            else:
-                                out_eu = "Other"
-                        elif mskeys[4] in eu[1]:
-                            if (eu[0] in ["Heating (Equip.)",
-                                          "Cooling (Equip.)"] and
-                                mskeys[5] == "supply") or (
-                                eu[0] in ["Heating (Env.)",
-                                          "Cooling (Env.)"] and
-                                mskeys[5] == "demand" and
-                                mskeys[0] == "primary") or (
-                                eu[0] not in ["Heating (Equip.)",
-                                              "Cooling (Equip.)",
-                                              "Heating (Env.)",
-                                              "Cooling (Env.)"]):
-                                out_eu = eu[0]
-                        elif "lighting gain" in mskeys:
-                            out_eu = "Lighting"
-                    # If applicable, establish fuel type breakout (electric vs.
-                    # non-electric); note – only applicable to end uses that
-                    # are at least in part fossil-fired
-                    if (len(self.handyvars.out_break_fuels.keys()) != 0) and (
-                        out_eu in ["Heating (Equip.)", "Cooling (Equip.)",
-                                   "Heating (Env.)", "Cooling (Env.)",
-                                   "Water Heating", "Cooking"]):
-                        # Flag for detailed fuel type breakout
-                        detail = len(self.handyvars.out_break_fuels.keys()) > 2
-                        # Establish breakout of fuel type that is being
-                        # reduced (e.g., through efficiency or fuel switching
-                        # away from the fuel)
-                        for f in self.handyvars.out_break_fuels.items():
-                            if mskeys[3] in f[1]:
-                                # Special handling for other fuel tech.,
-                                # under detailed fuel type breakouts; this
-                                # tech. may fit into multiple fuel categories
-                                if detail and mskeys[3] == "other fuel":
-                                    # Assign coal/kerosene tech.
-                                    if f[0] == "Distillate/Other" and (
-                                        mskeys[-2] is not None and any([
-                                            x in mskeys[-2] for x in [
-                                            "coal", "kerosene"]])):
-                                        out_fuel_save = f[0]
-                                    # Assign wood tech.
-                                    elif f[0] == "Biomass" and (
-                                        mskeys[-2] is not None and "wood" in
-                                            mskeys[-2]):
-                                        out_fuel_save = f[0]
-                                    # All other tech. goes to propane
-                                    elif f[0] == "Propane":
-                                        out_fuel_save = f[0]
-                                else:
-                                    out_fuel_save = f[0]
-                        # Establish breakout of fuel type that is being added
-                        # to via fuel switching, if applicable
-                        if self.fuel_switch_to == "electricity" and \
-                                out_fuel_save != "Electric":
-                            out_fuel_gain = "Electric"
-                        elif self.fuel_switch_to not in [None, "electricity"] \
-                                and out_fuel_save == "Electric":
-                            # Check for detailed fuel types
-                            if detail:
-                                for f in \
-                                        self.handyvars.out_break_fuels.items():
-                                    # Special handling for other fuel tech.,
-                                    # under detailed fuel type breakouts; this
-                                    # tech. may fit into multiple fuel cats.
-                                    if self.fuel_switch_to in f[1] and \
-                                            mskeys[3] == "other fuel":
-                                        # Assign coal/kerosene tech.
-                                        if f[0] == "Distillate/Other" and (
-                                            mskeys[-2] is not None and any([
-                                                x in mskeys[-2] for x in [
-                                                "coal", "kerosene"]])):
-                                            out_fuel_gain = f[0]
-                                        # Assign wood tech.
-                                        elif f[0] == "Biomass" and (
-                                            mskeys[-2] is not None and "wood"
-                                                in mskeys[-2]):
-                                            out_fuel_gain = f[0]
-                                        # All other tech. goes to propane
-                                        elif f[0] == "Propane":
-                                            out_fuel_gain = f[0]
-                                    elif self.fuel_switch_to in f[1]:
-                                        out_fuel_gain = f[0]
-                            else:
-                                out_fuel_gain = "Non-Electric"
-                        else:
-                            out_fuel_gain = ""
-                    else:
-                        out_fuel_save, out_fuel_gain = ("" for n in range(2))
-
-                    # Given the contributing microsegment's applicable climate
-                    # zone, building type, and end use categories, add the
-                    # microsegment's energy/ecost/carbon baseline, efficient
-                    # energy/ecost/carbon, and energy/ecost/carbon savings val.
-                    # to the appropriate leaf node of the dictionary used to
-                    # store measure output breakout information. * Note: the
-                    # values in this dictionary will be normalized in run.py by
-                    # the measure's energy/ecost/carbon baseline, efficient
-                    # energy/ecost/carbon, and energy/ecost/carbon savings
-                    # totals (post-competition) to yield the fractions of
-                    # measure energy, carbon, and cost markets/savings that are
-                    # attributable to each climate zone, building type, and
-                    # end use that the measure applies to
-                    try:
-                        # Create a shorthand for baseline and efficient
-                        # energy/carbon/cost data to add to the breakout dict
-                        base_data = [add_energy_total, add_energy_cost,
-                                     add_carb_total]
-                        eff_data = [add_energy_total_eff, add_energy_cost_eff,
-                                    add_carb_total_eff]
-                        # For a fuel switching case where the user desires that
-                        # the outputs be split by fuel, create shorthands for
-                        # any efficient energy/carbon/cost that remains with
-                        # the baseline fuel
-                        if self.fuel_switch_to is not None and out_fuel_save:
-                            eff_data_fs = [add_fs_energy_eff_remain,
-                                           add_fs_energy_cost_eff_remain,
-                                           add_fs_carb_eff_remain]
-                            # Record the efficient energy that has not yet fuel
-                            # switched and total efficient energy for the
-                            # current mseg for later use in packaging and/or
-                            # competing measures
-                            self.eff_fs_splt[adopt_scheme][
-                                str(contrib_mseg_key)] = {
-                                    "energy": [add_fs_energy_eff_remain,
-                                               add_energy_total_eff],
-                                    "cost": [add_fs_energy_cost_eff_remain,
-                                             add_energy_cost_eff],
-                                    "carbon": [add_fs_carb_eff_remain,
-                                               add_carb_total_eff]}
-                        # Handle case where output breakout includes fuel type
-                        # breakout or not
-                        if out_fuel_save:
-                            # Update results for the baseline fuel; handle
-                            # case where results for the current region, bldg.,
-                            # end use, and fuel have not yet been initialized
-                            try:
-                                for yr in self.handyvars.aeo_years:
-                                    for ind, key in enumerate([
-                                            "energy", "cost", "carbon"]):
-                                        # Baseline; add in baseline data
-                                        # as-is
-                                        self.markets[adopt_scheme][
-                                            "mseg_out_break"][key][
-                                            "baseline"][out_cz][out_bldg][
-                                            out_eu][out_fuel_save][yr] += \
-                                            base_data[ind][yr]
-                                        # Efficient and savings; if there is
-                                        # fuel switching, only the portion
-                                        # of the efficient case results that
-                                        # have not yet switched (due to stock
-                                        # turnover limitations) remain, and
-                                        # savings are the delta between what
-                                        # remains unswitched in the efficient
-                                        # case and the baseline
-                                        if not out_fuel_gain:
-                                            self.markets[adopt_scheme][
-                                                "mseg_out_break"][key][
-                                                "efficient"][out_cz][out_bldg][
-                                                out_eu][out_fuel_save][yr] += \
-                                                eff_data[ind][yr]
-                                            self.markets[adopt_scheme][
-                                                "mseg_out_break"][key][
-                                                "savings"][out_cz][out_bldg][
-                                                out_eu][out_fuel_save][yr] += (
-                                                    base_data[ind][yr] -
-                                                    eff_data[ind][yr])
-                                        else:
-                                            self.markets[adopt_scheme][
-                                                "mseg_out_break"][key][
-                                                "efficient"][out_cz][out_bldg][
-                                                out_eu][out_fuel_save][yr] += \
-                                                eff_data_fs[ind][yr]
-                                            self.markets[adopt_scheme][
-                                                "mseg_out_break"][key][
-                                                "savings"][out_cz][out_bldg][
-                                                out_eu][out_fuel_save][yr] += (
-                                                    base_data[ind][yr] -
-                                                    eff_data_fs[ind][yr])
-                            except KeyError:
-                                for ind, key in enumerate([
-                                        "energy", "cost", "carbon"]):
-                                    # Baseline; add in baseline data
-                                    # as-is
-                                    self.markets[adopt_scheme][
-                                        "mseg_out_break"][key][
-                                        "baseline"][out_cz][out_bldg][
-                                        out_eu][out_fuel_save] = {
-                                            yr: base_data[ind][yr] for
-                                            yr in self.handyvars.aeo_years}
-                                    # Efficient and savings; if there is fuel
-                                    # switching, only the portion of the
-                                    # efficient case results that have not yet
-                                    # switched (due to stock turnover
-                                    # limitations) remain, and savings are the
-                                    # delta between what remains unswitched in
-                                    # the efficient case and the baseline
-                                    if not out_fuel_gain:
-                                        self.markets[adopt_scheme][
-                                            "mseg_out_break"][key][
-                                            "efficient"][out_cz][out_bldg][
-                                            out_eu][out_fuel_save] = {
-                                                yr: eff_data[ind][yr] for
-                                                yr in self.handyvars.aeo_years}
-                                        self.markets[adopt_scheme][
-                                            "mseg_out_break"][key][
-                                            "savings"][out_cz][out_bldg][
-                                                out_eu][out_fuel_save] = {
-                                                yr: (base_data[ind][yr] -
-                                                     eff_data[ind][yr]) for
-                                                yr in self.handyvars.aeo_years}
-                                    else:
-                                        self.markets[adopt_scheme][
-                                            "mseg_out_break"][key][
-                                            "efficient"][out_cz][out_bldg][
-                                            out_eu][out_fuel_save] = {
-                                                yr: eff_data_fs[ind][yr] for
-                                                yr in self.handyvars.aeo_years}
-                                        self.markets[adopt_scheme][
-                                            "mseg_out_break"][key][
-                                            "savings"][out_cz][out_bldg][
-                                                out_eu][out_fuel_save] = {
-                                                yr: (base_data[ind][yr] -
-                                                     eff_data_fs[ind][yr]) for
-                                                yr in self.handyvars.aeo_years}
-                            # In a fuel switching case, update results for
-                            # the fuel being switched/added to
-                            if out_fuel_gain:
-                                # Handle case where results for the current
-                                # region, bldg., end use, and fuel have not yet
-                                # been initialized
-                                try:
-                                    for yr in self.handyvars.aeo_years:
-                                        for ind, key in enumerate([
-                                                "energy", "cost", "carbon"]):
-                                            # Note: no need to add to baseline
-                                            # for fuel being switched to,
-                                            # which remains zero
-
-                                            # Efficient and savings; efficient
-                                            # case energy/emissions/cost that
-                                            # do not remain with the baseline
-                                            # fuel are added to the switched to
-                                            # fuel and represented as negative
-                                            # savings for the switched to fuel
-                                            self.markets[adopt_scheme][
-                                                "mseg_out_break"][key][
-                                                "efficient"][out_cz][out_bldg][
-                                                out_eu][out_fuel_gain][yr] += \
-                                                (eff_data[ind][yr] -
-                                                 eff_data_fs[ind][yr])
-                                            self.markets[adopt_scheme][
-                                                "mseg_out_break"][key][
-                                                "savings"][out_cz][out_bldg][
-                                                out_eu][out_fuel_gain][yr] -= (
-                                                    eff_data[ind][yr] -
-                                                    eff_data_fs[ind][yr])
-                                except KeyError:
-                                    for ind, key in enumerate([
-                                            "energy", "cost", "carbon"]):
-                                        # Baseline for the fuel being switched
-                                        # to is initialized as zero
-                                        self.markets[adopt_scheme][
-                                            "mseg_out_break"][key][
-                                            "baseline"][out_cz][out_bldg][
-                                            out_eu][out_fuel_gain] = {
-                                                yr: 0 for yr in
-                                                self.handyvars.aeo_years}
-                                        # Efficient and savings; efficient
-                                        # case energy/emissions/cost that
-                                        # do not remain with the baseline
-                                        # fuel are added to the switched to
-                                        # fuel and represented as negative
-                                        # savings for the switched to fuel
-                                        self.markets[adopt_scheme][
-                                            "mseg_out_break"][key][
-                                            "efficient"][out_cz][out_bldg][
-                                            out_eu][out_fuel_gain] = {
-                                                yr: (eff_data[ind][yr] -
-                                                     eff_data_fs[ind][yr]) for
-                                                yr in self.handyvars.aeo_years}
-                                        self.markets[adopt_scheme][
-                                            "mseg_out_break"][key][
-                                            "savings"][out_cz][out_bldg][
-                                                out_eu][out_fuel_gain] = {
-                                                yr: -(eff_data[ind][yr] -
-                                                      eff_data_fs[ind][yr]) for
-                                                yr in self.handyvars.aeo_years}
-                        else:
-                            # Handle case where results for the current region,
-                            # bldg., end use, and fuel have not yet been
-                            # initialized
-                            try:
-                                for yr in self.handyvars.aeo_years:
-                                    for ind, key in enumerate([
-                                            "energy", "cost", "carbon"]):
-                                        self.markets[adopt_scheme][
-                                            "mseg_out_break"][key][
-                                            "baseline"][out_cz][out_bldg][
-                                            out_eu][yr] += base_data[ind][yr]
-                                        self.markets[adopt_scheme][
-                                            "mseg_out_break"][key][
-                                            "efficient"][out_cz][out_bldg][
-                                            out_eu][yr] += eff_data[ind][yr]
-                                        self.markets[adopt_scheme][
-                                            "mseg_out_break"][key][
-                                            "savings"][out_cz][out_bldg][
-                                            out_eu][yr] += (
-                                                base_data[ind][yr] -
-                                                eff_data[ind][yr])
-                            except KeyError:
-                                for ind, key in enumerate([
-                                        "energy", "cost", "carbon"]):
-                                    self.markets[adopt_scheme][
-                                        "mseg_out_break"][key]["baseline"][
-                                        out_cz][out_bldg][out_eu] = {
-                                            yr: base_data[ind][yr] for
-                                            yr in self.handyvars.aeo_years}
-                                    self.markets[adopt_scheme][
-                                        "mseg_out_break"][key]["efficient"][
-                                        out_cz][out_bldg][out_eu] = {
-                                            yr: eff_data[ind][yr] for
-                                            yr in self.handyvars.aeo_years}
-                                    self.markets[adopt_scheme][
-                                        "mseg_out_break"][key]["savings"][
-                                        out_cz][out_bldg][out_eu] = {
-                                            yr: (base_data[ind][yr] -
-                                                 eff_data[ind][yr]) for
-                                            yr in self.handyvars.aeo_years}
-
-                    # Yield warning if current contributing microsegment cannot
-                    # be mapped to an output breakout category
-                    except KeyError:
-                        verboseprint(
-                            opts.verbose,
-                            "Baseline market key chain: '" +
-                            str(mskeys) +
-                            "' for ECM '" + self.name + "' does not map to "
-                            "output breakout categories, thus will not "
-                            "be reflected in output breakout data")
-
-                    # Record contributing microsegment data needed for ECM
-                    # competition in the analysis engine
-                    contrib_mseg_key_str = str(contrib_mseg_key)
-
-                    # Case with no existing 'windows' contributing microsegment
-                    # for the current climate zone, building type, fuel type,
-                    # and end use (create new 'contributing mseg keys and
-                    # values' and 'competed choice parameters' microsegment
-                    # information)
-                    if contrib_mseg_key_str not in self.markets[adopt_scheme][
-                        "mseg_adjust"][
-                            "contributing mseg keys and values"].keys():
-                        # Register contributing microsegment information for
-                        # later use in determining savings overlaps for
-                        # measures that apply to this microsegment
-                        self.markets[adopt_scheme]["mseg_adjust"][
-                            "contributing mseg keys and values"][
-                            contrib_mseg_key_str] = add_dict
-                        # Register choice parameters associated with
-                        # contributing microsegment for later use in
-                        # apportioning out various technology options across
-                        # competed stock
-                        self.markets[adopt_scheme]["mseg_adjust"][
-                            "competed choice parameters"][
-                            contrib_mseg_key_str] = choice_params
-                    # Case with existing 'windows' contributing microsegment
-                    # for the current climate zone, building type, fuel type,
-                    # and end use (add to existing 'contributing mseg keys and
-                    # values' information)
-                    else:
-                        self.markets[adopt_scheme]["mseg_adjust"][
-                            "contributing mseg keys and values"][
-                            contrib_mseg_key_str] = self.add_keyvals(
-                                self.markets[adopt_scheme]["mseg_adjust"][
-                                    "contributing mseg keys and values"][
-                                    contrib_mseg_key_str], add_dict)
-
-                    # Market scaling fraction comes out of
-                    # "partition_microsegment" function in dict format, broken
-                    # by year; reformat as single value if values for each year
-                    # are identical
-                    if all([round(x[1], 3) == round(mkt_scale_frac_fin[
-                            self.handyvars.aeo_years[0]], 3) for
-                            x in mkt_scale_frac_fin.items()]):
-                        mkt_scale_frac_fin = mkt_scale_frac_fin[
-                            self.handyvars.aeo_years[0]]
-
-                    # Record the sub-market scaling fraction associated with
-                    # the current contributing microsegment
-                    self.markets[adopt_scheme]["mseg_adjust"][
-                        "contributing mseg keys and values"][
-                        contrib_mseg_key_str]["sub-market scaling"] = \
-                        mkt_scale_frac_fin
-
-                    # Add all updated contributing microsegment stock, energy
-                    # carbon, cost, and lifetime information to existing master
-                    # mseg dict and move to next iteration of the loop through
-                    # key chains
-                    self.markets[adopt_scheme]["master_mseg"] = \
-                        self.add_keyvals(self.markets[adopt_scheme][
-                            "master_mseg"], add_dict)
+                # Record the microsegment for partitioning once the stock
+                # turnover of a batch of microsegments is found (see
+                # 'fill_mseg_mkts'); copy any year-keyed measure cost, which
+                # may be converted in place for a later microsegment
+                mseg_parts.append(dict(
+                    mskeys=mskeys, bldg_sect=bldg_sect, sqft_subst=sqft_subst,
+                    diffuse_params=diffuse_params,
+                    mkt_scale_frac=mkt_scale_frac, new_constr=new_constr,
+                    add_stock_vec=add_stock_vec, add_energy_vec=add_energy_vec,
+                    add_carb_vec=add_carb_vec, cost_base=cost_base,
+                    cost_meas=(dict(cost_meas) if isinstance(
+                        cost_meas, dict) else cost_meas),
+                    cost_energy_base=cost_energy_base,
+                    cost_energy_meas=cost_energy_meas, rel_perf=rel_perf,
+                    life_base=life_base, life_meas=life_meas,
+                    site_source_conv_base=site_source_conv_base,
+                    site_source_conv_meas=site_source_conv_meas,
+                    intensity_carb_base=intensity_carb_base,
+                    intensity_carb_meas=intensity_carb_meas,
+                    energy_total_scnd=energy_total_scnd,
+                    tsv_scale_fracs=tsv_scale_fracs, tsv_shapes=tsv_shapes,
+                    contrib_mseg_key=contrib_mseg_key, hp_rate=hp_rate,
+                    retro_rate_mseg=retro_rate_mseg,
+                    choice_params=choice_params))
+
+        # Partition any microsegments recorded after the last batch above
+        if mseg_parts:
+            self.fill_mseg_mkts(
+                mseg_parts, ms_lists, opts, ctrb_ms_pkg_prep,
+                calc_sect_shapes)
 
         # Further normalize a measure's lifetime and stock information (where
         # the latter is based on square footage) to the number of microsegments
@@ -5449,6 +5715,597 @@ class Measure(object):
         else:
             print("Success" + bstk_msg + bcpl_msg + bcc_msg + cc_msg)
 
+    def fill_mseg_mkts(self, msegs, ms_lists, opts, ctrb_ms_pkg_prep,
+                       calc_sect_shapes):
+        """Partition a batch of microsegments and add them to measure markets.
+
+        Notes:
+            The stock turnover of all microsegments in the batch is found at
+            once (see 'stock_turnover_schemes'); each microsegment is then
+            partitioned and added to the measure's markets in the order it
+            was recorded in 'fill_mkts'.
+
+        Args:
+            msegs (list): Dicts of the information recorded for each
+                microsegment in 'fill_mkts' (keyed by the names used there).
+            ms_lists (list): Lists of the climate zones, building types,
+                fuel types, end uses, and technologies the measure applies to.
+            opts (object): Stores user-specified execution options.
+            ctrb_ms_pkg_prep (list): Names of measures that contribute to pkgs.
+            calc_sect_shapes (boolean): Flag for sector-shape calculations.
+        """
+        for mseg, trn_schemes in zip(
+                msegs, self.stock_turnover_schemes(msegs, opts)):
+            # Set short names for the microsegment information
+            mskeys, bldg_sect, sqft_subst, diffuse_params, mkt_scale_frac, \
+                new_constr, add_stock_vec, add_energy_vec, add_carb_vec, \
+                cost_base, cost_meas, cost_energy_base, cost_energy_meas, \
+                rel_perf, life_base, life_meas, site_source_conv_base, \
+                site_source_conv_meas, intensity_carb_base, \
+                intensity_carb_meas, energy_total_scnd, tsv_scale_fracs, \
+                tsv_shapes, contrib_mseg_key, hp_rate, retro_rate_mseg, \
+                choice_params = (mseg[x] for x in [
+                    "mskeys", "bldg_sect", "sqft_subst", "diffuse_params",
+                    "mkt_scale_frac", "new_constr", "add_stock_vec",
+                    "add_energy_vec", "add_carb_vec", "cost_base",
+                    "cost_meas", "cost_energy_base", "cost_energy_meas",
+                    "rel_perf", "life_base", "life_meas",
+                    "site_source_conv_base", "site_source_conv_meas",
+                    "intensity_carb_base", "intensity_carb_meas",
+                    "energy_total_scnd", "tsv_scale_fracs", "tsv_shapes",
+                    "contrib_mseg_key", "hp_rate", "retro_rate_mseg",
+                    "choice_params"])
+            # Initialize the output breakout categories of the microsegment,
+            # which are set for each adoption scheme below
+            out_cz, out_bldg, out_eu = (None for n in range(3))
+
+            for adopt_scheme in self.handyvars.adopt_schemes:
+                # Update total, competed, and efficient stock, energy,
+                # carbon and baseline/measure cost info. based on adoption
+                # scheme
+                [add_stock_total, add_energy_total, add_carb_total,
+                 add_stock_total_meas, add_energy_total_eff,
+                 add_carb_total_eff, add_stock_compete, add_energy_compete,
+                 add_carb_compete, add_stock_compete_meas,
+                 add_energy_compete_eff, add_carb_compete_eff,
+                 add_stock_cost, add_energy_cost, add_carb_cost,
+                 add_stock_cost_meas, add_energy_cost_eff,
+                 add_carb_cost_eff, add_stock_cost_compete,
+                 add_energy_cost_compete, add_carb_cost_compete,
+                 add_stock_cost_compete_meas, add_energy_cost_compete_eff,
+                 add_carb_cost_compete_eff, add_fs_energy_eff_remain,
+                 add_fs_carb_eff_remain, add_fs_energy_cost_eff_remain,
+                 mkt_scale_frac_fin] = \
+                    self.partition_microsegment(
+                        adopt_scheme, diffuse_params, mskeys, bldg_sect,
+                        sqft_subst, mkt_scale_frac, new_constr,
+                        add_stock_vec, add_energy_vec, add_carb_vec,
+                        cost_base, cost_meas, cost_energy_base,
+                        cost_energy_meas, rel_perf, life_base, life_meas,
+                        site_source_conv_base, site_source_conv_meas,
+                        intensity_carb_base, intensity_carb_meas,
+                        energy_total_scnd, tsv_scale_fracs, tsv_shapes,
+                        opts, contrib_mseg_key, ctrb_ms_pkg_prep, hp_rate,
+                        retro_rate_mseg, calc_sect_shapes,
+                        trn_schemes[adopt_scheme])
+
+                # Remove double counted stock and stock cost for equipment
+                # measures that apply to more than one end use that
+                # includes heating or cooling. In these cases, always
+                # anchor stock/cost on heating end use tech., provided
+                # heating is included, because they are generally
+                # of greatest interest for the stock of measures like
+                # ASHPs and span fuels (e.g., electric resistance, gas
+                # furnace, oil furnace, etc.). If heating is not covered,
+                # anchor on the cooling end use technologies. This
+                # adjustment covers heat pump measures as well as HVAC
+                # controls measures that apply across heating/cooling
+                # (and possibly other) end uses
+                if sqft_subst != 1 and len(ms_lists[3]) > 1 and ((
+                    "heating" in ms_lists[3] and
+                    "heating" not in mskeys) or (
+                    "heating" not in ms_lists[3] and
+                    "cooling" in ms_lists[3] and
+                        "cooling" not in mskeys)):
+                    add_stock_total, add_stock_compete, \
+                        add_stock_total_meas, add_stock_compete_meas, \
+                        add_stock_cost, add_stock_cost_compete, \
+                        add_stock_cost_meas, \
+                        add_stock_cost_compete_meas = ({
+                            yr: 0 for yr in self.handyvars.aeo_years}
+                            for n in range(8))
+
+                # Combine stock/energy/carbon/cost/lifetime updating info.
+                # into a dict. Note that baseline lighting lifetimes are
+                # adjusted by the stock of the contributing microsegment
+                # such that a total weighted baseline lifetime may be
+                # calculated below for the measure across all contributing
+                # microsegments
+                add_dict = {
+                    "stock": {
+                        "total": {
+                            "all": add_stock_total,
+                            "measure": add_stock_total_meas},
+                        "competed": {
+                            "all": add_stock_compete,
+                            "measure": add_stock_compete_meas}},
+                    "energy": {
+                        "total": {
+                            "baseline": add_energy_total,
+                            "efficient": add_energy_total_eff},
+                        "competed": {
+                            "baseline": add_energy_compete,
+                            "efficient": add_energy_compete_eff}},
+                    "carbon": {
+                        "total": {
+                            "baseline": add_carb_total,
+                            "efficient": add_carb_total_eff},
+                        "competed": {
+                            "baseline": add_carb_compete,
+                            "efficient": add_carb_compete_eff}},
+                    "cost": {
+                        "stock": {
+                            "total": {
+                                "baseline": add_stock_cost,
+                                "efficient": add_stock_cost_meas},
+                            "competed": {
+                                "baseline": add_stock_cost_compete,
+                                "efficient": add_stock_cost_compete_meas}},
+                        "energy": {
+                            "total": {
+                                "baseline": add_energy_cost,
+                                "efficient": add_energy_cost_eff},
+                            "competed": {
+                                "baseline": add_energy_cost_compete,
+                                "efficient": add_energy_cost_compete_eff}},
+                        "carbon": {
+                            "total": {
+                                "baseline": add_carb_cost,
+                                "efficient": add_carb_cost_eff},
+                            "competed": {
+                                "baseline": add_carb_cost_compete,
+                                "efficient": add_carb_cost_compete_eff}}},
+                    "lifetime": {
+                        "baseline": {
+                            yr: life_base[yr] * add_stock_total[yr] for
+                            yr in self.handyvars.aeo_years},
+                        "measure": life_meas}}
+
+                # Using the key chain for the current microsegment,
+                # determine the output climate zone, building type, and end
+                # use breakout categories to which the current microsegment
+                # applies
+
+                # Establish applicable climate zone breakout
+                for cz in self.handyvars.out_break_czones.items():
+                    if mskeys[1] in cz[1]:
+                        out_cz = cz[0]
+                # Establish applicable building type breakout
+                for bldg in self.handyvars.out_break_bldgtypes.items():
+                    if all([x in bldg[1] for x in [
+                            mskeys[2], mskeys[-1]]]):
+                        out_bldg = bldg[0]
+                # Establish applicable end use breakout
+                for eu in self.handyvars.out_break_enduses.items():
+                    # * Note: The 'other' microsegment end
+                    # use may map to either the 'Refrigeration' output
+                    # breakout or the 'Other' output breakout, depending on
+                    # the technology type specified in the measure
+                    # definition. Also note that 'supply' side
+                    # heating/cooling microsegments map to the
+                    # 'Heating (Equip.)'/'Cooling (Equip.)' end uses, while
+                    # 'demand' side heating/cooling microsegments map to
+                    # the 'Heating (Env.)'/'Cooling (Env.) end use, with
+                    # the exception of 'demand' side heating/cooling
+                    # microsegments that represent waste heat from lights -
+                    # these are categorized as part of the 'Lighting' end
+                    # use
+                    if mskeys[4] == "other":
+                        if mskeys[5] == "freezers":
+                            out_eu = "Refrigeration"
+                        else:
+                            out_eu = "Other"
+                    elif mskeys[4] in eu[1]:
+                        if (eu[0] in ["Heating (Equip.)",
+                                      "Cooling (Equip.)"] and
+                            mskeys[5] == "supply") or (
+                            eu[0] in ["Heating (Env.)",
+                                      "Cooling (Env.)"] and
+                            mskeys[5] == "demand" and
+                            mskeys[0] == "primary") or (
+                            eu[0] not in ["Heating (Equip.)",
+                                          "Cooling (Equip.)",
+                                          "Heating (Env.)",
+                                          "Cooling (Env.)"]):
+                            out_eu = eu[0]
+                    elif "lighting gain" in mskeys:
+                        out_eu = "Lighting"
+                # If applicable, establish fuel type breakout (electric vs.
+                # non-electric); note – only applicable to end uses that
+                # are at least in part fossil-fired
+                if (len(self.handyvars.out_break_fuels.keys()) != 0) and (
+                    out_eu in ["Heating (Equip.)", "Cooling (Equip.)",
+                               "Heating (Env.)", "Cooling (Env.)",
+                               "Water Heating", "Cooking"]):
+                    # Flag for detailed fuel type breakout
+                    detail = len(self.handyvars.out_break_fuels.keys()) > 2
+                    # Establish breakout of fuel type that is being
+                    # reduced (e.g., through efficiency or fuel switching
+                    # away from the fuel)
+                    for f in self.handyvars.out_break_fuels.items():
+                        if mskeys[3] in f[1]:
+                            # Special handling for other fuel tech.,
+                            # under detailed fuel type breakouts; this
+                            # tech. may fit into multiple fuel categories
+                            if detail and mskeys[3] == "other fuel":
+                                # Assign coal/kerosene tech.
+                                if f[0] == "Distillate/Other" and (
+                                    mskeys[-2] is not None and any([
+                                        x in mskeys[-2] for x in [
+                                        "coal", "kerosene"]])):
+                                    out_fuel_save = f[0]
+                                # Assign wood tech.
+                                elif f[0] == "Biomass" and (
+                                    mskeys[-2] is not None and "wood" in
+                                        mskeys[-2]):
+                                    out_fuel_save = f[0]
+                                # All other tech. goes to propane
+                                elif f[0] == "Propane":
+                                    out_fuel_save = f[0]
+                            else:
+                                out_fuel_save = f[0]
+                    # Establish breakout of fuel type that is being added
+                    # to via fuel switching, if applicable
+                    if self.fuel_switch_to == "electricity" and \
+                            out_fuel_save != "Electric":
+                        out_fuel_gain = "Electric"
+                    elif self.fuel_switch_to not in [None, "electricity"] \
+                            and out_fuel_save == "Electric":
+                        # Check for detailed fuel types
+                        if detail:
+                            for f in \
+                                    self.handyvars.out_break_fuels.items():
+                                # Special handling for other fuel tech.,
+                                # under detailed fuel type breakouts; this
+                                # tech. may fit into multiple fuel cats.
+                                if self.fuel_switch_to in f[1] and \
+                                        mskeys[3] == "other fuel":
+                                    # Assign coal/kerosene tech.
+                                    if f[0] == "Distillate/Other" and (
+                                        mskeys[-2] is not None and any([
+                                            x in mskeys[-2] for x in [
+                                            "coal", "kerosene"]])):
+                                        out_fuel_gain = f[0]
+                                    # Assign wood tech.
+                                    elif f[0] == "Biomass" and (
+                                        mskeys[-2] is not None and "wood"
+                                            in mskeys[-2]):
+                                        out_fuel_gain = f[0]
+                                    # All other tech. goes to propane
+                                    elif f[0] == "Propane":
+                                        out_fuel_gain = f[0]
+                                elif self.fuel_switch_to in f[1]:
+                                    out_fuel_gain = f[0]
+                        else:
+                            out_fuel_gain = "Non-Electric"
+                    else:
+                        out_fuel_gain = ""
+                else:
+                    out_fuel_save, out_fuel_gain = ("" for n in range(2))
+
+                # Given the contributing microsegment's applicable climate
+                # zone, building type, and end use categories, add the
+                # microsegment's energy/ecost/carbon baseline, efficient
+                # energy/ecost/carbon, and energy/ecost/carbon savings val.
+                # to the appropriate leaf node of the dictionary used to
+                # store measure output breakout information. * Note: the
+                # values in this dictionary will be normalized in run.py by
+                # the measure's energy/ecost/carbon baseline, efficient
+                # energy/ecost/carbon, and energy/ecost/carbon savings
+                # totals (post-competition) to yield the fractions of
+                # measure energy, carbon, and cost markets/savings that are
+                # attributable to each climate zone, building type, and
+                # end use that the measure applies to
+                try:
+                    # Create a shorthand for baseline and efficient
+                    # energy/carbon/cost data to add to the breakout dict
+                    base_data = [add_energy_total, add_energy_cost,
+                                 add_carb_total]
+                    eff_data = [add_energy_total_eff, add_energy_cost_eff,
+                                add_carb_total_eff]
+                    # For a fuel switching case where the user desires that
+                    # the outputs be split by fuel, create shorthands for
+                    # any efficient energy/carbon/cost that remains with
+                    # the baseline fuel
+                    if self.fuel_switch_to is not None and out_fuel_save:
+                        eff_data_fs = [add_fs_energy_eff_remain,
+                                       add_fs_energy_cost_eff_remain,
+                                       add_fs_carb_eff_remain]
+                        # Record the efficient energy that has not yet fuel
+                        # switched and total efficient energy for the
+                        # current mseg for later use in packaging and/or
+                        # competing measures
+                        self.eff_fs_splt[adopt_scheme][
+                            str(contrib_mseg_key)] = {
+                                "energy": [add_fs_energy_eff_remain,
+                                           add_energy_total_eff],
+                                "cost": [add_fs_energy_cost_eff_remain,
+                                         add_energy_cost_eff],
+                                "carbon": [add_fs_carb_eff_remain,
+                                           add_carb_total_eff]}
+                    # Handle case where output breakout includes fuel type
+                    # breakout or not
+                    if out_fuel_save:
+                        # Update results for the baseline fuel; handle
+                        # case where results for the current region, bldg.,
+                        # end use, and fuel have not yet been initialized
+                        try:
+                            for yr in self.handyvars.aeo_years:
+                                for ind, key in enumerate([
+                                        "energy", "cost", "carbon"]):
+                                    # Baseline; add in baseline data
+                                    # as-is
+                                    self.markets[adopt_scheme][
+                                        "mseg_out_break"][key][
+                                        "baseline"][out_cz][out_bldg][
+                                        out_eu][out_fuel_save][yr] += \
+                                        base_data[ind][yr]
+                                    # Efficient and savings; if there is
+                                    # fuel switching, only the portion
+                                    # of the efficient case results that
+                                    # have not yet switched (due to stock
+                                    # turnover limitations) remain, and
+                                    # savings are the delta between what
+                                    # remains unswitched in the efficient
+                                    # case and the baseline
+                                    if not out_fuel_gain:
+                                        self.markets[adopt_scheme][
+                                            "mseg_out_break"][key][
+                                            "efficient"][out_cz][out_bldg][
+                                            out_eu][out_fuel_save][yr] += \
+                                            eff_data[ind][yr]
+                                        self.markets[adopt_scheme][
+                                            "mseg_out_break"][key][
+                                            "savings"][out_cz][out_bldg][
+                                            out_eu][out_fuel_save][yr] += (
+                                                base_data[ind][yr] -
+                                                eff_data[ind][yr])
+                                    else:
+                                        self.markets[adopt_scheme][
+                                            "mseg_out_break"][key][
+                                            "efficient"][out_cz][out_bldg][
+                                            out_eu][out_fuel_save][yr] += \
+                                            eff_data_fs[ind][yr]
+                                        self.markets[adopt_scheme][
+                                            "mseg_out_break"][key][
+                                            "savings"][out_cz][out_bldg][
+                                            out_eu][out_fuel_save][yr] += (
+                                                base_data[ind][yr] -
+                                                eff_data_fs[ind][yr])
+                        except KeyError:
+                            for ind, key in enumerate([
+                                    "energy", "cost", "carbon"]):
+                                # Baseline; add in baseline data
+                                # as-is
+                                self.markets[adopt_scheme][
+                                    "mseg_out_break"][key][
+                                    "baseline"][out_cz][out_bldg][
+                                    out_eu][out_fuel_save] = {
+                                        yr: base_data[ind][yr] for
+                                        yr in self.handyvars.aeo_years}
+                                # Efficient and savings; if there is fuel
+                                # switching, only the portion of the
+                                # efficient case results that have not yet
+                                # switched (due to stock turnover
+                                # limitations) remain, and savings are the
+                                # delta between what remains unswitched in
+                                # the efficient case and the baseline
+                                if not out_fuel_gain:
+                                    self.markets[adopt_scheme][
+                                        "mseg_out_break"][key][
+                                        "efficient"][out_cz][out_bldg][
+                                        out_eu][out_fuel_save] = {
+                                            yr: eff_data[ind][yr] for
+                                            yr in self.handyvars.aeo_years}
+                                    self.markets[adopt_scheme][
+                                        "mseg_out_break"][key][
+                                        "savings"][out_cz][out_bldg][
+                                            out_eu][out_fuel_save] = {
+                                            yr: (base_data[ind][yr] -
+                                                 eff_data[ind][yr]) for
+                                            yr in self.handyvars.aeo_years}
+                                else:
+                                    self.markets[adopt_scheme][
+                                        "mseg_out_break"][key][
+                                        "efficient"][out_cz][out_bldg][
+                                        out_eu][out_fuel_save] = {
+                                            yr: eff_data_fs[ind][yr] for
+                                            yr in self.handyvars.aeo_years}
+                                    self.markets[adopt_scheme][
+                                        "mseg_out_break"][key][
+                                        "savings"][out_cz][out_bldg][
+                                            out_eu][out_fuel_save] = {
+                                            yr: (base_data[ind][yr] -
+                                                 eff_data_fs[ind][yr]) for
+                                            yr in self.handyvars.aeo_years}
+                        # In a fuel switching case, update results for
+                        # the fuel being switched/added to
+                        if out_fuel_gain:
+                            # Handle case where results for the current
+                            # region, bldg., end use, and fuel have not yet
+                            # been initialized
+                            try:
+                                for yr in self.handyvars.aeo_years:
+                                    for ind, key in enumerate([
+                                            "energy", "cost", "carbon"]):
+                                        # Note: no need to add to baseline
+                                        # for fuel being switched to,
+                                        # which remains zero
+
+                                        # Efficient and savings; efficient
+                                        # case energy/emissions/cost that
+                                        # do not remain with the baseline
+                                        # fuel are added to the switched to
+                                        # fuel and represented as negative
+                                        # savings for the switched to fuel
+                                        self.markets[adopt_scheme][
+                                            "mseg_out_break"][key][
+                                            "efficient"][out_cz][out_bldg][
+                                            out_eu][out_fuel_gain][yr] += \
+                                            (eff_data[ind][yr] -
+                                             eff_data_fs[ind][yr])
+                                        self.markets[adopt_scheme][
+                                            "mseg_out_break"][key][
+                                            "savings"][out_cz][out_bldg][
+                                            out_eu][out_fuel_gain][yr] -= (
+                                                eff_data[ind][yr] -
+                                                eff_data_fs[ind][yr])
+                            except KeyError:
+                                for ind, key in enumerate([
+                                        "energy", "cost", "carbon"]):
+                                    # Baseline for the fuel being switched
+                                    # to is initialized as zero
+                                    self.markets[adopt_scheme][
+                                        "mseg_out_break"][key][
+                                        "baseline"][out_cz][out_bldg][
+                                        out_eu][out_fuel_gain] = {
+                                            yr: 0 for yr in
+                                            self.handyvars.aeo_years}
+                                    # Efficient and savings; efficient
+                                    # case energy/emissions/cost that
+                                    # do not remain with the baseline
+                                    # fuel are added to the switched to
+                                    # fuel and represented as negative
+                                    # savings for the switched to fuel
+                                    self.markets[adopt_scheme][
+                                        "mseg_out_break"][key][
+                                        "efficient"][out_cz][out_bldg][
+                                        out_eu][out_fuel_gain] = {
+                                            yr: (eff_data[ind][yr] -
+                                                 eff_data_fs[ind][yr]) for
+                                            yr in self.handyvars.aeo_years}
+                                    self.markets[adopt_scheme][
+                                        "mseg_out_break"][key][
+                                        "savings"][out_cz][out_bldg][
+                                            out_eu][out_fuel_gain] = {
+                                            yr: -(eff_data[ind][yr] -
+                                                  eff_data_fs[ind][yr]) for
+                                            yr in self.handyvars.aeo_years}
+                    else:
+                        # Handle case where results for the current region,
+                        # bldg., end use, and fuel have not yet been
+                        # initialized
+                        try:
+                            for yr in self.handyvars.aeo_years:
+                                for ind, key in enumerate([
+                                        "energy", "cost", "carbon"]):
+                                    self.markets[adopt_scheme][
+                                        "mseg_out_break"][key][
+                                        "baseline"][out_cz][out_bldg][
+                                        out_eu][yr] += base_data[ind][yr]
+                                    self.markets[adopt_scheme][
+                                        "mseg_out_break"][key][
+                                        "efficient"][out_cz][out_bldg][
+                                        out_eu][yr] += eff_data[ind][yr]
+                                    self.markets[adopt_scheme][
+                                        "mseg_out_break"][key][
+                                        "savings"][out_cz][out_bldg][
+                                        out_eu][yr] += (
+                                            base_data[ind][yr] -
+                                            eff_data[ind][yr])
+                        except KeyError:
+                            for ind, key in enumerate([
+                                    "energy", "cost", "carbon"]):
+                                self.markets[adopt_scheme][
+                                    "mseg_out_break"][key]["baseline"][
+                                    out_cz][out_bldg][out_eu] = {
+                                        yr: base_data[ind][yr] for
+                                        yr in self.handyvars.aeo_years}
+                                self.markets[adopt_scheme][
+                                    "mseg_out_break"][key]["efficient"][
+                                    out_cz][out_bldg][out_eu] = {
+                                        yr: eff_data[ind][yr] for
+                                        yr in self.handyvars.aeo_years}
+                                self.markets[adopt_scheme][
+                                    "mseg_out_break"][key]["savings"][
+                                    out_cz][out_bldg][out_eu] = {
+                                        yr: (base_data[ind][yr] -
+                                             eff_data[ind][yr]) for
+                                        yr in self.handyvars.aeo_years}
+
+                # Yield warning if current contributing microsegment cannot
+                # be mapped to an output breakout category
+                except KeyError:
+                    verboseprint(
+                        opts.verbose,
+                        "Baseline market key chain: '" +
+                        str(mskeys) +
+                        "' for ECM '" + self.name + "' does not map to "
+                        "output breakout categories, thus will not "
+                        "be reflected in output breakout data")
+
+                # Record contributing microsegment data needed for ECM
+                # competition in the analysis engine
+                contrib_mseg_key_str = str(contrib_mseg_key)
+
+                # Case with no existing 'windows' contributing microsegment
+                # for the current climate zone, building type, fuel type,
+                # and end use (create new 'contributing mseg keys and
+                # values' and 'competed choice parameters' microsegment
+                # information)
+                if contrib_mseg_key_str not in self.markets[adopt_scheme][
+                    "mseg_adjust"][
+                        "contributing mseg keys and values"].keys():
+                    # Register contributing microsegment information for
+                    # later use in determining savings overlaps for
+                    # measures that apply to this microsegment
+                    self.markets[adopt_scheme]["mseg_adjust"][
+                        "contributing mseg keys and values"][
+                        contrib_mseg_key_str] = add_dict
+                    # Register choice parameters associated with
+                    # contributing microsegment for later use in
+                    # apportioning out various technology options across
+                    # competed stock
+                    self.markets[adopt_scheme]["mseg_adjust"][
+                        "competed choice parameters"][
+                        contrib_mseg_key_str] = choice_params
+                # Case with existing 'windows' contributing microsegment
+                # for the current climate zone, building type, fuel type,
+                # and end use (add to existing 'contributing mseg keys and
+                # values' information)
+                else:
+                    self.markets[adopt_scheme]["mseg_adjust"][
+                        "contributing mseg keys and values"][
+                        contrib_mseg_key_str] = self.add_keyvals(
+                            self.markets[adopt_scheme]["mseg_adjust"][
+                                "contributing mseg keys and values"][
+                                contrib_mseg_key_str], add_dict)
+
+                # Market scaling fraction comes out of
+                # "partition_microsegment" function in dict format, broken
+                # by year; reformat as single value if values for each year
+                # are identical
+                if all([round(x[1], 3) == round(mkt_scale_frac_fin[
+                        self.handyvars.aeo_years[0]], 3) for
+                        x in mkt_scale_frac_fin.items()]):
+                    mkt_scale_frac_fin = mkt_scale_frac_fin[
+                        self.handyvars.aeo_years[0]]
+
+                # Record the sub-market scaling fraction associated with
+                # the current contributing microsegment
+                self.markets[adopt_scheme]["mseg_adjust"][
+                    "contributing mseg keys and values"][
+                    contrib_mseg_key_str]["sub-market scaling"] = \
+                    mkt_scale_frac_fin
+
+                # Add all updated contributing microsegment stock, energy
+                # carbon, cost, and lifetime information to existing master
+                # mseg dict and move to next iteration of the loop through
+                # key chains
+                self.markets[adopt_scheme]["master_mseg"] = \
+                    self.add_keyvals(self.markets[adopt_scheme][
+                        "master_mseg"], add_dict)
+
     def gen_tsv_facts(self, tsv_data, mskeys, bldg_sect, cost_conv, opts):
         """Set annual re-weighting factors and hourly load fractions for TSV.
 
@@ -5601,38 +6458,33 @@ class Measure(object):
                 cost_fact_hourly, carbon_fact_hourly, cost_yr_map, \
                     carb_yr_map = (None for n in range(4))
             else:
-                # Set time-varying electricity price scaling factors for the
-                # EMM region (dict with keys distinguished by year, *CURRENTLY*
-                # every two years beginning in 2018)
-                if self.handyvars.tsv_hourly_price[mskeys[1]] is None:
-                    cost_fact_hourly,  self.handyvars.tsv_hourly_price[
-                        mskeys[1]] = ({yr: tsv_data["price"][
-                            "electricity price shapes"][yr][
-                            mskeys[1]] for yr in tsv_data["price"][
-                            "electricity price shapes"].keys()} for
-                            n in range(2))
-                else:
-                    cost_fact_hourly = \
-                        self.handyvars.tsv_hourly_price[mskeys[1]]
                 # Set TSV data -> AEO year mapping to use in preparing cost
                 # scaling factors
                 cost_yr_map = tsv_data["price_yr_map"]
-                # Set time-varying emissions scaling factors for the EMM
-                # region (dict with keys distinguished by year, *CURRENTLY*
-                # every two years beginning in 2018)
-                if self.handyvars.tsv_hourly_emissions[mskeys[1]] is None:
-                    carbon_fact_hourly,  self.handyvars.tsv_hourly_emissions[
-                        mskeys[1]] = ({yr: tsv_data["emissions"][
-                            "average carbon emissions rates"][yr][
-                            mskeys[1]] for yr in tsv_data["emissions"][
-                            "average carbon emissions rates"].keys()} for
-                            n in range(2))
-                else:
-                    carbon_fact_hourly = self.handyvars.tsv_hourly_emissions[
-                        mskeys[1]]
+                # Set time-varying electricity price scaling factors for the
+                # EMM region (array with rows for each year of the TSV data
+                # -> AEO year mapping, *CURRENTLY* every two years beginning
+                # in 2018, and columns for each hour of the year)
+                if self.handyvars.tsv_hourly_price[mskeys[1]] is None:
+                    self.handyvars.tsv_hourly_price[mskeys[1]] = numpy.array([
+                        tsv_data["price"]["electricity price shapes"][yr][
+                            mskeys[1]] for yr in cost_yr_map.keys()],
+                        dtype=float)
+                cost_fact_hourly = self.handyvars.tsv_hourly_price[mskeys[1]]
                 # Set TSV data -> AEO year mapping to use in preparing
                 # emissions scaling factors
                 carb_yr_map = tsv_data["emissions_yr_map"]
+                # Set time-varying emissions scaling factors for the EMM
+                # region (array with rows for each year of the TSV data ->
+                # AEO year mapping, *CURRENTLY* every two years beginning in
+                # 2018, and columns for each hour of the year)
+                if self.handyvars.tsv_hourly_emissions[mskeys[1]] is None:
+                    self.handyvars.tsv_hourly_emissions[mskeys[1]] = \
+                        numpy.array([tsv_data["emissions"][
+                            "average carbon emissions rates"][yr][mskeys[1]]
+                            for yr in carb_yr_map.keys()], dtype=float)
+                carbon_fact_hourly = self.handyvars.tsv_hourly_emissions[
+                    mskeys[1]]
 
             # Use 8760 load shape information, combined with 8760 price and
             # emissions shape information above, to calculate factors that
@@ -5677,8 +6529,10 @@ class Measure(object):
             load_fact (dict): Hourly energy load fractions of annual load.
             ash_cz_wts (list): Factors to map ASH climates -> EMM regions.
             eplus_bldg_wts (dict): Factors to map EPlus -> Scout bldg. types.
-            cost_fact_hourly (list): 8760 electricity price scaling factors.
-            carbon_fact_hourly (list): 8760 emissions scaling factors.
+            cost_fact_hourly (numpy.ndarray): 8760 electricity price scaling
+                factors for each year of the TSV price data.
+            carbon_fact_hourly (numpy.ndarray): 8760 emissions scaling factors
+                for each year of the TSV emissions data.
             mskeys (tuple): Microsegment information.
             bldg_sect (str): Building sector flag (residential/commercial).
             eu (str): End use for keying time sensitive load data.
@@ -5689,7 +6543,7 @@ class Measure(object):
         Returns:
             Dict of microsegment-specific energy, cost, and emissions re-
             weighting factors that reflect time-sensitive evaluation of energy
-            efficiency and associated energy costs/carbon emissions; list
+            efficiency and associated energy costs/carbon emissions; arrays
             with hourly fractions of annual baseline and efficient energy use
             (if desired by the user)
         """
@@ -5703,25 +6557,14 @@ class Measure(object):
         # Initialize hourly fractions of annual baseline and efficient energy
         # if sector-level load shape information is desired by the user
         if opts.sect_shapes is True:
-            energy_base_shape, energy_eff_shape = ([
-                0 for x in range(8760)] for n in range(2))
-        # Initialize carbon/cost scaling factor variables, but only if
-        # either measure TSV features are present or the user desires
-        # TSV metrics outputs; assume these shapes are not necessary if
-        # the user only desires sector-level load shapes
-        if opts.tsv_metrics is not False or self.tsv_features is not None:
-            # Initial format of cost/carbon scaling factor data (broken out by
-            # years available in the 8760 TSV cost/carbon input data)
-            cost_scale_base, cost_scale_eff = (
-                {yr: 0 for yr in cost_yr_map.keys()} for n in range(2))
-            carb_scale_base, carb_scale_eff = (
-                {yr: 0 for yr in carb_yr_map.keys()} for n in range(2))
-            # Final format of cost/carbon scaling factor data (broken out by
-            # AEO years)
-            cost_scale_base_aeo, cost_scale_eff_aeo, carb_scale_base_aeo, \
-                carb_scale_eff_aeo = (
-                    {yr: 0 for yr in self.handyvars.aeo_years} for
-                    n in range(4))
+            energy_base_shape, energy_eff_shape = (
+                numpy.zeros(8760) for n in range(2))
+        # Set short names for the day of year and hour of day of each of the
+        # 8760 hours of the year (both indexed from zero)
+        hr_day, hr_hour = [self.handyvars.tsv_hour_index[x] for x in [
+            "day", "hour"]]
+        # Set short name for the hours of the year (indexed from zero)
+        hr_year = numpy.arange(8760)
 
         # Set the user-specified time-sensitive valuation features
         # for the current ECM; handle cases where this parameter is
@@ -5855,7 +6698,7 @@ class Measure(object):
                     try:
                         base_load_hourly = load_fact[
                             load_fact_bldg_key]["load shape"][cz[0]]
-                    except (KeyError, TypeError):
+                    except (KeyError, TypeError, IndexError):
                         base_load_hourly = load_fact[
                             load_fact_bldg_key]["load shape"]
                 else:
@@ -5868,11 +6711,12 @@ class Measure(object):
                     # climate zone
                     try:
                         base_load_hourly = load_fact[cz[0]]
-                    except (KeyError, TypeError):
+                    except (KeyError, TypeError, IndexError):
                         base_load_hourly = load_fact
+                base_load_hourly = numpy.asarray(base_load_hourly, dtype=float)
 
                 # Initialize efficient load shape as equal to base load
-                eff_load_hourly = copy.deepcopy(base_load_hourly)
+                eff_load_hourly = base_load_hourly.copy()
 
                 # Loop through all time-varying efficiency features in sorted
                 # order, applying each successively to the base load shape
@@ -5937,10 +6781,10 @@ class Measure(object):
                     except (TypeError, KeyError):
                         applicable_hrs = list(range(0, 24))
 
-                    # Set enumerate object for applicable day/hour ranges
-                    enumerate_list = list(
-                        enumerate(itertools.product(
-                            range(365), range(24))))
+                    # Flag the hours of the year that fall within the
+                    # applicable day and hour ranges
+                    in_days = numpy.isin(hr_day, applicable_days)
+                    in_hrs = numpy.isin(hr_hour, applicable_hrs)
 
                     # Apply time-varying impacts based on type of time-varying
                     # efficiency feature(s) specified for the measure
@@ -5958,17 +6802,32 @@ class Measure(object):
                             rel_save_tsv = 0
                         # Reflect the shed impacts on efficient load shape
                         # across all relevant hours of the year
-                        eff_load_hourly = [base_load_hourly[i] * (
-                            1 - rel_save_tsv) if (
-                            x in applicable_days and y in applicable_hrs) else
-                            eff_load_hourly[i] for
-                            i, (x, y) in enumerate_list]
+                        eff_load_hourly = numpy.where(
+                            in_days & in_hrs,
+                            base_load_hourly * (1 - rel_save_tsv),
+                            eff_load_hourly)
                     # "Shift" time-varying efficiency features move a certain
                     # percentage of baseline load from one time period into
                     # another time period
                     elif "shift" in a:
                         # Set the number of hours earlier to shift the load
                         offset_hrs = tsv_adjustments[a]["offset_hrs_earlier"]
+                        # Flag hours of the year for which the hour that is
+                        # offset from it falls within the same year and the
+                        # applicable day range
+                        in_yr_days = ((hr_year + offset_hrs) <= 8759) & in_days
+                        # Baseline load in the hour that is offset from each
+                        # hour of the year, and baseline load at the offset
+                        # hour of the day on the last day of the year (the
+                        # index (hour of day + offset) - 24 counts back from
+                        # the end of the year, or, for offsets past midnight,
+                        # forward from the start of the year); the latter is
+                        # used when the offset hour is not in the same year or
+                        # the hour is outside the applicable day range
+                        base_offset_yr = base_load_hourly[numpy.minimum(
+                            hr_year + offset_hrs, 8759)]
+                        base_offset_dy = base_load_hourly[
+                            (hr_hour + offset_hrs) - 24]
                         # If the user has not specified a time range for the
                         # load shifting, assume the measure shifts the entire
                         # load shape earlier by the number of hours set above
@@ -5977,12 +6836,8 @@ class Measure(object):
                             # across all 8760 hours of the year; the initial
                             # efficient load in hour X is now the load in hour
                             # X minus user-specified hour offset
-                            eff_load_hourly = [
-                                base_load_hourly[i + offset_hrs] if ((
-                                    i + offset_hrs) <= 8759 and
-                                    x in applicable_days) else
-                                base_load_hourly[(y + offset_hrs) - 24] for
-                                i, (x, y) in enumerate_list]
+                            eff_load_hourly = numpy.where(
+                                in_yr_days, base_offset_yr, base_offset_dy)
                         # If the user has specified a time range for the load
                         # shifting, shift the load in accordance with range
                         else:
@@ -6017,41 +6872,25 @@ class Measure(object):
                             # user-specified % of load in the user-specified
                             # hour range and move it X hours earlier, where X
                             # is determined by the "offset_hours" parameter
-                            eff_load_hourly = [
-                                    (base_load_hourly[i] + (
-                                        base_load_hourly[
-                                            i + offset_hrs] *
-                                        rel_save_tsv)) if (
-                                        ((i + offset_hrs) <= 8759 and
-                                         x in applicable_days)
-                                        and y in hrs_to_shift_to and
-                                        y not in applicable_hrs) else
-                                    (base_load_hourly[i] * (
-                                      1 - rel_save_tsv) + (base_load_hourly[
-                                        i + offset_hrs] *
-                                        rel_save_tsv)) if (
-                                        ((i + offset_hrs) <= 8759 and
-                                         x in applicable_days)
-                                        and y in hrs_to_shift_to and
-                                        y in applicable_hrs) else
-                                    (base_load_hourly[i] +
-                                     base_load_hourly[
-                                        (y + offset_hrs) - 24] * rel_save_tsv)
-                                    if (y in hrs_to_shift_to and
-                                        y not in applicable_hrs and
-                                        x in applicable_days) else
-                                    (base_load_hourly[i] * (
-                                        1 - rel_save_tsv) + base_load_hourly[
-                                        (y + offset_hrs) - 24] * rel_save_tsv)
-                                    if (y in hrs_to_shift_to and
-                                        y in applicable_hrs and
-                                        x in applicable_days) else
-                                    eff_load_hourly[i] * (
-                                        1 - rel_save_tsv) if (
-                                        y in applicable_hrs and
-                                        x in applicable_days) else
-                                    eff_load_hourly[i] for i, (x, y) in
-                                    enumerate_list]
+                            in_shift_hrs = numpy.isin(hr_hour, hrs_to_shift_to)
+                            # Conditions are evaluated in order; the first
+                            # that holds for an hour sets its efficient load
+                            eff_load_hourly = numpy.select([
+                                in_yr_days & in_shift_hrs & ~in_hrs,
+                                in_yr_days & in_shift_hrs & in_hrs,
+                                in_days & in_shift_hrs & ~in_hrs,
+                                in_days & in_shift_hrs & in_hrs,
+                                in_days & in_hrs], [
+                                base_load_hourly + (
+                                    base_offset_yr * rel_save_tsv),
+                                base_load_hourly * (1 - rel_save_tsv) + (
+                                    base_offset_yr * rel_save_tsv),
+                                base_load_hourly + (
+                                    base_offset_dy * rel_save_tsv),
+                                base_load_hourly * (1 - rel_save_tsv) + (
+                                    base_offset_dy * rel_save_tsv),
+                                eff_load_hourly * (1 - rel_save_tsv)],
+                                default=eff_load_hourly)
 
                     # "Shape" time-sensitive efficiency features reshape
                     # the baseline load shape in accordance with custom load
@@ -6065,16 +6904,15 @@ class Measure(object):
                                 "custom_daily_savings"] is not None:
                             # Set the custom daily savings shape (each element
                             # of the list represents hourly savings fraction)
-                            custom_save_shape = \
-                                tsv_adjustments[a]["custom_daily_savings"]
+                            custom_save_shape = numpy.asarray(
+                                tsv_adjustments[a]["custom_daily_savings"],
+                                dtype=float)
                             # Reflect custom load savings in efficient load
                             # shape
-                            eff_load_hourly = [
-                                base_load_hourly[i] * (
-                                    1 - custom_save_shape[y]) if (
-                                    x in applicable_days) else
-                                eff_load_hourly[i] for
-                                i, (x, y) in enumerate_list]
+                            eff_load_hourly = numpy.where(
+                                in_days, base_load_hourly * (
+                                    1 - custom_save_shape[hr_hour]),
+                                eff_load_hourly)
 
                         # Custom annual load savings shape information contains
                         # savings fractions for all 8760 hours of the year
@@ -6131,19 +6969,19 @@ class Measure(object):
                                     "all baseline market segments the "
                                     "measure applies to in ./ecm_definitions/"
                                     "energy_plus_data/savings_shapes.")
-                                custom_hr_save_shape = [0 for x in range(8760)]
+                                custom_hr_save_shape = numpy.zeros(8760)
+                            custom_hr_save_shape = numpy.asarray(
+                                custom_hr_save_shape, dtype=float)
                             # Reflect custom load savings in efficient load
                             # shape; screen for NaNs in the CSV
-                            eff_load_hourly = [(
-                                base_load_hourly[x] +
-                                custom_hr_save_shape[x]) if
-                                numpy.isfinite(custom_hr_save_shape[x]) else
-                                eff_load_hourly[x] for x in range(8760)]
+                            eff_load_hourly = numpy.where(
+                                numpy.isfinite(custom_hr_save_shape),
+                                base_load_hourly + custom_hr_save_shape,
+                                eff_load_hourly)
                             # Ensure all efficient load fractions are greater
                             # than zero
-                            eff_load_hourly = [
-                                eff_load_hourly[x] if eff_load_hourly[x] >= 0
-                                else 0 for x in range(8760)]
+                            eff_load_hourly = numpy.where(
+                                eff_load_hourly >= 0, eff_load_hourly, 0)
                         else:
                             # Throw an error if the load reshaping operation
                             # name is invalid
@@ -6163,24 +7001,18 @@ class Measure(object):
                 # energy to reflect baseline hourly load shape plus effects of
                 # time-sensitive measure features on the baseline load (if any)
                 if opts.sect_shapes is True:
-                    # Base load weighted by contribution of climate for load
-                    # to EMM region
-                    base_ls_wt = [
-                        x * emm_adj_wt for x in base_load_hourly]
-                    # Efficient load weighted by contribution of climate for
-                    # load to current EMM region
-                    eff_ls_wt = [
-                        x * emm_adj_wt for x in eff_load_hourly]
-                    # Add to existing base load fractions (across all climates
-                    # that overlap with the current EMM region)
-                    energy_base_shape = [
-                        energy_base_shape[x] + base_ls_wt[x] for
-                        x in range(len(energy_base_shape))]
-                    # Add to existing efficient load fractions (across all
-                    # climates that overlap with the current EMM region)
-                    energy_eff_shape = [
-                        energy_eff_shape[x] + eff_ls_wt[x] for
-                        x in range(len(energy_eff_shape))]
+                    # Add base load weighted by contribution of climate for
+                    # load to EMM region to existing base load fractions
+                    # (across all climates that overlap with the current EMM
+                    # region)
+                    energy_base_shape = \
+                        energy_base_shape + base_load_hourly * emm_adj_wt
+                    # Add efficient load weighted by contribution of climate
+                    # for load to current EMM region to existing efficient
+                    # load fractions (across all climates that overlap with
+                    # the current EMM region)
+                    energy_eff_shape = \
+                        energy_eff_shape + eff_load_hourly * emm_adj_wt
 
                 # Further adjust baseline and efficient load shapes
                 # to account for time sensitive valuation (TSV) output metrics
@@ -6326,22 +7158,20 @@ class Measure(object):
                     # only the hourly values that fall within the applicable
                     # hour and day ranges from above; set all inapplicable
                     # values to zero (to maintain full 8760 list length)
-                    base_load_hourly, eff_load_hourly = [[
-                        (x[i] / avg_len) if (
-                            (d + 1) in tsv_metrics_days and
-                            (h + 1) in tsv_metrics_hrs)
-                        else 0 for
-                        i, (d, h) in
-                        self.handyvars.tsv_metrics_data["hourly index"]] for
+                    in_metrics_hrs = numpy.isin(
+                        hr_day + 1, tsv_metrics_days) & numpy.isin(
+                        hr_hour + 1, tsv_metrics_hrs)
+                    base_load_hourly, eff_load_hourly = [numpy.where(
+                        in_metrics_hrs, x / avg_len, 0) for
                         x in [base_load_hourly, eff_load_hourly]]
 
                     # Sum across all 8760 hourly baseline and efficient load
                     # values to arrive at final factor used to rescale
                     # annually-determined energy totals
-                    energy_scale_base += numpy.sum([
-                        x * emm_adj_wt for x in base_load_hourly])
-                    energy_scale_eff += numpy.sum([
-                        x * emm_adj_wt for x in eff_load_hourly])
+                    energy_scale_base += numpy.sum(
+                        base_load_hourly * emm_adj_wt)
+                    energy_scale_eff += numpy.sum(
+                        eff_load_hourly * emm_adj_wt)
                 else:
                     # If no tsv metrics are specified, annually-determined
                     # baseline energy total requires no rescaling (8760
@@ -6350,8 +7180,8 @@ class Measure(object):
                     # Sum across all 8760 hourly efficient load values
                     # to arrive at final factor used to rescale annually-
                     # determined energy totals
-                    energy_scale_eff += numpy.sum([
-                        x * emm_adj_wt for x in eff_load_hourly])
+                    energy_scale_eff += numpy.sum(
+                        eff_load_hourly * emm_adj_wt)
 
         # Finalize carbon/cost scaling factor variables, but only if
         # either measure TSV features are present or the user desires
@@ -6362,70 +7192,37 @@ class Measure(object):
             # Calculate baseline/efficient cost rescaling factors as the sums
             # of the hourly baseline/efficient load shape multiplied by the
             # hourly price scaling factors; calculate across available
-            # projection years for the price scaling factors
-            for yr in cost_scale_base.keys():
-                cost_scale_base[yr] += numpy.sum([
-                    x * y for x, y in zip(
-                        base_load_hourly, cost_fact_hourly[yr])])
-                cost_scale_eff[yr] += numpy.sum([
-                    x * y for x, y in zip(
-                        eff_load_hourly, cost_fact_hourly[yr])])
+            # projection years for the price scaling factors (one row of the
+            # price scaling factors per year)
+            cost_scale_base, cost_scale_eff = [
+                cost_fact_hourly @ x for x in [
+                    base_load_hourly, eff_load_hourly]]
 
             # Calculate baseline/efficient emissions rescaling factors as the
             # sums of the hourly baseline/efficient load shape multiplied by
             # the hourly emissions scaling factors; calculate across available
             # projection years for the emissions scaling factors
-            for yr in carb_scale_base.keys():
-                carb_scale_base[yr] += numpy.sum([
-                    x * y for x, y in zip(
-                        base_load_hourly, carbon_fact_hourly[yr])])
-                carb_scale_eff[yr] += numpy.sum([
-                    x * y for x, y in zip(
-                        eff_load_hourly, carbon_fact_hourly[yr])])
+            carb_scale_base, carb_scale_eff = [
+                carbon_fact_hourly @ x for x in [
+                    base_load_hourly, eff_load_hourly]]
 
             # Extend price/emissions factors across all years in the AEO time
-            # horizon
-            for yr in self.handyvars.aeo_years:
-                # Find year in the cost scaling factors data that maps to the
-                # current AEO year
-                tsv_yr_cost = [
-                    x[0] for x in cost_yr_map.items() if yr in x[1]][0]
-                # Find year in the emissions scaling factors data that maps to
-                # the current AEO year
-                tsv_yr_carb = [
-                    x[0] for x in carb_yr_map.items() if yr in x[1]][0]
-                # Finalize the cost/emissions scaling factors data for the
-                # current AEO year
-
-                # APPROACH 1: TAKE THE DATA AS IS
-                cost_scale_base_aeo[yr], cost_scale_eff_aeo[yr], \
-                    carb_scale_base_aeo[yr], carb_scale_eff_aeo[yr] = [
-                    cost_scale_base[tsv_yr_cost],
-                    cost_scale_eff[tsv_yr_cost],
-                    carb_scale_base[tsv_yr_carb],
-                    carb_scale_eff[tsv_yr_carb]]
-                # # APPROACH 2: RUNNING MEAN
-                # if yr == self.handyvars.aeo_years[0]:
-                #     cost_scale_base_aeo[yr], cost_scale_eff_aeo[yr], \
-                #         carb_scale_base_aeo[yr], carb_scale_eff_aeo[yr] = [
-                #         cost_scale_base[tsv_yr_cost],
-                #         cost_scale_eff[tsv_yr_cost],
-                #         carb_scale_base[tsv_yr_carb],
-                #         carb_scale_eff[tsv_yr_carb]]
-                # else:
-                #     cost_scale_base_aeo[yr], cost_scale_eff_aeo[yr], \
-                #         carb_scale_base_aeo[yr], carb_scale_eff_aeo[yr] = [
-                #         x * (1 / len(self.handyvars.aeo_years)) + y * (
-                #             1 - (1 / len(self.handyvars.aeo_years))) for
-                #         x, y in zip([
-                #             cost_scale_base[tsv_yr_cost],
-                #             cost_scale_eff[tsv_yr_cost],
-                #             carb_scale_base[tsv_yr_carb],
-                #             carb_scale_eff[tsv_yr_carb]], [
-                #             cost_scale_base_aeo[str(int(yr) - 1)],
-                #             cost_scale_eff_aeo[str(int(yr) - 1)],
-                #             carb_scale_base_aeo[str(int(yr) - 1)],
-                #             carb_scale_eff_aeo[str(int(yr) - 1)]])]
+            # horizon; find the rows of the cost/emissions scaling factors
+            # data (years in the TSV data) that map to each AEO year
+            tsv_yr_cost, tsv_yr_carb = [[
+                [ind for ind, x in enumerate(yr_map.values()) if yr in x][0]
+                for yr in self.handyvars.aeo_years] for yr_map in [
+                    cost_yr_map, carb_yr_map]]
+            # Finalize the cost/emissions scaling factors data for each AEO
+            # year
+
+            # APPROACH 1: TAKE THE DATA AS IS
+            cost_scale_base_aeo, cost_scale_eff_aeo, carb_scale_base_aeo, \
+                carb_scale_eff_aeo = [
+                    dict(zip(self.handyvars.aeo_years, x[y].tolist())) for
+                    x, y in zip([cost_scale_base, cost_scale_eff,
+                                 carb_scale_base, carb_scale_eff], [
+                        tsv_yr_cost, tsv_yr_cost, tsv_yr_carb, tsv_yr_carb])]
         else:
             cost_scale_base_aeo, cost_scale_eff_aeo, carb_scale_base_aeo, \
                 carb_scale_eff_aeo = (1 for n in range(4))
@@ -6440,7 +7237,7 @@ class Measure(object):
         # system that wasn't there before)
         if self.fuel_switch_to == "electricity" and \
                 "electricity" not in mskeys and opts.sect_shapes is True:
-            energy_base_shape = [0 for x in range(len(energy_base_shape))]
+            energy_base_shape = numpy.zeros(8760)
 
         # Return hourly fractions of annual baseline and efficient energy
         # if sector-level load shape information is desired by the user
@@ -6747,102 +7544,26 @@ class Measure(object):
                 str(cost_meas_units_fin) + "' not equal to base units '" +
                 str(cost_base_units) + "'")
 
-        return cost_meas_fin, cost_meas_units_fin
-
-    def partition_microsegment(
-            self, adopt_scheme, diffuse_params, mskeys, bldg_sect, sqft_subst,
-            mkt_scale_frac, new_constr, stock_total_init, energy_total_init,
-            carb_total_init, cost_base, cost_meas, cost_energy_base,
-            cost_energy_meas, rel_perf, life_base, life_meas,
-            site_source_conv_base, site_source_conv_meas, intensity_carb_base,
-            intensity_carb_meas, energy_total_scnd, tsv_adj_init,
-            tsv_shapes, opts, contrib_mseg_key, ctrb_ms_pkg_prep, hp_rate,
-            retro_rate_mseg, calc_sect_shapes):
-        """Find total, competed, and efficient portions of a mkt. microsegment.
-
+        return cost_meas_fin, cost_meas_units_fin
+
+    def secnd_adj_key(self, adopt_scheme, mskeys, energy_total_scnd):
+        """Set the key for secondary microsegment adjustment information.
+
         Args:
             adopt_scheme (string): Assumed consumer adoption scenario.
-            diffuse_params (NoneType): Parameters relating to the 'adjusted
-                adoption' consumer choice model (currently a placeholder).
             mskeys (tuple): Dictionary key information for the currently
                 partitioned market microsegment (mseg type->reg->bldg->
                 fuel->end use->technology type->structure type).
-            bldg_sect (str): Flag for residential or commercial.
-            sqft_subst (int): Flag for use of square feet as a stock basis.
-            mkt_scale_frac (float): Microsegment scaling fraction (used to
-                break market microsegments into more granular sub-markets).
-            new_constr (dict): Data needed to determine the portion of the
-                total microsegment stock that is added in each year.
-            stock_total_init (dict): Baseline technology stock, by year.
-            energy_total_init (dict): Baseline microsegment primary energy use,
-                by year.
-            carb_total_init (dict): Baseline microsegment carbon emissions,
-                by year.
-            cost_base (dict): Baseline technology installed cost, by year.
-            cost_meas (float): Measure installed cost, by year.
-            cost_energy_base (dict): Baseline fuel cost, by year.
-            cost_energy_meas (dict): Measure fuel cost, by year.
-            rel_perf (float): Measure performance relative to baseline.
-            life_base (dict): Baseline technology lifetime.
-            life_meas (float): Measure lifetime.
-            site_source_conv_base (dict): Baseline fuel site-source conversion,
-                by year.
-            site_source_conv_meas (dict): Measure fuel site-source conversion,
-                by year.
-            intensity_carb_base (dict): Baseline fuel carbon intensity,
-                by year.
-            intensity_carb_meas (dict): Measure fuel carbon intensity, by year.
-            tsv_adj_init (dict): Adj. for time sensitive efficiency valuation.
-            tsv_shapes (dict): 8760 hourly adjustments (sum to tsv_adj values)
-            opts (object): Stores user-specified execution options.
-            contrib_mseg_key (tuple): The same as mskeys, but adjusted to merge
-                windows solar/conduction msegs into "windows" if applicable.
-            ctrb_ms_pkg_prep (list): Names of measures that contribute to pkgs.
-            hp_rate (dict): Exogenous rate of conversion of the baseline mseg
-                to HPs, if applicable.
-            retro_rate_mseg (dict): Microsegment-specific retrofit rate.
-            calc_sect_shapes (boolean): Flag for sector-shape calculations.
+            energy_total_scnd (dict or boolean): Total energy of any
+                secondary microsegments associated with a primary
+                microsegment, by year (False if there are none).
 
         Returns:
-            Total, total-efficient, competed, and competed-efficient
-            stock, energy, carbon, and cost market microsegments by year; for
-            fuel switching measures, also reports out any remaining
-            (unswitched) energy, carbon, and cost segments by year.
+            Key for the climate zone, building type, and structure type
+            shared by the primary and secondary microsegments, with the
+            associated adjustment information initialized as needed, or
+            None where no secondary microsegment is present.
         """
-        # Initialize stock, energy, and carbon mseg partition dicts, where the
-        # dict keys will be years in the modeling time horizon
-        stock_total, stock_total_sbmkt, energy_total, carb_total, \
-            energy_total_sbmkt, carb_total_sbmkt, stock_total_meas, \
-            stock_comp_cum_sbmkt, stock_total_hp_convert, energy_total_eff, \
-            carb_total_eff, stock_compete, stock_compete_meas, \
-            stock_compete_sbmkt, stock_comp_hp_convert, stock_comp_hp_remain, \
-            energy_compete, carb_compete, energy_compete_sbmkt, \
-            carb_compete_sbmkt, energy_compete_eff, carb_compete_eff, \
-            stock_total_cost, energy_total_cost, carb_total_cost, \
-            stock_total_cost_eff, energy_total_eff_cost, carb_total_eff_cost, \
-            stock_compete_cost, energy_compete_cost, carb_compete_cost, \
-            stock_compete_cost_eff, energy_compete_cost_eff, \
-            carb_compete_cost_eff, mkt_scale_frac_fin = (
-                {} for n in range(35))
-
-        # Initialize the portion of microsegment already captured by the
-        # efficient measure as 0, the cumulative portion of the microsegment
-        # already competed by the current year as 0, and a flag for whether
-        # full saturation with competed measures has not been achieved as True
-        meas_cum_frac = 0
-        comp_cum_frac = 0
-        turnover_cap_not_reached = True
-
-        # Initialize flag for whether measure is on the market in a given year
-        # as false
-        measure_on_mkt = ""
-
-        # Initialize variables that capture the portion of baseline
-        # energy, carbon, and energy cost that remains with the baseline fuel
-        # (for fuel switching measures only)
-        fs_energy_eff_remain, fs_carb_eff_remain, fs_energy_cost_eff_remain = (
-            {yr: 0 for yr in self.handyvars.aeo_years} for n in range(3))
-
         # In cases where secondary microsegments are present, initialize a
         # dict of year-by-year secondary microsegment adjustment information
         # that will be used to scale down the secondary microsegment(s) in
@@ -6921,6 +7642,262 @@ class Measure(object):
         else:
             secnd_mseg_adjkey = None
 
+        return secnd_mseg_adjkey
+
+    def stock_turnover_schemes(self, msegs, opts):
+        """Find the stock turnover of microsegments across adoption schemes.
+
+        Notes:
+            The turnover of all given microsegments under all adoption
+            schemes is found in one batch of the 'stock_turnover' kernel (or
+            one batch per number of measure performance samples). The
+            competed and captured fractions of secondary microsegments depend
+            on those of the associated primary microsegments, which are only
+            recorded as the primary microsegments are partitioned; batches
+            therefore do not mix primary and secondary microsegments (see
+            'fill_mkts').
+
+        Args:
+            msegs (list): Dicts of the information recorded for each
+                microsegment in 'fill_mkts', including its key chain
+                ('mskeys'), sub-market scaling fraction ('mkt_scale_frac'),
+                baseline technology stock over the modeling time horizon
+                ('add_stock_vec'), measure performance relative to baseline
+                ('rel_perf'), baseline technology lifetime ('life_base'),
+                total energy of any associated secondary microsegments
+                ('energy_total_scnd'), exogenous rate of conversion to HPs
+                ('hp_rate'), and microsegment-specific retrofit rate
+                ('retro_rate_mseg').
+            opts (object): Stores user-specified execution options.
+
+        Returns:
+            List with a dict of stock turnover results by adoption scheme for
+            each microsegment, each a dict of the results
+            'stock_turnover.turnover' yields and the sub-market scaling
+            fraction ('mkt_scale_frac') by year.
+        """
+        # Set short names for the modeling time horizon and for the
+        # conversion of year-keyed data to vectors over the time horizon
+        yrs, schemes = self.handyvars.aeo_years, self.handyvars.adopt_schemes
+        yr_vec = MsegStore.yr_vec
+        n_yrs, n_schemes = len(yrs), len(schemes)
+
+        # Flag years in which the measure is on the market
+        yrs_int = numpy.array([int(yr) for yr in yrs])
+        measure_on_mkt = (yrs_int >= self.market_entry_year) & (
+            yrs_int < self.market_exit_year)
+        # Flag the technical potential adoption scheme
+        tech_pot = [x == "Technical potential" for x in schemes]
+
+        # Set the kernel inputs for each microsegment, with a row for each
+        # adoption scheme
+        mseg_inputs = []
+        for mseg in msegs:
+            mskeys = mseg["mskeys"]
+            # Set the sub-market scaling fraction by year. For primary
+            # microsegments, this fraction does not vary by year; for
+            # secondary microsegments, it is updated based on any sub-market
+            # scaling in the associated primary microsegment (retaining the
+            # previous year's fraction where the primary microsegment has no
+            # energy use). Also set the competed fraction and the fraction
+            # captured by the measure in previous years for secondary
+            # microsegments, which are tied to the associated primary
+            # microsegment. The secondary microsegment adjustment information
+            # is initialized for all adoption schemes
+            mkt_scale_vec, comp_frac_scnd, meas_cum_frac_scnd = (
+                numpy.zeros((n_schemes, n_yrs)) for n in range(3))
+            mkt_scale_vec[:] = mseg["mkt_scale_frac"]
+            for s, adopt_scheme in enumerate(schemes):
+                secnd_mseg_adjkey = self.secnd_adj_key(
+                    adopt_scheme, mskeys, mseg["energy_total_scnd"])
+                if mskeys[0] != "secondary":
+                    continue
+                secnd_adj_sbmkt, secnd_adj_stk = (
+                    self.markets[adopt_scheme]["mseg_adjust"][
+                        "secondary mseg adjustments"][x] for x in [
+                        "sub-market", "stock-and-flow"])
+                scale_frac = mseg["mkt_scale_frac"]
+                for t, yr in enumerate(yrs):
+                    # Adjust sub-market scaling fraction
+                    if secnd_adj_sbmkt["original energy (total)"][
+                            secnd_mseg_adjkey][yr] != 0:
+                        scale_frac = secnd_adj_sbmkt[
+                            "adjusted energy (sub-market)"][
+                            secnd_mseg_adjkey][yr] / \
+                            secnd_adj_sbmkt["original energy (total)"][
+                            secnd_mseg_adjkey][yr]
+                    mkt_scale_vec[s, t] = scale_frac
+                    # Competed and previously captured fractions
+                    if secnd_adj_stk["original energy (total)"][
+                            secnd_mseg_adjkey][yr] != 0:
+                        comp_frac_scnd[s, t] = secnd_adj_stk[
+                            "adjusted energy (competed)"][
+                            secnd_mseg_adjkey][yr] / secnd_adj_sbmkt[
+                            "adjusted energy (sub-market)"][
+                            secnd_mseg_adjkey][yr]
+                        meas_cum_frac_scnd[s, t] = secnd_adj_stk[
+                            "adjusted energy (previously captured)"][
+                            secnd_mseg_adjkey][yr] / secnd_adj_stk[
+                            "original energy (total)"][secnd_mseg_adjkey][yr]
+
+            # Set baseline lifetime and retrofit rate information needed to
+            # find the replacement and retrofit fractions of primary
+            # microsegment stock (these fractions are zero for secondary
+            # microsegments)
+            if mskeys[0] == "primary":
+                life_base_vec, retro_rate_vec = (
+                    yr_vec(mseg[x], yrs) for x in [
+                        "life_base", "retro_rate_mseg"])
+            else:
+                life_base_vec, retro_rate_vec = numpy.ones(
+                    n_yrs), numpy.zeros(n_yrs)
+            # Set information needed for the diffusion of electric HPs
+            # according to pre-determined rates; for the measure's
+            # microsegment, HP conversion either adds to the microsegment
+            # (e.g., electric ASHP or HPWH measure) or erodes it (e.g., gas
+            # efficiency); depending on user command line inputs, either all
+            # retrofits or the HP rate times the retrofits are converted to
+            # HPs (except under technical potential)
+            if mseg["hp_rate"] and mskeys[0] == "primary":
+                hp_rate_vec = yr_vec(mseg["hp_rate"], yrs)
+                if (self.fuel_switch_to == "electricity" or
+                        "electricity" in mskeys):
+                    hp_mode = 1
+                else:
+                    hp_mode = 2
+                hp_retro_all = [not x and opts.exog_hp_rates[1] == '1' for
+                                x in tech_pot]
+            else:
+                hp_rate_vec, hp_mode = numpy.zeros(n_yrs), 0
+                hp_retro_all = [False] * n_schemes
+            # Measure relative performance by year (and by sample, in cases
+            # with a distribution on measure performance)
+            rel_perf_vec = numpy.array(
+                [mseg["rel_perf"][yr] for yr in yrs], dtype=float).reshape(
+                    1, n_yrs, -1)
+
+            mseg_inputs.append({
+                # Total stock after accounting for any sub-market scaling
+                "stock": yr_vec(mseg["add_stock_vec"], yrs) * mkt_scale_vec,
+                "life_base": numpy.broadcast_to(
+                    life_base_vec, (n_schemes, n_yrs)),
+                "retro_rate": numpy.broadcast_to(
+                    retro_rate_vec, (n_schemes, n_yrs)),
+                "hp_rate": numpy.broadcast_to(
+                    hp_rate_vec, (n_schemes, n_yrs)),
+                "on_mkt": numpy.broadcast_to(
+                    measure_on_mkt, (n_schemes, n_yrs)),
+                "rel_perf": numpy.broadcast_to(rel_perf_vec, (
+                    n_schemes, n_yrs, rel_perf_vec.shape[2])),
+                "comp_frac_scnd": comp_frac_scnd,
+                "meas_cum_frac_scnd": meas_cum_frac_scnd,
+                "primary": [mskeys[0] == "primary"] * n_schemes,
+                "new": [mskeys[-1] == "new"] * n_schemes,
+                "tech_pot": tech_pot, "hp_mode": [hp_mode] * n_schemes,
+                "hp_retro_all": hp_retro_all,
+                "entry_year": [self.market_entry_year] * n_schemes,
+                "mkt_scale_frac": mkt_scale_vec})
+
+        # Find the competed and captured portions of the stock in each year
+        # under each adoption scheme, given new construction, replacement,
+        # retrofit, and HP conversion dynamics and the stock captured by the
+        # measure in previous years. The microsegments are stacked into one
+        # batch for each number of measure performance samples, as relative
+        # performance inputs and outputs are shaped by this number
+        trn_msegs = [None] * len(msegs)
+        n_smps = [x["rel_perf"].shape[2] for x in mseg_inputs]
+        for n_smp in sorted(set(n_smps)):
+            batch = [ind for ind, x in enumerate(n_smps) if x == n_smp]
+            trn = stock_turnover.turnover(years=yrs_int, **{
+                x: numpy.concatenate([
+                    numpy.asarray(mseg_inputs[ind][x]) for ind in batch])
+                for x in mseg_inputs[0].keys() if x != "mkt_scale_frac"})
+            for b, ind in enumerate(batch):
+                trn_msegs[ind] = {adopt_scheme: dict(
+                    {x: trn[x][b * n_schemes + s] for x in trn.keys()},
+                    mkt_scale_frac=mseg_inputs[ind]["mkt_scale_frac"][s])
+                    for s, adopt_scheme in enumerate(schemes)}
+
+        return trn_msegs
+
+    def partition_microsegment(
+            self, adopt_scheme, diffuse_params, mskeys, bldg_sect, sqft_subst,
+            mkt_scale_frac, new_constr, stock_total_init, energy_total_init,
+            carb_total_init, cost_base, cost_meas, cost_energy_base,
+            cost_energy_meas, rel_perf, life_base, life_meas,
+            site_source_conv_base, site_source_conv_meas, intensity_carb_base,
+            intensity_carb_meas, energy_total_scnd, tsv_adj_init,
+            tsv_shapes, opts, contrib_mseg_key, ctrb_ms_pkg_prep, hp_rate,
+            retro_rate_mseg, calc_sect_shapes, trn):
+        """Find total, competed, and efficient portions of a mkt. microsegment.
+
+        Args:
+            adopt_scheme (string): Assumed consumer adoption scenario.
+            diffuse_params (NoneType): Parameters relating to the 'adjusted
+                adoption' consumer choice model (currently a placeholder).
+            mskeys (tuple): Dictionary key information for the currently
+                partitioned market microsegment (mseg type->reg->bldg->
+                fuel->end use->technology type->structure type).
+            bldg_sect (str): Flag for residential or commercial.
+            sqft_subst (int): Flag for use of square feet as a stock basis.
+            mkt_scale_frac (float): Microsegment scaling fraction (used to
+                break market microsegments into more granular sub-markets).
+            new_constr (dict): Data needed to determine the portion of the
+                total microsegment stock that is added in each year.
+            stock_total_init (numpy.ndarray): Baseline technology stock over
+                the modeling time horizon.
+            energy_total_init (numpy.ndarray): Baseline microsegment primary
+                energy use over the modeling time horizon.
+            carb_total_init (numpy.ndarray): Baseline microsegment carbon
+                emissions over the modeling time horizon.
+            cost_base (dict): Baseline technology installed cost, by year.
+            cost_meas (float): Measure installed cost, by year.
+            cost_energy_base (dict): Baseline fuel cost, by year.
+            cost_energy_meas (dict): Measure fuel cost, by year.
+            rel_perf (float): Measure performance relative to baseline.
+            life_base (dict): Baseline technology lifetime.
+            life_meas (float): Measure lifetime.
+            site_source_conv_base (dict): Baseline fuel site-source conversion,
+                by year.
+            site_source_conv_meas (dict): Measure fuel site-source conversion,
+                by year.
+            intensity_carb_base (dict): Baseline fuel carbon intensity,
+                by year.
+            intensity_carb_meas (dict): Measure fuel carbon intensity, by year.
+            tsv_adj_init (dict): Adj. for time sensitive efficiency valuation.
+            tsv_shapes (dict): 8760 hourly adjustments (sum to tsv_adj values)
+            opts (object): Stores user-specified execution options.
+            contrib_mseg_key (tuple): The same as mskeys, but adjusted to merge
+                windows solar/conduction msegs into "windows" if applicable.
+            ctrb_ms_pkg_prep (list): Names of measures that contribute to pkgs.
+            hp_rate (dict): Exogenous rate of conversion of the baseline mseg
+                to HPs, if applicable.
+            retro_rate_mseg (dict): Microsegment-specific retrofit rate.
+            calc_sect_shapes (boolean): Flag for sector-shape calculations.
+            trn (dict): Stock turnover results for the microsegment under
+                the adoption scheme (see 'stock_turnover_schemes').
+
+        Returns:
+            Total, total-efficient, competed, and competed-efficient
+            stock, energy, carbon, and cost market microsegments by year; for
+            fuel switching measures, also reports out any remaining
+            (unswitched) energy, carbon, and cost segments by year.
+        """
+        # Initialize variables that capture the portion of baseline
+        # energy, carbon, and energy cost that remains with the baseline fuel
+        # (for fuel switching measures only)
+        fs_energy_eff_remain, fs_carb_eff_remain, fs_energy_cost_eff_remain = (
+            {yr: 0 for yr in self.handyvars.aeo_years} for n in range(3))
+
+        # Set the key for any secondary microsegment adjustment information
+        # (see 'secnd_adj_key') and short names for this information
+        secnd_mseg_adjkey = self.secnd_adj_key(
+            adopt_scheme, mskeys, energy_total_scnd)
+        secnd_adj_sbmkt, secnd_adj_stk = (
+            self.markets[adopt_scheme]["mseg_adjust"][
+                "secondary mseg adjustments"][x] for x in [
+                "sub-market", "stock-and-flow"])
+
         # Set time sensitive energy scaling factors for all baseline stock
         # (does not depend on year)
         tsv_energy_base = tsv_adj_init["energy"]["baseline"]
@@ -6954,866 +7931,331 @@ class Measure(object):
         else:
             stk_serv_cap_cnv = 1
 
-        # Loop through and update stock, energy, and carbon mseg partitions for
-        # each year in the modeling time horizon
-        for yr in self.handyvars.aeo_years:
-            # Reset flag for whether measure is on the market in current year
-            if (int(yr) >= self.market_entry_year and
-                    int(yr) < self.market_exit_year):
-                measure_on_mkt = True
-            else:
-                measure_on_mkt = ""
-
-            # Set time sensitive cost/emissions scaling factors for all
-            # baseline stock; handle cases where these factors are/are not
-            # broken out by AEO projection year
-            try:
-                tsv_ecost_base, tsv_carb_base = [
-                    tsv_adj_init[x]["baseline"][yr] for
-                    x in ["cost", "carbon"]]
-            except TypeError:
-                tsv_ecost_base, tsv_carb_base = [
-                    tsv_adj_init[x]["baseline"] for
-                    x in ["cost", "carbon"]]
-
-            # If measure is not on the market, force efficient TSV scaling
-            # factors to baseline profiles
-            if measure_on_mkt:
-                tsv_energy_eff = tsv_adj_init["energy"]["efficient"]
-                # Set time sensitive cost/emissions scaling factors for all
-                # efficient stock; handle cases where these factors are/are not
-                # broken out by AEO projection year
+        # Set short names for the modeling time horizon and for the
+        # conversion of year-keyed data to/from vectors over the time horizon
+        yrs = self.handyvars.aeo_years
+        yr_vec, yr_dict = MsegStore.yr_vec, MsegStore.yr_dict
+        n_yrs = len(yrs)
+
+        # Total stock, energy, and carbon markets after accounting for any
+        # sub-market scaling (by year, as found with the stock turnover for
+        # the adoption scheme)
+        mkt_scale_vec = trn["mkt_scale_frac"]
+        stock_total_sbmkt, energy_total_sbmkt, carb_total_sbmkt = (
+            yr_vec(x, yrs) * mkt_scale_vec for x in [
+                stock_total_init, energy_total_init, carb_total_init])
+
+        # Flag years in which the measure is on the market
+        yrs_int = numpy.array([int(yr) for yr in yrs])
+        measure_on_mkt = (yrs_int >= self.market_entry_year) & (
+            yrs_int < self.market_exit_year)
+        # Measure relative performance by year (and by sample, in cases with
+        # a distribution on measure performance)
+        rel_perf_vec = numpy.array([rel_perf[yr] for yr in yrs], dtype=float)
+        rel_perf_smp = rel_perf_vec.ndim == 2
+
+        # Shape turnover results and the remaining year vectors as columns,
+        # such that they broadcast across any samples of measure performance
+        # or cost values
+        comp_frac_sbmkt, diffuse_frac, comp_frac_diffuse, \
+            comp_frac_diffuse_meas, meas_cum_frac, stock_total_meas = (
+                trn[x][:, None] for x in stock_turnover.OUTPUTS)
+        rel_perf_capt = trn["rel_perf_capt"]
+        rel_perf_vec = rel_perf_vec.reshape(n_yrs, -1)
+        mkt_scale_vec, stock_total_sbmkt, energy_total_sbmkt, \
+            carb_total_sbmkt, measure_on_mkt = (x[:, None] for x in [
+                mkt_scale_vec, stock_total_sbmkt, energy_total_sbmkt,
+                carb_total_sbmkt, measure_on_mkt])
+
+        # Set time sensitive cost/emissions scaling factors for all baseline
+        # and efficient stock; handle cases where these factors are/are not
+        # broken out by AEO projection year. If the measure is not on the
+        # market, force efficient TSV scaling factors to baseline profiles
+        tsv_vecs = {}
+        for x in ["cost", "carbon"]:
+            for case in ["baseline", "efficient"]:
                 try:
-                    tsv_ecost_eff, tsv_carb_eff = [
-                        tsv_adj_init[x]["efficient"][yr] for
-                        x in ["cost", "carbon"]]
+                    tsv_vecs[x, case] = yr_vec(tsv_adj_init[x][case], yrs)
                 except TypeError:
-                    tsv_ecost_eff, tsv_carb_eff = [
-                        tsv_adj_init[x]["efficient"] for x
-                        in ["cost", "carbon"]]
-            else:
-                tsv_energy_eff, tsv_ecost_eff, tsv_carb_eff = [
-                    tsv_energy_base, tsv_ecost_base, tsv_carb_base]
-
-            # For secondary microsegments only, update sub-market scaling
-            # fraction, based on any sub-market scaling in the associated
-            # primary microsegment
-            if mskeys[0] == "secondary":
-                # Adjust sub-market scaling fraction
-                if secnd_adj_sbmkt["original energy (total)"][
-                        secnd_mseg_adjkey][yr] != 0:
-                    mkt_scale_frac = secnd_adj_sbmkt[
-                        "adjusted energy (sub-market)"][
-                        secnd_mseg_adjkey][yr] / \
-                        secnd_adj_sbmkt["original energy (total)"][
-                        secnd_mseg_adjkey][yr]
-
-            # Total stock, energy, and carbon markets after accounting for any
-            # sub-market scaling
-            stock_total_sbmkt[yr] = stock_total_init[yr] * mkt_scale_frac
-            energy_total_sbmkt[yr] = energy_total_init[yr] * mkt_scale_frac
-            carb_total_sbmkt[yr] = carb_total_init[yr] * mkt_scale_frac
-
-            # Calculate new, replacement, and retrofit fractions for the
-            # baseline and efficient stock as applicable. * Note: these
-            # fractions are 0 for secondary microsegments
-            if mskeys[0] == "primary":
-                # Calculate the portions of existing baseline and efficient
-                # stock that are up for replacement
-
-                # Update base/measure captured replacement fraction
-
-                # Set an indicator for when the stock previously captured
-                # after the beginning of the modeling time horizon begins to
-                # turnover, using the baseline lifetime (zero or negative
-                # value indicates turnover)
-                yrs_until_prevcapt_tover = int(life_base[yr]) - (
-                    int(yr) - int(sorted(self.handyvars.aeo_years)[0]))
-
-                if type(yrs_until_prevcapt_tover) != numpy.ndarray:
-                    prev_capt_turnover = yrs_until_prevcapt_tover <= 0
-                else:
-                    prev_capt_turnover = all(yrs_until_prevcapt_tover <= 0)
-
-                # Case where the current microsegment applies to new
-                # structures
-                if mskeys[-1] == "new":
-                    # Calculate the newly added portion of the total new
-                    # stock (where 'new' is all stock added since year one of
-                    # the modeling time horizon)
-
-                    # After the first year in the modeling time horizon,
-                    # the newly added stock fraction is the difference in
-                    # stock between the current and previous year divided
-                    # by the current year's stock (assuming it is not zero)
-                    if yr != self.handyvars.aeo_years[0] and \
-                            stock_total_sbmkt[yr] != 0:
-                        # Handle case where data for previous year are
-                        # unavailable; set newly added fraction to 1
-                        try:
-                            # Handle case where new stock is attentuating
-                            # rather than growing; set new added fraction to 0
-                            if stock_total_sbmkt[yr] >= stock_total_sbmkt[
-                                    str(int(yr) - 1)]:
-                                new_frac = (
-                                    stock_total_sbmkt[yr] - stock_total_sbmkt[
-                                        str(int(yr) - 1)]) / \
-                                    stock_total_sbmkt[yr]
-                            else:
-                                new_frac = 0
-                        except KeyError:
-                            new_frac = 1
-                    # For the first year in the modeling time horizon, the
-                    # newly added stock fraction is 1
-                    elif yr == self.handyvars.aeo_years[0]:
-                        new_frac = 1
-                    # If the total new stock in the current year is zero,
-                    # the newly added stock fraction is also zero
-                    else:
-                        new_frac = 0
-
-                    # If the previously captured baseline stock has
-                    # begun to turnover, the replacement rate equals the
-                    # ratio of baseline stock captured in a given previous
-                    # year over the total stock in the current year
-                    if prev_capt_turnover:
-                        # Determine the previous year in which
-                        # the new stock was captured by the base/measure
-                        prev_capt_yr = int(yr) - int(life_base[yr])
-                        # Ensure that year of previous capture is not
-                        # earlier than earliest year in the AEO range
-                        if prev_capt_yr >= int(self.handyvars.aeo_years[0]):
-                            # Calculate the ratio of the new stock
-                            # previously captured by the base/measure tech.
-                            # to the total new stock in the current year
-
-                            # Previously captured year is not first
-                            # AEO year and non-zero denominator
-                            if (str(prev_capt_yr) !=
-                                self.handyvars.aeo_years[0]) and \
-                                    stock_total_sbmkt[yr] != 0:
-                                # Handle case where stock was attentuating
-                                # rather than growing in year where new stock
-                                # was captured
-                                if stock_total_sbmkt[str(prev_capt_yr)] >= \
-                                    stock_total_sbmkt[
-                                        str(prev_capt_yr - 1)]:
-                                    repl_frac = (
-                                        stock_total_sbmkt[str(prev_capt_yr)] -
-                                        stock_total_sbmkt[
-                                            str(prev_capt_yr - 1)]
-                                        ) / stock_total_sbmkt[yr]
-                                else:
-                                    repl_frac = (
-                                        stock_total_sbmkt[str(prev_capt_yr)] /
-                                        stock_total_sbmkt[yr])
-                                retro_frac = 0
-                            # Previously captured year is first
-                            # AEO year and non-zero denominator
-                            elif stock_total_sbmkt[yr] != 0:
-                                repl_frac = (
-                                    stock_total_sbmkt[str(prev_capt_yr)] /
-                                    stock_total_sbmkt[yr])
-                                retro_frac = 0
-                            else:
-                                repl_frac, retro_frac = (
-                                    0 for n in range(2))
-                        else:
-                            repl_frac, retro_frac = (0 for n in range(2))
-                    # Otherwise, the replacement/retrofit rates are zero
-                    else:
-                        repl_frac, retro_frac = (0 for n in range(2))
-
-                # Case where the current microsegment applies to
-                # existing structures
-                else:
-                    # Set newly added stock fraction to zero (not applicable
-                    # for existing structures)
-                    new_frac = 0
-
-                    # Case where not all existing stock has been captured
-                    # yet; allow both regular replacements and retrofits
-                    if turnover_cap_not_reached:
-                        repl_frac = (1 / life_base[yr])
-                        retro_frac = retro_rate_mseg[yr]
-                    # Case where all existing stock has been captured
-                    # but stock previously captured after the start of
-                    # the modeling horizon is turning over; allow only
-                    # regular replacement of that stock, no retrofits
-                    elif prev_capt_turnover:
-                        repl_frac = (1 / life_base[yr])
-                        retro_frac = 0
-                    # Otherwise, the turnover rates are zero
-                    else:
-                        repl_frac, retro_frac = (0 for n in range(2))
-            else:
-                new_frac, repl_frac, retro_frac = (0 for n in range(3))
-                prev_capt_turnover = False
-
-            # Determine the fraction of total stock, energy, and carbon
-            # in a given year post-sub-mkt scaling that the measure will
-            # compete for given the microsegment type and adoption scenario
-
-            # Secondary microsegment (competed fraction tied to the associated
-            # primary microsegment)
-            if mskeys[0] == "secondary" and secnd_mseg_adjkey is not None \
-                and secnd_adj_stk["original energy (total)"][
-                    secnd_mseg_adjkey][yr] != 0:
-                comp_frac_sbmkt = secnd_adj_stk[
-                    "adjusted energy (competed)"][
-                    secnd_mseg_adjkey][yr] / secnd_adj_sbmkt[
-                    "adjusted energy (sub-market)"][secnd_mseg_adjkey][yr]
-            # Primary microsegment in the first year of a technical
-            # potential scenario (all stock competed)
-            elif mskeys[0] == "primary" and \
-                    adopt_scheme == "Technical potential":
-                comp_frac_sbmkt = 1
-            # Primary microsegment not in the first year where current
-            # microsegment applies to new structure type
-            elif mskeys[0] == "primary":
-                # Total competed stock fraction is sum of new, replacement,
-                # and retrofit turnover fractions calculated above
-                comp_frac_sbmkt = new_frac + repl_frac + retro_frac
-            else:
-                comp_frac_sbmkt = 0
-
-            # Ensure that competed fraction never exceeds 1; handle cases
-            # with/without lifetime distribution
-            try:
-                if comp_frac_sbmkt > 1:
-                    comp_frac_sbmkt = 1
-            # Handle case with retro. rate distributions
-            except ValueError:
-                if any(comp_frac_sbmkt > 1):
-                    comp_frac_sbmkt[numpy.where(comp_frac_sbmkt > 1)] = 1
-
-            # Diffusion of electric HPs according to pre-determined rates
-            if hp_rate and mskeys[0] == "primary":
-                # Find the annual fraction of the total stock that is converted
-                # to a heat pump; set to 100% for technical potential,
-                # otherwise set to the new/replacement stock (and, if user
-                # desires, retrofit) times externally determined rate
-
-                # In a technical potential case, all stock converts to HPs
-                if adopt_scheme == "Technical potential":
-                    # Frac. total stock that converted to HP in year
-                    annual_hp_convert_frac = 1
-                    # Frac. total stock that remains with base fuel in year
-                    annual_hp_remain_frac = 0
-                # Otherwise, stock is converted according to external rate
-                else:
-                    # Determine what portion of the retrofit rate in each
-                    # year converts to HPs based on user cmd line inputs
-                    if opts.exog_hp_rates[1] == '1':  # All retrofits to HPs
-                        # Converted retrofits
-                        retro_convert = retro_frac
-                        # Remaining retrofits
-                        retro_remain = 0
-                    elif opts.exog_hp_rates[1] == '2':  # Frac. retro. to HPs
-                        # Converted retrofits
-                        retro_convert = retro_frac * hp_rate[yr]
-                        # Remaining retrofits
-                        retro_remain = retro_frac * (1 - hp_rate[yr])
-                    # Frac. total stock that converted to HP in year
-                    annual_hp_convert_frac = (new_frac + repl_frac) * \
-                        hp_rate[yr] + retro_convert
-                    # Frac. total stock that remains with base fuel in year
-                    annual_hp_remain_frac = (new_frac + repl_frac) * (
-                        1 - hp_rate[yr]) + retro_remain
-
-                # Find the annual stock that is converted to the HP measure
-                stock_comp_hp_convert[yr] = \
-                    annual_hp_convert_frac * stock_total_sbmkt[yr]
-                # Find the annual stock competed but remains /w base fuel
-                stock_comp_hp_remain[yr] = \
-                    annual_hp_remain_frac * stock_total_sbmkt[yr]
-                # Find the total stock (cumulative) that has been converted
-                # to HPs through the current year
-                if yr == self.handyvars.aeo_years[0]:
-                    stock_total_hp_convert[yr] = stock_comp_hp_convert[yr]
-                # If stock is not already all captured, add competed stock
-                else:
-                    stock_total_hp_convert[yr] = (
-                        stock_total_hp_convert[str(int(yr) - 1)]
-                        + stock_comp_hp_convert[yr])
-                # Ensure converted HP stock never goes above 1
-                if stock_total_hp_convert[yr] > stock_total_sbmkt[yr]:
-                    stock_total_hp_convert[yr] = stock_total_sbmkt[yr]
-
-                # Find the fraction of the total stock that has been converted
-                # to HPs through the current year
-                if stock_total_sbmkt[yr] != 0:
-                    stock_total_hp_convert_frac = \
-                        stock_total_hp_convert[yr] / stock_total_sbmkt[yr]
-                else:
-                    stock_total_hp_convert_frac = 0
-
-                # Finalize the fraction of the total stock (cumulative) that
-                # has either been converted to or away from the current mseg
-                # through the current year, as well as the fraction of the
-                # converted stock that was competed in the current year
-
-                # Case where the measure's microsegment is being added to
-                # by the HP conversion (e.g., electric ASHP or HPWH measure)
-                if (self.fuel_switch_to == "electricity" or
-                        "electricity" in mskeys):
-                    # Cumulative fraction converted to HPs
-                    diffuse_frac = stock_total_hp_convert_frac
-                    # Fraction of total converted HPs competed in current
-                    # year
-
-                    # If full cumulative conversion was not yet achieved, set
-                    # to the fraction of total converted stock that was
-                    # converted in the current year
-                    if diffuse_frac != 1:
-                        if stock_total_hp_convert[yr] != 0:
-                            comp_frac_diffuse = stock_comp_hp_convert[yr] / \
-                                stock_total_hp_convert[yr]
-                        else:
-                            comp_frac_diffuse = 0
-                    # If full cumulative conversion was achieved
-                    elif adopt_scheme != "Technical potential":
-                        # Achieved in the current year; set to the fraction of
-                        # total converted stock that was converted in the
-                        # current year; if no additional stock was converted
-                        # (current year not great than previou), set to zero
-                        if (stock_total_hp_convert[str(int(yr) - 1)] <
-                                stock_total_hp_convert[yr]):
-                            comp_frac_diffuse = (
-                                stock_total_hp_convert[yr] -
-                                stock_total_hp_convert[str(int(yr) - 1)]) / \
-                                stock_total_hp_convert[yr]
-                        # Achieved in a previous year; set to zero
-                        else:
-                            comp_frac_diffuse = 0
-                    else:
-                        comp_frac_diffuse = 1
-                # Case where the measure's microsegment is being eroded
-                # by the pre-determined conversion to HPs (e.g. gas efficiency)
-                else:
-                    # Cumulative fraction remaining after conversion to HPs
-                    diffuse_frac = (1 - stock_total_hp_convert_frac)
-                    # Fraction of total mseg remaining /w base fuel competed in
-                    # current year
-
-                    # If full cumulative conversion was not yet achieved, set
-                    # to the fraction of total remaining stock that was
-                    # retained in the current year
-                    if diffuse_frac != 0:
-                        if (stock_total_sbmkt[yr] -
-                                stock_total_hp_convert[yr]) != 0:
-                            comp_frac_diffuse = stock_comp_hp_remain[yr] / (
-                                stock_total_sbmkt[yr] -
-                                stock_total_hp_convert[yr])
-                        else:
-                            comp_frac_diffuse = 0
-                    # If full cumulative conversion was achieved, set to zero
-                    else:
-                        comp_frac_diffuse = 0
-            # All other measure diffusion cases
-            else:
-                # Currently no diffusion scaling
-                diffuse_frac = 1
-                # Competed fraction is that calculated above for the mseg
-                # after applying submkt scaling
-                comp_frac_diffuse = comp_frac_sbmkt
-
-            # Ensure that competed diffusion fraction is always between 0 and 1
-            if type(comp_frac_diffuse) != numpy.ndarray:
-                if comp_frac_diffuse > 1:
-                    comp_frac_diffuse = 1
-                elif comp_frac_diffuse < 0:
-                    comp_frac_diffuse = 0
-            elif type(comp_frac_diffuse) == numpy.ndarray:
-                if any(comp_frac_diffuse > 1):
-                    comp_frac_diffuse[numpy.where(comp_frac_diffuse > 1)] = 1
-                elif any(comp_frac_diffuse < 0):
-                    comp_frac_diffuse[numpy.where(comp_frac_diffuse < 0)] = 0
-
-            # If the measure is on the market, the competed fraction that
-            # is captured by the measure is the same as the competed fraction
-            # above (all competed stock goes to measure); otherwise, this
-            # fraction is set to zero to preclude measure impacts on baseline
-            if measure_on_mkt:
-                comp_frac_diffuse_meas = comp_frac_diffuse
-            else:
-                comp_frac_diffuse_meas = 0
-
-            # Flag a case where the measure is not currently on the market,
-            # but the measure has previously captured stock that is now
-            # turning over; in this case, the previously captured measure stock
-            # should be decremented by the current year's competed stock value
-            # (see use of this below)
-            if not measure_on_mkt and prev_capt_turnover:
-                decrmnt_meas_capt_stk = True
-            else:
-                decrmnt_meas_capt_stk = False
-
-            # Final total stock, energy, and carbon markets after accounting
-            # for any diffusion/conversion dynamics that restrict a measure's
-            # access to it's full baseline market (after sub-mkt scaling), as
-            # well as any adjustments to account for time-sensitive effects
-            stock_total[yr] = stock_total_sbmkt[yr] * diffuse_frac
-            energy_total[yr] = \
-                energy_total_sbmkt[yr] * diffuse_frac * tsv_energy_base
-            carb_total[yr] = \
-                carb_total_sbmkt[yr] * diffuse_frac * tsv_carb_base
-
-            # Finalize the sub-market scaling fraction as the initial sub-
-            # market scaling fraction from the measure definition times
-            # the diffusion fraction by year
-            mkt_scale_frac_fin[yr] = mkt_scale_frac * diffuse_frac
-
-            # Re-apportion total baseline microsegment energy across all 8760
-            # hours of the year, if necessary (supports sector-level savings
-            # shapes)
-
-            # Only update sector-level shapes for certain years of focus;
-            # ensure that load shape information is available for the
-            # update and if not, yield an error message
-            if calc_sect_shapes is True and yr in \
-                self.handyvars.aeo_years_summary and \
-                    tsv_shapes is not None:
-                self.sector_shapes[adopt_scheme][mskeys[1]][yr]["baseline"] = [
-                    self.sector_shapes[adopt_scheme][mskeys[1]][yr][
-                        "baseline"][x] + tsv_shapes["baseline"][x] *
-                    energy_total[yr] for x in range(8760)]
-            elif calc_sect_shapes is True and tsv_shapes is None and (
-                    mskeys[0] == "primary" and (
-                        (mskeys[3] == "electricity") or
-                        (self.fuel_switch_to == "electricity"))):
-                raise ValueError(
-                    "Missing hourly fraction of annual load data for "
-                    "baseline energy use segment: " + str(mskeys) + ". ")
-
-            # Competed stock, energy, and carbon markets after accounting for
-            # any sub-market scaling
-            stock_compete_sbmkt[yr] = stock_total_sbmkt[yr] * comp_frac_sbmkt
-            energy_compete_sbmkt[yr] = energy_total_sbmkt[yr] * comp_frac_sbmkt
-            carb_compete_sbmkt[yr] = carb_total_sbmkt[yr] * comp_frac_sbmkt
-
-            # Final competed stock, energy, and carbon markets after accounting
-            # for any diffusion/conversion dynamics that restrict a measure's
-            # access to it's full baseline market (after sub-mkt scaling), as
-            # well as any adjustments to account for time-sensitive effects
-            stock_compete[yr] = \
-                stock_total_sbmkt[yr] * diffuse_frac * comp_frac_diffuse
-            energy_compete[yr] = \
-                energy_total_sbmkt[yr] * diffuse_frac * comp_frac_diffuse * \
-                tsv_energy_base
-            carb_compete[yr] = \
-                carb_total_sbmkt[yr] * diffuse_frac * comp_frac_diffuse * \
-                tsv_carb_base
-
-            # Final competed stock captured by the measure
-            stock_compete_meas[yr] = \
-                stock_total_sbmkt[yr] * diffuse_frac * comp_frac_diffuse_meas
-
-            # For primary microsegments only, update portion of stock captured
-            # by efficient measure in previous years
-            if mskeys[0] == "primary" and yr != self.handyvars.aeo_years[0]:
-                # Set previous year key
-                prev_yr = str(int(yr) - 1)
-
-                # Handle case where captured efficient stock total
-                # is a point value
-                try:
-                    if (stock_total[yr] - stock_compete[yr]) != 0:
-                        meas_cum_frac = \
-                            stock_total_meas[prev_yr] / (
-                                stock_total[yr] - stock_compete[yr])
-                    if (stock_total_sbmkt[yr] - stock_compete_sbmkt[yr]) != 0:
-                        comp_cum_frac = stock_comp_cum_sbmkt[prev_yr] / \
-                            (stock_total_sbmkt[yr] - stock_compete_sbmkt[yr])
-                # Handle case where captured efficient stock total
-                # is a numpy array
-                except ValueError:
-                    if all((stock_total[yr] - stock_compete[yr]) != 0):
-                        meas_cum_frac = (
-                            stock_total_meas[prev_yr] /
-                            (stock_total[yr] - stock_compete[yr]))
-                    if all((stock_total_sbmkt[yr] -
-                            stock_compete_sbmkt[yr]) != 0):
-                        comp_cum_frac = (stock_comp_cum_sbmkt[prev_yr] / (
-                            stock_total_sbmkt[yr] - stock_compete_sbmkt[yr]))
-
-                # Ensure neither fraction goes above 1
-
-                # Cumulative measure-captured fraction
-                if type(meas_cum_frac) != numpy.ndarray and meas_cum_frac > 1:
-                    meas_cum_frac = 1
-                elif type(meas_cum_frac) == numpy.ndarray and \
-                        any(meas_cum_frac > 1):
-                    meas_cum_frac[numpy.where(meas_cum_frac > 1)] = 1
-                # Cumulative competed-captured fraction
-                if type(comp_cum_frac) != numpy.ndarray and comp_cum_frac > 1:
-                    comp_cum_frac = 1
-                elif type(comp_cum_frac) == numpy.ndarray and \
-                        any(comp_cum_frac > 1):
-                    comp_cum_frac[numpy.where(comp_cum_frac > 1)] = 1
-
-                # For non-technical potential scenarios for existing stock,
-                # determine whether a cap on existing stock turnover has been
-                # reached (TP has measure eligible for all stock
-                # each year, and new stock is always growing so the turnover
-                # cap is not applicable)
-                if "existing" in mskeys and \
-                        adopt_scheme != "Technical potential":
-                    if type(comp_cum_frac) != numpy.ndarray:
-                        turnover_cap_not_reached = comp_cum_frac < 1
-                    else:
-                        turnover_cap_not_reached = all(comp_cum_frac < 1)
-
-            # In the case of a primary microsegment with secondary effects,
-            # update the information needed to scale down the secondary
-            # microsegment(s) by a sub-market fraction and previously captured,
-            # competed, and competed and captured stock fractions for the
-            # primary microsegment
-            if mskeys[0] == "primary" and mskeys[4] == "lighting" and \
-                    secnd_mseg_adjkey is not None:
-                # Sub-market stock
-                secnd_adj_sbmkt["adjusted energy (sub-market)"][
-                    secnd_mseg_adjkey][yr] += energy_total_sbmkt[yr]
-                # Total stock
-                secnd_adj_stk[
-                    "original energy (total)"][secnd_mseg_adjkey][yr] += \
-                    energy_total_init[yr]
-                # Previously captured stock
-                secnd_adj_stk["adjusted energy (previously captured)"][
-                    secnd_mseg_adjkey][yr] += \
-                    energy_total_sbmkt[yr] * meas_cum_frac
-                # Competed stock
-                secnd_adj_stk["adjusted energy (competed)"][
-                    secnd_mseg_adjkey][yr] += \
-                    energy_total_sbmkt[yr] * comp_frac_sbmkt
-                # Competed and captured stock
-                secnd_adj_stk["adjusted energy (competed and captured)"][
-                    secnd_mseg_adjkey][yr] += \
-                    energy_total_sbmkt[yr] * comp_frac_sbmkt
-
-            # For secondary microsegments only, update the portion of
-            # associated primary microsegment stock that has been captured by
-            # the measure in previous years
-            if mskeys[0] == "secondary":
-                # Adjust previously captured efficient fraction
-                if secnd_adj_stk["original energy (total)"][
-                        secnd_mseg_adjkey][yr] != 0:
-                    meas_cum_frac = secnd_adj_stk[
-                        "adjusted energy (previously captured)"][
-                        secnd_mseg_adjkey][yr] / secnd_adj_stk[
-                        "original energy (total)"][secnd_mseg_adjkey][yr]
-                else:
-                    meas_cum_frac = 0
-
-            # Determine the amount of existing stock that has already
-            # been captured by the measure up until the current year;
-            # subsequently, update the number of total and competed stock units
-            # captured by the measure to reflect additions from the current
-            # year
-
-            # First year in the modeling time horizon
-            if yr == self.handyvars.aeo_years[0]:
-                stock_total_meas[yr] = stock_compete_meas[yr]
-                stock_comp_cum_sbmkt[yr] = stock_compete_sbmkt[yr]
-            # Subsequent year in modeling time horizon
-            else:
-                # Technical potential case where the measure is on the
-                # market: the stock captured by the measure should equal the
-                # total stock (measure captures all stock)
-                if adopt_scheme == "Technical potential" and measure_on_mkt:
-                    stock_total_meas[yr] = stock_total[yr]
-                    stock_comp_cum_sbmkt[yr] = stock_total_sbmkt[yr]
-                # Non-technical potential case
-                elif adopt_scheme != "Technical potential":
-                    # Handle case where data for previous year are
-                    # unavailable; set total captured stock to current year's
-                    # competed/captured stock
-                    try:
-                        # Update total number of stock units captured by the
-                        # measure specifically and an efficient alternative (
-                        # reflects all previously captured stock +
-                        # captured competed stock from the current year).
-                        if not decrmnt_meas_capt_stk:
-                            stock_total_meas[yr] = stock_total_meas[
-                                str(int(yr) - 1)] + stock_compete_meas[yr]
-                        else:
-                            stock_total_meas[yr] = stock_total_meas[
-                                str(int(yr) - 1)] - stock_compete[yr]
-                        stock_comp_cum_sbmkt[yr] = stock_comp_cum_sbmkt[
-                            str(int(yr) - 1)] + stock_compete_sbmkt[yr]
-                    except KeyError:
-                        if not decrmnt_meas_capt_stk:
-                            stock_total_meas[yr] = stock_compete_meas[yr]
-                        else:
-                            stock_total_meas[yr] = 0
-                        stock_comp_cum_sbmkt[yr] = stock_compete_sbmkt[yr]
-                # All other cases, including technical potential case where
-                # measure is not on the market (stock goes immediately to zero)
-                else:
-                    stock_total_meas[yr] = 0
-                    stock_comp_cum_sbmkt[yr] = 0
-
-            # Ensure stock captured by measure never exceeds total stock
-            # and that it never goes below zero
-
-            # Handle case where stock captured by measure is an array
-            if type(stock_total_meas[yr]) == numpy.ndarray and \
-                    any(stock_total_meas[yr] > stock_total[yr]) is True:
-                stock_total_meas[yr][numpy.where(
-                    stock_total_meas[yr] > stock_total[yr])] = stock_total[yr]
-            elif type(stock_total_meas[yr]) == numpy.ndarray and \
-                    any(stock_total_meas[yr] < 0) is True:
-                stock_total_meas[yr][numpy.where(
-                    stock_total_meas[yr] < 0)] = 0
-            # Handle case where stock captured by measure is point val
-            elif type(stock_total_meas[yr]) != numpy.ndarray and \
-                    stock_total_meas[yr] > stock_total[yr]:
-                stock_total_meas[yr] = stock_total[yr]
-            elif type(stock_total_meas[yr]) != numpy.ndarray and \
-                    stock_total_meas[yr] < 0:
-                stock_total_meas[yr] = 0
-
-            # Set the weighted overall relative performance and per unit
-            # measure tech. refrigerant emissions (if applicable) for stock
-            # captured in current year and all previous years.
-
-            # Set to the relative performance/unit measure refrigerant
-            # emissions of the current year only for all years through
-            # market entry
-            if int(yr) <= self.market_entry_year:
-                # Update overall and previously captured measure stock RP
-                rel_perf_overall, rel_perf_capt = (
-                    copy.deepcopy(rel_perf[yr]) for n in range(2))
-            # Set a measure stock turnover weight to use in balancing
-            # current measure year's relative performance and fugitive
-            # refrigerant emissions per unit (if applicable) with values
-            # for measure stock captured in all previous years since market
-            # entry; weight is equal to the ratio of total competed measure
-            # stock in the current year to total previously captured
-            # measure stock across all previous years
-            else:
-                if stock_total_meas[yr] != 0:
-                    to_m_stk = (
-                        stock_compete_meas[yr] / stock_total_meas[yr])
-                else:
-                    to_m_stk = 0
-                # Ensure the measure turnover weight never exceeds 1
-                if (type(to_m_stk) != numpy.ndarray) and \
-                        to_m_stk > 1:
-                    to_m_stk = 1
-                elif (type(to_m_stk) == numpy.ndarray) and any(
-                        to_m_stk > 1):
-                    to_m_stk[numpy.where(to_m_stk > 1)] = 1
-                # Update overall measure stock RP
-                rel_perf_overall = (rel_perf[yr] * to_m_stk +
-                                    rel_perf_capt * (1 - to_m_stk))
-
-            # Update total-efficient and competed-efficient energy and
-            # carbon, where "efficient" signifies the total and competed
-            # energy/carbon remaining after measure implementation plus
-            # non-competed energy/carbon.
-
-            # Set common variables for the efficient energy calculations
-
-            # Competed energy captured by measure
-            energy_tot_comp_meas = energy_total_sbmkt[yr] * diffuse_frac * \
-                tsv_energy_eff * comp_frac_diffuse_meas * \
-                rel_perf[yr] * (
-                    site_source_conv_meas[yr] / site_source_conv_base[yr])
-            # Competed energy not captured by measure
-            energy_tot_comp_base = energy_total_sbmkt[yr] * diffuse_frac * \
-                tsv_energy_base * (
-                    comp_frac_diffuse - comp_frac_diffuse_meas)
-            # Uncompeted energy captured by measure
-            energy_tot_uncomp_meas = energy_total_sbmkt[yr] * diffuse_frac * \
-                tsv_energy_eff * (1 - comp_frac_diffuse) * meas_cum_frac * \
-                rel_perf_capt * (
-                    site_source_conv_meas[yr] / site_source_conv_base[yr])
-            # Uncompeted energy not captured by measure
-            energy_tot_uncomp_base = energy_total_sbmkt[yr] * diffuse_frac * \
-                tsv_energy_base * (1 - comp_frac_diffuse) * (
-                    1 - meas_cum_frac)
-
-            # Competed-efficient energy
-            energy_compete_eff[yr] = energy_tot_comp_meas + \
-                energy_tot_comp_base
-            # Total-efficient energy
-            energy_total_eff[yr] = energy_compete_eff[yr] + \
-                energy_tot_uncomp_meas + energy_tot_uncomp_base
-
-            # Re-apportion total efficient microsegment energy across all 8760
-            # hours of the year, if necessary (supports sector-level savings
-            # shapes)
-            if calc_sect_shapes is True and \
-                yr in self.handyvars.aeo_years_summary and \
-                    tsv_shapes is not None:
+                    tsv_vecs[x, case] = numpy.full(
+                        n_yrs, tsv_adj_init[x][case], dtype=float)
+        tsv_ecost_base, tsv_carb_base = (
+            tsv_vecs[x, "baseline"][:, None] for x in ["cost", "carbon"])
+        tsv_ecost_eff, tsv_carb_eff = (numpy.where(
+            measure_on_mkt, tsv_vecs[x, "efficient"][:, None],
+            tsv_vecs[x, "baseline"][:, None]) for x in ["cost", "carbon"])
+        tsv_energy_eff = numpy.where(
+            measure_on_mkt, tsv_adj_init["energy"]["efficient"],
+            tsv_energy_base)
+
+        # Set ratio of measure to baseline site-source conversions
+        site_source_ratio = (yr_vec(site_source_conv_meas, yrs) / yr_vec(
+            site_source_conv_base, yrs))[:, None]
+        # Anticipate and handle case with base carbon intensity of zero for
+        # electricity; in this case, assume the measure and baseline
+        # intensity is the same (zero intensity is only possible for
+        # electricity; assume measures will not be switched away from
+        # electricity)
+        intensity_carb_base_vec, intensity_carb_meas_vec = (
+            yr_vec(x, yrs) for x in [intensity_carb_base, intensity_carb_meas])
+        intensity_carb_ratio = numpy.ones(n_yrs)
+        numpy.divide(
+            intensity_carb_meas_vec, intensity_carb_base_vec,
+            out=intensity_carb_ratio, where=(intensity_carb_base_vec != 0))
+        intensity_carb_ratio = intensity_carb_ratio[:, None]
+
+        # Final total stock, energy, and carbon markets after accounting
+        # for any diffusion/conversion dynamics that restrict a measure's
+        # access to it's full baseline market (after sub-mkt scaling), as
+        # well as any adjustments to account for time-sensitive effects
+        stock_total = stock_total_sbmkt * diffuse_frac
+        energy_total = energy_total_sbmkt * diffuse_frac * tsv_energy_base
+        carb_total = carb_total_sbmkt * diffuse_frac * tsv_carb_base
+
+        # Finalize the sub-market scaling fraction as the initial sub-
+        # market scaling fraction from the measure definition times
+        # the diffusion fraction by year
+        mkt_scale_frac_fin = mkt_scale_vec * diffuse_frac
+
+        # Final competed stock, energy, and carbon markets after accounting
+        # for any diffusion/conversion dynamics that restrict a measure's
+        # access to it's full baseline market (after sub-mkt scaling), as
+        # well as any adjustments to account for time-sensitive effects
+        stock_compete = stock_total_sbmkt * diffuse_frac * comp_frac_diffuse
+        energy_compete = energy_total_sbmkt * diffuse_frac * \
+            comp_frac_diffuse * tsv_energy_base
+        carb_compete = carb_total_sbmkt * diffuse_frac * comp_frac_diffuse * \
+            tsv_carb_base
+
+        # Final competed stock captured by the measure
+        stock_compete_meas = stock_total_sbmkt * diffuse_frac * \
+            comp_frac_diffuse_meas
+
+        # In the case of a primary microsegment with secondary effects,
+        # update the information needed to scale down the secondary
+        # microsegment(s) by a sub-market fraction and previously captured,
+        # competed, and competed and captured stock fractions for the
+        # primary microsegment
+        if mskeys[0] == "primary" and mskeys[4] == "lighting" and \
+                secnd_mseg_adjkey is not None:
+            for (adj, adj_key), add in zip([
+                    (secnd_adj_sbmkt, "adjusted energy (sub-market)"),
+                    (secnd_adj_stk, "original energy (total)"),
+                    (secnd_adj_stk, "adjusted energy (previously captured)"),
+                    (secnd_adj_stk, "adjusted energy (competed)"),
+                    (secnd_adj_stk, "adjusted energy (competed and captured)")
+                    ], [energy_total_sbmkt, yr_vec(energy_total_init, yrs),
+                        energy_total_sbmkt * meas_cum_frac,
+                        energy_total_sbmkt * comp_frac_sbmkt,
+                        energy_total_sbmkt * comp_frac_sbmkt]):
+                for yr, val in zip(yrs, add.ravel().tolist()):
+                    adj[adj_key][secnd_mseg_adjkey][yr] += val
+
+        # Update total-efficient and competed-efficient energy and
+        # carbon, where "efficient" signifies the total and competed
+        # energy/carbon remaining after measure implementation plus
+        # non-competed energy/carbon.
+
+        # Set common variables for the efficient energy calculations
+
+        # Competed energy captured by measure
+        energy_tot_comp_meas = energy_total_sbmkt * diffuse_frac * \
+            tsv_energy_eff * comp_frac_diffuse_meas * rel_perf_vec * \
+            site_source_ratio
+        # Competed energy not captured by measure
+        energy_tot_comp_base = energy_total_sbmkt * diffuse_frac * \
+            tsv_energy_base * (comp_frac_diffuse - comp_frac_diffuse_meas)
+        # Uncompeted energy captured by measure
+        energy_tot_uncomp_meas = energy_total_sbmkt * diffuse_frac * \
+            tsv_energy_eff * (1 - comp_frac_diffuse) * meas_cum_frac * \
+            rel_perf_capt * site_source_ratio
+        # Uncompeted energy not captured by measure
+        energy_tot_uncomp_base = energy_total_sbmkt * diffuse_frac * \
+            tsv_energy_base * (1 - comp_frac_diffuse) * (1 - meas_cum_frac)
+
+        # Competed-efficient energy
+        energy_compete_eff = energy_tot_comp_meas + energy_tot_comp_base
+        # Total-efficient energy
+        energy_total_eff = energy_compete_eff + energy_tot_uncomp_meas + \
+            energy_tot_uncomp_base
+
+        # Set common variables for the carbon calculations
+
+        # Competed carbon captured by measure
+        carb_tot_comp_meas = carb_total_sbmkt * diffuse_frac * \
+            tsv_carb_eff * comp_frac_diffuse_meas * rel_perf_vec * \
+            site_source_ratio * intensity_carb_ratio
+        # Competed carbon not captured by measure
+        carb_tot_comp_base = carb_total_sbmkt * diffuse_frac * \
+            tsv_carb_base * (comp_frac_diffuse - comp_frac_diffuse_meas)
+        # Uncompeted carbon captured by measure
+        carb_tot_uncomp_meas = carb_total_sbmkt * diffuse_frac * \
+            tsv_carb_eff * (1 - comp_frac_diffuse) * meas_cum_frac * \
+            rel_perf_capt * site_source_ratio * intensity_carb_ratio
+        # Uncompeted carbon not captured by measure
+        carb_tot_uncomp_base = carb_total_sbmkt * diffuse_frac * \
+            tsv_carb_base * (1 - comp_frac_diffuse) * (1 - meas_cum_frac)
+
+        # Competed-efficient carbon
+        carb_compete_eff = carb_tot_comp_meas + carb_tot_comp_base
+        # Total-efficient energy
+        carb_total_eff = carb_compete_eff + carb_tot_uncomp_meas + \
+            carb_tot_uncomp_base
+
+        # Update total and competed stock, energy, and carbon
+        # costs
+
+        # Baseline and measure installed costs by year (and by sample, in
+        # cases with a distribution on measure cost)
+        cost_base_vec = yr_vec(cost_base, yrs)[:, None]
+        cost_meas_vec = numpy.array(
+            [cost_meas[yr] for yr in yrs], dtype=float)
+        cost_meas_smp = cost_meas_vec.ndim == 2
+        cost_meas_vec = cost_meas_vec.reshape(n_yrs, -1)
+        # Baseline cost of the competed and total stock; anchor this on
+        # the stock captured by the measure to allow direct comparison
+        # with measure stock costs
+        stock_compete_cost = \
+            (stock_compete_meas * stk_serv_cap_cnv) * cost_base_vec
+        stock_total_cost = \
+            (stock_total_meas * stk_serv_cap_cnv) * cost_base_vec
+        # Total and competed-efficient stock cost for add-on and
+        # full service measures. * Note: the baseline technology installed
+        # cost must be added to the measure installed cost in the case of
+        # an add-on measure type
+        if self.measure_type == "add-on":
+            cost_meas_vec = cost_meas_vec + cost_base_vec
+        # Competed-efficient stock cost
+        stock_compete_cost_eff = \
+            (stock_compete_meas * stk_serv_cap_cnv) * cost_meas_vec
+        # Total-efficient stock cost
+        stock_total_cost_eff = \
+            (stock_total_meas * stk_serv_cap_cnv) * cost_meas_vec
+
+        # Baseline and measure energy costs by year
+        cost_energy_base_vec, cost_energy_meas_vec = (
+            yr_vec(x, yrs)[:, None] for x in [
+                cost_energy_base, cost_energy_meas])
+        # Competed baseline energy cost
+        energy_compete_cost = energy_total_sbmkt * diffuse_frac * \
+            comp_frac_diffuse * cost_energy_base_vec * tsv_ecost_base
+        # Total baseline energy cost
+        energy_total_cost = energy_total_sbmkt * diffuse_frac * \
+            cost_energy_base_vec * tsv_ecost_base
+
+        # Set common variables for the energy cost calculations
+
+        # Competed energy cost captured by measure
+        energy_cost_tot_comp_meas = energy_total_sbmkt * diffuse_frac * \
+            tsv_ecost_eff * comp_frac_diffuse_meas * rel_perf_vec * \
+            site_source_ratio * cost_energy_meas_vec
+        # Competed energy cost remaining with baseline
+        energy_cost_tot_comp_base = energy_total_sbmkt * diffuse_frac * \
+            tsv_ecost_base * (comp_frac_diffuse - comp_frac_diffuse_meas) * \
+            cost_energy_base_vec
+        # Total energy cost captured by measure
+        energy_cost_tot_uncomp_meas = energy_total_sbmkt * diffuse_frac * \
+            tsv_ecost_eff * (1 - comp_frac_diffuse) * meas_cum_frac * \
+            rel_perf_capt * site_source_ratio * cost_energy_meas_vec
+        # Total energy cost remaining with baseline
+        energy_cost_tot_uncomp_base = energy_total_sbmkt * diffuse_frac * \
+            tsv_ecost_base * (1 - comp_frac_diffuse) * (1 - meas_cum_frac) * \
+            cost_energy_base_vec
+
+        # Competed-efficient energy cost
+        energy_compete_cost_eff = energy_cost_tot_comp_meas + \
+            energy_cost_tot_comp_base
+        # Total-efficient energy cost
+        energy_total_eff_cost = energy_compete_cost_eff + \
+            energy_cost_tot_uncomp_meas + energy_cost_tot_uncomp_base
+
+        # Competed and total baseline and efficient carbon costs
+        ccosts = yr_vec(self.handyvars.ccosts, yrs)[:, None]
+        carb_compete_cost, carb_total_cost, carb_compete_cost_eff, \
+            carb_total_eff_cost = (x * ccosts for x in [
+                carb_compete, carb_total, carb_compete_eff, carb_total_eff])
+
+        # Re-apportion total baseline and efficient microsegment energy across
+        # all 8760 hours of the year, if necessary (supports sector-level
+        # savings shapes); only update sector-level shapes for certain years
+        # of focus
+        if calc_sect_shapes is True and tsv_shapes is not None:
+            for t, yr in enumerate(yrs):
+                if yr not in self.handyvars.aeo_years_summary:
+                    continue
+                self.sector_shapes[adopt_scheme].add(
+                    mskeys[1], yr, "baseline",
+                    tsv_shapes["baseline"] * energy_total[t, 0])
                 # For fuel switching measures where a fossil baseline segment
                 # (to be switched to electricity) is present, only represent
                 # the measure-captured (switched to/added) loads in the
                 # efficient-case sector shape; otherwise, represent both
                 # measure-captured and remaining baseline loads for
                 # electricity microsegments
+                load_meas = energy_tot_comp_meas[t] + energy_tot_uncomp_meas[t]
+                load_base = energy_tot_comp_base[t] + energy_tot_uncomp_base[t]
                 if self.fuel_switch_to == "electricity" and \
                         "electricity" not in mskeys:
-                    self.sector_shapes[adopt_scheme][mskeys[1]][yr][
-                        "efficient"] = [self.sector_shapes[adopt_scheme][
-                            mskeys[1]][yr]["efficient"][x] + (
-                            energy_tot_comp_meas + energy_tot_uncomp_meas) *
-                            tsv_shapes["efficient"][x]
-                        for x in range(8760)]
+                    self.sector_shapes[adopt_scheme].add(
+                        mskeys[1], yr, "efficient",
+                        load_meas * tsv_shapes["efficient"])
                 else:
-                    self.sector_shapes[adopt_scheme][mskeys[1]][yr][
-                        "efficient"] = [self.sector_shapes[adopt_scheme][
-                            mskeys[1]][yr]["efficient"][x] + (
-                            energy_tot_comp_meas + energy_tot_uncomp_meas) *
-                            tsv_shapes["efficient"][x] + (
-                            energy_tot_comp_base + energy_tot_uncomp_base) *
-                            tsv_shapes["baseline"][x]
-                        for x in range(8760)]
-            # Anticipate and handle case with base carbon intensity of zero for
-            # electricity; in this case, assume the measure and baseline
-            # intensity is the same (zero intensity is only possible for
-            # electricity; assume measures will not be switched away from
-            # electricity)
-            try:
-                intensity_carb_ratio = (
-                    intensity_carb_meas[yr] / intensity_carb_base[yr])
-            except ZeroDivisionError:
-                intensity_carb_ratio = 1
-
-            # Set common variables for the carbon calculations
-
-            # Competed carbon captured by measure
-            carb_tot_comp_meas = carb_total_sbmkt[yr] * diffuse_frac * \
-                tsv_carb_eff * comp_frac_diffuse_meas * rel_perf[yr] * \
-                (site_source_conv_meas[yr] / site_source_conv_base[yr]) * \
-                intensity_carb_ratio
-            # Competed carbon not captured by measure
-            carb_tot_comp_base = carb_total_sbmkt[yr] * diffuse_frac * \
-                tsv_carb_base * (
-                    comp_frac_diffuse - comp_frac_diffuse_meas)
-            # Uncompeted carbon captured by measure
-            carb_tot_uncomp_meas = carb_total_sbmkt[yr] * diffuse_frac * \
-                tsv_carb_eff * (1 - comp_frac_diffuse) * meas_cum_frac * \
-                rel_perf_capt * (
-                    site_source_conv_meas[yr] / site_source_conv_base[yr]) * \
-                intensity_carb_ratio
-            # Uncompeted carbon not captured by measure
-            carb_tot_uncomp_base = carb_total_sbmkt[yr] * diffuse_frac * \
-                tsv_carb_base * (1 - comp_frac_diffuse) * (
-                    1 - meas_cum_frac)
-
-            # Competed-efficient carbon
-            carb_compete_eff[yr] = carb_tot_comp_meas + carb_tot_comp_base
-            # Total-efficient energy
-            carb_total_eff[yr] = carb_compete_eff[yr] + \
-                carb_tot_uncomp_meas + carb_tot_uncomp_base
-
-            # Update total and competed stock, energy, and carbon
-            # costs
-
-            # Baseline cost of the competed and total stock; anchor this on
-            # the stock captured by the measure to allow direct comparison
-            # with measure stock costs
-            stock_compete_cost[yr] = \
-                (stock_compete_meas[yr] * stk_serv_cap_cnv) * cost_base[yr]
-            stock_total_cost[yr] = \
-                (stock_total_meas[yr] * stk_serv_cap_cnv) * cost_base[yr]
-            # Total and competed-efficient stock cost for add-on and
-            # full service measures. * Note: the baseline technology installed
-            # cost must be added to the measure installed cost in the case of
-            # an add-on measure type
-            if self.measure_type == "add-on":
-                # Competed-efficient stock cost (add-on measure)
-                stock_compete_cost_eff[yr] = \
-                    (stock_compete_meas[yr] * stk_serv_cap_cnv) * (
-                    cost_meas[yr] + cost_base[yr])
-                # Total-efficient stock cost (add-on measure)
-                stock_total_cost_eff[yr] = \
-                    (stock_total_meas[yr] * stk_serv_cap_cnv) * (
-                    cost_meas[yr] + cost_base[yr])
-            else:
-                # Competed-efficient stock cost (full service measure)
-                stock_compete_cost_eff[yr] = \
-                    (stock_compete_meas[yr] * stk_serv_cap_cnv) * cost_meas[yr]
-                # Total-efficient stock cost (full service measure)
-                stock_total_cost_eff[yr] = \
-                    (stock_total_meas[yr] * stk_serv_cap_cnv) * cost_meas[yr]
-
-            # Competed baseline energy cost
-            energy_compete_cost[yr] = energy_total_sbmkt[yr] * \
-                diffuse_frac * comp_frac_diffuse * cost_energy_base[yr] * \
-                tsv_ecost_base
-            # Total baseline energy cost
-            energy_total_cost[yr] = energy_total_sbmkt[yr] * \
-                diffuse_frac * cost_energy_base[yr] * tsv_ecost_base
-
-            # Set common variables for the energy cost calculations
-
-            # Competed energy cost captured by measure
-            energy_cost_tot_comp_meas = energy_total_sbmkt[yr] * \
-                diffuse_frac * tsv_ecost_eff * comp_frac_diffuse_meas * \
-                rel_perf[yr] * (
-                    site_source_conv_meas[yr] / site_source_conv_base[yr]) * \
-                cost_energy_meas[yr]
-            # Competed energy cost remaining with baseline
-            energy_cost_tot_comp_base = energy_total_sbmkt[yr] * \
-                diffuse_frac * tsv_ecost_base * (
-                    comp_frac_diffuse - comp_frac_diffuse_meas) * \
-                cost_energy_base[yr]
-            # Total energy cost captured by measure
-            energy_cost_tot_uncomp_meas = energy_total_sbmkt[yr] * \
-                diffuse_frac * tsv_ecost_eff * (
-                    1 - comp_frac_diffuse) * meas_cum_frac * rel_perf_capt * (
-                    site_source_conv_meas[yr] / site_source_conv_base[yr]) * \
-                cost_energy_meas[yr]
-            # Total energy cost remaining with baseline
-            energy_cost_tot_uncomp_base = energy_total_sbmkt[yr] * \
-                diffuse_frac * tsv_ecost_base * (
-                    1 - comp_frac_diffuse) * (1 - meas_cum_frac) * \
-                cost_energy_base[yr]
-
-            # Competed-efficient energy cost
-            energy_compete_cost_eff[yr] = energy_cost_tot_comp_meas + \
-                energy_cost_tot_comp_base
-            # Total-efficient energy cost
-            energy_total_eff_cost[yr] = energy_compete_cost_eff[yr] + \
-                energy_cost_tot_uncomp_meas + energy_cost_tot_uncomp_base
-
-            # Competed baseline carbon cost
-            carb_compete_cost[yr] = carb_compete[yr] * \
-                self.handyvars.ccosts[yr]
-            # Total baseline carbon cost
-            carb_total_cost[yr] = carb_total[yr] * self.handyvars.ccosts[yr]
-
-            # Competed carbon-efficient cost
-            carb_compete_cost_eff[yr] = \
-                carb_compete_eff[yr] * self.handyvars.ccosts[yr]
-            # Total carbon-efficient cost
-            carb_total_eff_cost[yr] = \
-                carb_total_eff[yr] * self.handyvars.ccosts[yr]
-
-            # Reset previously captured measure relative performance for next
-            # year to that of the overall stock in the current year
-            rel_perf_capt = rel_perf_overall
-
-            # For fuel switching measures where exogenous HP conversion
-            # rates have NOT been specified only, record the portion of total
-            # baseline energy, carbon, and energy cost that remains with the
-            # baseline fuel in the given year; for fuel switching measures
-            # with exogenous HP conversion rates specified, no baseline
-            # energy/carbon/cost will remain with the baseline fuel b/c of the
-            # way the markets are specified (the baseline for such measures is
-            # constrained to only the energy/carbon/cost that switches over
-            # in each year); for non-fuel switching measures, this variable is
-            # not used further in the routine
-            if self.fuel_switch_to is not None and not hp_rate:
-                fs_energy_eff_remain[yr] = \
-                    energy_tot_comp_base + energy_tot_uncomp_base
-                fs_carb_eff_remain[yr] = \
-                    carb_tot_comp_base + carb_tot_uncomp_base
-                fs_energy_cost_eff_remain[yr] = \
-                    energy_cost_tot_comp_base + energy_cost_tot_uncomp_base
+                    self.sector_shapes[adopt_scheme].add(
+                        mskeys[1], yr, "efficient",
+                        load_meas * tsv_shapes["efficient"] +
+                        load_base * tsv_shapes["baseline"])
+        # Ensure that load shape information is available for the update and
+        # if not, yield an error message
+        elif calc_sect_shapes is True and tsv_shapes is None and (
+                mskeys[0] == "primary" and (
+                    (mskeys[3] == "electricity") or
+                    (self.fuel_switch_to == "electricity"))):
+            raise ValueError(
+                "Missing hourly fraction of annual load data for "
+                "baseline energy use segment: " + str(mskeys) + ". ")
+
+        # For fuel switching measures where exogenous HP conversion
+        # rates have NOT been specified only, record the portion of total
+        # baseline energy, carbon, and energy cost that remains with the
+        # baseline fuel in the given year; for fuel switching measures
+        # with exogenous HP conversion rates specified, no baseline
+        # energy/carbon/cost will remain with the baseline fuel b/c of the
+        # way the markets are specified (the baseline for such measures is
+        # constrained to only the energy/carbon/cost that switches over
+        # in each year); for non-fuel switching measures, this variable is
+        # not used further in the routine
+        if self.fuel_switch_to is not None and not hp_rate:
+            fs_energy_eff_remain, fs_carb_eff_remain, \
+                fs_energy_cost_eff_remain = (yr_dict(x[:, 0], yrs) for x in [
+                    energy_tot_comp_base + energy_tot_uncomp_base,
+                    carb_tot_comp_base + carb_tot_uncomp_base,
+                    energy_cost_tot_comp_base + energy_cost_tot_uncomp_base])
+
+        # Convert results back to year-keyed dicts; results that depend on
+        # sampled measure performance or cost values are keyed to arrays of
+        # sampled values, and otherwise to point values
+        stock_total, energy_total, carb_total, stock_total_meas, \
+            stock_compete, energy_compete, carb_compete, \
+            stock_compete_meas, stock_total_cost, energy_total_cost, \
+            carb_total_cost, stock_compete_cost, energy_compete_cost, \
+            carb_compete_cost, mkt_scale_frac_fin = (
+                yr_dict(x[:, 0], yrs) for x in [
+                    stock_total, energy_total, carb_total, stock_total_meas,
+                    stock_compete, energy_compete, carb_compete,
+                    stock_compete_meas, stock_total_cost, energy_total_cost,
+                    carb_total_cost, stock_compete_cost, energy_compete_cost,
+                    carb_compete_cost, mkt_scale_frac_fin])
+        energy_total_eff, carb_total_eff, energy_compete_eff, \
+            carb_compete_eff, energy_total_eff_cost, carb_total_eff_cost, \
+            energy_compete_cost_eff, carb_compete_cost_eff = (
+                dict(zip(yrs, x)) if rel_perf_smp else yr_dict(x[:, 0], yrs)
+                for x in [energy_total_eff, carb_total_eff,
+                          energy_compete_eff, carb_compete_eff,
+                          energy_total_eff_cost, carb_total_eff_cost,
+                          energy_compete_cost_eff, carb_compete_cost_eff])
+        stock_total_cost_eff, stock_compete_cost_eff = (
+            dict(zip(yrs, x)) if cost_meas_smp else yr_dict(x[:, 0], yrs)
+            for x in [stock_total_cost_eff, stock_compete_cost_eff])
 
         # Return partitioned stock, energy, and cost mseg information
         return [stock_total, energy_total, carb_total,
@@ -8999,7 +9441,8 @@ class MeasurePackage(Measure):
             across contributing equipment vs. envelope ECMs that apply to the
             same region, building type/vintage, fuel type, and end use.
         sector_shapes (dict): Sector-level hourly baseline and efficient load
-            shapes by adopt scheme, EMM region, and year.
+            shapes by adopt scheme (as SectorShapes arrays indexed by EMM
+            region and year).
 
     """
 
@@ -9288,10 +9731,8 @@ class MeasurePackage(Measure):
             # full set of climate zones initialized above
             if calc_sect_shapes is True:
                 self.sector_shapes = {
-                    a_s: {reg: {yr: {"baseline": [0 for n in range(8760)],
-                                     "efficient": [0 for n in range(8760)]} for
-                                yr in self.handyvars.aeo_years_summary} for
-                          reg in self.climate_zone}
+                    a_s: sector_shapes.SectorShapes(
+                        self.climate_zone, self.handyvars.aeo_years_summary)
                     for a_s in self.handyvars.adopt_schemes}
 
             # Update measure contributing mseg data by adoption scheme
@@ -9341,8 +9782,8 @@ class MeasurePackage(Measure):
                                         copy.deepcopy(fs_eff_splt)
                             else:
                                 fs_eff_splt = None
-                            # Convert mseg string to list for further calcs.
-                            key_list = literal_eval(cm)
+                            # Find mseg key chain list for further calcs.
+                            key_list = self.handyvars.key_chains.get(cm).chain
                             # Add to initial annual electricity use that
                             # concerns the measure's sector shape, before
                             # package adjustments
@@ -9424,8 +9865,8 @@ class MeasurePackage(Measure):
                         fs_eff_splt = m[adopt_scheme]["eff_fuel_splits"][cm]
                     else:
                         fs_eff_splt = None
-                    # Convert mseg string to list for further calcs.
-                    key_list = literal_eval(cm)
+                    # Find mseg key chain list for further calcs.
+                    key_list = self.handyvars.key_chains.get(cm).chain
                     # Further adjust equipment msegs to account for
                     # overlapping envelope performance improvements
                     msegs_meas_fin[cm], mseg_out_break_fin = \
@@ -9478,23 +9919,24 @@ class MeasurePackage(Measure):
                 # information to account for overlaps with other measures in
                 # the package and add to the overall package sector shape
                 if sect_shp_e_fin:
-                    self.sector_shapes[adopt_scheme] = {reg: {yr: {s: [
-                        # Add in measure sector shape data, adjusted to
-                        # account for any changes in annual electricity use
-                        # after packaging, to the package sector shape
-                        self.sector_shapes[adopt_scheme][reg][yr][s][x] +
-                        m[adopt_scheme]["sect_shp_orig"][reg][yr][s][x] * (
-                            (m[adopt_scheme]["sect_shp_e_fin"][reg][yr][s] /
-                             m[adopt_scheme]["sect_shp_e_init"][reg][yr][s]
-                             ) if m[adopt_scheme][
-                                "sect_shp_e_fin"][reg][yr][s] != 0 else 1)
-                        for x in range(8760)]
-                        for s in ["baseline", "efficient"]}
-                        for yr in self.handyvars.aeo_years_summary}
-                        # Ensure that only package regions concerning currently
-                        # added individual measure are looped through
-                        for reg in self.climate_zone if reg in m[
-                            adopt_scheme]["regions"]}
+                    # Ensure that only package regions concerning currently
+                    # added individual measure are looped through
+                    for reg in [x for x in self.climate_zone if x in m[
+                            adopt_scheme]["regions"]]:
+                        for yr in self.handyvars.aeo_years_summary:
+                            for s in sector_shapes.CASES:
+                                # Add in measure sector shape data, adjusted to
+                                # account for any changes in annual electricity
+                                # use after packaging, to the package sector
+                                # shape
+                                self.sector_shapes[adopt_scheme].add(
+                                    reg, yr, s, m[adopt_scheme][
+                                        "sect_shp_orig"].get(reg, yr, s) * ((
+                                            sect_shp_e_fin[reg][yr][s] /
+                                            m[adopt_scheme][
+                                                "sect_shp_e_init"][reg][yr][s]
+                                        ) if sect_shp_e_fin[reg][yr][s] != 0
+                                        else 1))
 
         # Generate a packaged master microsegment based on the contributing
         # microsegment information defined above
@@ -9603,13 +10045,13 @@ class MeasurePackage(Measure):
                         # Record that the contributing microsegment key has
                         # been parsed for overlapping data
                         self.htcl_overlaps[adopt_scheme]["keys"].append(cm_key)
-                        # Translate the contributing microsegment key (which
-                        # is in string format) to list format
-                        keys = literal_eval(cm_key)
+                        # Find the parsed contributing microsegment key
+                        kc = self.handyvars.key_chains.get(cm_key)
                         # Pull out region, building type/vintage,
-                        # fuel type, and end use from the key list
+                        # fuel type, and end use from the key chain
                         cm_key_match = [str(x) for x in [
-                            keys[1], keys[2], keys[-1], keys[3], keys[4]]]
+                            kc.region, kc.bldg, kc.structure, kc.fuel,
+                            kc.end_use]]
                         # Determine which, if any, envelope ECMs overlap with
                         # the region, building type/vintage, fuel type, and
                         # end use for the current contributing mseg for the
@@ -9682,8 +10124,8 @@ class MeasurePackage(Measure):
                                 dmd_stk_cost, dmd_stk = (
                                     None for n in range(2))
 
-                            # Translate key used to identify overlaps to str
-                            cm_key_store = str(cm_key_match)
+                            # Set key used to identify overlaps as a str
+                            cm_key_store = kc.htcl_match_key
                             # Record the overlap data if it has not already
                             # been recorded for the current overlapping
                             # region, building type, building vintage,
@@ -9739,9 +10181,7 @@ class MeasurePackage(Measure):
 
         # Pull keys from the current contributing microsegment info. that
         # can be used to match across heating/cooling equip/env measures
-        htcl_key_match = str([str(x) for x in [
-            key_list[1], key_list[2], key_list[-1], key_list[3],
-            key_list[4]]])
+        htcl_key_match = self.handyvars.key_chains.get(cm_key).htcl_match_key
         # If the keys are not found in the package attribute that stores data
         # needed to adjust across equip/env msegs, set key to empty string
         if htcl_key_match not in self.htcl_overlaps[
@@ -9926,8 +10366,7 @@ class MeasurePackage(Measure):
         """
         # Pull keys from the current contributing microsegment info. that
         # can be used to match across heating/cooling equip/env measures
-        htcl_key_match = str([str(x) for x in [
-            key_list[1], key_list[2], key_list[-1], key_list[3], key_list[4]]])
+        htcl_key_match = self.handyvars.key_chains.get(cm_key).htcl_match_key
         # If the keys are not found in the package attribute that stores data
         # needed to adjust across equip/env msegs, stop operation
         if htcl_key_match in self.htcl_overlaps[
@@ -11063,7 +11502,7 @@ class MeasurePackage(Measure):
 
 def prepare_measures(measures, convert_data, msegs, msegs_cpl, handyvars,
                      handyfiles, cbecs_sf_byvint, tsv_data, base_dir, opts,
-                     ctrb_ms_pkg_prep, tsv_data_nonfs):
+                     ctrb_ms_pkg_prep, tsv_data_nonfs, prep_cache=None):
     """Finalize measure markets for subsequent use in the analysis engine.
 
     Note:
@@ -11087,6 +11526,8 @@ def prepare_measures(measures, convert_data, msegs, msegs_cpl, handyvars,
         ctrb_ms_pkg_prep (list): Names of measures that contribute to pkgs.
         tsv_data_nonfs (dict): If applicable, base-case TSV data to apply to
             non-fuel switching measures under a high decarb. scenario.
+        prep_cache (object): If applicable, previously prepared measure data
+            to reuse for measures whose definitions and inputs are unchanged.
 
     Returns:
         A list of dicts, each including a set of measure attributes that has
@@ -11096,6 +11537,12 @@ def prepare_measures(measures, convert_data, msegs, msegs_cpl, handyvars,
         ValueError: If more than one Measure object matches the name of a
             given input efficiency measure.
     """
+    # Find the keys that each measure's prepared data are cached under; keys
+    # are found before measure initialization, which modifies certain
+    # attributes of the input measure definitions
+    if prep_cache is not None:
+        meas_keys = [prep_cache.find_key(
+            m, opts, m["name"] in ctrb_ms_pkg_prep) for m in measures]
     print('Initializing measures...', end="", flush=True)
     # Translate user options to a dictionary for further use in Measures
     opts_dict = vars(opts)
@@ -11132,23 +11579,156 @@ def prepare_measures(measures, convert_data, msegs, msegs_cpl, handyvars,
             'One or more ECMs require EnergyPlus data for ECM performance; '
             'EnergyPlus-based ECM performance data are currently unsupported.')
 
+    # Draw a random number seed for each measure up front, in the original
+    # measure order, such that the sampling of any measure input
+    # distributions does not depend on the order in which (or the process
+    # in which) the measures' markets are filled
+    meas_seeds = numpy.random.randint(10000, size=len(meas_update_objs))
+
+    # Restore previously prepared data for measures with unchanged
+    # definitions and inputs; flag all other measures for preparation
+    if prep_cache is not None:
+        meas_to_fill = []
+        for ind, m in enumerate(meas_update_objs):
+            if prep_cache.load(m, meas_keys[ind]):
+                print("Restored ECM '" + m.name + "' from previously "
+                      "prepared data")
+            else:
+                meas_to_fill.append(ind)
+    else:
+        meas_to_fill = list(range(len(meas_update_objs)))
+
+    # Set the number of processes to use in finalizing measure markets
+    if opts is not None and getattr(opts, "workers", None) is not None:
+        n_workers = min(opts.workers, len(meas_to_fill))
+    else:
+        n_workers = 1
+    # Worker processes read the baseline data from memory inherited at
+    # process creation (copy-on-write); this requires the 'fork' start method
+    if n_workers > 1 and \
+            "fork" not in multiprocessing.get_all_start_methods():
+        warnings.warn(
+            "WARNING: Parallel measure preparation requires the 'fork' "
+            "process start method, which is unavailable on this system; "
+            "measures will be prepared serially")
+        n_workers = 1
+
+    # Share baseline microsegment results that do not depend on the measure
+    # across all measures (in parallel runs, each worker process adds to its
+    # own copy of the cache)
+    base_cache = BaselineMsegCache()
     # Finalize 'markets' attribute for all Measure objects
-    [m.fill_mkts(
-        msegs, msegs_cpl, convert_data, tsv_data, opts, ctrb_ms_pkg_prep,
-        tsv_data_nonfs)
-     for m in meas_update_objs]
+    if n_workers > 1:
+        # Make input data available to the worker processes as module-level
+        # data that are inherited (not pickled) when the processes fork
+        global prep_shared_data
+        prep_shared_data = {
+            "measures": meas_update_objs, "seeds": meas_seeds,
+            "msegs": msegs, "msegs_cpl": msegs_cpl,
+            "convert_data": convert_data, "tsv_data": tsv_data,
+            "opts": opts, "ctrb_ms_pkg_prep": ctrb_ms_pkg_prep,
+            "tsv_data_nonfs": tsv_data_nonfs, "base_cache": base_cache}
+        # Order the measures from largest to smallest expected baseline
+        # market for load balancing across the worker processes (the sort
+        # is stable, so ties retain the original measure order)
+        meas_order = sorted(
+            meas_to_fill, key=lambda ind: est_mkt_size(
+                meas_update_objs[ind], handyvars), reverse=True)
+        try:
+            with multiprocessing.get_context("fork").Pool(n_workers) as pool:
+                # Each finalized measure is returned alongside its index in
+                # the original measure list, preserving the measure order
+                for ind, m in pool.imap_unordered(
+                        fill_mkts_worker, meas_order, chunksize=1):
+                    meas_update_objs[ind] = m
+        finally:
+            prep_shared_data = None
+    else:
+        for ind in meas_to_fill:
+            numpy.random.seed(meas_seeds[ind])
+            meas_update_objs[ind].fill_mkts(
+                msegs, msegs_cpl, convert_data, tsv_data, opts,
+                ctrb_ms_pkg_prep, tsv_data_nonfs, base_cache)
+
+    # Store newly prepared measure data for reuse in later runs, and record
+    # the data used for each measure
+    if prep_cache is not None:
+        for ind in meas_to_fill:
+            prep_cache.save(meas_update_objs[ind], meas_keys[ind])
+        for ind, m in enumerate(measures):
+            prep_cache.record(m, opts, meas_keys[ind])
 
     return meas_update_objs
 
 
-def prepare_packages(packages, meas_update_objs, meas_summary,
+def fill_mkts_worker(ind):
+    """Finalize the markets of a single measure in a worker process.
+
+    Args:
+        ind (int): Index of the measure in the list of measures to prepare.
+
+    Returns:
+        Tuple of the measure index and the Measure object with finalized
+        'markets' attribute.
+    """
+    # Shorthand for input data inherited from the parent process
+    sd = prep_shared_data
+    m = sd["measures"][ind]
+    # Seed the random number generator as in the serial case
+    numpy.random.seed(sd["seeds"][ind])
+    m.fill_mkts(
+        sd["msegs"], sd["msegs_cpl"], sd["convert_data"], sd["tsv_data"],
+        sd["opts"], sd["ctrb_ms_pkg_prep"], sd["tsv_data_nonfs"],
+        sd["base_cache"])
+
+    return ind, m
+
+
+def est_mkt_size(m, handyvars):
+    """Estimate the number of baseline microsegments a measure applies to.
+
+    Note:
+        Used to order measures for parallel preparation; attributes that
+        are marked 'all' are assumed to expand to all available choices.
+
+    Args:
+        m (object): Measure object that has not yet been prepared.
+        handyvars (object): Global variables of use across Measure methods.
+
+    Returns:
+        Estimated number of baseline microsegment key chains for the measure.
+    """
+    # Initialize the estimated number of key chains
+    n_keys = 1
+    for attr, n_all in [
+            ("climate_zone", len(handyvars.in_all_map["climate_zone"])),
+            ("bldg_type", 14), ("fuel_type", 4), ("end_use", 10),
+            ("technology", 10),
+            ("structure_type", len(handyvars.in_all_map["structure_type"]))]:
+        val = getattr(m, attr, None)
+        # Handle attributes broken out by primary/secondary microsegment
+        if isinstance(val, dict):
+            val = val["primary"]
+        # Ensure attribute values are formatted as a list
+        if not isinstance(val, list):
+            val = [val]
+        # Count 'all' entries (e.g., 'all', 'all residential') as the
+        # full set of choices for the attribute
+        n_val = sum([n_all if (isinstance(x, str) and (
+            x == "all" or x.startswith("all "))) else 1 for x in val])
+        n_keys *= n_val
+
+    return n_keys
+
+
+def prepare_packages(packages, meas_update_objs, meas_stores,
                      handyvars, handyfiles, base_dir, opts, convert_data):
     """Combine multiple measures into a single packaged measure.
 
     Args:
         packages (dict): Names of packages and measures that comprise them.
         meas_update_objs (dict): Attributes of individual efficiency measures.
-        meas_summary (): List of dicts including previously prepared ECM data.
+        meas_stores (list): Stores of previously prepared ECM data.
         handyvars (object): Global variables of use across Measure methods.
         handyfiles (object): Input files of use across Measure methods.
         base_dir (string): Base directory.
@@ -11180,7 +11760,8 @@ def prepare_packages(packages, meas_update_objs, meas_summary,
         # the existing list of contributing measure objects for the package
         for m in measures_to_add:
             # Load and set high level summary data for the missing measure
-            meas_summary_data = [x for x in meas_summary if x["name"] == m]
+            meas_summary_data = [
+                x for store in meas_stores for x in store.records([m])]
             if len(meas_summary_data) == 1:
                 # Translate user options to a dictionary for further use in
                 # Measures
@@ -11199,16 +11780,18 @@ def prepare_packages(packages, meas_update_objs, meas_summary,
                 # Assemble file name for measure competition data
                 meas_file_name = meas_obj.name + ".pkl.gz"
                 # Load and set competition data for the missing measure object
-                with gzip.open(path.join(base_dir, meas_folder_name,
-                                         meas_file_name), 'r') as zp:
-                    try:
-                        meas_comp_data = pickle.load(zp)
-                    except Exception as e:
-                        raise Exception(
-                            "Error reading in competition data of " +
-                            "contributing ECM '" + meas_obj.name +
-                            "' for package '" + p["name"] + "': " +
-                            str(e)) from None
+                # (as plain dicts, since these data are updated in merging
+                # the measure into the package)
+                try:
+                    meas_comp_data = compete_arrays.to_dict(
+                        compete_arrays.load_compete_data(path.join(
+                            base_dir, meas_folder_name, meas_file_name)))
+                except Exception as e:
+                    raise Exception(
+                        "Error reading in competition data of " +
+                        "contributing ECM '" + meas_obj.name +
+                        "' for package '" + p["name"] + "': " +
+                        str(e)) from None
                 for adopt_scheme in handyvars.adopt_schemes:
                     meas_obj.markets[adopt_scheme]["master_mseg"] = \
                         meas_summary_data[0]["markets"][adopt_scheme][
@@ -11319,8 +11902,8 @@ def split_clean_data(meas_prepped_objs):
                 fs_splits_dict[adopt_scheme] = \
                     m.eff_fs_splt[adopt_scheme]
             # If applicable, add sector shape data
-            if m.sector_shapes is not None and len(
-                    m.sector_shapes[adopt_scheme].keys()) != 0:
+            if m.sector_shapes is not None and isinstance(
+                    m.sector_shapes[adopt_scheme], sector_shapes.SectorShapes):
                 shapes_dict["name"] = m.name
                 shapes_dict[adopt_scheme] = \
                     m.sector_shapes[adopt_scheme]
@@ -11796,25 +12379,26 @@ def main(base_dir):
 
     # Instantiate useful variables object
     handyvars = UsefulVars(base_dir, handyfiles, opts)
-
-    # Import file to write prepared measure attributes data to for
-    # subsequent use in the analysis engine (if file does not exist,
-    # provide empty list as substitute, since file will be created
-    # later when writing ECM data)
+    # Instantiate object with previously prepared measure data, keyed by the
+    # inputs used to prepare each measure
+    prep_cache = MeasurePrepCache(base_dir, handyfiles)
+
+    # Open store of prepared measure attributes data for subsequent use in
+    # the analysis engine (if file does not exist, the store is empty, and
+    # the file will be created later when writing ECM data); only the
+    # header values of each measure's data (name, user options, and package
+    # settings) are read here, as needed to determine which measures require
+    # preparation
     try:
-        es = open(path.join(base_dir, *handyfiles.ecm_prep), 'r')
-        try:
-            meas_summary = json.load(es)
-        except ValueError as e:
-            raise ValueError(
-                "Error reading in '" + handyfiles.ecm_prep +
-                "': " + str(e)) from None
-        es.close()
-        # Flag if the ecm_prep file already exists
-        ecm_prep_exists = True
-    except FileNotFoundError:
-        meas_summary = []
-        ecm_prep_exists = ""
+        meas_store = summary_store.SummaryStore(
+            path.join(base_dir, *handyfiles.ecm_prep))
+    except ValueError as e:
+        raise ValueError(
+            "Error reading in '" + path.join(*handyfiles.ecm_prep) +
+            "': " + str(e)) from None
+    meas_summary = meas_store.headers()
+    # Flag if the ecm_prep file already exists
+    ecm_prep_exists = meas_store.exists
 
     # Import packages JSON
     with open(path.join(base_dir, *handyfiles.ecm_packages), 'r') as mpk:
@@ -11825,21 +12409,17 @@ def main(base_dir):
                 "Error reading in ECM package '" + handyfiles.ecm_packages +
                 "': " + str(e)) from None
 
-    # If applicable, import file to write prepared measure sector shapes to
-    # (if file does not exist, provide empty list as substitute, since file
-    # will be created later when writing ECM data)
+    # If applicable, open store to write prepared measure sector shapes to
+    # (if file does not exist, the file will be created later when writing
+    # ECM data)
     if opts.sect_shapes is True:
         try:
-            es_ss = open(path.join(
-                base_dir, *handyfiles.ecm_prep_shapes), 'r')
-            try:
-                meas_shapes = json.load(es_ss)
-            except ValueError:
-                raise ValueError("Error reading in '" +
-                                 handyfiles.ecm_prep_shapes + "'")
-            es_ss.close()
-        except FileNotFoundError:
-            meas_shapes = []
+            shapes_store = summary_store.SummaryStore(
+                path.join(base_dir, *handyfiles.ecm_prep_shapes))
+        except ValueError:
+            raise ValueError(
+                "Error reading in '" +
+                path.join(*handyfiles.ecm_prep_shapes) + "'") from None
 
     # Determine which individual and package measure definitions
     # require further preparation for use in the analysis engine
@@ -11875,51 +12455,43 @@ def main(base_dir):
         for p in meas_toprep_package_init:
             ctrb_ms_pkg_all.append([p["name"], p["contributing_ECMs"]])
         if opts.pkg_env_sep is True:
-            # Import separate file that will ultimately store all
+            # Open separate store that will ultimately hold all
             # counterfactual package data for later use
             try:
-                ecf = open(
-                    path.join(base_dir, *handyfiles.ecm_prep_env_cf), 'r')
-                try:
-                    meas_summary_env_cf = json.load(ecf)
-                except ValueError as e:
-                    raise ValueError(
-                        "Error reading in '" + handyfiles.ecm_prep_env_cf +
-                        "': " + str(e)) from None
-                ecf.close()
-                # In some cases, individual ECMs may be defined and written to
-                # the counterfactual package data; these ECMs should be added
-                # to the list of previously prepared individual ECMs so that
-                # they are not prepared again if their definitions haven't
-                # been updated
-                meas_summary_env_cf_indiv = [
-                    m for m in meas_summary_env_cf if
-                    "contributing_ECMs" not in m.keys()]
-                if len(meas_summary_env_cf_indiv) != 0:
-                    meas_summary = meas_summary + meas_summary_env_cf_indiv
-            except FileNotFoundError:
-                meas_summary_env_cf = []
-            # If applicable, import separate file that will store
+                env_cf_store = summary_store.SummaryStore(
+                    path.join(base_dir, *handyfiles.ecm_prep_env_cf))
+            except ValueError as e:
+                raise ValueError(
+                    "Error reading in '" +
+                    path.join(*handyfiles.ecm_prep_env_cf) +
+                    "': " + str(e)) from None
+            # In some cases, individual ECMs may be defined and written to
+            # the counterfactual package data; these ECMs should be added
+            # to the list of previously prepared individual ECMs so that
+            # they are not prepared again if their definitions haven't
+            # been updated
+            meas_summary_env_cf_indiv = [
+                m for m in env_cf_store.headers() if
+                "contributing_ECMs" not in m.keys()]
+            if len(meas_summary_env_cf_indiv) != 0:
+                meas_summary = meas_summary + meas_summary_env_cf_indiv
+            # If applicable, open separate store that will hold
             # counterfactual package sector shape data
-            try:
-                ecf_ss = open(
-                    path.join(base_dir, *handyfiles.ecm_prep_env_cf), 'r')
+            if opts.sect_shapes is True:
                 try:
-                    meas_shapes_env_cf = json.load(ecf_ss)
+                    env_cf_shapes_store = summary_store.SummaryStore(
+                        path.join(base_dir,
+                                  *handyfiles.ecm_prep_env_cf_shapes))
                 except ValueError:
                     raise ValueError(
                         "Error reading in '" +
-                        handyfiles.ecm_prep_env_cf_shapes +
+                        path.join(*handyfiles.ecm_prep_env_cf_shapes) +
                         "'") from None
-                ecf_ss.close()
-            except FileNotFoundError:
-                meas_shapes_env_cf = []
         else:
-            meas_summary_env_cf, meas_shapes_env_cf = (
-                None for n in range(2))
+            env_cf_store = None
     else:
-        ctrb_ms_pkg_all, pkg_copy_flag, meas_summary_env_cf, \
-            meas_shapes_env_cf = (None for n in range(4))
+        ctrb_ms_pkg_all, pkg_copy_flag, env_cf_store = (
+            None for n in range(3))
 
     # Import all individual measure JSONs
     for mi in meas_toprep_indiv_names:
@@ -11946,7 +12518,10 @@ def main(base_dir):
                 # or e) command line arguments applied to the measure are not
                 # consistent with those reported out the last time the measure
                 # was prepared (based on 'usr_opts' attribute), excepting
-                # the 'verbose' option, which has no bearing on results
+                # the 'verbose', 'workers', and 'compact_json' options, which
+                # have no bearing on results, or f) any of the input files
+                # used to prepare the measure (e.g., baseline data) have
+                # changed since the last time the measure was prepared
                 update_indiv_ecm = ((ecm_prep_exists and stat(
                     path.join(handyfiles.indiv_ecms, mi)).st_mtime > stat(
                     path.join(
@@ -11964,8 +12539,10 @@ def main(base_dir):
                     (not all([all([m["usr_opts"][x] ==
                               vars(opts)[x] for x in [
                                 k for k in vars(opts).keys() if
-                                k != "verbose"]]) for m in
-                              match_in_prep_file]))))
+                                k not in ["verbose", "workers",
+                                          "compact_json"]]]) for m in
+                              match_in_prep_file])) or
+                    prep_cache.inputs_changed(meas_dict, opts)))
                 # Add measure to tracking of individual measures needing update
                 # independent of required updates to packages they are a
                 # part of (if applicable)
@@ -12238,16 +12815,22 @@ def main(base_dir):
     # further with 'ecm_prep.py' routine; otherwise end the routine
     if len(meas_toprep_indiv) > 0 or len(meas_toprep_package) > 0:
 
+        # Initialize compact store for year-keyed baseline data, which are
+        # moved into arrays as the baseline data files are read in
+        mseg_store = MsegStore()
         # Import baseline microsegments
         if opts.alt_regions in ['EMM', 'State']:  # Extract EMM/state files
             bjszip = path.join(base_dir, *handyfiles.msegs_in)
             # bjszip = path.splitext(bjs)[0] + '.gz'
-            with gzip.GzipFile(bjszip, 'r') as zip_ref:
-                msegs = json.loads(zip_ref.read().decode('utf-8'))
+            # EMM/state data are read from shards by region and building
+            # type only as measures key into them (the data are sharded
+            # on first use)
+            msegs = mseg_shards.load_msegs(bjszip, decode=MsegStore.loads)
         else:
             with open(path.join(base_dir, *handyfiles.msegs_in), 'r') as msi:
                 try:
-                    msegs = json.load(msi)
+                    msegs = json.load(
+                        msi, object_hook=mseg_store.year_vals_hook)
                 except ValueError as e:
                     raise ValueError(
                         "Error reading in '" +
@@ -12257,16 +12840,20 @@ def main(base_dir):
             bjszip = path.join(base_dir, *handyfiles.msegs_cpl_in)
             # bjszip = path.splitext(bjs)[0] + '.gz'
             with gzip.GzipFile(bjszip, 'r') as zip_ref:
-                msegs_cpl = json.loads(zip_ref.read().decode('utf-8'))
+                msegs_cpl = json.loads(zip_ref.read().decode('utf-8'),
+                                       object_hook=mseg_store.year_vals_hook)
         else:
             with open(
                     path.join(base_dir, *handyfiles.msegs_cpl_in), 'r') as bjs:
                 try:
-                    msegs_cpl = json.load(bjs)
+                    msegs_cpl = json.load(
+                        bjs, object_hook=mseg_store.year_vals_hook)
                 except ValueError as e:
                     raise ValueError(
                         "Error reading in '" +
                         handyfiles.msegs_cpl_in + "': " + str(e)) from None
+        # Finalize arrays of year-keyed baseline data
+        mseg_store.freeze()
         # Import measure cost unit conversion data
         with open(path.join(base_dir, *handyfiles.cost_convert_in), 'r') as cc:
             try:
@@ -12292,11 +12879,12 @@ def main(base_dir):
                 for m in meas_toprep_indiv])) or
                 opts is not None and opts.sect_shapes is True)):
             # Import load, price, and emissions shape data needed for time
-            # sensitive analysis of measure energy efficiency impacts
+            # sensitive analysis of measure energy efficiency impacts; on
+            # first use, these data are converted from gzipped JSON to a
+            # memory-mapped array format (see 'TSVArrayData')
             tsv_l = path.join(base_dir, *handyfiles.tsv_load_data)
             tsv_l_zip = path.splitext(tsv_l)[0] + '.gz'
-            with gzip.GzipFile(tsv_l_zip, 'r') as zip_ref_l:
-                tsv_load_data = json.loads(zip_ref_l.read().decode('utf-8'))
+            tsv_load_data = TSVArrayData(tsv_l_zip).load()
             # When sector shapes are specified and no other time sensitive
             # valuation or features are present, assume that hourly price
             # and emissions data will not be needed
@@ -12311,9 +12899,7 @@ def main(base_dir):
             else:
                 tsv_c = path.join(base_dir, *handyfiles.tsv_cost_data)
                 tsv_c_zip = path.splitext(tsv_c)[0] + '.gz'
-                with gzip.GzipFile(tsv_c_zip, 'r') as zip_ref_c:
-                    tsv_cost_data = \
-                        json.loads(zip_ref_c.read().decode('utf-8'))
+                tsv_cost_data = TSVArrayData(tsv_c_zip).load()
                 # Case where the user assesses time sensitive cost
                 # factors for before grid decarbonization for non-fuel
                 # switching measures
@@ -12321,18 +12907,13 @@ def main(base_dir):
                     tsv_c_nonfs = path.join(
                         base_dir, *handyfiles.tsv_cost_data_nonfs)
                     tsv_c_nonfs_zip = path.splitext(tsv_c_nonfs)[0] + '.gz'
-                    with gzip.GzipFile(tsv_c_nonfs_zip, 'r') as \
-                            zip_ref_nonfs_c:
-                        tsv_cost_nonfs_data = \
-                            json.loads(zip_ref_nonfs_c.read().decode('utf-8'))
+                    tsv_cost_nonfs_data = TSVArrayData(tsv_c_nonfs_zip).load()
                 else:
                     tsv_cost_nonfs_data = None
 
                 tsv_cb = path.join(base_dir, *handyfiles.tsv_carbon_data)
                 tsv_cb_zip = path.splitext(tsv_cb)[0] + '.gz'
-                with gzip.GzipFile(tsv_cb_zip, 'r') as zip_ref_cb:
-                    tsv_carbon_data = \
-                        json.loads(zip_ref_cb.read().decode('utf-8'))
+                tsv_carbon_data = TSVArrayData(tsv_cb_zip).load()
                 # Case where the user assesses time sensitive emissions
                 # factors for before grid decarbonization for non-fuel
                 # switching measures
@@ -12340,10 +12921,8 @@ def main(base_dir):
                     tsv_cb_nonfs = path.join(
                         base_dir, *handyfiles.tsv_carbon_data_nonfs)
                     tsv_cb_nonfs_zip = path.splitext(tsv_cb_nonfs)[0] + '.gz'
-                    with gzip.GzipFile(tsv_cb_nonfs_zip, 'r') as \
-                            zip_ref_nonfs_cb:
-                        tsv_carbon_nonfs_data = \
-                            json.loads(zip_ref_nonfs_cb.read().decode('utf-8'))
+                    tsv_carbon_nonfs_data = TSVArrayData(
+                        tsv_cb_nonfs_zip).load()
                 else:
                     tsv_carbon_nonfs_data = None
 
@@ -12399,12 +12978,13 @@ def main(base_dir):
         meas_prepped_objs = prepare_measures(
             meas_toprep_indiv, convert_data, msegs, msegs_cpl, handyvars,
             handyfiles, cbecs_sf_byvint, tsv_data, base_dir, opts,
-            ctrb_ms_pkg_prep, tsv_data_nonfs)
+            ctrb_ms_pkg_prep, tsv_data_nonfs, prep_cache)
 
         # Prepare measure packages for use in analysis engine (if needed)
         if meas_toprep_package:
             meas_prepped_objs = prepare_packages(
-                meas_toprep_package, meas_prepped_objs, meas_summary,
+                meas_toprep_package, meas_prepped_objs, [
+                    x for x in [meas_store, env_cf_store] if x is not None],
                 handyvars, handyfiles, base_dir, opts, convert_data)
 
         print("All ECM updates complete; finalizing data...",
@@ -12414,6 +12994,11 @@ def main(base_dir):
         # in the analysis engine
         meas_prepped_compete, meas_prepped_summary, meas_prepped_shapes, \
             meas_eff_fs_splt = split_clean_data(meas_prepped_objs)
+        # Initialize lists of high-level measure data and sector shapes to
+        # write to the prepared measure data stores and the counterfactual
+        # measure data stores
+        summary_updates, shapes_updates, summary_updates_env_cf, \
+            shapes_updates_env_cf = ([] for n in range(4))
 
         # Add all prepared high-level measure information to existing
         # high-level data and to list of active measures for analysis;
@@ -12428,28 +13013,18 @@ def main(base_dir):
                 m["name"] not in ctrb_ms_pkg_prep or (
                     opts.pkg_env_costs == '1' and
                     m["technology_type"]["primary"][0] == "supply")):
-                # Measure has been prepared from existing case (replace
-                # high-level data for measure)
-                if m["name"] in [x["name"] for x in meas_summary]:
-                    [x.update(m) for x in meas_summary if
-                     x["name"] == m["name"]]
-                # Measure is new (add high-level data for measure)
-                else:
-                    meas_summary.append(m)
+                # Add high-level data for measure to those written out (the
+                # store replaces the data for measures that have been
+                # prepared from an existing case and adds data for new
+                # measures)
+                summary_updates.append(m)
                 # Repeat for sector shapes, if applicable; exclude sector
                 # shapes for individual measures that are part of packages
                 if opts.sect_shapes is True:
                     # Shorthand for measure sector shapes data object
                     m_ss = meas_prepped_shapes[m_i]
                     if len(m_ss.keys()) != 0:
-                        # Measure has been prepared from existing case (replace
-                        # high-level data for measure)
-                        if m_ss["name"] in [x["name"] for x in meas_shapes]:
-                            [x.update(m_ss) for x in meas_shapes if
-                             x["name"] == m_ss["name"]]
-                        # Measure is new (add high-level data for measure)
-                        else:
-                            meas_shapes.append(m_ss)
+                        shapes_updates.append(m_ss)
                 # Add measures to active list; exclude individual measures that
                 # are part of a package from the active list, under the
                 # assumption that competition of these measures is handled via
@@ -12475,21 +13050,15 @@ def main(base_dir):
                     m["name"] not in ctrb_ms_pkg_prep or (
                     opts.pkg_env_costs == '1' and
                     m["technology_type"]["primary"][0] == "supply")):
-                # Measure has been prepared from existing case (replace
-                # high-level data for measure)
-                if m["name"] in [x["name"] for x in meas_summary_env_cf]:
-                    [x.update(m) for x in meas_summary_env_cf if
-                     x["name"] == m["name"]]
-                # Measure is new (add high-level data for measure)
-                else:
-                    meas_summary_env_cf.append(m)
-                    # Repeat for sector shapes, if applicable; exclude sector
-                    # shapes for individual measures that are part of packages
-                    if opts.sect_shapes is True:
-                        # Shorthand for measure sector shapes data object
-                        m_ss = meas_prepped_shapes[m_i]
-                        if len(m_ss.keys()) != 0:
-                            meas_shapes_env_cf.append(m_ss)
+                # Add high-level data for measure to those written out
+                summary_updates_env_cf.append(m)
+                # Repeat for sector shapes, if applicable; exclude sector
+                # shapes for individual measures that are part of packages
+                if opts.sect_shapes is True:
+                    # Shorthand for measure sector shapes data object
+                    m_ss = meas_prepped_shapes[m_i]
+                    if len(m_ss.keys()) != 0:
+                        shapes_updates_env_cf.append(m_ss)
 
         # Notify user that all measure preparations are completed
         print('Writing output data...')
@@ -12510,9 +13079,12 @@ def main(base_dir):
                 meas_file_name = m.name + ".pkl.gz"
                 # Assemble folder path for measure competition data
                 comp_folder_name = path.join(*handyfiles.ecm_compete_data)
-                with gzip.open(path.join(base_dir, comp_folder_name,
-                                         meas_file_name), 'w') as zp:
-                    pickle.dump(meas_prepped_compete[ind], zp, -1)
+                # Write year values of the data as rows of a flat array
+                # (memory-mapped by run.py) with a pickled index of the rows
+                compete_arrays.write_compete_data(
+                    meas_prepped_compete[ind], path.join(
+                        base_dir, comp_folder_name, meas_file_name),
+                    handyvars.aeo_years)
                 if len(meas_eff_fs_splt[ind].keys()) != 0:
                     # Assemble path for measure efficient fs split data
                     fs_splt_folder_name = path.join(
@@ -12520,29 +13092,36 @@ def main(base_dir):
                     with gzip.open(path.join(base_dir, fs_splt_folder_name,
                                              meas_file_name), 'w') as zp:
                         pickle.dump(meas_eff_fs_splt[ind], zp, -1)
-        # Write prepared high-level measure attributes data to JSON
-        with open(path.join(base_dir, *handyfiles.ecm_prep), "w") as jso:
-            json.dump(meas_summary, jso, indent=2, cls=MyEncoder)
-        # If applicable, write sector shape data to JSON
+        # Write prepared high-level measure attributes data to JSON; only
+        # the data for the measures prepared in this run are written (in
+        # place of any previous data for these measures)
+        meas_store.update(summary_updates, opts.compact_json)
+        # If applicable, write sector shape data to binary files, and the
+        # regions and years that index these data to JSON (replacing any
+        # previous data for the measures)
         if opts.sect_shapes is True:
-            with open(path.join(
-                    base_dir, *handyfiles.ecm_prep_shapes), "w") as jso:
-                json.dump(meas_shapes, jso, indent=2, cls=MyEncoder)
+            shapes_file = path.join(base_dir, *handyfiles.ecm_prep_shapes)
+            shapes_store.update([sector_shapes.write_shapes(
+                m_ss, shapes_file) for m_ss in shapes_updates],
+                opts.compact_json, merge=False)
 
         # Write prepared high-level counterfactual measure attributes data to
         # JSON (e.g., a separate file with data that will be used to isolate
         # the effects of envelope within envelope/HVAC packages)
         if opts is not None and opts.pkg_env_sep is True and \
-                meas_summary_env_cf is not None:
-            with open(path.join(
-                    base_dir, *handyfiles.ecm_prep_env_cf), "w") as jso:
-                json.dump(meas_summary_env_cf, jso, indent=2, cls=MyEncoder)
+                env_cf_store is not None:
+            env_cf_store.update(summary_updates_env_cf, opts.compact_json)
             # If applicable, write out envelope counterfactual sector shapes
             if opts.sect_shapes is True:
-                with open(path.join(
-                        base_dir,
-                        *handyfiles.ecm_prep_env_cf_shapes), "w") as jso:
-                    json.dump(meas_shapes_env_cf, jso, indent=2, cls=MyEncoder)
+                shapes_file = path.join(
+                    base_dir, *handyfiles.ecm_prep_env_cf_shapes)
+                env_cf_shapes_store.update([sector_shapes.write_shapes(
+                    m_ss, shapes_file) for m_ss in shapes_updates_env_cf],
+                    opts.compact_json, merge=False)
+
+        # Write the keys and input file digests of the data used for each
+        # prepared measure
+        prep_cache.write_index()
 
         # Write any newly prepared measure names to the list of active
         # measures to be run in the analysis engine
@@ -12647,6 +13226,12 @@ if __name__ == "__main__":
     parser.add_argument("--detail_brkout", action="store_true",
                         help=("Use more detailed region/building type "
                               "breakouts as applicable"))
+    # Optional flag to prepare measures in parallel across multiple processes
+    parser.add_argument("--workers", required=False, type=int, default=1,
+                        help="Number of processes to prepare measures with")
+    # Optional flag to write output JSON files without indentation
+    parser.add_argument("--compact_json", action="store_true",
+                        help="Write output JSON files without indentation")
     # Object to store all user-specified execution arguments
     opts = parser.parse_args()
 
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+
+""" Tests for preparing measure markets """
+
+# Import code to be tested
+import ecm_prep
+
+# Import needed packages
+import unittest
+import numpy
+import json
+import copy
+import random
+import io
+import tempfile
+from contextlib import redirect_stdout
+from unittest import mock
+from os import path
+from types import SimpleNamespace
+
+
+def sample_msegs(years, seed=1):
+    """Generate sample baseline stock/energy and technology data.
+
+    Notes:
+        Covers residential equipment, envelope, and fuel switching key chains
+        and commercial lighting key chains with secondary heating/cooling
+        ('lighting gain') effects across all AIA climate zones.
+
+    Args:
+        years (list): Modeling time horizon.
+        seed (int): Seed for the sample values.
+
+    Returns:
+        Baseline stock/energy and cost/performance/lifetime data.
+    """
+    rng = random.Random(seed)
+
+    def yr_vals(lo, hi):
+        return {yr: rng.uniform(lo, hi) for yr in years}
+
+    def mseg(stock=True):
+        return {"stock": yr_vals(1e5, 2e5) if stock else "NA",
+                "energy": yr_vals(0.1, 2)}
+
+    def cpl(perf_units, cost_units, perf=(2, 3), cost=(1000, 2000)):
+        return {
+            "performance": {
+                "typical": yr_vals(*perf), "units": perf_units,
+                "source": "sample"},
+            "installed cost": {
+                "typical": yr_vals(*cost), "units": cost_units,
+                "source": "sample"},
+            "lifetime": {
+                "average": yr_vals(10, 20), "range": yr_vals(1, 2),
+                "units": "years", "source": "sample"},
+            "consumer choice": {
+                "competed market share": {
+                    "parameters": {
+                        "b1": yr_vals(-0.01, -0.001),
+                        "b2": yr_vals(-0.01, -0.001)},
+                    "model type": "logistic regression",
+                    "source": "sample"}}}
+
+    msegs, msegs_cpl = {}, {}
+    for cz in ["AIA_CZ1", "AIA_CZ2", "AIA_CZ3", "AIA_CZ4", "AIA_CZ5"]:
+        msegs[cz], msegs_cpl[cz] = {}, {}
+        for bldg in ["single family home", "mobile home"]:
+            envelope = ["ground", "roof", "windows conduction"]
+            msegs[cz][bldg] = {
+                "total homes": yr_vals(1e6, 2e6),
+                "new homes": yr_vals(1e4, 2e4),
+                "total square footage": yr_vals(1e3, 2e3),
+                "natural gas": {
+                    "heating": {
+                        "supply": {"furnace (NG)": mseg()},
+                        "demand": {t: mseg(False) for t in envelope}},
+                    "water heating": mseg()},
+                "electricity": {
+                    "heating": {
+                        "supply": {"ASHP": mseg()},
+                        "demand": {t: mseg(False) for t in envelope}},
+                    "cooling": {
+                        "supply": {"ASHP": mseg(), "central AC": mseg()},
+                        "demand": {t: mseg(False) for t in envelope}},
+                    "water heating": {"electric WH": mseg()},
+                    "lighting": {"general service (LED)": mseg()}}}
+            envelope_cpl = {t: cpl(
+                "R value", "2016$/ft^2 floor", (10, 20), (1, 5))
+                for t in envelope}
+            msegs_cpl[cz][bldg] = {
+                "natural gas": {
+                    "heating": {
+                        "supply": {"furnace (NG)": cpl(
+                            "AFUE", "2013$/unit", (0.8, 0.95))},
+                        "demand": envelope_cpl},
+                    "water heating": cpl(
+                        "UEF", "2013$/unit", (0.6, 0.7))},
+                "electricity": {
+                    "heating": {
+                        "supply": {"ASHP": cpl("COP", "2013$/unit")},
+                        "demand": envelope_cpl},
+                    "cooling": {
+                        "supply": {
+                            "ASHP": cpl("COP", "2013$/unit", (3, 4)),
+                            "central AC": cpl("COP", "2013$/unit", (3, 4))},
+                        "demand": envelope_cpl},
+                    "water heating": {"electric WH": cpl(
+                        "UEF", "2013$/unit", (0.9, 0.95))},
+                    "lighting": {"general service (LED)": cpl(
+                        "lm/W", "2013$/unit", (80, 90), (5, 10))}}}
+        for bldg in ["assembly", "small office"]:
+            envelope = ["roof", "lighting gain"]
+            msegs[cz][bldg] = {
+                "total square footage": yr_vals(1e3, 2e3),
+                "new square footage": yr_vals(10, 20),
+                "natural gas": {
+                    "heating": {
+                        "supply": {"gas_furnace": mseg(False)},
+                        "demand": {t: mseg(False) for t in envelope}}},
+                "electricity": {
+                    "heating": {
+                        "supply": {"electric_res-heater": mseg(False)},
+                        "demand": {t: mseg(False) for t in envelope}},
+                    "cooling": {
+                        "supply": {"rooftop_AC": mseg(False)},
+                        "demand": {t: mseg(False) for t in envelope}},
+                    "lighting": {
+                        "T8 F32": mseg(False),
+                        "LED Integrated Luminaire": mseg(False)}}}
+            envelope_cpl = {t: cpl(
+                "R value", "2016$/ft^2 floor", (10, 20), (1, 5))
+                for t in envelope}
+            msegs_cpl[cz][bldg] = {
+                "natural gas": {
+                    "heating": {
+                        "supply": {"gas_furnace": cpl(
+                            "AFUE", "2013$/kBtu/h heating", (0.8, 0.9))},
+                        "demand": envelope_cpl}},
+                "electricity": {
+                    "heating": {
+                        "supply": {"electric_res-heater": cpl(
+                            "COP", "2013$/kBtu/h heating", (1, 1))},
+                        "demand": envelope_cpl},
+                    "cooling": {
+                        "supply": {"rooftop_AC": cpl(
+                            "COP", "2013$/kBtu/h cooling", (3, 4))},
+                        "demand": envelope_cpl},
+                    "lighting": {t: cpl(
+                        "lm/W", "2013$/1000 lm", (80, 120), (20, 40))
+                        for t in ["T8 F32", "LED Integrated Luminaire"]}}}
+
+    return msegs, msegs_cpl
+
+
+def default_opts():
+    """Set user options to their defaults for the AIA climate zones.
+
+    Returns:
+        Object with the user-specified execution options.
+    """
+    return SimpleNamespace(
+        site_energy=False, captured_energy=False, alt_regions="AIA",
+        tsv_metrics=False, sect_shapes=False, rp_persist=False,
+        verbose=False, health_costs=False, split_fuel=False,
+        no_scnd_lgt=False, floor_start=None, pkg_env_costs=False,
+        exog_hp_rates=False, gs_ref_carb=False, grid_decarb=False,
+        adopt_scn_restrict=False, retro_set=False, add_typ_eff=False,
+        pkg_env_sep=False, detail_brkout=False, workers=1,
+        compact_json=False)
+
+
+class PrepareMeasuresTest(unittest.TestCase):
+    """Test 'prepare_measures' on sample baseline data end to end.
+
+    Verify that measure markets prepared from baseline data held in a
+    'MsegStore' (year-keyed leaves backed by shared arrays, as read in by
+    'ecm_prep.main') match those prepared from the same data held as plain
+    year-keyed dicts.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Define variables and objects for use across all class functions."""
+        cls.base_dir = path.dirname(path.abspath(ecm_prep.__file__))
+        cls.opts = default_opts()
+        cls.handyfiles = ecm_prep.UsefulInputFiles(cls.opts)
+        cls.handyvars = ecm_prep.UsefulVars(
+            cls.base_dir, cls.handyfiles, cls.opts)
+        with open(path.join(
+                cls.base_dir, *cls.handyfiles.cost_convert_in), 'r') as cc:
+            cls.convert_data = json.load(cc)
+        with open(path.join(
+                cls.base_dir, *cls.handyfiles.cbecs_sf_byvint), 'r') as cbsf:
+            cls.cbecs_sf_byvint = json.load(cbsf)[
+                "commercial square footage by vintage"]
+        cls.measures = []
+        for name in [
+                "Best Residential Gas Furnace",
+                "Best Residential Air Source HP",
+                "Best Residential Electric HPWH (FS)",
+                "Best Residential Floors", "Best Commercial LED Lighting"]:
+            with open(path.join(
+                    cls.base_dir, "ecm_definitions", name + ".json"),
+                    'r') as jsf:
+                cls.measures.append(json.load(jsf))
+        # Baseline data are serialized as they would be read from file
+        msegs, msegs_cpl = sample_msegs(cls.handyvars.aeo_years)
+        cls.msegs_text, cls.msegs_cpl_text = (
+            json.dumps(x) for x in [msegs, msegs_cpl])
+
+    def prepare(self, msegs, msegs_cpl):
+        """Prepare the sample measures and return their markets.
+
+        Args:
+            msegs (dict): Baseline microsegment stock and energy use.
+            msegs_cpl (dict): Baseline technology cost, performance, and
+                lifetime.
+
+        Returns:
+            List of the prepared measure markets as written to JSON.
+        """
+        numpy.random.seed(0)
+        # Suppress progress messages
+        with redirect_stdout(io.StringIO()):
+            meas_prepped = ecm_prep.prepare_measures(
+                copy.deepcopy(self.measures), self.convert_data, msegs,
+                msegs_cpl, self.handyvars, self.handyfiles,
+                self.cbecs_sf_byvint, None, self.base_dir, self.opts, [],
+                None)
+        return json.loads(json.dumps(
+            [m.markets for m in meas_prepped], cls=ecm_prep.MyEncoder))
+
+    def test_store_matches_dicts(self):
+        """Test prepared markets from array-backed vs. plain baseline data."""
+        mkts_dict = self.prepare(*(json.loads(x) for x in [
+            self.msegs_text, self.msegs_cpl_text]))
+        mkts_store = self.prepare(*(ecm_prep.MsegStore.loads(x) for x in [
+            self.msegs_text, self.msegs_cpl_text]))
+        self.assertEqual(mkts_dict, mkts_store)
+        # Check that the sample data reach the primary and secondary
+        # microsegments of each measure
+        for mkts in mkts_store:
+            self.assertNotEqual(mkts["Technical potential"]["mseg_adjust"][
+                "contributing mseg keys and values"], {})
+        self.assertTrue(any("secondary" in k for k in mkts_store[-1][
+            "Technical potential"]["mseg_adjust"][
+            "contributing mseg keys and values"]))
+
+    def test_reference_markets(self):
+        """Test prepared markets against those of per-key chain turnover.
+
+        Notes:
+            Reference values are the total measure stock, total efficient
+            energy, and total efficient stock cost in 2025, 2035, and 2050 as
+            prepared from the sample data when the stock turnover of each key
+            chain was found year by year under each adoption scheme in turn.
+        """
+        ref_mkts = [{
+            "Technical potential": [
+                [1668495.636, 1549793.002, 1539124.537],
+                [11.88205592, 11.06129123, 9.819523624],
+                [5072226732, 4711370727, 4678938591]],
+            "Max adoption potential": [
+                [507845.5209, 1363804.34, 1406597.993],
+                [12.81329468, 11.31624796, 9.593529684],
+                [1543850384, 4145965193, 4276057899]]}, {
+            "Technical potential": [
+                [2900155.803, 2495463.537, 2981967.108],
+                [59.40591586, 58.19819336, 58.66060661],
+                [1.76909504e+10, 1.522232758e+10, 1.818999936e+10]],
+            "Max adoption potential": [
+                [910263.172, 2432826.873, 2723815.675],
+                [76.76125146, 58.96064395, 60.58839576],
+                [5552605350, 1.484024392e+10, 1.661527562e+10]]}, {
+            "Technical potential": [
+                [1486855.01, 1417237.363, 1551509.449],
+                [5.04263686, 7.379955973, 5.427338366],
+                [3679966150, 3507662473, 3839985886]],
+            "Max adoption potential": [
+                [465283.7665, 1251538.798, 1429019.484],
+                [8.279823736, 8.084853009, 5.938204696],
+                [1151577322, 3097558525, 3536823223]]}, {
+            "Technical potential": [
+                [24810443.68, 21466110.83, 22577198.74],
+                [65.4147175, 53.5574866, 55.99269204],
+                [6.838206701e+10, 6.30766663e+10, 7.75811276e+10]],
+            "Max adoption potential": [
+                [7129580.393, 18129049.55, 19267676.05],
+                [69.82452947, 54.23823946, 57.46775464],
+                [2.006733762e+10, 5.445545447e+10, 6.718563058e+10]]}, {
+            "Technical potential": [
+                [7.972078167e+10, 8.542703665e+10, 8.340413459e+10],
+                [96.6196234, 92.51810278, 93.64439574],
+                [4.557238484e+12, 4.88343655e+12, 4.767797354e+12]],
+            "Max adoption potential": [
+                [2.454851306e+10, 7.369577572e+10, 7.299471911e+10],
+                [120.1979583, 93.77384912, 91.00649366],
+                [1.409191979e+12, 4.218513778e+12, 4.167768384e+12]]}]
+        # Record the number of rows in each stock turnover batch
+        with mock.patch.object(
+                ecm_prep.stock_turnover, "turnover",
+                wraps=ecm_prep.stock_turnover.turnover) as trn:
+            mkts = self.prepare(*(ecm_prep.MsegStore.loads(x) for x in [
+                self.msegs_text, self.msegs_cpl_text]))
+        # Check that turnover is batched across key chains, such that the
+        # batches reach the NumPy kernel
+        self.assertGreaterEqual(
+            max(x.kwargs["stock"].shape[0] for x in trn.call_args_list),
+            ecm_prep.stock_turnover.NUMPY_MIN_ROWS)
+        for mkt, ref in zip(mkts, ref_mkts):
+            for adopt_scheme in ref.keys():
+                mseg = mkt[adopt_scheme]["master_mseg"]
+                numpy.testing.assert_allclose([[x[yr] for yr in [
+                    "2025", "2035", "2050"]] for x in [
+                    mseg["stock"]["total"]["measure"],
+                    mseg["energy"]["total"]["efficient"],
+                    mseg["cost"]["stock"]["total"]["efficient"]]],
+                    ref[adopt_scheme], rtol=1e-8)
+        # Check that smaller batches yield the same markets
+        with mock.patch.object(self.handyvars, "trn_batch", 3):
+            self.assertEqual(mkts, self.prepare(*(
+                ecm_prep.MsegStore.loads(x) for x in [
+                    self.msegs_text, self.msegs_cpl_text])))
+
+    def test_yr_vec(self):
+        """Test finding year-keyed values as vectors."""
+        yrs = self.handyvars.aeo_years
+        vals = {yr: float(ind) for ind, yr in enumerate(yrs)}
+        view = ecm_prep.MsegStore.loads(json.dumps({"a": vals}))["a"]
+        vec = numpy.arange(len(yrs), dtype=float)
+        for x in [vals, view, vec]:
+            numpy.testing.assert_array_equal(
+                ecm_prep.MsegStore.yr_vec(x, yrs), vec)
+        # Vectors over the time horizon pass through unchanged
+        self.assertIs(ecm_prep.MsegStore.yr_vec(vec, yrs), vec)
+
+
+class MeasurePrepCacheTest(unittest.TestCase):
+    """Test the cache of prepared measure data."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Define variables and objects for use across all class functions."""
+        cls.base_dir = path.dirname(path.abspath(ecm_prep.__file__))
+        cls.handyfiles = ecm_prep.UsefulInputFiles(default_opts())
+
+    def test_modules(self):
+        """Test finding the local modules used to prepare measures."""
+        modules = ecm_prep.MeasurePrepCache(
+            self.base_dir, self.handyfiles).modules
+        for mod in [ecm_prep, ecm_prep.stock_turnover, ecm_prep.mseg_shards,
+                    ecm_prep.summary_store.json_stream]:
+            self.assertEqual(
+                modules[path.basename(mod.__file__)],
+                path.abspath(mod.__file__))
+
+    def test_prune(self):
+        """Test removing cached data the index does not reference."""
+        prep_cache = ecm_prep.MeasurePrepCache(
+            self.base_dir, self.handyfiles)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            prep_cache.cache_dir = cache_dir
+            prep_cache.index = {
+                "a": {"key": "k1", "inputs": {}},
+                "b": {"key": "k2", "inputs": {}}}
+            for key in ["k1", "k2", "k3"]:
+                with open(path.join(cache_dir, key + ".pkl.gz"), 'w'):
+                    pass
+            # Data previously stored for a measure are removed when the
+            # measure's data are stored anew
+            prep_cache.save(SimpleNamespace(name="a", markets={}), "k4")
+            self.assertEqual(sorted(ecm_prep.listdir(cache_dir)), [
+                "k2.pkl.gz", "k3.pkl.gz", "k4.pkl.gz"])
+            # All other unreferenced data are removed with the index update
+            prep_cache.index["a"]["key"] = "k4"
+            prep_cache.write_index()
+            self.assertEqual(sorted(ecm_prep.listdir(cache_dir)), [
+                "index.json", "k2.pkl.gz", "k4.pkl.gz"])
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+""" Single-pass import of EIA AEO text/CSV data files.
+
+The residential and commercial baseline data import scripts (mseg.py,
+com_mseg.py) read the EIA AEO output files (e.g., RESDBOUT, KDBOUT, KSDOUT)
+into numpy structured arrays. This module provides the pieces these imports
+share: reading the lines of a file once (removing NULL characters as they
+are read), converting the parsed rows of a file in chunks into a
+preallocated structured array, and caching the resultant arrays on disk
+(as .npy files next to the data files), keyed by the digest of the data file
+contents, the import settings, and the source code of the import routines,
+such that unchanged data files are not parsed again by unchanged code.
+"""
+
+import numpy
+import hashlib
+import json
+from glob import glob
+from os import path, replace, remove
+
+
+# Number of rows converted to the structured array at once
+CHUNK_ROWS = 50000
+
+
+def read_lines(data_file_path, replace_text=(), encoding=None):
+    """Read the lines of a data file once, removing NULL characters.
+
+    Args:
+        data_file_path (str): The full path to the data file to be read.
+        replace_text (list): Pairs of strings, where each occurrence of
+            the first string in a line is replaced with the second.
+        encoding (str, optional): The encoding of the data file.
+
+    Yields:
+        Each line of the data file, with NULL characters removed and any
+        other replacements made.
+    """
+    with open(data_file_path, encoding=encoding) as thefile:
+        for line in thefile:
+            line = line.replace('\0', '')
+            for old, new in replace_text:
+                line = line.replace(old, new)
+            yield line
+
+
+def fill_array(rows, dtype_list, fix=None, chunk_rows=None):
+    """Convert rows of data into a structured array, chunk by chunk.
+
+    Args:
+        rows: Iterable of the tuples of values in each row of data.
+        dtype_list (list): A list of tuples with each tuple containing two
+            entries, a column heading string, and a string defining the
+            data type for that column. Formatted as a numpy dtype list.
+        fix (function, optional): Called with a chunk of rows (list) and
+            the dtype list if the chunk cannot be converted using the dtype
+            list; returns the chunk and dtype list to convert the chunk
+            with instead (the columns of the rows already converted are
+            recast to any updated dtype list).
+        chunk_rows (int, optional): The number of rows to convert at once
+            (CHUNK_ROWS by default).
+
+    Returns:
+        A numpy structured array of the rows of data.
+
+    Notes:
+        Chunks of rows are converted into an array allocated up front,
+        which is extended (doubling its length) only if more rows are
+        found than it can hold; rows are thus never held in memory as
+        tuples all at once.
+    """
+    if chunk_rows is None:
+        chunk_rows = CHUNK_ROWS
+    final_struct = numpy.empty(chunk_rows, dtype=dtype_list)
+    n_rows = 0
+    rows = iter(rows)
+    while True:
+        # Collect the next chunk of rows
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_rows:
+                break
+        if not chunk:
+            break
+        try:
+            chunk_struct = numpy.array(chunk, dtype=dtype_list)
+        except ValueError:
+            if fix is None:
+                raise
+            chunk, dtype_list = fix(chunk, dtype_list)
+            chunk_struct = numpy.array(chunk, dtype=dtype_list)
+            # Recast the rows already converted to any updated dtypes
+            if chunk_struct.dtype != final_struct.dtype:
+                final_struct = final_struct[:n_rows].astype(
+                    chunk_struct.dtype)
+        # Extend the array if needed, then copy the chunk into it
+        if n_rows + len(chunk_struct) > len(final_struct):
+            extended = numpy.empty(max(
+                2 * len(final_struct), n_rows + chunk_rows),
+                dtype=final_struct.dtype)
+            extended[:n_rows] = final_struct[:n_rows]
+            final_struct = extended
+        final_struct[n_rows:n_rows + len(chunk_struct)] = chunk_struct
+        n_rows += len(chunk_struct)
+
+    return final_struct[:n_rows].copy()
+
+
+def file_digest(data_file_path):
+    """Find the digest of the contents of a data file.
+
+    Args:
+        data_file_path (str): The full path to the data file.
+
+    Returns:
+        Hexadecimal SHA-256 hash of the file contents.
+    """
+    file_hash = hashlib.sha256()
+    with open(data_file_path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def cache_path(data_file_path, digest, settings_key):
+    """Set the path to the cached array for a data file.
+
+    Args:
+        data_file_path (str): The full path to the data file.
+        digest (str): Digest of the data file contents.
+        settings_key (str): Digest of the import settings.
+
+    Returns:
+        Path to the .npy file of the array imported from the data file.
+    """
+    return (path.splitext(data_file_path)[0] + '_import_' + digest[:16] +
+            '_' + settings_key[:16] + '.npy')
+
+
+def cached_import(data_file_path, settings, parse, sources=()):
+    """Import a data file, reusing the array cached for unchanged files.
+
+    Args:
+        data_file_path (str): The full path to the data file.
+        settings (dict): The import settings (e.g., the importing function,
+            delimiting character, dtype list, and rows to skip) that bear
+            on the resultant array (must be serializable to JSON).
+        parse (function): Called without arguments to import the data
+            file if no cached array exists for the file contents and
+            settings.
+        sources (list): Paths to the source files of the import routines
+            that 'parse' calls (in addition to this module), such that
+            changes to these routines are not masked by arrays cached by
+            the routines as they were before.
+
+    Returns:
+        A numpy structured array of the imported data file.
+
+    Notes:
+        Arrays cached for earlier contents of the data file (imported with
+        the same settings) are removed once an array is cached for the
+        current contents. Failures to write the cache (e.g., in a read-only
+        directory) are ignored.
+    """
+    digest = file_digest(data_file_path)
+    settings_key = hashlib.sha256(json.dumps(
+        dict(settings, file_name=path.basename(data_file_path),
+             code=[file_digest(src) for src in [__file__] + list(sources)]),
+        sort_keys=True).encode('utf-8')).hexdigest()
+    cache_file = cache_path(data_file_path, digest, settings_key)
+    try:
+        return numpy.load(cache_file, allow_pickle=False)
+    except (OSError, ValueError):
+        pass
+    final_struct = parse()
+    try:
+        # Write to a temporary file first such that an interrupted write
+        # does not leave an incomplete cached array
+        with open(cache_file + '.tmp', 'wb') as fh:
+            numpy.save(fh, final_struct, allow_pickle=False)
+        replace(cache_file + '.tmp', cache_file)
+        for old_file in glob(cache_path(
+                data_file_path, '?' * 16, settings_key)):
+            if old_file != cache_file:
+                remove(old_file)
+    except OSError:
+        pass
+
+    return final_struct
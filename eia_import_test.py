@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+""" Tests for the single-pass import of EIA AEO data files """
+
+# Import code to be tested
+import eia_import
+
+# Import needed packages
+import unittest
+import numpy
+import tempfile
+import os
+from os import path
+
+
+class EIAImportTest(unittest.TestCase):
+    """Test reading, converting, and caching of EIA AEO data files.
+
+    Attributes:
+        tmp_dir (object): Temporary folder for the sample data file.
+        data_file (str): Path to the sample data file.
+        dtype_list (list): Sample dtype definition.
+        rows (list): Sample rows of data.
+    """
+
+    def setUp(self):
+        """Set sample rows of data and write them to a file."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_file = path.join(self.tmp_dir.name, "KDBOUT.txt")
+        self.dtype_list = [('Label', '<U50'), ('Year', 'i4'),
+                           ('Amount', 'i4')]
+        self.rows = [('EndUseConsump', str(yr), str(yr - 2000))
+                     for yr in range(2010, 2021)]
+        with open(self.data_file, "w") as fh:
+            fh.write("Label,Year,Amount\n")
+            for row in self.rows:
+                fh.write(",".join(row).replace("End", "End\0") + "\n")
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        self.tmp_dir.cleanup()
+
+    def test_read_lines(self):
+        """Test removal of NULL characters and other replacements."""
+        lines = list(eia_import.read_lines(
+            self.data_file, [("Consump", "Use")]))
+        self.assertEqual(lines[1], "EndUseUse,2010,10\n")
+        self.assertEqual(len(lines), len(self.rows) + 1)
+
+    def test_fill_array(self):
+        """Test conversion of rows of data in chunks."""
+        expected = numpy.array(self.rows, dtype=self.dtype_list)
+        # The array is extended as needed to hold all of the rows
+        numpy.testing.assert_array_equal(eia_import.fill_array(
+            self.rows, self.dtype_list, chunk_rows=3), expected)
+        self.assertEqual(len(eia_import.fill_array(
+            [], self.dtype_list, chunk_rows=3)), 0)
+
+        # Chunks that cannot be converted are fixed, and the rows already
+        # converted are recast to any updated dtypes
+        def fix(chunk, dtype_list):
+            return ([r[:2] + (r[2].replace('NA', 'nan'),) for r in chunk],
+                    dtype_list[:2] + [('Amount', 'f8')])
+
+        rows = self.rows[:-1] + [('EndUseConsump', '2020', 'NA')]
+        with self.assertRaises(ValueError):
+            eia_import.fill_array(rows, self.dtype_list, chunk_rows=3)
+        fixed = eia_import.fill_array(rows, self.dtype_list, fix, 3)
+        self.assertEqual(fixed.dtype['Amount'], numpy.dtype('f8'))
+        numpy.testing.assert_array_equal(
+            fixed['Amount'][:-1], expected['Amount'][:-1])
+        self.assertTrue(numpy.isnan(fixed['Amount'][-1]))
+
+    def test_cached_import(self):
+        """Test that data files are parsed again only once changed."""
+        parsed = []
+
+        def parse():
+            parsed.append(1)
+            return numpy.array(self.rows, dtype=self.dtype_list)
+
+        settings = {"delim_char": ","}
+        for n in range(2):
+            numpy.testing.assert_array_equal(eia_import.cached_import(
+                self.data_file, settings, parse), parse())
+        # The first import parses the file, the second reads the cache
+        self.assertEqual(len(parsed), 3)
+        # Imports with other settings do not use the cached array
+        eia_import.cached_import(self.data_file, {"delim_char": "\t"}, parse)
+        self.assertEqual(len(parsed), 4)
+        # Arrays cached for earlier contents of the file are removed
+        with open(self.data_file, "a") as fh:
+            fh.write("EndUseConsump,2021,21\n")
+        eia_import.cached_import(self.data_file, settings, parse)
+        self.assertEqual(len(parsed), 5)
+        self.assertEqual(len([f for f in os.listdir(self.tmp_dir.name) if
+                              f.endswith(".npy")]), 2)
+
+    def test_cached_import_code(self):
+        """Test that data files are parsed again once the importer changes."""
+        parsed = []
+
+        def parse():
+            parsed.append(1)
+            return numpy.array(self.rows, dtype=self.dtype_list)
+
+        importer = path.join(self.tmp_dir.name, "importer.py")
+        with open(importer, "w") as fh:
+            fh.write("skip_rows = []\n")
+        for n in range(2):
+            eia_import.cached_import(self.data_file, {}, parse, [importer])
+        self.assertEqual(len(parsed), 1)
+        # Arrays cached by an earlier version of the importer are not used
+        with open(importer, "w") as fh:
+            fh.write("skip_rows = ['SF']\n")
+        eia_import.cached_import(self.data_file, {}, parse, [importer])
+        self.assertEqual(len(parsed), 2)
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,16 @@ import com_mseg as cm
 import functools as ft
 import math
 import gzip
+import multiprocessing
+import warnings
+import mseg_shards
+from os import path, makedirs
+from argparse import ArgumentParser
+
+
+# Data shared with the worker processes that convert and write the data for
+# each custom region (see 'write_converted_shards')
+convert_shared_data = None
 
 
 class UsefulVars(object):
@@ -249,6 +259,90 @@ class UsefulVars(object):
             self.json_out = 'cpl_res_com_cdiv.json'
 
 
+def sector_types():
+    """Find the building and fuel types of the residential and commercial data.
+
+    Returns:
+        A tuple of lists of the residential building types, commercial
+        building types, residential fuel types, and commercial fuel types
+        (as found in the input JSON database).
+    """
+    return (list(mseg.bldgtypedict.keys()),
+            list(cm.CommercialTranslationDicts().bldgtypedict.keys()),
+            list(mseg.fueldict.keys()),
+            list(cm.CommercialTranslationDicts().fueldict.keys()))
+
+
+def conversion_flags(k, base_dict, cd_to_cz_factor, fuel_flag,
+                     res_convert_array, com_convert_array, types):
+    """Update the conversion factor array and fuel type flag for a key.
+
+    The census division to custom region conversion factors that apply to
+    the data in the input JSON database depend on the building type (and,
+    for EMM regions or states, on the fuel type) that the data fall under.
+    This function updates the applicable conversion factor array and fuel
+    type flag as each key of a portion of the database is reached, in the
+    (sorted) order in which the keys are traversed.
+
+    Args:
+        k (str): The current key.
+        base_dict (dict): The portion of the input JSON database in which
+            the current key is found.
+        cd_to_cz_factor: The conversion factor array that applied to the
+            previous key (0 if not yet set).
+        fuel_flag: The fuel type flag that applied to the previous key
+            (None if not yet set).
+        res_convert_array: Coefficients for converting from census
+            divisions to custom regions for residential buildings.
+        com_convert_array: Coefficients for converting from census
+            divisions to custom regions for commercial buildings.
+        types (tuple): Lists of the residential and commercial building and
+            fuel types, as given by sector_types.
+
+    Returns:
+        A tuple of the conversion factor array and fuel type flag that
+        apply to the data under the current key.
+    """
+    res_bldg_types, com_bldg_types, res_fuel_types, com_fuel_types = types
+
+    # Identify appropriate census division to custom region conversion
+    # weighting factor array as a function of building type; k corresponds
+    # to the current top level/parent key, thus k is equal to a building
+    # type immediately prior to traversing the entire child tree for that
+    # building type, for which the conversion number array cd_to_cz_factor
+    # will be the same. Ensure that the walk is currently at the building
+    # type level by checking keys from the next level down (the fuel type
+    # level) against expected fuel types
+    if ((k in res_bldg_types and
+        any([x in res_fuel_types for x in base_dict[k].keys()])) or
+        (k in com_bldg_types and
+         any([x in com_fuel_types for x in base_dict[k].keys()]))):
+        if k in res_bldg_types:
+            cd_to_cz_factor = res_convert_array
+        elif k in com_bldg_types:
+            cd_to_cz_factor = com_convert_array
+    # Flag the current fuel type being updated, which is relevant
+    # to ultimate selection of conversion factor from the conversion
+    # array when translating to EMM region or state, in which case
+    # conversion factors are different for different fuels. Use the
+    # expectation that conversion arrays will be in dict format in the
+    # EMM region or state case (with keys for fuel conversion factors)
+    # to trigger the fuel flag update
+    elif (k in res_fuel_types or k in com_fuel_types) and \
+            type(res_convert_array) is dict:
+        fuel_flag = k
+    # When updating total building stock or square footage data for
+    # EMM regions or states, which are not keyed by fuel type, set the
+    # fuel type flag accordingly; for states, this will pull in
+    # mapping data based on consumption splits across all fuels; for
+    # EMM regions, this will pull in mapping data based on electricity
+    elif (k in ["total homes", "new homes", "total square footage",
+                "new square footage"]):
+        fuel_flag = "building stock and square footage"
+
+    return cd_to_cz_factor, fuel_flag
+
+
 def merge_sum(base_dict, add_dict, cd, cz, cd_dict, cd_list,
               res_convert_array, com_convert_array, cd_to_cz_factor=0,
               fuel_flag=None):
@@ -317,13 +411,8 @@ def merge_sum(base_dict, add_dict, cd, cz, cd_dict, cd_list,
     """
 
     # Extract lists of strings corresponding to the residential and
-    # commercial building types used to process these inputs
-    res_bldg_types = list(mseg.bldgtypedict.keys())
-    com_bldg_types = list(cm.CommercialTranslationDicts().bldgtypedict.keys())
-    # Extract lists of strings corresponding to the residential and
-    # commercial fuel types used to process these inputs
-    res_fuel_types = list(mseg.fueldict.keys())
-    com_fuel_types = list(cm.CommercialTranslationDicts().fueldict.keys())
+    # commercial building and fuel types used to process these inputs
+    types = sector_types()
 
     for (k, i), (k2, i2) in zip(sorted(base_dict.items()),
                                 sorted(add_dict.items())):
@@ -332,41 +421,11 @@ def merge_sum(base_dict, add_dict, cd, cz, cd_dict, cd_list,
         # (census division basis) and add_dict (custom region basis)
         # are proceeding with the same structure
         if k == k2:
-            # Identify appropriate census division to custom region
-            # conversion weighting factor array as a function of building
-            # type; k and k2 correspond to the current top level/parent key,
-            # thus k and k2 are equal to a building type immediately
-            # prior to traversing the entire child tree for that
-            # building type, for which the conversion number array
-            # cd_to_cz_factor will be the same. Ensure that the walk is
-            # currently at the building type level by checking keys from the
-            # next level down (the fuel type level) against expected fuel types
-            if ((k in res_bldg_types and
-                any([x in res_fuel_types for x in base_dict[k].keys()])) or
-                (k in com_bldg_types and
-                 any([x in com_fuel_types for x in base_dict[k].keys()]))):
-                if k in res_bldg_types:
-                    cd_to_cz_factor = res_convert_array
-                elif k in com_bldg_types:
-                    cd_to_cz_factor = com_convert_array
-            # Flag the current fuel type being updated, which is relevant
-            # to ultimate selection of conversion factor from the conversion
-            # array when translating to EMM region or state, in which case
-            # conversion factors are different for different fuels. Use the
-            # expectation that conversion arrays will be in dict format in the
-            # EMM region or state case (with keys for fuel conversion factors)
-            # to trigger the fuel flag update
-            elif (k in res_fuel_types or k in com_fuel_types) and \
-                    type(res_convert_array) is dict:
-                fuel_flag = k
-            # When updating total building stock or square footage data for
-            # EMM regions or states, which are not keyed by fuel type, set the
-            # fuel type flag accordingly; for states, this will pull in
-            # mapping data based on consumption splits across all fuels; for
-            # EMM regions, this will pull in mapping data based on electricity
-            elif (k in ["total homes", "new homes", "total square footage",
-                        "new square footage"]):
-                fuel_flag = "building stock and square footage"
+            # Update the conversion factor array and fuel type flag that
+            # apply to the data under the current key
+            cd_to_cz_factor, fuel_flag = conversion_flags(
+                k, base_dict, cd_to_cz_factor, fuel_flag, res_convert_array,
+                com_convert_array, types)
             # Recursively loop through both dicts
             if isinstance(i, dict):
                 merge_sum(i, i2, cd, cz, cd_dict, cd_list, res_convert_array,
@@ -420,7 +479,8 @@ def merge_sum(base_dict, add_dict, cd, cz, cd_dict, cd_list,
     return base_dict
 
 
-def clim_converter(input_dict, res_convert_array, com_convert_array):
+def clim_converter(input_dict, res_convert_array, com_convert_array,
+                   matrix=False):
     """Convert input data dict from a census division to a custom region basis.
 
     This function principally serves to prepare the inputs for, and
@@ -437,6 +497,10 @@ def clim_converter(input_dict, res_convert_array, com_convert_array):
         com_convert_array (numpy.ndarray): Array of census
             division to custom region conversion factors for
             commercial building types.
+        matrix (bool): If True, convert the data for all of the custom
+            regions at once using matrix_converter, rather than merging
+            copies of the data for each census division into each custom
+            region with merge_sum.
 
     Returns:
         A complete dict with the same structure as input_dict,
@@ -445,6 +509,11 @@ def clim_converter(input_dict, res_convert_array, com_convert_array):
         have been updated to correspond to those custom regions.
     """
 
+    # Convert the data as arrays and rebuild the dict from the result
+    if matrix:
+        return matrix_converter(
+            input_dict, res_convert_array, com_convert_array).to_dict()
+
     # Create an instance of the CommercialTranslationDicts object from
     # com_mseg, which contains a dict that translates census division
     # strings into the corresponding integer codes
@@ -514,6 +583,401 @@ def clim_converter(input_dict, res_convert_array, com_convert_array):
     return converted_dict
 
 
+def conversion_leaves(tree, res_convert_array, com_convert_array, types,
+                      cd_to_cz_factor=0, fuel_flag=None, key_list=()):
+    """Find the data in a census division and the factors that apply to them.
+
+    The input dict is traversed in the same (sorted) order as in merge_sum,
+    such that the conversion factor array and fuel type flag found for
+    each numeric value (or list of values) are those that merge_sum would
+    use to convert it.
+
+    Args:
+        tree (dict): A portion of the input JSON database corresponding to
+            a census division.
+        res_convert_array: Coefficients for converting from census
+            divisions to custom regions for residential buildings.
+        com_convert_array: Coefficients for converting from census
+            divisions to custom regions for commercial buildings.
+        types (tuple): Lists of the residential and commercial building and
+            fuel types, as given by sector_types.
+        cd_to_cz_factor: The conversion factor array that applies to the
+            data in 'tree' (0 if not yet set).
+        fuel_flag: The fuel type flag that applies to the data in 'tree'
+            (None if not yet set).
+        key_list (tuple): Keys leading to 'tree' in the input dict.
+
+    Yields:
+        Tuples of the keys leading to each numeric value or list of values
+        (strings are not converted), the value or list, and the conversion
+        factor array and fuel type flag that apply to it.
+    """
+    for k, i in sorted(tree.items()):
+        cd_to_cz_factor, fuel_flag = conversion_flags(
+            k, tree, cd_to_cz_factor, fuel_flag, res_convert_array,
+            com_convert_array, types)
+        if isinstance(i, dict):
+            yield from conversion_leaves(
+                i, res_convert_array, com_convert_array, types,
+                cd_to_cz_factor, fuel_flag, key_list + (k,))
+        elif type(i) is not str:
+            yield key_list + (k,), i, cd_to_cz_factor, fuel_flag
+
+
+def tree_leaves(tree, key_list=()):
+    """Find the numeric data in a census division, in sorted key order.
+
+    Args:
+        tree (dict): A portion of the input JSON database corresponding to
+            a census division.
+        key_list (tuple): Keys leading to 'tree' in the input dict.
+
+    Yields:
+        Tuples of the keys leading to each numeric value or list of values
+        and the value or list.
+    """
+    for k, i in sorted(tree.items()):
+        if isinstance(i, dict):
+            yield from tree_leaves(i, key_list + (k,))
+        elif type(i) is not str:
+            yield key_list + (k,), i
+
+
+def merge_leaves(template, tree):
+    """Match the numeric data in a census division to those in another.
+
+    The data are matched as merge_sum matches them when adding the data
+    for a census division ('tree') to the data of the first census
+    division ('template'): keys are compared in sorted order and must
+    agree, and trailing keys of either dict that have no counterpart in
+    the other dict are skipped.
+
+    Args:
+        template (dict): A portion of the input JSON database corresponding
+            to the first census division in the input data.
+        tree (dict): The same portion of the input JSON database for
+            another census division.
+
+    Yields:
+        The numeric value or list of values in 'tree' for each numeric
+        value or list of values in 'template', in sorted key order; None
+        for the values in 'template' that merge_sum would not add to.
+
+    Raises:
+        KeyError: If the keys of the two dicts do not match.
+    """
+    tree_items = sorted(tree.items())
+    for n, (k, i) in enumerate(sorted(template.items())):
+        # Skip trailing keys with no counterpart in 'tree', as in merge_sum
+        if n >= len(tree_items):
+            if isinstance(i, dict):
+                for leaf in tree_leaves(i):
+                    yield None
+            elif type(i) is not str:
+                yield None
+            continue
+        k2, i2 = tree_items[n]
+        if k != k2:
+            raise KeyError('Merge keys do not match!')
+        if isinstance(i, dict):
+            yield from merge_leaves(i, i2)
+        elif type(i) is not str:
+            yield i2
+
+
+def conversion_matrix(cd_to_cz_factor, fuel_flag, cd_numbers, cz_count):
+    """Arrange census division to custom region conversion factors in a matrix.
+
+    Args:
+        cd_to_cz_factor: A conversion factor array, or dict of arrays keyed
+            by fuel type (for EMM regions or states).
+        fuel_flag: The fuel type flag that applies to the data converted.
+        cd_numbers (list): The census division row indices (0-8) of the
+            conversion factor array, in the order in which the census
+            divisions appear in the input data.
+        cz_count (int): The number of custom regions.
+
+    Returns:
+        A numpy array of the conversion factors for each census division
+        (rows) to each custom region (columns).
+    """
+    # Select the conversion factors for the fuel type, as in merge_sum;
+    # conversion arrays not broken out by fuel type (AIA regions) raise
+    # a ValueError when keyed by fuel type
+    if fuel_flag is not None:
+        try:
+            cd_to_cz_factor = cd_to_cz_factor[fuel_flag]
+        except ValueError:
+            pass
+    # The first (0th) column of the conversion array holds the census
+    # division codes, thus the custom region columns begin at 1
+    return np.array([[cd_to_cz_factor[cd][cz] for cz in
+                      range(1, cz_count + 1)] for cd in cd_numbers],
+                    dtype="float64")
+
+
+class ConvertedRegions(object):
+    """Input data to be converted to custom regions, held as arrays.
+
+    Attributes:
+        template (dict): The data for the first census division in the
+            input data, whose structure (and strings) the data for each
+            custom region share.
+        regions (list): The custom region names.
+        layout (list): The row of 'values' at which each numeric value or
+            list of values in 'template' begins, and the length of each
+            list (None for values not in lists), in sorted key order.
+        values (numpy.ndarray): The numeric data (rows) for each census
+            division (columns).
+        groups (list): Tuples of the rows of 'values' that share a
+            conversion factor array (and fuel type) and the matrix of the
+            factors for each census division (rows) to each custom region
+            (columns).
+    """
+
+    def __init__(self, template, regions, layout, values, groups):
+        self.template = template
+        self.regions = regions
+        self.layout = layout
+        self.values = values
+        self.groups = groups
+
+    def region_values(self, cz_name):
+        """Convert the data to a custom region with matrix products.
+
+        Args:
+            cz_name (str): The custom region name.
+
+        Returns:
+            A numpy array of the converted values for the custom region.
+        """
+        cz_col = self.regions.index(cz_name)
+        column = np.empty(len(self.values))
+        for rows, matrix in self.groups:
+            column[rows] = self.values[rows].dot(matrix[:, cz_col])
+        return column
+
+    def region_dict(self, cz_name):
+        """Rebuild the dict of the converted data for a custom region.
+
+        Args:
+            cz_name (str): The custom region name.
+
+        Returns:
+            A dict with the same structure as the data for each census
+            division in the input data, with the converted values for the
+            custom region.
+        """
+        column = self.region_values(cz_name).tolist()
+        layout = iter(self.layout)
+
+        def rebuild(tree):
+            # Traverse the data in sorted key order (the order of the
+            # layout), then restore the original order of the keys
+            converted = {}
+            for k, i in sorted(tree.items()):
+                if isinstance(i, dict):
+                    converted[k] = rebuild(i)
+                elif type(i) is str:
+                    converted[k] = i
+                else:
+                    start, length = next(layout)
+                    if length is None:
+                        converted[k] = column[start]
+                    else:
+                        converted[k] = column[start:start + length]
+            return {k: converted[k] for k in tree}
+
+        return rebuild(self.template)
+
+    def to_dict(self):
+        """Rebuild the dict of the converted data for all custom regions.
+
+        Returns:
+            A dict of the converted data keyed by custom region name.
+        """
+        return {cz_name: self.region_dict(cz_name)
+                for cz_name in self.regions}
+
+
+def matrix_converter(input_dict, res_convert_array, com_convert_array):
+    """Convert input data from census divisions to custom regions as arrays.
+
+    Instead of merging copies of the data for each census division into
+    the data for each custom region in turn (as clim_converter does with
+    merge_sum), this function flattens the numeric data (e.g., the values
+    for each year) for each census division into the columns of a single
+    array, and sets the matrix of conversion factors for the data that
+    share a conversion factor array (i.e., each building sector and, for
+    EMM regions or states, fuel type), such that those data are converted
+    to a custom region with one matrix product. The data are converted and
+    the dicts of converted data rebuilt only on output, one custom region
+    at a time (see ConvertedRegions).
+
+    Args:
+        input_dict (dict): Data from JSON database, as imported,
+            on a census division basis.
+        res_convert_array: An array (or dict of arrays keyed by fuel
+            type) of census division to custom region conversion factors
+            for residential building types.
+        com_convert_array: An array (or dict of arrays keyed by fuel
+            type) of census division to custom region conversion factors
+            for commercial building types.
+
+    Returns:
+        A ConvertedRegions object with the data to convert to each
+        custom region.
+
+    Raises:
+        KeyError: If a census division name is not recognized or if the
+            keys of the data for a census division do not match those of
+            the first census division (as in merge_sum; see merge_leaves).
+    """
+
+    # Translate census division strings into the corresponding integer codes
+    cd = cm.CommercialTranslationDicts()
+
+    # Obtain list of all custom region names as strings
+    try:
+        cz_list = list(res_convert_array.dtype.names[1:])
+    # Handle conversion to EMM regions or states, in which custom region names
+    # will be one level-deep in a dict that breaks out conv. factors by fuel
+    except AttributeError:
+        cz_list = list(res_convert_array["electricity"].dtype.names[1:])
+
+    # Obtain list of all census divisions in the input data and their
+    # numbers (less 1, for use as row indices of the conversion arrays)
+    cd_list = list(input_dict.keys())
+    for cd_name in cd_list:
+        if cd_name not in cd.cdivdict.keys():
+            raise KeyError("Census division name not found in dict keys!")
+    cd_numbers = [cd.cdivdict[cd_name] - 1 for cd_name in cd_list]
+
+    # Find the layout of the numeric data in the first census division and
+    # group the rows of the data by the conversion factors that apply
+    template = input_dict[cd_list[0]]
+    layout, groups = [], {}
+    n_rows = 0
+    for keys, value, factor, fuel_flag in conversion_leaves(
+            template, res_convert_array, com_convert_array, sector_types()):
+        length = len(value) if isinstance(value, list) else None
+        layout.append([n_rows, length])
+        size = 1 if length is None else length
+        groups.setdefault((id(factor), fuel_flag), (factor, fuel_flag, []))[
+            2].extend(range(n_rows, n_rows + size))
+        n_rows += size
+
+    # Flatten the numeric data for each census division into a column,
+    # matched to the data of the first census division as in merge_sum;
+    # values that merge_sum would not add are left at zero, and lists of
+    # values are cut to the shortest list added to them, as in merge_sum
+    values = np.zeros((n_rows, len(cd_list)))
+    for cd_col, cd_name in enumerate(cd_list):
+        for entry, value in zip(
+                layout, merge_leaves(template, input_dict[cd_name])):
+            start, length = entry
+            if value is None:
+                continue
+            elif length is None:
+                values[start, cd_col] = value
+            else:
+                entry[1] = min(length, len(value))
+                values[start:start + entry[1], cd_col] = value[:entry[1]]
+
+    # Set the matrix of conversion factors for the data that share each
+    # conversion factor array (and fuel type); the data are converted
+    # from census divisions to custom regions with a matrix product as
+    # the data for each custom region are needed
+    groups = [(np.array(rows, dtype=int), conversion_matrix(
+        factor, fuel_flag, cd_numbers, len(cz_list)))
+        for factor, fuel_flag, rows in groups.values()]
+
+    return ConvertedRegions(template, cz_list, layout, values, groups)
+
+
+def region_shards_worker(cz_index):
+    """Convert the data for a custom region and write them to shards.
+
+    Args:
+        cz_index (int): The position of the custom region in the custom
+            region names of the data to convert.
+
+    Returns:
+        A tuple of the custom region position and the shard file names and
+        shard content digests for the custom region, keyed by building type.
+    """
+    converted = convert_shared_data["converted"]
+    return cz_index, mseg_shards.write_region_shards(
+        converted.region_dict(converted.regions[cz_index]), cz_index,
+        convert_shared_data["out_dir"])
+
+
+def write_converted_shards(converted, out_dir, source=None, workers=1):
+    """Write data converted to custom regions to shards and a manifest.
+
+    The data for each custom region are converted, rebuilt, and written to
+    shards by building type (see 'mseg_shards') separately, in parallel
+    across worker processes if more than one is used, such that the data
+    for all of the custom regions are never held in memory at once.
+
+    Args:
+        converted (object): A ConvertedRegions object with the data to
+            convert to each custom region.
+        out_dir (str): Folder to write shard files and manifest to.
+        source (str): Name of the baseline data file that the shards stand
+            in for, if any.
+        workers (int): Number of processes to convert and write the data
+            for the custom regions with.
+
+    Returns:
+        Manifest of the shard files written, keyed by custom region and
+        building type.
+    """
+    # Remove the manifest of any shards from a previous run before any
+    # shards are overwritten
+    makedirs(out_dir, exist_ok=True)
+    mseg_shards.remove_manifest(out_dir)
+    n_workers = min(workers, len(converted.regions))
+    # Worker processes read the data to convert from memory inherited at
+    # process creation (copy-on-write); this requires the 'fork' start method
+    if n_workers > 1 and \
+            "fork" not in multiprocessing.get_all_start_methods():
+        warnings.warn(
+            "WARNING: Parallel conversion of custom region data requires "
+            "the 'fork' process start method, which is unavailable on this "
+            "system; custom region data will be converted serially")
+        n_workers = 1
+
+    shards = {}
+    if n_workers > 1:
+        # Make the data to convert available to the worker processes as
+        # module-level data that are inherited when the processes fork
+        global convert_shared_data
+        convert_shared_data = {"converted": converted, "out_dir": out_dir}
+        try:
+            with multiprocessing.get_context("fork").Pool(n_workers) as pool:
+                for cz_index, cz_shards in pool.imap_unordered(
+                        region_shards_worker,
+                        range(len(converted.regions)), chunksize=1):
+                    shards[cz_index] = cz_shards
+        finally:
+            convert_shared_data = None
+    else:
+        for cz_index, cz_name in enumerate(converted.regions):
+            shards[cz_index] = mseg_shards.write_region_shards(
+                converted.region_dict(cz_name), cz_index, out_dir)
+
+    # Write the manifest last, with the custom regions in their original
+    # order, such that an interrupted write leaves no manifest; the manifest
+    # records the digests of the shard contents, and thus changes whenever
+    # the converted data do
+    return mseg_shards.write_manifest(
+        {cz_name: shards[cz_index][0] for cz_index, cz_name in
+         enumerate(converted.regions)},
+        {cz_name: shards[cz_index][1] for cz_index, cz_name in
+         enumerate(converted.regions)}, out_dir, source)
+
+
 def env_cpl_data_handler(
         cpl_data, cost_convert, perf_convert, years, key_list):
     """Restructure envelope component cost, performance, and lifetime data.
@@ -1278,7 +1742,7 @@ def walk(cpl_data, conversions, perf_convert, years, json_db, key_list=[]):
     return json_db
 
 
-def main():
+def main(opts):
     """Import external data files, process data, and produce desired output.
 
     This function calls the required external data, both the data to be
@@ -1290,6 +1754,12 @@ def main():
     performance, and lifetime data, when the script is run, this
     function requests user input to determine the appropriate files
     to import.
+
+    Args:
+        opts (object): Stores user-specified execution options (whether to
+            convert the data with matrix products, whether to write EMM
+            region or state energy, stock, and square footage data to
+            shards, and the number of processes to use in doing so).
     """
 
     # Obtain user input regarding what data are to be processed. Include two
@@ -1419,11 +1889,28 @@ def main():
         # Do not convert non-envelope technology characteristics data to a
         # state-level resolution (these data remain with the original
         # Census breakout)
-        if input_var[0] == '1' or (
+        if input_var[0] == '1' and input_var[1] in ['2', '3'] and \
+                opts.shards:
+            # Convert the data for each EMM region or state separately and
+            # write them to shards by region and building type alongside a
+            # manifest (in place of the full JSON output), which 'ecm_prep.py'
+            # and 'run.py' read lazily (see 'mseg_shards')
+            zip_out_se = handyvars.json_out.split('.')[0] + '.gz'
+            converted = matrix_converter(
+                msjson_cdiv, res_cd_cz_conv, com_cd_cz_conv)
+            # Keep only the input data needed to convert each region
+            del msjson_cdiv
+            write_converted_shards(
+                converted, mseg_shards.shard_dir(zip_out_se),
+                path.basename(zip_out_se), opts.workers)
+            print("Data written to shards in '" +
+                  mseg_shards.shard_dir(zip_out_se) + "'")
+            return
+        elif input_var[0] == '1' or (
                 input_var[0] == '2' and input_var[1] != '3'):
             # Convert data
             result = clim_converter(
-                msjson_cdiv, res_cd_cz_conv, com_cd_cz_conv)
+                msjson_cdiv, res_cd_cz_conv, com_cd_cz_conv, opts.matrix)
         else:
             result = msjson_cdiv
 
@@ -1450,15 +1937,34 @@ def main():
         if handyvars.json_out in [
                 'cpl_res_com_emm.json', 'cpl_res_com_cdiv.json']:
             zip_out_cpl = handyvars.json_out.split('.')[0] + '.gz'
-            with gzip.GzipFile(zip_out_cpl, 'w') as fout_cpl:
-                fout_cpl.write(json.dumps(result).encode('utf-8'))
+            # Write the JSON to the compressed file as it is encoded
+            with gzip.open(zip_out_cpl, 'wt', encoding='utf-8') as fout_cpl:
+                json.dump(result, fout_cpl)
         # Compress stock/energy EMM and state files
         if handyvars.json_out in [
                 'mseg_res_com_state.json', 'mseg_res_com_emm.json']:
             zip_out_se = handyvars.json_out.split('.')[0] + '.gz'
-            with gzip.GzipFile(zip_out_se, 'w') as fout_se:
-                fout_se.write(json.dumps(result).encode('utf-8'))
+            with gzip.open(zip_out_se, 'wt', encoding='utf-8') as fout_se:
+                json.dump(result, fout_se)
 
 
 if __name__ == '__main__':
-    main()
+    # Handle option user-specified execution arguments
+    parser = ArgumentParser()
+    # Optional flag to write EMM region or state energy, stock, and square
+    # footage data to shards by region and building type
+    parser.add_argument("--shards", action="store_true",
+                        help="Write EMM/state stock and energy data to "
+                             "per-region shards and a manifest")
+    # Optional flag to convert census division data to all custom regions
+    # at once with matrix products (as --shards always does)
+    parser.add_argument("--matrix", action="store_true",
+                        help="Convert census division data to custom regions "
+                             "with matrix products")
+    # Optional flag to convert and write the data for each region in
+    # parallel across multiple processes (with --shards)
+    parser.add_argument("--workers", required=False, type=int, default=1,
+                        help="Number of processes to write shards with")
+    # Object to store all user-specified execution arguments
+    opts = parser.parse_args()
+    main(opts)
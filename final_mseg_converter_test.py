@@ -14,6 +14,9 @@ import unittest
 import numpy as np
 import copy
 import itertools
+import tempfile
+from os import path
+import mseg_shards
 
 
 class CommonUnitTest(unittest.TestCase):
@@ -1817,6 +1820,175 @@ class ToClimateZoneConversionTest(CommonUnitTest):
                                self.res_cd_cz_array,
                                self.com_cd_cz_array)
 
+    # Compare the dicts of converted energy, stock, and square footage data
+    # and cost, performance, and lifetime data to the expected data when
+    # converting all custom regions at once with matrix products, given
+    # conversion arrays that are or are not split out by fuel type
+    def test_matrix_conversion_of_energy_stock_and_cpl_data(self):
+        for test_input, test_output, res_array, com_array in [
+                (self.test_energy_stock_input, self.test_energy_stock_output,
+                 self.res_cd_cz_array, self.com_cd_cz_array),
+                (self.test_energy_stock_input, self.test_energy_stock_output,
+                 self.res_cd_cz_array_fuelsplit,
+                 self.com_cd_cz_array_fuelsplit),
+                (self.test_cpl_input, self.test_cpl_output,
+                 self.res_cd_cz_wtavg_array, self.com_cd_cz_wtavg_array),
+                (self.test_cpl_input, self.test_cpl_output,
+                 self.res_cd_cz_wtavg_array_fuelsplit,
+                 self.com_cd_cz_wtavg_array_fuelsplit)]:
+            dict1 = fmc.clim_converter(
+                test_input, res_array, com_array, matrix=True)
+            self.dict_check(dict1, test_output)
+
+    # Verify that the converted data for each custom region are rebuilt
+    # with the keys in the order of the census division data
+    def test_matrix_conversion_rebuilt_region_data(self):
+        converted = fmc.matrix_converter(self.test_energy_stock_input,
+                                         self.res_cd_cz_array,
+                                         self.com_cd_cz_array)
+        self.assertEqual(converted.regions,
+                         list(self.res_cd_cz_array.dtype.names[1:]))
+        region_data = converted.region_dict('AIA_CZ2')
+        self.dict_check(region_data,
+                        self.test_energy_stock_output['AIA_CZ2'])
+        self.assertEqual(
+            list(region_data['single family home'].keys()),
+            list(self.test_energy_stock_input['new england'][
+                'single family home'].keys()))
+
+    # Verify that the data converted to each custom region and written to
+    # shards (serially or in parallel) match the converted dict and are
+    # listed in the manifest in custom region order
+    def test_conversion_to_region_shards(self):
+        converted = fmc.matrix_converter(self.test_energy_stock_input,
+                                         self.res_cd_cz_array_fuelsplit,
+                                         self.com_cd_cz_array_fuelsplit)
+        for workers in [1, 2]:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                manifest = fmc.write_converted_shards(
+                    converted, tmp_dir, "mseg_res_com_emm.gz", workers)
+                self.assertEqual(list(manifest["regions"].keys()),
+                                 converted.regions)
+                msegs = mseg_shards.ShardedMsegs(tmp_dir)
+                self.dict_check(
+                    {reg: dict(msegs[reg]) for reg in msegs},
+                    self.test_energy_stock_output)
+
+    # Check malformed dicts to verify that the appropriate errors are
+    # raised when converting the data with matrix products
+    def test_matrix_conversion_error_handling(self):
+        with self.assertRaises(KeyError):
+            fmc.clim_converter(self.test_fail_input,
+                               self.res_cd_cz_array,
+                               self.com_cd_cz_array, matrix=True)
+        # Census divisions with data whose keys do not match (in sorted
+        # order) before the last key, as merge_sum requires
+        mismatch_input = copy.deepcopy(self.test_energy_stock_input)
+        del mismatch_input['mid atlantic']['mercantile/service'][
+            'natural gas']
+        for matrix in [False, True]:
+            with self.assertRaises(KeyError):
+                fmc.clim_converter(mismatch_input, self.res_cd_cz_array,
+                                   self.com_cd_cz_array, matrix)
+
+    # Verify that converting census divisions whose data differ in their
+    # trailing keys or list lengths with matrix products yields the same
+    # dicts as converting them with merge_sum (which skips the keys and
+    # list entries with no counterpart in the first census division)
+    def test_matrix_conversion_of_mismatched_data(self):
+        # Census divisions with an added trailing key for a technology, a
+        # building type, and a year, with a missing trailing year, and
+        # with shorter and longer lists of values
+        mismatch_inputs = [
+            copy.deepcopy(self.test_energy_stock_input) for n in range(5)]
+        mismatch_inputs[0]['mid atlantic']['mercantile/service'][
+            'electricity']['lighting']['T8 F32'] = {'2009': 1}
+        mismatch_inputs[1]['east north central']['single family home'][
+            'water heating'] = {'2009': 5}
+        mismatch_inputs[2]['mid atlantic']['single family home'][
+            'electricity']['lighting']['linear fluorescent']['energy'][
+            '2012'] = 9
+        del mismatch_inputs[3]['mid atlantic']['single family home'][
+            'electricity']['lighting']['linear fluorescent']['energy'][
+            '2011']
+        for cd_name, values in zip(
+                mismatch_inputs[4], [[1, 2, 3], [4, 5], [6, 7, 8, 9]]):
+            mismatch_inputs[4][cd_name]['mercantile/service'][
+                'natural gas']['water heating'] = values
+        for mismatch_input in mismatch_inputs:
+            for res_array, com_array in [
+                    (self.res_cd_cz_array, self.com_cd_cz_array),
+                    (self.res_cd_cz_array_fuelsplit,
+                     self.com_cd_cz_array_fuelsplit)]:
+                dict1 = fmc.clim_converter(
+                    copy.deepcopy(mismatch_input), res_array, com_array)
+                dict2 = fmc.clim_converter(
+                    mismatch_input, res_array, com_array, matrix=True)
+                self.dict_check(dict2, dict1)
+
+    # Verify that converting multi-fuel residential and commercial data for
+    # all census divisions to states with matrix products (using the state
+    # conversion data in 'supporting_data') yields the same dicts as
+    # converting them with merge_sum
+    def test_matrix_conversion_of_state_data(self):
+        handyvars = fmc.UsefulVars('3')
+        handyvars.configure_for_energy_square_footage_stock_data()
+        base_dir = path.dirname(path.abspath(fmc.__file__))
+        res_array, com_array = [{
+            fuel: np.genfromtxt(path.join(base_dir, file_name), names=True,
+                                delimiter='\t', dtype="float64")
+            for fuel, file_name in convert_files.items()} for convert_files
+            in [handyvars.res_climate_convert,
+                handyvars.com_climate_convert]]
+        # Generate stock, energy, and square footage data by year for each
+        # census division, residential and commercial building type, fuel
+        # type, and end use
+        rand = np.random.RandomState(0)
+
+        def years():
+            return {str(yr): rand.uniform(0, 1000)
+                    for yr in range(2015, 2026)}
+
+        def stock_energy():
+            return {'stock': years(), 'energy': years()}
+
+        test_input = {}
+        for cd_name in cm.CommercialTranslationDicts().cdivdict.keys():
+            test_input[cd_name] = {}
+            for bldg in ['single family home', 'multi family home',
+                         'mobile home']:
+                test_input[cd_name][bldg] = {
+                    'total homes': years(), 'new homes': years(),
+                    'total square footage': years(),
+                    'electricity': {
+                        'heating': {
+                            'supply': {'ASHP': stock_energy()},
+                            'demand': {'wall': {
+                                'stock': 'NA', 'energy': years()}}},
+                        'lighting': {
+                            'general service (LED)': stock_energy()}},
+                    'natural gas': {'water heating': stock_energy()},
+                    'distillate': {'heating': {'supply': {
+                        'boiler (distillate)': stock_energy()}}},
+                    'other fuel': {'secondary heating': {
+                        'supply': {'non-specific': stock_energy()}}}}
+            for bldg in ['assembly', 'large office', 'warehouse']:
+                test_input[cd_name][bldg] = {
+                    'total square footage': years(),
+                    'new square footage': years(),
+                    'electricity': {
+                        'lighting': {'F32T8': years()},
+                        'cooling': {'supply': {'rooftop_AC': years()}}},
+                    'natural gas': {'heating': {'supply': {
+                        'gas_boiler': years()}}},
+                    'distillate': {'water heating': years()}}
+        dict1 = fmc.clim_converter(
+            copy.deepcopy(test_input), res_array, com_array)
+        dict2 = fmc.clim_converter(
+            test_input, res_array, com_array, matrix=True)
+        self.assertEqual(list(dict2.keys()), list(dict1.keys()))
+        self.dict_check(dict2, dict1)
+
 
 class EnvelopeDataUnitTest(CommonUnitTest):
     """ Set up a CommonUnitTest subclass with additional data to be
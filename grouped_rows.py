@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+""" Grouped row index for the structured arrays of EIA AEO data.
+
+The baseline data import scripts (e.g., mseg.py) populate each terminal node
+of the microsegments JSON with the rows of an EIA AEO data array (e.g.,
+RESDBOUT) that match a few codes (census division, building type, end use,
+and so on). Selecting these rows with boolean masks over the whole array for
+each node scales with the number of nodes times the number of rows. This
+module instead sorts the array once by the columns holding these codes, such
+that the rows for any combination of codes are found with a dict lookup.
+"""
+
+import numpy
+
+
+class GroupedRows(object):
+    """Rows of a structured array grouped by the values of key columns.
+
+    Attributes:
+        data (numpy.ndarray): Structured array to select rows from.
+        cols (list): Key columns of the array, in the order in which their
+            values are given when selecting rows (key columns absent from
+            the array are dropped).
+        groups (dict): Row indices of the array (in their original order)
+            keyed by tuples of the values of the first n key columns, for
+            each number of key columns n used in selecting rows so far.
+        levels (set): Numbers of key columns for which groups are set.
+    """
+
+    def __init__(self, data, cols):
+        self.data = data
+        self.cols = [c for c in cols if c in data.dtype.names]
+        self.groups = {}
+        self.levels = set()
+
+    def group(self, n):
+        """Group the rows of the array by the values of the first n keys.
+
+        Args:
+            n (int): Number of key columns to group the rows by.
+
+        Notes:
+            The array is sorted (stably, such that rows with the same key
+            values keep their original order) by the key columns, and the
+            groups are slices of the resultant order between the positions
+            at which any of the key values change.
+        """
+        keys = [self.data[c] for c in self.cols[:n]]
+        if len(self.data) > 0:
+            # numpy.lexsort sorts by the last key given first
+            order = numpy.lexsort(keys[::-1])
+            keys = [k[order] for k in keys]
+            # Find the start and end of each group in the sorted rows
+            bounds = numpy.flatnonzero(numpy.any(
+                [k[1:] != k[:-1] for k in keys], axis=0)) + 1
+            starts = numpy.concatenate(([0], bounds))
+            ends = numpy.concatenate((bounds, [len(order)]))
+            # Convert key values to native types, which match the codes
+            # given in selecting rows (e.g., by mseg.json_translator)
+            for key, start, end in zip(zip(*[k[starts].tolist() for k in
+                                             keys]), starts, ends):
+                self.groups[key] = order[start:end]
+        self.levels.add(n)
+
+    def indices(self, *key):
+        """Find the indices of the rows with the given key values.
+
+        Args:
+            key: Values of the first len(key) key columns.
+
+        Returns:
+            Array of the indices of the matching rows, in their original
+            order (empty if no rows match).
+
+        Raises:
+            KeyError: If more key values are given than there are key
+                columns in the array.
+        """
+        if len(key) > len(self.cols):
+            raise KeyError("Key " + str(key) + " has more values than "
+                           "the key columns " + str(self.cols) + "!")
+        if len(key) not in self.levels:
+            self.group(len(key))
+        return self.groups.get(key, numpy.array([], dtype=int))
+
+    def select(self, *key):
+        """Select the rows with the given key values.
+
+        Args:
+            key: Values of the first len(key) key columns.
+
+        Returns:
+            Structured array of the matching rows, in their original order.
+        """
+        return self.data[self.indices(*key)]
+
+    def select_any(self, *key_opts):
+        """Select the rows with any of several values for each key.
+
+        Args:
+            key_opts: For each of the first len(key_opts) key columns, a
+                value or a list (or tuple) of values to match.
+
+        Returns:
+            Structured array of the matching rows, grouped by the value of
+            the last key column with several values (in the order given),
+            then that of the previous key column with several values, and
+            so on, and otherwise in their original order.
+        """
+        opts = [x if isinstance(x, (list, tuple)) else [x] for x in key_opts]
+        # Vary the values of the last key column slowest
+        combs = [[]]
+        for vals in opts:
+            combs = [c + [v] for v in vals for c in combs]
+        if len(combs) == 1:
+            return self.select(*combs[0])
+        return self.data[numpy.concatenate(
+            [self.indices(*c) for c in combs])]
+
+
+def grouped(data, cols):
+    """Group the rows of an array by key columns, if not already grouped.
+
+    Args:
+        data: Structured array, or its rows already grouped by key columns.
+        cols (list): Key columns to group the rows of an array by.
+
+    Returns:
+        Rows of the array grouped by the key columns.
+    """
+    if isinstance(data, GroupedRows):
+        return data
+    return GroupedRows(data, cols)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+""" Tests for the grouped row index of EIA AEO data arrays """
+
+# Import code to be tested
+import grouped_rows
+
+# Import needed packages
+import unittest
+import numpy
+
+
+class GroupedRowsTest(unittest.TestCase):
+    """Test selection of rows by the values of key columns.
+
+    Attributes:
+        data (numpy.ndarray): Sample structured array of AEO data.
+        rows (object): Rows of the sample array grouped by census division,
+            end use, and fuel type.
+    """
+
+    def setUp(self):
+        """Set a sample array and group its rows."""
+        self.data = numpy.array([
+            (1, 'HT', 'EL', 2010, 1.0),
+            (2, 'HT', 'EL', 2010, 2.0),
+            (1, 'CL', 'EL', 2010, 3.0),
+            (1, 'HT', 'GS', 2010, 4.0),
+            (1, 'HT', 'EL', 2011, 5.0),
+            (1, 'SH', 'GS', 2010, 6.0),
+            (1, 'HT', 'GS', 2011, 7.0)],
+            dtype=[('CDIV', '<i4'), ('ENDUSE', '<U4'), ('FUEL', '<U4'),
+                   ('YEAR', '<i4'), ('CONSUMPTION', '<f8')])
+        self.rows = grouped_rows.GroupedRows(
+            self.data, ['CDIV', 'ENDUSE', 'FUEL', 'BULBTYPE'])
+
+    def test_select(self):
+        """Test selecting rows in their original order."""
+        # Key columns absent from the array are dropped
+        self.assertEqual(self.rows.cols, ['CDIV', 'ENDUSE', 'FUEL'])
+        self.assertEqual(
+            self.rows.select(1, 'HT')['CONSUMPTION'].tolist(), [1, 4, 5, 7])
+        self.assertEqual(
+            self.rows.select(1, 'HT', 'GS')['CONSUMPTION'].tolist(), [4, 7])
+        # Rows are grouped only for the numbers of keys used so far
+        self.assertEqual(self.rows.levels, {2, 3})
+        # Keys with no matching rows select no rows
+        self.assertEqual(len(self.rows.select(3, 'HT')), 0)
+        with self.assertRaises(KeyError):
+            self.rows.select(1, 'HT', 'GS', 'LED')
+
+    def test_select_any(self):
+        """Test selecting rows with several values for some keys."""
+        # Rows are grouped by the values of the last key column with
+        # several values first
+        self.assertEqual(self.rows.select_any(
+            1, ['SH', 'HT'], ['GS', 'EL'])['CONSUMPTION'].tolist(),
+            [6, 4, 7, 1, 5])
+        self.assertEqual(self.rows.select_any(
+            [1, 2], 'HT', 'EL')['CONSUMPTION'].tolist(), [1, 5, 2])
+        # Grouped rows are not grouped again
+        self.assertIs(grouped_rows.grouped(self.rows, ['CDIV']), self.rows)
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+
+""" Overlaps between heating/cooling supply and demand-side measures.
+
+Supply-side heating/cooling measures (e.g., HVAC equipment) and demand-side
+heating/cooling measures (e.g., envelope) that apply to the same region,
+building type, structure type, fuel type, and end use are not competed
+directly, but their energy savings overlap. run.py removes these overlaps by
+recording the energy use (and savings) affected by each side across all
+competed measures, and then scaling each measure's heating/cooling
+contributing microsegments by fractions that depend only on the recorded
+data for the microsegment's side and the overlapping side.
+
+This module records the affected energy use and savings of each side as
+arrays of year values (with an added dimension for any sampled values),
+indexed by the region, building type, structure type, fuel type, and end use
+combination, and finds the adjustment fractions for every combination and
+side at once (rather than for each year of each contributing microsegment of
+each measure). The heating/cooling energy totals these data are compared
+against are read from file only once they are first needed, and only for the
+regions and building types of the active measures.
+"""
+
+import json
+import numpy
+from collections.abc import Mapping
+
+
+# Heating/cooling technology types, in the order of the sides of the data
+TECH_TYPES = ("supply", "demand")
+
+
+def year_array(vals, years):
+    """Convert a dict of values by year to an array.
+
+    Args:
+        vals (dict): Values by year (floats, or arrays of sampled values).
+        years (list): Years to convert.
+
+    Returns:
+        Array of the values for each year (with an added dimension for the
+        samples, if applicable).
+    """
+    return numpy.array([vals[yr] for yr in years], dtype=float)
+
+
+def all_nonzero(x):
+    """Check for nonzero values in each year of a stack of year arrays.
+
+    Args:
+        x (numpy.ndarray): Values by row and year (and sample).
+
+    Returns:
+        Boolean array by row and year, True where all values (across
+        samples) are nonzero.
+    """
+    return numpy.all((x != 0).reshape(x.shape[:2] + (-1,)), axis=2)
+
+
+def expand(x, ndim):
+    """Add trailing dimensions to an array.
+
+    Args:
+        x (numpy.ndarray): Array to expand.
+        ndim (int): Number of dimensions of the expanded array.
+
+    Returns:
+        View of the array with trailing dimensions of length one.
+    """
+    return x.reshape(x.shape + (1,) * (ndim - x.ndim))
+
+
+class HtclOverlaps(object):
+    """Heating/cooling supply and demand-side energy use that overlaps.
+
+    Attributes:
+        years (list): Years in the modeling time horizon.
+        rows (dict): Row of the recorded data for each region, building
+            type, structure type, fuel type, and end use combination (keyed
+            by the key chain attribute 'htcl_match_key').
+        total (list): Total potentially overlapping energy use, by side
+            (supply, demand) and row (None for rows with no data recorded
+            for the side).
+        affected (list): Overlapping energy use affected by competed
+            measures, by side and row.
+        savings (list): Savings in the affected overlapping energy use, by
+            side and row.
+        fracs (dict): Baseline and efficient adjustment fractions by year,
+            keyed by side and row, for rows with data recorded on both sides
+            (None until the fractions are found).
+    """
+
+    def __init__(self, years):
+        self.years = list(years)
+        self.rows = {}
+        self.total, self.affected, self.savings = (
+            ([], []) for n in range(3))
+        self.fracs = None
+
+    def add(self, tech_type, match_key, total, affected, savings):
+        """Add to the affected energy use and savings of a side and row.
+
+        Args:
+            tech_type (str): Heating/cooling technology type ('supply' or
+                'demand').
+            match_key (str): Region, building type, structure type, fuel
+                type, and end use key of the row.
+            total (dict): Total potentially overlapping energy use by year,
+                recorded for the first data added for the side and row.
+            affected (numpy.ndarray): Affected energy use by year.
+            savings (numpy.ndarray): Affected energy use savings by year.
+        """
+        side = TECH_TYPES.index(tech_type)
+        try:
+            row = self.rows[match_key]
+        except KeyError:
+            row = self.rows[match_key] = len(self.rows)
+            for data in [self.total, self.affected, self.savings]:
+                for x in data:
+                    x.append(None)
+        if self.total[side][row] is None:
+            self.total[side][row] = year_array(total, self.years)
+            self.affected[side][row], self.savings[side][row] = \
+                affected, savings
+        else:
+            self.affected[side][row] = self.affected[side][row] + affected
+            self.savings[side][row] = self.savings[side][row] + savings
+        # Adjustment fractions must be found again
+        self.fracs = None
+
+    def record(self, kc, msu_mkts, htcl_totals):
+        """Record the overlapping energy use of a contributing microsegment.
+
+        Args:
+            kc (object): Parsed key chain of a primary heating/cooling
+                contributing microsegment.
+            msu_mkts (list): Energy, carbon, and cost data for the
+                contributing microsegment, across all measures that apply to
+                the microsegment.
+            htcl_totals (dict): Heating/cooling energy totals by region,
+                building type, structure type, fuel type, and end use.
+        """
+        base, eff = ([year_array(m["energy"]["total"][x], self.years) for
+                      m in msu_mkts] for x in ["baseline", "efficient"])
+        self.add(
+            kc.htcl_type, kc.htcl_match_key,
+            htcl_totals[kc.region][kc.bldg][kc.structure][kc.fuel][
+                kc.end_use],
+            sum(base), sum([b - e for b, e in zip(base, eff)]))
+
+    def adj_fracs(self, kc):
+        """Find the adjustment fractions of a contributing microsegment.
+
+        Args:
+            kc (object): Parsed key chain of a primary heating/cooling
+                contributing microsegment.
+
+        Returns:
+            Arrays of the baseline and efficient adjustment fractions by year
+            (and sample, if applicable), or None if no overlapping data are
+            recorded for the microsegment.
+        """
+        if self.fracs is None:
+            self.find_fracs()
+        try:
+            return self.fracs[(
+                TECH_TYPES.index(kc.htcl_type), self.rows[kc.htcl_match_key])]
+        except KeyError:
+            return None
+
+    def find_fracs(self):
+        """Find the adjustment fractions of all rows with overlaps.
+
+        Notes:
+            Rows with data recorded on both sides are stacked by the shape of
+            their data (point values or a given number of samples), and the
+            fractions for both sides of all rows in a stack are found at
+            once. For each year, the fraction of the total potentially
+            overlapping energy use that is affected by the overlapping side
+            is removed in proportion to the share of the combined relative
+            savings that belongs to the current side; efficient energy use
+            is further scaled by the relative performance of the overlapping
+            side.
+        """
+        self.fracs, stacks = {}, {}
+        for row in range(len(self.rows)):
+            if any([x[row] is None for x in self.total]):
+                continue
+            # Year arrays of sampled values have a trailing dimension
+            ndim = max([x[row].ndim for x in self.affected + self.savings])
+            shape = numpy.broadcast(*[
+                expand(x[row], ndim) for x in
+                self.affected + self.savings]).shape
+            stacks.setdefault(shape, []).append(row)
+        for shape, rows in stacks.items():
+            # Stack total, affected, and savings data for both sides
+            total, affected, savings = [[numpy.stack([
+                numpy.broadcast_to(expand(x[side][row], len(shape)), shape)
+                for row in rows]) for side in range(2)] for x in [
+                self.total, self.affected, self.savings]]
+            # Find overall relative performance of each side, where all
+            # samples of affected energy use are nonzero
+            rel_perf = []
+            for side in range(2):
+                nz = expand(all_nonzero(affected[side]), len(shape) + 1)
+                rel_perf.append(numpy.where(nz, 1 - numpy.divide(
+                    savings[side], affected[side], out=numpy.zeros(
+                        affected[side].shape), where=nz), 1))
+            for side in range(2):
+                overlp = 1 - side
+                # Find the fraction of total possibly overlapping energy use
+                # that is affected by the overlapping side
+                affected_frac = numpy.divide(
+                    affected[overlp], total[overlp],
+                    out=numpy.zeros(affected[overlp].shape),
+                    where=(total[overlp] != 0))
+                # Find the share of the combined relative savings of both
+                # sides that belongs to the current side
+                save_tot = abs(1 - rel_perf[side]) + abs(1 - rel_perf[overlp])
+                nz = expand(all_nonzero(save_tot), len(shape) + 1)
+                save_ratio = numpy.where(nz, numpy.divide(
+                    abs(1 - rel_perf[side]), save_tot,
+                    out=numpy.zeros(save_tot.shape), where=nz), 0.5)
+                # Find baseline and efficient adjustment fractions
+                adj_frac_base = (1 - affected_frac) + \
+                    affected_frac * save_ratio
+                adj_frac_eff = (1 - affected_frac) + \
+                    affected_frac * save_ratio * rel_perf[overlp]
+                for ind, row in enumerate(rows):
+                    self.fracs[(side, row)] = (
+                        adj_frac_base[ind], adj_frac_eff[ind])
+
+
+class HtclTotals(Mapping):
+    """Heating/cooling energy totals, read from file on first use.
+
+    Attributes:
+        file_path (str): Path to the heating/cooling energy totals file.
+        regions (set): Regions to keep the totals of (all by default).
+        bldgs (set): Building types to keep the totals of (all by default).
+        data (dict): Heating/cooling energy totals by region, building type,
+            structure type, fuel type, and end use (None until read).
+    """
+
+    def __init__(self, file_path, regions=None, bldgs=None):
+        self.file_path = file_path
+        self.regions, self.bldgs = regions, bldgs
+        self.data = None
+
+    def load(self):
+        """Read the totals for the regions and building types of interest.
+
+        Returns:
+            Heating/cooling energy totals by region, building type, structure
+            type, fuel type, and end use.
+
+        Raises:
+            ValueError: If the file cannot be read as JSON.
+        """
+        if self.data is None:
+            with open(self.file_path, 'r') as msi:
+                try:
+                    data = json.load(msi)
+                except ValueError as e:
+                    raise ValueError(
+                        "Error reading in '" + self.file_path + "': " +
+                        str(e)) from None
+            # Keep the totals for the regions and building types of interest
+            # (dropping any entries that are not keyed by region, e.g., the
+            # site-source conversion method used in calculating the totals)
+            self.data = {
+                reg: {bldg: bldg_dat for bldg, bldg_dat in reg_dat.items() if
+                      self.bldgs is None or bldg in self.bldgs}
+                for reg, reg_dat in data.items() if
+                isinstance(reg_dat, dict) and (
+                    self.regions is None or reg in self.regions)}
+        return self.data
+
+    def __getitem__(self, reg):
+        return self.load()[reg]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+""" Tests for heating/cooling supply-demand overlap data """
+
+# Import code to be tested
+import htcl_overlaps
+
+# Import needed packages
+import unittest
+import numpy
+import tempfile
+import json
+from os import path
+from collections import namedtuple
+
+
+class HtclOverlapsTest(unittest.TestCase):
+    """Test recording of overlaps and the resulting adjustment fractions.
+
+    Attributes:
+        years (list): Sample modeling time horizon.
+        key_chain (namedtuple): Sample parsed key chain attributes.
+        htcl_totals (dict): Sample heating/cooling energy totals.
+    """
+
+    def setUp(self):
+        """Set sample key chains and energy totals."""
+        self.years = ["2009", "2010", "2011"]
+        self.key_chain = namedtuple("KeyChain", [
+            "region", "bldg", "structure", "fuel", "end_use", "htcl_type",
+            "htcl_match_key"])
+        self.htcl_totals = {"AIA_CZ1": {"single family home": {"existing": {
+            "electricity": {"cooling": {"2009": 100, "2010": 0,
+                                        "2011": 100}}}}}}
+
+    def kc(self, tech_type, region="AIA_CZ1"):
+        """Set a sample cooling key chain for a technology type."""
+        return self.key_chain(
+            region, "single family home", "existing", "electricity",
+            "cooling", tech_type, str([
+                region, "single family home", "existing", "electricity",
+                "cooling"]))
+
+    def mkt(self, base, eff):
+        """Set sample contributing microsegment energy data."""
+        return {"energy": {"total": {
+            "baseline": dict(zip(self.years, base)),
+            "efficient": dict(zip(self.years, eff))}}}
+
+    def test_point_fracs(self):
+        """Test adjustment fractions for point value data."""
+        overlaps = htcl_overlaps.HtclOverlaps(self.years)
+        overlaps.record(self.kc("supply"), [
+            self.mkt([20, 20, 0], [15, 15, 0]),
+            self.mkt([20, 20, 0], [15, 15, 0])], self.htcl_totals)
+        # No adjustments until data are recorded for both sides
+        self.assertIsNone(overlaps.adj_fracs(self.kc("supply")))
+        overlaps.record(self.kc("demand"), [
+            self.mkt([50, 50, 50], [40, 40, 40])], self.htcl_totals)
+        base, eff = overlaps.adj_fracs(self.kc("supply"))
+        # Supply side: 25% savings vs. 20% demand-side savings; half of the
+        # total is affected by the demand side in 2009 and 2011, none of it
+        # in 2010 (no total energy), and all of the savings in 2011 belong
+        # to the demand side (no supply-side savings)
+        ratio = 0.25 / 0.45
+        numpy.testing.assert_allclose(base, [
+            0.5 + 0.5 * ratio, 1, 0.5 + 0.5 * 0])
+        numpy.testing.assert_allclose(eff, [
+            0.5 + 0.5 * ratio * 0.8, 1, 0.5 + 0.5 * 0 * 1])
+        base, eff = overlaps.adj_fracs(self.kc("demand"))
+        numpy.testing.assert_allclose(base, [
+            0.6 + 0.4 * (1 - ratio), 1, 1])
+        numpy.testing.assert_allclose(eff, [
+            0.6 + 0.4 * (1 - ratio) * 0.75, 1, 1])
+        # Microsegments without recorded data are not adjusted
+        self.assertIsNone(overlaps.adj_fracs(self.kc("supply", "AIA_CZ2")))
+
+    def test_sampled_fracs(self):
+        """Test that sampled data yield the fractions of each sample."""
+        samples = [([20, 20, 0], [15, 15, 0], [50, 50, 50], [40, 40, 50]),
+                   ([20, 10, 5], [10, 8, 5], [50, 20, 50], [45, 15, 30])]
+        sampled = htcl_overlaps.HtclOverlaps(self.years)
+        for side, (b, e) in [("supply", (0, 1)), ("demand", (2, 3))]:
+            sampled.record(self.kc(side), [self.mkt(*[
+                [numpy.array([s[x][y] for s in samples]) for
+                 y in range(3)] for x in [b, e]])], self.htcl_totals)
+        for s in samples:
+            point = htcl_overlaps.HtclOverlaps(self.years)
+            point.record(self.kc("supply"), [self.mkt(s[0], s[1])],
+                         self.htcl_totals)
+            point.record(self.kc("demand"), [self.mkt(s[2], s[3])],
+                         self.htcl_totals)
+            for side in ["supply", "demand"]:
+                fracs_s = sampled.adj_fracs(self.kc(side))
+                fracs_p = point.adj_fracs(self.kc(side))
+                self.assertEqual(fracs_s[0].shape, (3, 2))
+                # Years in which any sample has no affected energy use fall
+                # back to no savings for that side in all samples, so only
+                # compare the years in which all samples are nonzero
+                for f_s, f_p in zip(fracs_s, fracs_p):
+                    numpy.testing.assert_allclose(
+                        f_s[:2, samples.index(s)], f_p[:2])
+
+    def test_htcl_totals(self):
+        """Test reading totals on first use, for regions of interest."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = path.join(tmp_dir, "htcl_totals.json")
+            totals = htcl_overlaps.HtclTotals(
+                file_path, {"AIA_CZ1"}, {"single family home"})
+            # The file is not read until the totals are first used
+            self.assertIsNone(totals.data)
+            data = dict(self.htcl_totals)
+            data["AIA_CZ2"] = data["AIA_CZ1"]
+            data["AIA_CZ1"] = dict(data["AIA_CZ1"], assembly={})
+            data["site-source calculation method"] = "captured energy"
+            with open(file_path, "w") as jso:
+                json.dump(data, jso)
+            self.assertEqual(dict(totals), self.htcl_totals)
+            self.assertEqual(
+                totals["AIA_CZ1"]["single family home"]["existing"],
+                self.htcl_totals["AIA_CZ1"]["single family home"][
+                    "existing"])
+            with self.assertRaises(KeyError):
+                totals["AIA_CZ2"]
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
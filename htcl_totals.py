@@ -5,6 +5,7 @@ import json
 from collections import OrderedDict
 from datetime import datetime
 import gzip
+import onsite_gen
 
 
 class UsefulInputFiles(object):
@@ -382,6 +383,11 @@ def main():
                         "Error reading in '" +
                         handyfiles.msegs_in + "': " + str(e)) from None
 
+        # Write out a summary of the onsite generation energy data for each
+        # region and building type, which run.py reads in place of the full
+        # baseline data
+        onsite_gen.write_summary(msegs, path.join(base_dir, *mseg_fi))
+
         # Find total heating and cooling *source* energy use for each region,
         # building type, and structure type combination (fossil fuel site-
         # source conversion method)
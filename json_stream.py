@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+
+""" Streaming output of measure data to JSON files.
+
+Measure summary and results data are written out as a JSON object or array
+with one entry per measure. Serializing these data with 'json.dump' requires
+the complete data for all measures to be assembled first, and any NumPy
+arrays in the data to be converted to (nested) lists of Python values before
+they are serialized. This module instead writes the entries of a top-level
+JSON object or array one at a time, such that the data for each measure can
+be written out (and released) as soon as they are available, and serializes
+NumPy arrays and scalars directly. Output is identical to that of
+'json.dump' with the same indentation, and may optionally be written in a
+compact form without indentation.
+"""
+
+import numpy
+from os import replace, remove
+from collections.abc import Mapping
+from json.encoder import encode_basestring_ascii
+
+
+def float_str(obj):
+    """Serialize a floating point value as in 'json.dump'.
+
+    Args:
+        obj (float): Value to serialize.
+
+    Returns:
+        JSON string for the value.
+    """
+    if obj != obj:
+        return "NaN"
+    elif obj == float("inf"):
+        return "Infinity"
+    elif obj == -float("inf"):
+        return "-Infinity"
+    else:
+        return float.__repr__(float(obj))
+
+
+def key_str(key):
+    """Serialize a dict key as in 'json.dump'.
+
+    Args:
+        key: Key to serialize (a string, number, boolean, or None).
+
+    Returns:
+        JSON string for the key.
+
+    Raises:
+        TypeError: If the key is not of a type that JSON keys can represent.
+    """
+    if isinstance(key, str):
+        return encode_basestring_ascii(key)
+    elif key is True or isinstance(key, numpy.bool_) and key:
+        return '"true"'
+    elif key is False or isinstance(key, numpy.bool_):
+        return '"false"'
+    elif key is None:
+        return '"null"'
+    elif isinstance(key, (float, numpy.floating)):
+        return '"' + float_str(key) + '"'
+    elif isinstance(key, (int, numpy.integer)):
+        return '"' + int.__repr__(int(key)) + '"'
+    else:
+        raise TypeError(
+            "Keys must be str, int, float, bool or None, not " +
+            type(key).__name__)
+
+
+def iterencode(obj, indent=2, level=0):
+    """Serialize data to chunks of a JSON string.
+
+    Args:
+        obj: Data to serialize. Dicts (and other mappings), lists, tuples,
+            NumPy arrays, strings, numbers (including NumPy scalars),
+            booleans, and None are supported.
+        indent (int): Number of spaces to indent each level of the JSON
+            string by, or None for compact output.
+        level (int): Indentation level of the data.
+
+    Yields:
+        Chunks of the JSON string for the data.
+
+    Raises:
+        TypeError: If the data include values that cannot be serialized.
+    """
+    if isinstance(obj, str):
+        yield encode_basestring_ascii(obj)
+    elif obj is None:
+        yield "null"
+    elif obj is True:
+        yield "true"
+    elif obj is False:
+        yield "false"
+    elif isinstance(obj, numpy.bool_):
+        yield "true" if obj else "false"
+    elif isinstance(obj, (int, numpy.integer)):
+        yield int.__repr__(int(obj))
+    elif isinstance(obj, (float, numpy.floating)):
+        yield float_str(obj)
+    elif isinstance(obj, Mapping):
+        if len(obj) == 0:
+            yield "{}"
+            return
+        # Set separators between entries and between keys and values
+        if indent is not None:
+            newline = "\n" + " " * (indent * (level + 1))
+            item_sep, key_sep = "," + newline, ": "
+            yield "{" + newline
+        else:
+            item_sep, key_sep = ",", ":"
+            yield "{"
+        first = True
+        for key, val in obj.items():
+            if first:
+                first = False
+            else:
+                yield item_sep
+            yield key_str(key) + key_sep
+            yield from iterencode(val, indent, level + 1)
+        if indent is not None:
+            yield "\n" + " " * (indent * level)
+        yield "}"
+    elif isinstance(obj, numpy.ndarray) and obj.ndim == 0:
+        yield from iterencode(obj[()], indent, level)
+    elif isinstance(obj, (list, tuple, numpy.ndarray)):
+        if len(obj) == 0:
+            yield "[]"
+            return
+        # 1-D arrays of floats are serialized element by element without
+        # first converting the array to a list
+        if isinstance(obj, numpy.ndarray) and obj.ndim == 1 and \
+                obj.dtype.kind == "f":
+            vals = (float_str(x) for x in obj)
+        else:
+            vals = None
+        if indent is not None:
+            newline = "\n" + " " * (indent * (level + 1))
+            item_sep = "," + newline
+            yield "[" + newline
+        else:
+            item_sep = ","
+            yield "["
+        if vals is not None:
+            yield item_sep.join(vals)
+        else:
+            first = True
+            for val in obj:
+                if first:
+                    first = False
+                else:
+                    yield item_sep
+                yield from iterencode(val, indent, level + 1)
+        if indent is not None:
+            yield "\n" + " " * (indent * level)
+        yield "]"
+    else:
+        raise TypeError(
+            "Object of type " + type(obj).__name__ +
+            " is not JSON serializable")
+
+
+def dump(obj, fp, compact=False):
+    """Write data to an open JSON file without first serializing it in full.
+
+    Args:
+        obj: Data to write (see 'iterencode').
+        fp (file): File object opened for writing text.
+        compact (boolean): Flag for writing the data without indentation.
+    """
+    for chunk in iterencode(obj, indent=None if compact else 2):
+        fp.write(chunk)
+
+
+class JSONStreamWriter(object):
+    """Write the entries of a JSON object or array to a file one at a time.
+
+    Note:
+        Entries are written to a temporary file that replaces the output
+        file once all entries are written (on 'close', or on exiting the
+        writer as a context manager), such that an interrupted write leaves
+        any previous version of the output file as is.
+
+    Attributes:
+        file_path (str): Path to the output JSON file.
+        array (boolean): Flag for writing a JSON array (rather than object).
+        indent (int): Number of spaces to indent each level by, or None.
+        fp (file): Temporary output file object.
+        n_items (int): Number of entries written so far.
+    """
+
+    def __init__(self, file_path, array=False, compact=False):
+        self.file_path = file_path
+        self.array = array
+        self.indent = None if compact else 2
+        self.fp = open(file_path + ".tmp", "w")
+        self.n_items = 0
+
+    def write(self, *item):
+        """Write an entry of the JSON object or array.
+
+        Args:
+            item: Key and value of an object entry, or value of an array
+                entry.
+        """
+        # Open the JSON object or array, or separate this entry from the
+        # previous one
+        if self.n_items == 0:
+            self.fp.write("[" if self.array else "{")
+        else:
+            self.fp.write(",")
+        if self.indent is not None:
+            self.fp.write("\n" + " " * self.indent)
+        if self.array:
+            val, = item
+        else:
+            key, val = item
+            self.fp.write(key_str(key) + (
+                ": " if self.indent is not None else ":"))
+        for chunk in iterencode(val, self.indent, 1):
+            self.fp.write(chunk)
+        self.n_items += 1
+
+    def close(self):
+        """Close the JSON object or array and replace the output file."""
+        if self.n_items == 0:
+            self.fp.write("[]" if self.array else "{}")
+        elif self.indent is not None:
+            self.fp.write("\n" + ("]" if self.array else "}"))
+        else:
+            self.fp.write("]" if self.array else "}")
+        self.fp.close()
+        replace(self.file_path + ".tmp", self.file_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Discard partially written output
+            self.fp.close()
+            remove(self.file_path + ".tmp")
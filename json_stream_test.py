@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+""" Tests for streaming output of measure data to JSON files """
+
+# Import code to be tested
+import json_stream
+
+# Import needed packages
+import unittest
+import tempfile
+import json
+import numpy
+from collections import OrderedDict
+from os import path
+
+
+class JSONStreamTest(unittest.TestCase):
+    """Test serialization of measure data and streaming of JSON entries.
+
+    Attributes:
+        tmp_dir (object): Temporary folder for output files.
+        out_file (str): Path to an output JSON file.
+        meas_data (dict): Sample measure data, keyed by measure name.
+        meas_data_lists (dict): Sample measure data with NumPy arrays and
+            scalars converted to Python lists and values.
+    """
+
+    def setUp(self):
+        """Set sample measure data and a file to write them to."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.out_file = path.join(self.tmp_dir.name, "ecm_results.json")
+        self.meas_data = OrderedDict([
+            ("Sample Measure 1", OrderedDict([
+                ("Avoided CO₂ Emissions (MMTons)", {
+                    "2020": numpy.float64(0.1), "2021": 1e-20}),
+                ("Energy Savings (MMBtu)", {
+                    "2020": numpy.array([1.5, 2.0, float("nan")]),
+                    "2021": numpy.array([[1, 2], [3, 4]])}),
+                ("Payback (years)", {
+                    "2020": numpy.int64(999), "2021": float("inf")}),
+                ("Flags", [True, False, None, numpy.bool_(True)]),
+                ("Empty", [{}, [], numpy.array([])])])),
+            ("Sample Measure 2", {
+                "Stock": {"2020": 5, "2021": numpy.array(
+                    [None, 0.5], dtype=object)}})])
+        self.meas_data_lists = {
+            "Sample Measure 1": {
+                "Avoided CO₂ Emissions (MMTons)": {
+                    "2020": 0.1, "2021": 1e-20},
+                "Energy Savings (MMBtu)": {
+                    "2020": [1.5, 2.0, float("nan")],
+                    "2021": [[1, 2], [3, 4]]},
+                "Payback (years)": {"2020": 999, "2021": float("inf")},
+                "Flags": [True, False, None, True],
+                "Empty": [{}, [], []]},
+            "Sample Measure 2": {
+                "Stock": {"2020": 5, "2021": [None, 0.5]}}}
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        self.tmp_dir.cleanup()
+
+    def test_iterencode(self):
+        """Test that serialized data match the output of 'json.dumps'."""
+        self.assertEqual(
+            "".join(json_stream.iterencode(self.meas_data)),
+            json.dumps(self.meas_data_lists, indent=2))
+        self.assertEqual(
+            "".join(json_stream.iterencode(self.meas_data, indent=None)),
+            json.dumps(self.meas_data_lists, separators=(",", ":")))
+        with self.assertRaises(TypeError):
+            "".join(json_stream.iterencode({"2020": set()}))
+
+    def test_writer(self):
+        """Test that entries written one at a time form a JSON file."""
+        for compact in [False, True]:
+            # JSON object; entries are released once written
+            meas_data = OrderedDict(self.meas_data)
+            with json_stream.JSONStreamWriter(
+                    self.out_file, compact=compact) as jso:
+                for key in list(meas_data.keys()):
+                    jso.write(key, meas_data.pop(key))
+            with open(self.out_file, "r") as jsi:
+                out_str = jsi.read()
+            self.assertEqual(out_str, json.dumps(
+                self.meas_data_lists, indent=None if compact else 2,
+                separators=(",", ":") if compact else None))
+            # JSON array
+            with json_stream.JSONStreamWriter(
+                    self.out_file, array=True, compact=compact) as jso:
+                for val in self.meas_data.values():
+                    jso.write(val)
+            with open(self.out_file, "r") as jsi:
+                out_str = jsi.read()
+            self.assertEqual(out_str, json.dumps(
+                list(self.meas_data_lists.values()),
+                indent=None if compact else 2,
+                separators=(",", ":") if compact else None))
+        # Empty JSON array
+        with json_stream.JSONStreamWriter(self.out_file, array=True):
+            pass
+        with open(self.out_file, "r") as jsi:
+            self.assertEqual(json.load(jsi), [])
+
+    def test_interrupted_write(self):
+        """Test that an interrupted write leaves the previous file as is."""
+        with open(self.out_file, "w") as jso:
+            json.dump(["Sample Measure 0"], jso)
+        with self.assertRaises(TypeError):
+            with json_stream.JSONStreamWriter(self.out_file) as jso:
+                jso.write("Sample Measure 1", {"2020": set()})
+        with open(self.out_file, "r") as jsi:
+            self.assertEqual(json.load(jsi), ["Sample Measure 0"])
+        self.assertFalse(path.isfile(self.out_file + ".tmp"))
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
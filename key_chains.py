@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+""" Interned contributing microsegment key chains.
+
+Measure competition data key each contributing microsegment by a string
+version of its key chain tuple, e.g., "('primary', 'AIA_CZ1', 'single family
+home', 'electricity', 'heating', 'supply', 'ASHP', 'new')". This module maps
+each such string to an integer ID the first time it is seen, parsing the
+string once and recording the attributes of the key chain (microsegment
+type, region, building type, fuel, end use, technology, and structure type)
+that are otherwise recovered by re-parsing the string or by searching it for
+substrings each time it is used.
+"""
+
+from ast import literal_eval
+
+
+# Building types that belong to the residential sector
+RES_BLDGS = ("single family home", "multi family home", "mobile home")
+
+
+class KeyChain(object):
+    """Parsed attributes of a contributing microsegment key chain.
+
+    Attributes:
+        id (int): ID of the key chain in its table.
+        key (str): Key chain string, as used to key competition data.
+        chain (tuple): Key chain elements.
+        mseg_type (str): Microsegment type ('primary' or 'secondary').
+        region (str): Region (climate zone, EMM region, or state).
+        bldg (str): Building type.
+        bldg_sect (str): Building sector ('residential' or 'commercial').
+        fuel (str): Fuel type.
+        end_use (str): End use.
+        htcl_type (str): Heating/cooling technology type ('supply' or
+            'demand'), or None for microsegments that are not split into
+            supply and demand-side technologies.
+        tech (str): Technology (None for microsegments without one).
+        structure (str): Structure type ('new' or 'existing').
+        secnd_adj_key (str): Region, building type, and structure type key
+            that links primary and secondary microsegments.
+        htcl_match_key (str): Region, building type, structure type, fuel,
+            and end use key that links overlapping heating/cooling supply and
+            demand-side microsegments.
+        out_break (tuple): Output breakout categories of the key chain, as
+            set by the routine that uses them (None until then).
+    """
+
+    __slots__ = ("id", "key", "chain", "mseg_type", "region", "bldg",
+                 "bldg_sect", "fuel", "end_use", "htcl_type", "tech",
+                 "structure", "secnd_adj_key", "htcl_match_key", "out_break")
+
+    def __init__(self, id, key):
+        self.id = id
+        self.key = key
+        self.chain = tuple(literal_eval(key))
+        self.mseg_type, self.region, self.bldg, self.fuel, self.end_use = \
+            self.chain[:5]
+        self.tech, self.structure = self.chain[-2:]
+        if self.bldg in RES_BLDGS:
+            self.bldg_sect = "residential"
+        else:
+            self.bldg_sect = "commercial"
+        if "supply" in self.chain:
+            self.htcl_type = "supply"
+        elif "demand" in self.chain:
+            self.htcl_type = "demand"
+        else:
+            self.htcl_type = None
+        self.secnd_adj_key = str((self.region, self.bldg, self.structure))
+        self.htcl_match_key = str([str(x) for x in [
+            self.region, self.bldg, self.structure, self.fuel,
+            self.end_use]])
+        self.out_break = None
+
+    @property
+    def primary_htcl(self):
+        """True for primary heating/cooling supply or demand-side chains."""
+        return self.mseg_type == "primary" and self.htcl_type is not None
+
+
+class KeyChainTable(object):
+    """Table of interned contributing microsegment key chains.
+
+    Attributes:
+        ids (dict): Integer ID of each key chain string seen so far.
+        chains (list): Parsed key chains, in order of their IDs.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.chains = []
+
+    def intern(self, key):
+        """Find the ID of a key chain string, adding it to the table if new.
+
+        Args:
+            key (str): Key chain string.
+
+        Returns:
+            Integer ID of the key chain.
+        """
+        try:
+            return self.ids[key]
+        except KeyError:
+            kc = KeyChain(len(self.chains), key)
+            self.chains.append(kc)
+            self.ids[key] = kc.id
+            return kc.id
+
+    def get(self, key):
+        """Find the parsed attributes of a key chain string.
+
+        Args:
+            key (str): Key chain string.
+
+        Returns:
+            Parsed key chain (added to the table if new).
+        """
+        return self.chains[self.intern(key)]
+
+    def __getitem__(self, id):
+        return self.chains[id]
+
+    def __len__(self):
+        return len(self.chains)
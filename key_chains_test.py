@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+""" Tests for interned contributing microsegment key chains """
+
+# Import code to be tested
+import key_chains
+
+# Import needed packages
+import unittest
+
+
+class KeyChainTableTest(unittest.TestCase):
+    """Test interning and parsing of contributing microsegment key chains.
+
+    Attributes:
+        res_key (str): Residential primary heating supply-side key chain.
+        com_key (str): Commercial secondary heating key chain.
+    """
+
+    def setUp(self):
+        """Set sample key chain strings."""
+        self.res_key = str((
+            "primary", "AIA_CZ1", "single family home", "electricity",
+            "heating", "supply", "ASHP", "new"))
+        self.com_key = str((
+            "secondary", "AIA_CZ2", "assembly", "electricity", "heating",
+            "demand", "lighting gain", "existing"))
+
+    def test_intern(self):
+        """Test that each key chain string is assigned a single ID."""
+        table = key_chains.KeyChainTable()
+        res_id = table.intern(self.res_key)
+        self.assertEqual(table.intern(self.com_key), res_id + 1)
+        self.assertEqual(table.intern(self.res_key), res_id)
+        self.assertIs(table.get(self.res_key), table[res_id])
+        self.assertEqual(len(table), 2)
+
+    def test_attributes(self):
+        """Test the attributes parsed from key chain strings."""
+        table = key_chains.KeyChainTable()
+        res, com = [table.get(x) for x in [self.res_key, self.com_key]]
+        self.assertEqual(
+            [res.mseg_type, res.region, res.bldg, res.bldg_sect, res.fuel,
+             res.end_use, res.htcl_type, res.tech, res.structure],
+            ["primary", "AIA_CZ1", "single family home", "residential",
+             "electricity", "heating", "supply", "ASHP", "new"])
+        self.assertTrue(res.primary_htcl)
+        self.assertEqual(res.secnd_adj_key, str((
+            "AIA_CZ1", "single family home", "new")))
+        self.assertEqual(res.htcl_match_key, str([
+            "AIA_CZ1", "single family home", "new", "electricity",
+            "heating"]))
+        self.assertEqual([com.mseg_type, com.bldg_sect, com.htcl_type],
+                         ["secondary", "commercial", "demand"])
+        self.assertFalse(com.primary_htcl)
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
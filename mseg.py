@@ -6,6 +6,9 @@ import json
 import argparse
 import csv
 import mseg_techdata as rmt
+import grouped_rows
+import eia_import
+import itertools
 
 
 class EIAData(object):
@@ -219,6 +222,13 @@ technology_demanddict = {'windows conduction': 'WIND_COND',
 res_dictlist = [endusedict, cdivdict, bldgtypedict, fueldict,
                 technology_supplydict, technology_demanddict]
 
+# Key columns by which to group the rows of the AEO energy and stock data,
+# the thermal load components data, and the lighting weighting factors, in
+# the order in which their codes are given in selecting data
+res_keys = ['CDIV', 'BLDG', 'ENDUSE', 'FUEL', 'EQPCLASS', 'BULBTYPE']
+tl_keys = ['ENDUSE', 'CDIV', 'BLDG']
+lt_keys = ['CDIV', 'BLDG', 'EQPCLASS', 'BULBTYPE']
+
 
 def json_translator(dictlist, filterformat):
     """Determine filtering keys for finding information in the input data
@@ -352,7 +362,9 @@ def thermal_load_select(tl_data, sel):
     building envelope.
 
     Args:
-        tl_data (numpy.ndarray): An array of thermal load component factors.
+        tl_data (numpy.ndarray or grouped_rows.GroupedRows): An array of
+            thermal load component factors, or its rows grouped by end
+            use, census division, and building type.
         sel (list): A nested list of indices for selecting the relevant
             data, created by json_translator.
 
@@ -363,9 +375,8 @@ def thermal_load_select(tl_data, sel):
     """
 
     # Select the appropriate data from the thermal loads data array
-    tl_data_sel = tl_data[numpy.all([tl_data['ENDUSE'] == sel[0][0],
-                                     tl_data['CDIV'] == sel[0][1],
-                                     tl_data['BLDG'] == sel[0][2]], axis=0)]
+    tl_data_sel = grouped_rows.grouped(tl_data, tl_keys).select(
+        sel[0][0], sel[0][1], sel[0][2])
 
     # Extract the demand modifier value (the fraction of heating or
     # cooling load gained/lost through the relevant exterior surface)
@@ -388,8 +399,11 @@ def nrg_stock_select(data, sel):
     and stock data always have a single key for each year.
 
     Args:
-        data (numpy.ndarray): An array of AEO energy, equipment stock,
-            and household count data given by microsegment.
+        data (numpy.ndarray or grouped_rows.GroupedRows): An array of
+            AEO energy, equipment stock, and household count data given
+            by microsegment, or its rows grouped by census division,
+            building type, end use, fuel type, equipment class, and bulb
+            type.
         sel (list): A nested list of indices for selecting the relevant
             data, created by json_translator.
 
@@ -402,29 +416,11 @@ def nrg_stock_select(data, sel):
     group_stock = {}
     group_energy = {}
 
-    # Select data for the specified census division and building type
-    data_sel = data[numpy.all([data['CDIV'] == sel[0][1],
-                               data['BLDG'] == sel[0][2]], axis=0)]
-
-    # Multiple end uses can be provided, but try first to see if only
-    # one end use is provided; if not, select data for all of the
-    # end uses given
-    try:
-        data_sel = data_sel[numpy.all(
-            [data_sel['ENDUSE'] == sel[0][0]], axis=0)]
-    except ValueError:
-        data_sel = data_sel[numpy.hstack([numpy.where(
-            data_sel['ENDUSE'] == i) for i in sel[0][0]]).flatten()]
-
-    # Multiple fuel types can be provided, but try first to see if only
-    # one fuel type is provided and if not, use a different approach to
-    # select data for all of the fuel types indicated
-    try:
-        data_sel = data_sel[numpy.all(
-            [data_sel['FUEL'] == sel[0][3]], axis=0)]
-    except ValueError:
-        data_sel = data_sel[numpy.hstack([numpy.where(
-            data_sel['FUEL'] == i) for i in sel[0][3]]).flatten()]
+    # Set the census division, building type, end use, and fuel type
+    # codes of the data to select; multiple end uses and/or fuel types
+    # can be provided, in which case the data for all of the end uses
+    # and fuel types given are selected
+    key_opts = [sel[0][1], sel[0][2], sel[0][0], sel[0][3]]
 
     # If an equipment class is specified, select the subset of
     # applicable data as appropriate
@@ -435,12 +431,13 @@ def nrg_stock_select(data, sel):
 
     if eqp:
         if isinstance(eqp, tuple):  # Lighting
-            data_sel = data_sel[
-                numpy.all([data_sel['EQPCLASS'] == eqp[0],
-                           data_sel['BULBTYPE'] == eqp[1]], axis=0)]
+            key_opts.extend([eqp[0], eqp[1]])
         else:  # Other end uses
-            data_sel = data_sel[
-                numpy.all([data_sel['EQPCLASS'] == eqp], axis=0)]
+            key_opts.append(eqp)
+
+    # Look up the rows of the data with the given codes (grouping the
+    # rows of the data by these codes first, if not already grouped)
+    data_sel = grouped_rows.grouped(data, res_keys).select_any(*key_opts)
 
     # Loop through the reduced numpy stock and energy array and
     # combine the reported values together
@@ -482,8 +479,11 @@ def sqft_homes_select(data, sel):
     use, building type, and technology type in each census division.
 
     Args:
-        data (numpy.ndarray): An array of AEO energy, equipment stock,
-            and household count data given by microsegment.
+        data (numpy.ndarray or grouped_rows.GroupedRows): An array of
+            AEO energy, equipment stock, and household count data given
+            by microsegment, or its rows grouped by census division,
+            building type, end use, fuel type, equipment class, and bulb
+            type.
         sel (list): A nested list of indices for selecting the relevant
             data, created by json_translator.
 
@@ -501,16 +501,12 @@ def sqft_homes_select(data, sel):
         raise ValueError('Unexpected housing stock filtering information!')
 
     # Select home count or square footage data based on selection indices
+    data = grouped_rows.grouped(data, res_keys)
     if technology_supplydict['total homes (tech level)'] in sel[0]:
-        data_sel = data[numpy.all([data['ENDUSE'] == sel[0][0],
-                                   data['CDIV'] == sel[0][1],
-                                   data['BLDG'] == sel[0][2],
-                                   data['FUEL'] == sel[0][3],
-                                   data['EQPCLASS'] == sel[0][4]], axis=0)]
+        data_sel = data.select(sel[0][1], sel[0][2], sel[0][0],
+                               sel[0][3], sel[0][4])
     else:
-        data_sel = data[numpy.all([data['ENDUSE'] == sel[0][0],
-                                   data['CDIV'] == sel[0][1],
-                                   data['BLDG'] == sel[0][2]], axis=0)]
+        data_sel = data.select(sel[0][1], sel[0][2], sel[0][0])
 
     # Loop through the reduced numpy stock and energy (and ancillary
     # data) array and restructure the reported values
@@ -547,16 +543,20 @@ def list_generator(nrg_stock, tloads, filterdata, aeo_years, lt_factors):
     reported only for the first bulb type for each fixture type.
 
     Args:
-        nrg_stock (numpy.ndarray): An array of AEO energy, equipment
-            stock, and household count data given by microsegment.
-        loads (numpy.ndarray): An array of thermal load component factors.
+        nrg_stock (numpy.ndarray or grouped_rows.GroupedRows): An array
+            of AEO energy, equipment stock, and household count data given
+            by microsegment, or its grouped rows (see nrg_stock_select).
+        loads (numpy.ndarray or grouped_rows.GroupedRows): An array of
+            thermal load component factors, or its grouped rows.
         filterdata (list): A list of keys from the microsegments JSON
             indicating the data to be obtained.
         aeo_years (int): The number of years of data reported in the
             RESDBOUT file.
-        lt_factors (numpy.ndarray): A numpy structured array with
-            lighting efficiency and stock weighted factors to be used
-            to break out the lighting energy use data by bulb type.
+        lt_factors (numpy.ndarray or grouped_rows.GroupedRows): A numpy
+            structured array with lighting efficiency and stock weighted
+            factors to be used to break out the lighting energy use data
+            by bulb type, or its rows grouped by census division,
+            building type, fixture type, and bulb type.
 
     Returns:
         In general, this function returns stock and energy dicts,
@@ -569,6 +569,12 @@ def list_generator(nrg_stock, tloads, filterdata, aeo_years, lt_factors):
     # Find the corresponding text filtering information
     txt_filter = json_translator(res_dictlist, filterdata)
 
+    # Group the rows of the input data by the codes used in selecting
+    # data, if not already grouped (e.g., by walk), such that the data
+    # for a microsegment are found with a lookup
+    nrg_stock = grouped_rows.grouped(nrg_stock, res_keys)
+    tloads = grouped_rows.grouped(tloads, tl_keys)
+
     # Specify the lighting fixture and bulb types with lighting
     # energy data reported, in a format consistent with the output
     # from json_translator, handling the difference in the bulb
@@ -670,11 +676,10 @@ def list_generator(nrg_stock, tloads, filterdata, aeo_years, lt_factors):
                     nrg_stock, txt_filter)
 
             # Obtain the applicable lighting energy correction factors
-            lt_correction = lt_factors[numpy.all(
-                [lt_factors['CDIV'] == txt_filter[0][1],
-                 lt_factors['BLDG'] == txt_filter[0][2],
-                 lt_factors['EQPCLASS'] == txt_filter[0][4][0],
-                 lt_factors['BULBTYPE'] == txt_filter[0][4][1]], axis=0)]
+            lt_correction = grouped_rows.grouped(
+                lt_factors, lt_keys).select(
+                txt_filter[0][1], txt_filter[0][2],
+                txt_filter[0][4][0], txt_filter[0][4][1])
             lt_correction = lt_correction['FACTOR']
 
             # Correct the lighting energy data by applying
@@ -715,15 +720,18 @@ def walk(nrg_stock, loads, json_dict, yrs_range, lt_factors, key_list=[]):
     terminal node.
 
     Args:
-        nrg_stock (numpy.ndarray): An array of AEO energy, equipment
-            stock, and household count data given by microsegment.
-        loads (numpy.ndarray): An array of thermal load component factors.
+        nrg_stock (numpy.ndarray or grouped_rows.GroupedRows): An array
+            of AEO energy, equipment stock, and household count data given
+            by microsegment, or its grouped rows (see nrg_stock_select).
+        loads (numpy.ndarray or grouped_rows.GroupedRows): An array of
+            thermal load component factors, or its grouped rows.
         json_dict (dict): The empty microsegments JSON structure.
         yrs_range (int): The number of years of data reported in the
             RESDBOUT file.
-        lt_factors (numpy.ndarray): A numpy structured array with
-            lighting efficiency and stock weighted factors to be used
-            to break out the lighting energy use data by bulb type.
+        lt_factors (numpy.ndarray or grouped_rows.GroupedRows): A numpy
+            structured array with lighting efficiency and stock weighted
+            factors to be used to break out the lighting energy use data
+            by bulb type, or its grouped rows.
         key_list (list): A list of keys corresponding to the current
             location in the dict, ultimately indicating the data to
             extract from the applicable input file(s).
@@ -733,6 +741,13 @@ def walk(nrg_stock, loads, json_dict, yrs_range, lt_factors, key_list=[]):
         by this module.
     """
 
+    # Group the rows of the input data once (at the top of the dict) by
+    # the codes used in selecting the data for each leaf node, such that
+    # those data are found with a lookup rather than a scan of all rows
+    nrg_stock = grouped_rows.grouped(nrg_stock, res_keys)
+    loads = grouped_rows.grouped(loads, tl_keys)
+    lt_factors = grouped_rows.grouped(lt_factors, lt_keys)
+
     # Explore the data structure from the current location
     for key, item in json_dict.items():
         # If there are additional levels in the dict, call the function
@@ -1213,52 +1228,72 @@ def dtype_array(data_file_path, delim_char=',', hl=None):
         return comb_dtypes
 
 
-def data_import(data_file_path, dtype_list, delim_char=',', skip_rows=[]):
+def data_import(data_file_path, dtype_list=None, delim_char=',',
+                skip_rows=[], cache=True):
     """Import data and convert to a numpy structured array.
 
     Read the contents of a data file with a header line and convert
     it into a numpy structured array using the provided dtype definition.
     If specified, also skip lines that have values in the first column
-    indicated by 'skip_rows.'
+    indicated by 'skip_rows.' If no dtype definition is provided, it is
+    determined from the header line and the first complete row of data
+    in the same pass through the file (as in dtype_array).
+
+    The file is read only once, with any NULL characters removed as it
+    is read, and the rows of data are converted in chunks (see
+    eia_import.fill_array). The resultant array is cached next to the
+    data file, such that the file is not parsed again until its contents,
+    the import settings, or the import code (this module) change.
 
     Args:
         data_file_path (str): The full path to the data file to be imported.
-        dtype_list (list): A list of tuples with each tuple containing two
-            entries, a column heading string, and a string defining the
-            data type for that column. Formatted as a numpy dtype list.
+        dtype_list (list, optional): A list of tuples with each tuple
+            containing two entries, a column heading string, and a string
+            defining the data type for that column. Formatted as a numpy
+            dtype list.
         delim_char (str, optional): The delimiting character, defaults to ','.
         skip_rows (list): A list of strings, one of which will appear
             in the first column of each row to be skipped.
+        cache (bool, optional): Whether to reuse/write the cached array.
 
     Returns:
         A numpy structured array of the imported data file with the
         columns specified by dtype_list.
     """
 
-    # Open the target CSV formatted data file
-    with open(data_file_path) as thefile:
-
-        # This use of csv.reader assumes that the default setting of
-        # quotechar '"' is appropriate; the skipinitialspace option
-        # ensures proper reading of double-quoted text strings in the
-        # AEO data that have the delimiter inside them (e.g., cooking
-        # equipment descriptions); the loop which csv.reader is called
-        # is used to detect NULL characters and act appropriately (by
-        # removing them prior to converting to a csv.reader object)
-        # if they are encountered
-        if '\0' in open(data_file_path).read():  # NULL bytes detected
-            filecont = csv.reader((x.replace('\0', '') for x in thefile),
-                                  delimiter=delim_char, skipinitialspace=True)
-        else:  # No NULL bytes, proceed normally
-            filecont = csv.reader(thefile,
-                                  delimiter=delim_char, skipinitialspace=True)
-
-        # Create list to be populated with tuples of each row of data
-        # from the data file
-        data = []
-
-        # Skip first line of the file
-        next(filecont)
+    def parse():
+        # Read the lines of the file once, removing any NULL characters
+        # as they are read
+        lines = eia_import.read_lines(data_file_path)
+
+        # Read the first (header) line of the file
+        header_names = [entry.strip() for entry in next(csv.reader(
+            [next(lines)], delimiter=delim_char))]
+
+        # If no dtype definition is provided, read ahead to the first
+        # row with an entry for each value in the header line, and use
+        # that row to determine the dtype of each column
+        dtypes = dtype_list
+        lines_read = []
+        if dtypes is None:
+            for line in lines:
+                lines_read.append(line)
+                row = next(csv.reader([line], delimiter=delim_char), [])
+                if '' not in row and len(row) == len(header_names):
+                    break
+            else:
+                raise ValueError('No complete row of data found in ' +
+                                 data_file_path)
+            dtypes = list(zip(header_names, [dtype_eval(col) for col in
+                                             row]))
+
+        # Parse the remaining lines of the file; this use of csv.reader
+        # assumes that the default setting of quotechar '"' is
+        # appropriate; the skipinitialspace option ensures proper reading
+        # of double-quoted text strings in the AEO data that have the
+        # delimiter inside them (e.g., cooking equipment descriptions)
+        filecont = csv.reader(itertools.chain(lines_read, lines),
+                              delimiter=delim_char, skipinitialspace=True)
 
         # Import the data, skipping lines that have an end use
         # indicated that is not needed (or will cause later problems
@@ -1267,28 +1302,32 @@ def data_import(data_file_path, dtype_list, delim_char=',', skip_rows=[]):
         # expected based on the dtype, add a sufficient number of 0
         # values to complete the line (0 values are added since they
         # can be coerced to strings or floats and empty strings cannot)
-        for row in filecont:
-            if row[0].strip() not in skip_rows:
-                if len(tuple(row)) != len(dtype_list):
-                    row = row + [0]*(len(dtype_list)-len(row))
-                data.append(tuple(row))
-
-        # Convert data into numpy structured array, using a try/catch
-        # for the case where the data type for a particular column
-        # is not identified correctly by the dtype_array function
-        try:
-            final_struct = numpy.array(data, dtype=dtype_list)
-        # Target error "ValueError: invalid literal for int() with base 10: ''"
-        except ValueError:
-            # In the 2017 AEO data, some consumption data are reported
-            # as floating point numbers on the 0.5 for some reason;
-            # update the dtype for that column to float
-            dtype_list[7] = (dtype_list[7][0], 'f8')
-
-            # With the '' strings replaced with integer coercible
-            # values, create the numpy array as originally desired
-            final_struct = numpy.array(data, dtype=dtype_list)
-        return final_struct
+        def rows():
+            for row in filecont:
+                if row[0].strip() not in skip_rows:
+                    if len(tuple(row)) != len(dtypes):
+                        row = row + [0]*(len(dtypes)-len(row))
+                    yield tuple(row)
+
+        # In the case where the data type for a particular column is not
+        # identified correctly by the dtype_array function (target error
+        # "ValueError: invalid literal for int() with base 10: ''"), note
+        # that in the 2017 AEO data, some consumption data are reported
+        # as floating point numbers on the 0.5 for some reason; update
+        # the dtype for that column to float
+        def fix(chunk, dtypes):
+            dtypes[7] = (dtypes[7][0], 'f8')
+            return chunk, dtypes
+
+        # Convert data into numpy structured array in chunks
+        return eia_import.fill_array(rows(), dtypes, fix)
+
+    if not cache:
+        return parse()
+    return eia_import.cached_import(data_file_path, {
+        'importer': 'mseg', 'dtype_list': dtype_list,
+        'delim_char': delim_char, 'skip_rows': list(skip_rows)}, parse,
+        [__file__])
 
 
 def str_cleaner(data_array, column_name):
@@ -1425,17 +1464,17 @@ def main():
     if aeo_import_year == 2015:
         yrs_range = metajson['max year'] - metajson['min year'] + 1
 
-        # Import EIA RESDBOUT.txt energy use and stock file
-        ns_dtypes = dtype_array(eiadata.res_energy, '\t')
-        ns_data = data_import(eiadata.res_energy, ns_dtypes, '\t',
+        # Import EIA RESDBOUT.txt energy use and stock file (determining
+        # the dtype of each column in the same pass)
+        ns_data = data_import(eiadata.res_energy, None, '\t',
                               ['SF', 'ST', 'FP'])
     else:
         yrs_range = 36
         update_lighting_dict()
 
-        # Import EIA RESDBOUT.txt energy use and stock file
-        ns_dtypes = dtype_array(eiadata.res_energy)
-        ns_data = data_import(eiadata.res_energy, ns_dtypes, ',',
+        # Import EIA RESDBOUT.txt energy use and stock file (determining
+        # the dtype of each column in the same pass)
+        ns_data = data_import(eiadata.res_energy, None, ',',
                               ['SF', 'ST', 'FP', 'HSHE', 'HSHN',
                                'HSHA', 'CSHA', 'CSHE', 'CSHN'])
 
@@ -1450,8 +1489,7 @@ def main():
     ns_data = str_cleaner(ns_data, 'BULBTYPE')
 
     # Import residential thermal load components data
-    tl_dtypes = dtype_array(handyvars.res_tloads, '\t')
-    tl_data = data_import(handyvars.res_tloads, tl_dtypes, '\t')
+    tl_data = data_import(handyvars.res_tloads, None, '\t')
 
     # Explicitly define the lighting data type (note that special)
     eia_lt_dtype = [('FirstYear', 'i4'), ('LastYear', 'i4'), ('Cost', 'f8'),
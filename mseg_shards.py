@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+
+""" Sharded, lazily-loaded baseline microsegment data.
+
+Baseline stock/energy data for EMM regions and states are distributed as a
+single gzipped JSON that is otherwise read in full by each routine that uses
+it. This module splits those data into one gzipped JSON shard per region and
+building type, alongside a JSON manifest of the shard files, and provides a
+read-only dict-like view of the sharded data that only reads a region and
+building type's shard from disk when that branch of the data is first keyed
+into. Routines that touch only some branches of the baseline data (e.g., for
+the regions and building types of the active measures) thus only load those
+branches. The shards may also be written directly in place of the baseline
+data file (e.g., by 'final_mseg_converter.py', one region at a time).
+"""
+
+import json
+import gzip
+import hashlib
+from os import path, makedirs, stat, replace, remove
+from collections.abc import Mapping
+
+
+def shard_dir(src_file):
+    """Set the folder for the shards of a baseline data file.
+
+    Args:
+        src_file (str): Path to the (gzipped) baseline data file.
+
+    Returns:
+        Path to the folder with the shards of the baseline data.
+    """
+    return path.splitext(src_file)[0] + "_shards"
+
+
+def manifest_path(src_file):
+    """Set the path to the manifest for the shards of a baseline data file.
+
+    Args:
+        src_file (str): Path to the (gzipped) baseline data file.
+
+    Returns:
+        Path to the JSON manifest of baseline data shard files.
+    """
+    return path.join(shard_dir(src_file), "manifest.json")
+
+
+def write_shards(msegs, out_dir, source=None, source_mtime=None):
+    """Write baseline data to shards by region and building type.
+
+    Note:
+        Any existing manifest is removed before the shards are written and
+        the new manifest is written last, such that an interrupted write
+        (including a rewrite over existing shards) leaves no manifest for
+        partially written shards.
+
+    Args:
+        msegs (dict): Baseline data, keyed by region, then building type.
+        out_dir (str): Folder to write shard files and manifest to.
+        source (str): Name of the baseline data file the shards are drawn
+            from, if any.
+        source_mtime (float): Modification time of the baseline data file
+            the shards are drawn from, if any.
+
+    Returns:
+        Manifest of the shard files written, keyed by region and building
+        type (shard file names use region and building type positions,
+        as building type names may include characters that are invalid in
+        file names).
+    """
+    makedirs(out_dir, exist_ok=True)
+    remove_manifest(out_dir)
+    regions, digests = {}, {}
+    for r_ind, (reg, reg_dat) in enumerate(msegs.items()):
+        regions[reg], digests[reg] = write_region_shards(
+            reg_dat, r_ind, out_dir)
+
+    return write_manifest(regions, digests, out_dir, source, source_mtime)
+
+
+def write_region_shards(reg_dat, r_ind, out_dir):
+    """Write the baseline data for a single region to shards by building type.
+
+    Args:
+        reg_dat (dict): Baseline data for a region, keyed by building type.
+        r_ind (int): Position of the region in the baseline data.
+        out_dir (str): Folder to write shard files to.
+
+    Returns:
+        A tuple of the shard file names and the digests of the shard
+        contents for the region, each keyed by building type.
+    """
+    shards, digests = {}, {}
+    for b_ind, (bldg, bldg_dat) in enumerate(reg_dat.items()):
+        shard_name = str(r_ind) + "_" + str(b_ind) + ".json.gz"
+        digests[bldg] = write_shard(bldg_dat, path.join(out_dir, shard_name))
+        shards[bldg] = shard_name
+
+    return shards, digests
+
+
+def remove_manifest(out_dir):
+    """Remove the manifest of the shard files in a folder, if any.
+
+    Args:
+        out_dir (str): Folder with the shard files.
+    """
+    try:
+        remove(path.join(out_dir, "manifest.json"))
+    except FileNotFoundError:
+        pass
+
+
+def write_manifest(regions, digests, out_dir, source=None,
+                   source_mtime=None):
+    """Write the manifest of the shard files for baseline data.
+
+    Args:
+        regions (dict): Shard file names, keyed by region and building type.
+        digests (dict): Digests of the shard contents, keyed by region and
+            building type.
+        out_dir (str): Folder with the shard files.
+        source (str): Name of the baseline data file the shards are drawn
+            from, or that the shards stand in for, if any.
+        source_mtime (float): Modification time of the baseline data file
+            the shards are drawn from; None for shards written directly
+            (e.g., by 'final_mseg_converter.py').
+
+    Returns:
+        Manifest of the shard files (which changes with the shard contents
+        through the digests it records).
+    """
+    manifest = {"source": source, "source_mtime": source_mtime,
+                "regions": regions, "digests": digests}
+    with open(path.join(out_dir, "manifest.json") + ".tmp", "w") as jso:
+        json.dump(manifest, jso, indent=2)
+    replace(path.join(out_dir, "manifest.json") + ".tmp",
+            path.join(out_dir, "manifest.json"))
+
+    return manifest
+
+
+def write_shard(data, shard_file):
+    """Write the data for a single shard to a gzipped JSON file.
+
+    Args:
+        data (dict): Baseline data for a region and building type.
+        shard_file (str): Path to the shard file.
+
+    Returns:
+        Hexadecimal SHA-256 hash of the JSON text of the shard (which,
+        unlike the gzipped file, does not change when the same data are
+        written again).
+    """
+    shard_text = json.dumps(data, separators=(",", ":"))
+    with gzip.open(shard_file + ".tmp", "wt", compresslevel=5) as jso:
+        jso.write(shard_text)
+    replace(shard_file + ".tmp", shard_file)
+
+    return hashlib.sha256(shard_text.encode("utf-8")).hexdigest()
+
+
+def shards_current(src_file):
+    """Check whether shards exist and reflect the baseline data file.
+
+    Args:
+        src_file (str): Path to the (gzipped) baseline data file.
+
+    Returns:
+        True if a shard manifest exists and either the baseline data file
+        is absent (shards are used as is) or its modification time matches
+        that recorded in the manifest (for shards written directly rather
+        than drawn from the file, if the file is not newer than the
+        manifest); otherwise False (including for manifests that do not
+        record the digests of the shard contents).
+    """
+    try:
+        with open(manifest_path(src_file), 'r') as jsi:
+            manifest = json.load(jsi)
+    except (FileNotFoundError, ValueError):
+        return False
+    if "digests" not in manifest.keys():
+        return False
+    if not path.isfile(src_file):
+        return True
+    if manifest.get("source_mtime") is None:
+        return stat(src_file).st_mtime <= stat(
+            manifest_path(src_file)).st_mtime
+    return manifest.get("source_mtime") == stat(src_file).st_mtime
+
+
+def shards_digest(src_file):
+    """Find a digest of the contents of the shards of a baseline data file.
+
+    Args:
+        src_file (str): Path to the (gzipped) baseline data file.
+
+    Returns:
+        Hexadecimal SHA-256 hash of the shard content digests recorded in
+        the shard manifest, or None if there is no (readable) manifest.
+    """
+    try:
+        with open(manifest_path(src_file), 'r') as jsi:
+            manifest = json.load(jsi)
+    except (FileNotFoundError, ValueError):
+        return None
+    return hashlib.sha256(json.dumps(
+        [manifest["regions"], manifest.get("digests")],
+        sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_msegs(src_file, decode=json.loads):
+    """Load baseline data lazily, first sharding the data if needed.
+
+    Args:
+        src_file (str): Path to the (gzipped) baseline data file.
+        decode (function): Converts the JSON text of a shard to data.
+
+    Returns:
+        Lazily-loaded, read-only view of the baseline data.
+    """
+    if not shards_current(src_file):
+        with gzip.GzipFile(src_file, 'r') as zip_ref:
+            msegs = json.loads(zip_ref.read().decode('utf-8'))
+        write_shards(msegs, shard_dir(src_file), path.basename(src_file),
+                     stat(src_file).st_mtime)
+        del msegs
+
+    return ShardedMsegs(shard_dir(src_file), decode)
+
+
+class ShardedMsegs(Mapping):
+    """Read-only view of baseline data sharded by region and building type.
+
+    Attributes:
+        shard_dir (str): Folder with the shard files and manifest.
+        decode (function): Converts the JSON text of a shard to data.
+        manifest (dict): Shard file names, keyed by region and building type.
+        regions (dict): Views of the data for regions keyed into so far.
+    """
+
+    def __init__(self, shard_dir, decode=json.loads):
+        self.shard_dir = shard_dir
+        self.decode = decode
+        with open(path.join(shard_dir, "manifest.json"), 'r') as jsi:
+            self.manifest = json.load(jsi)["regions"]
+        self.regions = {}
+
+    def __getitem__(self, reg):
+        if reg not in self.regions:
+            self.regions[reg] = ShardedRegion(self, reg)
+        return self.regions[reg]
+
+    def __iter__(self):
+        return iter(self.manifest)
+
+    def __len__(self):
+        return len(self.manifest)
+
+    def __contains__(self, reg):
+        return reg in self.manifest
+
+
+class ShardedRegion(Mapping):
+    """Read-only view of a region's baseline data, sharded by building type.
+
+    Attributes:
+        msegs (object): View of the sharded baseline data across regions.
+        shards (dict): Shard file names for the region, by building type.
+        bldgs (dict): Data for the building types keyed into so far.
+    """
+
+    def __init__(self, msegs, reg):
+        self.msegs = msegs
+        self.shards = msegs.manifest[reg]
+        self.bldgs = {}
+
+    def __getitem__(self, bldg):
+        if bldg not in self.bldgs:
+            # Read the building type's shard on first use only
+            with gzip.open(path.join(
+                    self.msegs.shard_dir, self.shards[bldg]), 'rt') as jsi:
+                self.bldgs[bldg] = self.msegs.decode(jsi.read())
+        return self.bldgs[bldg]
+
+    def __iter__(self):
+        return iter(self.shards)
+
+    def __len__(self):
+        return len(self.shards)
+
+    def __contains__(self, bldg):
+        return bldg in self.shards
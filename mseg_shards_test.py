@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+""" Tests for sharding and lazily loading baseline microsegment data """
+
+# Import code to be tested
+import mseg_shards
+
+# Import needed packages
+import unittest
+import tempfile
+import gzip
+import json
+from os import path, utime, stat, makedirs
+
+
+class ShardedMsegsTest(unittest.TestCase):
+    """Test sharding of baseline data and lazy loading of the shards.
+
+    Attributes:
+        tmp_dir (object): Temporary folder for baseline data and shards.
+        src_file (str): Path to gzipped baseline data file.
+        msegs (dict): Sample baseline data, keyed by region, then building.
+    """
+
+    def setUp(self):
+        """Write sample gzipped baseline data to a temporary folder."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.src_file = path.join(self.tmp_dir.name, "mseg_res_com_emm.gz")
+        self.msegs = {
+            "TRE": {
+                "single family home": {
+                    "total homes": {"2020": 10, "2021": 11},
+                    "electricity": {"onsite generation": {
+                        "energy": {"2020": 1.5, "2021": 2.5}}}},
+                "mercantile/service": {
+                    "total square footage": {"2020": 5, "2021": 6}}},
+            "FRCC": {
+                "single family home": {
+                    "total homes": {"2020": 20, "2021": 21}}}}
+        with gzip.GzipFile(self.src_file, "w") as zip_ref:
+            zip_ref.write(json.dumps(self.msegs).encode("utf-8"))
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        """Test that sharded data match the original baseline data."""
+        msegs = mseg_shards.load_msegs(self.src_file)
+        self.assertEqual(sorted(msegs.keys()), sorted(self.msegs.keys()))
+        for reg in self.msegs.keys():
+            self.assertEqual(
+                sorted(msegs[reg].keys()), sorted(self.msegs[reg].keys()))
+            for bldg in self.msegs[reg].keys():
+                self.assertEqual(msegs[reg][bldg], self.msegs[reg][bldg])
+
+    def test_lazy_load(self):
+        """Test that only the shards keyed into are read."""
+        msegs = mseg_shards.load_msegs(self.src_file)
+        self.assertEqual(
+            msegs["TRE"]["single family home"]["electricity"][
+                "onsite generation"]["energy"]["2021"], 2.5)
+        self.assertEqual(list(msegs.regions.keys()), ["TRE"])
+        self.assertEqual(
+            list(msegs["TRE"].bldgs.keys()), ["single family home"])
+
+    def test_reshard_on_update(self):
+        """Test that shards are rewritten when the baseline data change."""
+        mseg_shards.load_msegs(self.src_file)
+        self.assertTrue(mseg_shards.shards_current(self.src_file))
+        digest = mseg_shards.shards_digest(self.src_file)
+        self.msegs["FRCC"]["single family home"]["total homes"]["2021"] = 30
+        with gzip.GzipFile(self.src_file, "w") as zip_ref:
+            zip_ref.write(json.dumps(self.msegs).encode("utf-8"))
+        # Ensure the modification time differs from the one recorded
+        mtime = stat(self.src_file).st_mtime + 10
+        utime(self.src_file, (mtime, mtime))
+        self.assertFalse(mseg_shards.shards_current(self.src_file))
+        msegs = mseg_shards.load_msegs(self.src_file)
+        self.assertEqual(
+            msegs["FRCC"]["single family home"]["total homes"]["2021"], 30)
+        # The digest of the shard contents reflects the updated data
+        self.assertNotEqual(mseg_shards.shards_digest(self.src_file), digest)
+
+    def test_direct_shards(self):
+        """Test that shards written directly stand in for the data file."""
+        out_dir = mseg_shards.shard_dir(self.src_file)
+        makedirs(out_dir)
+        shards = {reg: mseg_shards.write_region_shards(
+            self.msegs[reg], r_ind, out_dir)
+            for r_ind, reg in enumerate(self.msegs.keys())}
+        mseg_shards.write_manifest(
+            {reg: shards[reg][0] for reg in shards},
+            {reg: shards[reg][1] for reg in shards}, out_dir,
+            path.basename(self.src_file))
+        # The data file is older than the shards and is not read
+        mtime = stat(mseg_shards.manifest_path(self.src_file)).st_mtime - 10
+        utime(self.src_file, (mtime, mtime))
+        self.assertTrue(mseg_shards.shards_current(self.src_file))
+        msegs = mseg_shards.load_msegs(self.src_file)
+        self.assertEqual(msegs["FRCC"]["single family home"],
+                         self.msegs["FRCC"]["single family home"])
+        # A data file updated after the shards were written is sharded
+        utime(self.src_file, (mtime + 20, mtime + 20))
+        self.assertFalse(mseg_shards.shards_current(self.src_file))
+
+    def test_interrupted_rewrite(self):
+        """Test that an interrupted rewrite of shards leaves no manifest."""
+        out_dir = mseg_shards.shard_dir(self.src_file)
+        mseg_shards.write_shards(self.msegs, out_dir)
+        self.assertTrue(path.isfile(mseg_shards.manifest_path(self.src_file)))
+        # Data that cannot be written to JSON interrupt the rewrite after
+        # the shards of the first region are overwritten
+        msegs = dict(self.msegs)
+        msegs[list(msegs.keys())[-1]] = {"single family home": object()}
+        with self.assertRaises(TypeError):
+            mseg_shards.write_shards(msegs, out_dir)
+        self.assertFalse(path.isfile(mseg_shards.manifest_path(
+            self.src_file)))
+        self.assertFalse(mseg_shards.shards_current(self.src_file))
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
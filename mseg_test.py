@@ -11,6 +11,9 @@ import re
 import numpy as np
 import os
 import itertools
+import tempfile
+from unittest import mock
+import eia_import
 
 
 # Skip this test if the EIA files are not expected, indicated by the
@@ -99,6 +102,61 @@ class ResidentialDataIntegrityTest(unittest.TestCase):
                         "are different than expected")
 
 
+class DataImportTest(unittest.TestCase):
+    """ Test that the single-pass import of a RESDBOUT-like data file
+    yields the array produced by the previous import, which determined
+    the dtype in a separate pass (dtype_array) and converted all rows of
+    the file at once """
+
+    # Define sample RESDBOUT rows, including a first row with missing
+    # values (not used to determine the dtype), a NULL character, a row
+    # to skip, a consumption value reported as a float (after the first
+    # chunk of rows), and a row with fewer values than expected
+    res_text = (
+        'ENDUSE,CDIV,BLDG,FUEL,EQPCLASS,YEAR,EQSTOCK,CONSUMPTION,'
+        'HOUSEHOLDS,BULBTYPE\n'
+        'HT,1,1,EL,,2010,1.5,3,0,\n'
+        'HT,1,1,EL\0,ELEC_RAD,2010,2.5,10,100,INC\n'
+        'SF,1,1,EL,ELEC_RAD,2010,1.0,4,100,\n'
+        'CL,2,3,EL,ROOM_AIR,2011,0.5,7,200,\n'
+        'LT,2,3,EL,GSL,2011,0.5,2.5,200,LED\n'
+        'HT,9,2,GS,NG_FA,2012,4.0,12,300,\n'
+        'WH,9,2,GS,NG_WH,2012,1.0,6\n')
+
+    # Define the array yielded by the previous import of the sample rows
+    res_array = np.array([
+        ('HT', 1, 1, 'EL', '', 2010, 1.5, 3.0, 0, ''),
+        ('HT', 1, 1, 'EL', 'ELEC_RAD', 2010, 2.5, 10.0, 100, 'INC'),
+        ('CL', 2, 3, 'EL', 'ROOM_AIR', 2011, 0.5, 7.0, 200, ''),
+        ('LT', 2, 3, 'EL', 'GSL', 2011, 0.5, 2.5, 200, 'LED'),
+        ('HT', 9, 2, 'GS', 'NG_FA', 2012, 4.0, 12.0, 300, ''),
+        ('WH', 9, 2, 'GS', 'NG_WH', 2012, 1.0, 6.0, 0, '0')],
+        dtype=[('ENDUSE', '<U50'), ('CDIV', '<i4'), ('BLDG', '<i4'),
+               ('FUEL', '<U50'), ('EQPCLASS', '<U50'), ('YEAR', '<i4'),
+               ('EQSTOCK', '<f8'), ('CONSUMPTION', '<f8'),
+               ('HOUSEHOLDS', '<i4'), ('BULBTYPE', '<U50')])
+
+    def setUp(self):
+        # Write the sample rows to a temporary data file
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.res_file = os.path.join(self.tmp_dir.name, 'RESDBOUT.txt')
+        with open(self.res_file, 'w') as fh:
+            fh.write(self.res_text)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    # Test import with the dtype determined in the same pass and with
+    # the dtype determined by dtype_array, converting two rows at a time
+    def test_data_import(self):
+        with mock.patch.object(eia_import, 'CHUNK_ROWS', 2):
+            for dtype_list in [None, rm.dtype_array(self.res_file)]:
+                imported = rm.data_import(
+                    self.res_file, dtype_list, ',', ['SF'], cache=False)
+                self.assertEqual(imported.dtype, self.res_array.dtype)
+                np.testing.assert_array_equal(imported, self.res_array)
+
+
 class JSONTranslatorTest(unittest.TestCase):
     """ Test conversion of lists of strings from JSON file into
     restructured lists corresponding to the codes used by EIA in the
@@ -390,6 +448,21 @@ class NumpyArrayReductionTest(unittest.TestCase):
             # Compare consumption
             self.assertEqual(b, self.EIA_nrg_stock_out[n][1])
 
+    # Test that data with rows already grouped by the selection codes
+    # (as done once in walk) yield the same output, including for
+    # filters with multiple fuel types
+    def test_recording_of_EIA_data_grouped_rows(self):
+        grouped = rm.grouped_rows.GroupedRows(self.EIA_nrg_stock,
+                                              rm.res_keys)
+        for n in range(0, len(self.EIA_nrg_stock_filter)):
+            self.assertEqual(rm.nrg_stock_select(
+                grouped, self.EIA_nrg_stock_filter[n]),
+                self.EIA_nrg_stock_out[n])
+        (a, b) = rm.nrg_stock_select(grouped, [['HT', 9, 1, ['GS', 'EL']],
+                                               ''])
+        self.assertEqual(a, {"2010": 1452680 * 2, "2011": 1577350 * 2,
+                             "2012": 1324963 * 2})
+
     # Test restructuring of EIA data into a square footage list, confirming
     # that both the reported data and the reduced array with the remaining
     # data are correct
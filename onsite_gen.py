@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+""" Summary of baseline onsite generation data.
+
+run.py reports the onsite generation energy of the regions and building types
+of the active measures alongside the measure results. These data are a small
+branch of the baseline stock/energy data (e.g., 'mseg_res_com_cz.json'),
+which is otherwise read in full only to find them. This module writes the
+onsite generation energy of each region and building type to a small summary
+file next to the baseline data file, marked with the modification time and
+digest of the baseline data file, such that later runs read the summary
+instead.
+"""
+
+import json
+import hashlib
+import warnings
+from os import path, stat, replace
+
+
+def summary_path(src_file):
+    """Set the path to the onsite generation summary of a baseline file.
+
+    Args:
+        src_file (str): Path to the (gzipped) baseline data file.
+
+    Returns:
+        Path to the JSON summary of onsite generation data.
+    """
+    return path.splitext(src_file)[0] + "_onsite_gen.json"
+
+
+def file_digest(src_file):
+    """Find the digest of the contents of a baseline data file.
+
+    Args:
+        src_file (str): Path to the (gzipped) baseline data file.
+
+    Returns:
+        Hexadecimal SHA-256 hash of the file contents.
+    """
+    file_hash = hashlib.sha256()
+    with open(src_file, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def sum_onsite_gen(msegs, regions=None, bldgs=None):
+    """Find the onsite generation energy of each region and building type.
+
+    Args:
+        msegs (dict): Baseline data, keyed by region, then building type.
+        regions: Regions to find data for (all regions by default).
+        bldgs: Building types to find data for (all building types with
+            onsite generation data by default).
+
+    Returns:
+        Dict of onsite generation energy by year, keyed by region and
+        building type.
+    """
+    if regions is None:
+        regions = msegs.keys()
+    osg = {}
+    for reg in regions:
+        osg[reg] = {}
+        for bldg in (bldgs if bldgs is not None else msegs[reg].keys()):
+            try:
+                osg[reg][bldg] = msegs[reg][bldg]["electricity"][
+                    "onsite generation"]["energy"]
+            except KeyError:
+                # Only report missing data for requested building types
+                if bldgs is not None:
+                    raise
+    return osg
+
+
+def write_summary(msegs, src_file):
+    """Write the onsite generation summary for a baseline data file.
+
+    Args:
+        msegs (dict): Baseline data read from the file.
+        src_file (str): Path to the (gzipped) baseline data file.
+
+    Returns:
+        Onsite generation energy by region and building type.
+    """
+    osg = sum_onsite_gen(msegs)
+    with open(summary_path(src_file) + ".tmp", "w") as jso:
+        json.dump({"source": path.basename(src_file),
+                   "source_mtime": stat(src_file).st_mtime,
+                   "source_digest": file_digest(src_file),
+                   "onsite generation": osg}, jso, indent=2)
+    replace(summary_path(src_file) + ".tmp", summary_path(src_file))
+
+    return osg
+
+
+def load_summary(src_file):
+    """Read the onsite generation summary for a baseline data file.
+
+    Args:
+        src_file (str): Path to the (gzipped) baseline data file.
+
+    Returns:
+        Onsite generation energy by region and building type if a summary
+        exists and either the baseline data file is absent (the summary is
+        used as is, with a warning) or the modification time or digest of
+        the file matches that recorded in the summary; otherwise None.
+    """
+    try:
+        with open(summary_path(src_file), 'r') as jsi:
+            summary = json.load(jsi)
+    except (FileNotFoundError, ValueError):
+        return None
+    # The summary cannot be checked against a missing baseline data file
+    if not path.isfile(src_file):
+        warnings.warn(
+            "Baseline data file '" + src_file + "' not found; using "
+            "onsite generation data summarized in '" +
+            summary_path(src_file) + "', which may be out of date")
+    # Check the digest of the baseline data file only when its modification
+    # time has changed (e.g., when the file was copied or checked out again)
+    elif summary.get("source_mtime") != stat(src_file).st_mtime and \
+            summary.get("source_digest") != file_digest(src_file):
+        return None
+    return summary["onsite generation"]
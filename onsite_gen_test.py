@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+""" Tests for the summary of baseline onsite generation data """
+
+# Import code to be tested
+import onsite_gen
+
+# Import needed packages
+import unittest
+import tempfile
+import json
+from os import path, utime, stat, remove
+
+
+class OnsiteGenTest(unittest.TestCase):
+    """Test writing and reading of onsite generation summaries.
+
+    Attributes:
+        tmp_dir (object): Temporary folder for baseline data and summary.
+        src_file (str): Path to the sample baseline data file.
+        msegs (dict): Sample baseline data.
+    """
+
+    def setUp(self):
+        """Set sample baseline data and write them to a file."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.src_file = path.join(self.tmp_dir.name, "mseg_res_com_cz.json")
+        self.msegs = {reg: {
+            "single family home": {
+                "total homes": {"2009": 100},
+                "electricity": {"onsite generation": {
+                    "energy": {"2009": n, "2010": n + 1}}}},
+            "mobile home": {"total homes": {"2009": 10}},
+            "assembly": {"electricity": {"onsite generation": {
+                "energy": {"2009": 2 * n, "2010": 2 * n + 1}}}}}
+            for n, reg in enumerate(["AIA_CZ1", "AIA_CZ2"])}
+        with open(self.src_file, "w") as jso:
+            json.dump(self.msegs, jso)
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        self.tmp_dir.cleanup()
+
+    def test_sum_onsite_gen(self):
+        """Test finding onsite generation data by region and building."""
+        osg = onsite_gen.sum_onsite_gen(self.msegs)
+        self.assertEqual(osg["AIA_CZ2"], {
+            "single family home": {"2009": 1, "2010": 2},
+            "assembly": {"2009": 2, "2010": 3}})
+        self.assertEqual(onsite_gen.sum_onsite_gen(
+            self.msegs, ["AIA_CZ1"], ["assembly"]), {
+            "AIA_CZ1": {"assembly": {"2009": 0, "2010": 1}}})
+        # Requested building types without onsite generation data raise an
+        # error
+        with self.assertRaises(KeyError):
+            onsite_gen.sum_onsite_gen(self.msegs, ["AIA_CZ1"], [
+                "mobile home"])
+
+    def test_summary(self):
+        """Test that summaries are used only while current."""
+        self.assertIsNone(onsite_gen.load_summary(self.src_file))
+        osg = onsite_gen.write_summary(self.msegs, self.src_file)
+        self.assertEqual(onsite_gen.load_summary(self.src_file), osg)
+        # Summaries of baseline data files with a new modification time but
+        # the same contents are used
+        mtime = stat(self.src_file).st_mtime
+        utime(self.src_file, (mtime + 10, mtime + 10))
+        self.assertEqual(onsite_gen.load_summary(self.src_file), osg)
+        # Summaries of updated baseline data files are not used
+        self.msegs["AIA_CZ1"]["assembly"]["electricity"]["onsite generation"][
+            "energy"]["2009"] = 5
+        with open(self.src_file, "w") as jso:
+            json.dump(self.msegs, jso)
+        utime(self.src_file, (mtime + 20, mtime + 20))
+        self.assertIsNone(onsite_gen.load_summary(self.src_file))
+        # Summaries of missing baseline data files are used with a warning
+        onsite_gen.write_summary(self.msegs, self.src_file)
+        remove(self.src_file)
+        with self.assertWarns(UserWarning):
+            self.assertEqual(onsite_gen.load_summary(self.src_file)[
+                "AIA_CZ1"]["assembly"]["2009"], 5)
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,30 @@ import numpy
 import copy
 from numpy.linalg import LinAlgError
 from collections import OrderedDict, defaultdict
+from collections.abc import Mapping
 import gzip
 import pickle
 from os import getcwd, path, pathsep, sep, environ, walk, devnull
-from ast import literal_eval
 import math
 from argparse import ArgumentParser
 import subprocess
 import sys
 import warnings
+import multiprocessing
+import traceback
 import numpy_financial as npf
+import mseg_shards
+import compete_arrays
+import key_chains
+import breakout_index
+import htcl_overlaps
+import onsite_gen
+import json_stream
+import summary_store
+
+# Engine and input data made available to worker processes in parallel
+# scenario/competition runs (see 'main' and 'Engine.compete_groups_parallel')
+run_shared_data = None
 
 
 class UsefulInputFiles(object):
@@ -356,10 +370,14 @@ class Engine(object):
         output_all (OrderedDict): Summary results across all active measures;
             also stores data on energy output type (site, source (fossil
             equivalent site-source) or source (captured energy site-source).
+        key_chains (object): Table of parsed contributing microsegment key
+            chains.
+        batch_compete (boolean): Flag to calculate market shares for all
+            primary microsegments with the same competing measures at once.
     """
 
     def __init__(self, handyvars, measure_objects, energy_out, brkout,
-                 report_cfs):
+                 report_cfs, batch_compete=False):
         self.handyvars = handyvars
         self.measures = measure_objects
         self.output_ecms, self.output_all = (OrderedDict() for n in range(2))
@@ -367,6 +385,15 @@ class Engine(object):
             ("Markets and Savings (Overall)", OrderedDict())])
         self.output_all["Energy Output Type"] = energy_out
         self.output_all["Output Resolution"] = brkout
+        # Initialize table of parsed contributing microsegment key chains
+        self.key_chains = key_chains.KeyChainTable()
+        # Initialize reverse index of output breakout categories
+        self.out_breaks = breakout_index.BreakoutIndex(
+            self.handyvars.out_break_czones,
+            self.handyvars.out_break_bldgtypes,
+            self.handyvars.out_break_enduses,
+            self.handyvars.out_break_fuels)
+        self.batch_compete = batch_compete
         # Initialize competition adjustment fraction dict, if required by user
         if report_cfs is True:
             self.output_ecms_cfs = {}
@@ -392,46 +419,7 @@ class Engine(object):
             # Set measure climate zone, building sector, and end use
             # output category names for use in filtering and/or breaking
             # out results
-            czones, bldgtypes, end_uses = ([] for n in range(3))
-            # Find measure climate zone output categories
-            for cz in self.handyvars.out_break_czones.items():
-                if any([x in cz[1] for x in m.climate_zone]) and \
-                        cz[0] not in czones:
-                    czones.append(cz[0])
-            # Find measure building sector output categories
-            for bldg in self.handyvars.out_break_bldgtypes.items():
-                if any([x in bldg[1] for x in m.bldg_type]) and \
-                        bldg[0] not in bldgtypes:
-                    bldgtypes.append(bldg[0])
-            # Find measure end use output categories
-            for euse in self.handyvars.out_break_enduses.items():
-                # Find primary end use categories
-                if any([x in euse[1] for x in m.end_use["primary"]]) and \
-                        euse[0] not in end_uses:
-                    # * Note: classify special freezers ECM case as
-                    # 'Refrigeration'; classify 'supply' side heating/cooling
-                    # ECMs as 'Heating (Equip.)'/'Cooling (Equip.)' and
-                    # 'demand' side heating/cooling ECMs as 'Envelope'
-                    if (euse[0] == "Refrigeration" and
-                        ("refrigeration" in m.end_use["primary"] or
-                         "freezers" in m.technology)) or (
-                        euse[0] != "Refrigeration" and ((
-                            euse[0] in ["Heating (Equip.)",
-                                        "Cooling (Equip.)"] and
-                            "supply" in m.technology_type["primary"]) or (
-                            euse[0] in ["Heating (Env.)", "Cooling (Env.)"] and
-                            "demand" in m.technology_type["primary"]) or (
-                            euse[0] not in [
-                                "Heating (Equip.)", "Cooling (Equip.)",
-                                "Heating (Env.)", "Cooling (Env.)"]))):
-                        end_uses.append(euse[0])
-                # Assign secondary heating/cooling microsegments that
-                # represent waste heat from lights to the 'Lighting' end use
-                # category
-                if m.end_use["secondary"] is not None and any([
-                    x in m.end_use["secondary"] for x in [
-                        "heating", "cooling"]]) and "Lighting" not in end_uses:
-                    end_uses.append("Lighting")
+            czones, bldgtypes, end_uses = self.out_breaks.measure(m)
 
             # Set measure climate zone(s), building sector(s), and end use(s)
             # as filter variables
@@ -524,305 +512,306 @@ class Engine(object):
             # schemes to finalized status
             m.update_results["savings"][adopt_scheme][comp_scheme] = False
 
-            # Update measure financial metrics if they have not already been
-            # finalized (these metrics remain constant across
-            # all consumer adoption and measure competition schemes)
-            if m.update_results["financial metrics"] is True:
-                # Shorthand for data used to determine financial metrics (since
-                # these data do not vary based on competition or adoption
-                # scheme, use only uncompeted data for the calculations)
-                markets_uc = m.markets[self.handyvars.adopt_schemes[0]][
-                    "uncompeted"]["master_mseg"]
-
-                # Initialize per unit measure stock, energy, and carbon costs;
-                # per unit energy and carbon cost savings; per sunit energy and
-                # carbon savings; unit stock, energy, and carbon costs to use
-                # in residential and commercial competition calculations; and
-                # financial metrics (irr, payback, cce, ccc)
-                scostbase_unit, scostmeas_delt_unit, scostmeas_unit, \
-                    ecost_meas_unit, ccost_meas_unit, \
-                    ecostsave_unit, ccostsave_unit, esave_unit, \
-                    csave_unit, stock_unit_cost_res, stock_unit_cost_com, \
-                    energy_unit_cost_res, energy_unit_cost_com, \
-                    carb_unit_cost_res, carb_unit_cost_com, irr_e, irr_ec, \
-                    payback_e, payback_ec, cce, cce_bens, ccc, ccc_bens = ({
-                        yr: None for yr in self.handyvars.aeo_years} for
-                        n in range(23))
-
-                # Calculate per unit stock costs, energy and carbon savings,
-                # and energy and carbon cost savings for each projection year;
-                # base calculations on competed stock in each year
-                for yr in self.handyvars.aeo_years:
+        # Update measure financial metrics if they have not already been
+        # finalized (these metrics remain constant across all consumer
+        # adoption and measure competition schemes), calculating the metrics
+        # for all such measures at once
+        measures_fin = [m for m in measures_update if
+                        m.update_results["financial metrics"] is True]
+        if len(measures_fin) > 0:
+            self.calc_financial_metrics(measures_fin)
 
-                    # Baseline capital cost
-                    stock_base_cost_tot = \
-                        markets_uc["cost"]["stock"]["total"]["baseline"][yr]
-                    # Measure capital cost
-                    stock_meas_cost_tot = markets_uc["cost"]["stock"][
-                        "total"]["efficient"][yr]
-                    # Energy savings
-                    esave_tot = \
-                        markets_uc["energy"]["total"]["baseline"][yr] - \
-                        markets_uc["energy"]["total"]["efficient"][yr]
-                    # Carbon savings
-                    csave_tot = \
-                        markets_uc["carbon"]["total"]["baseline"][yr] - \
-                        markets_uc["carbon"]["total"]["efficient"][yr]
-                    # Energy cost savings
-                    ecostsave_tot = markets_uc["cost"]["energy"]["total"][
-                        "baseline"][yr] - markets_uc["cost"]["energy"][
-                        "total"]["efficient"][yr]
-                    # Carbon cost savings
-                    ccostsave_tot = markets_uc["cost"]["carbon"]["total"][
-                        "baseline"][yr] - markets_uc["cost"]["carbon"][
-                        "total"]["efficient"][yr]
-                    # Number of applicable baseline stock units
-                    nunits_tot = \
-                        markets_uc["stock"]["total"]["all"][yr]
-                    # Number of applicable stock units capt. by measure
-                    nunits_meas_tot = \
-                        markets_uc["stock"]["total"]["measure"][yr]
-
-                    # Calculate per unit baseline capital cost and incremental
-                    # measure capital cost (used in financial metrics
-                    # calculations below); set these values to zero for
-                    # years in which total number of base/meas units is zero
-                    if nunits_tot != 0 and (
-                        type(nunits_meas_tot) != numpy.ndarray and
-                        nunits_meas_tot >= 1 or
-                            type(nunits_meas_tot) == numpy.ndarray and all(
-                                nunits_meas_tot) >= 1):
-                        # Per unit baseline capital cost; note that these costs
-                        # are aggregated as a baseline counterfactual for all
-                        # units captured by the measure and therefore must be
-                        # normalized by the number of measure-captured units
-                        scostbase_unit[yr] = \
-                            stock_base_cost_tot / nunits_meas_tot
-                        # Per unit measure total capital cost
-                        scostmeas_unit[yr] = \
-                            stock_meas_cost_tot / nunits_meas_tot
-                        # Per unit measure incremental capital cost
-                        scostmeas_delt_unit[yr] = (
-                            scostbase_unit[yr] - scostmeas_unit[yr])
-                        # Per unit measure energy savings
-                        esave_unit[yr] = esave_tot / nunits_meas_tot
-                        # Per unit measure carbon savings
-                        csave_unit[yr] = csave_tot / nunits_meas_tot
-                        # Per unit measure energy cost savings
-                        ecostsave_unit[yr] = ecostsave_tot / nunits_meas_tot
-                        # Per unit measure carbon cost savings
-                        ccostsave_unit[yr] = ccostsave_tot / nunits_meas_tot
-                        # Per unit measure energy costs
-                        ecost_meas_unit[yr] = (
-                            markets_uc["cost"]["energy"]["total"][
-                                "baseline"][yr] / nunits_tot) - \
-                            ecostsave_unit[yr]
-                        # Per unit measure carbon costs
-                        ccost_meas_unit[yr] = (
-                            markets_uc["cost"]["carbon"]["total"][
-                                "baseline"][yr] / nunits_tot) - \
-                            ccostsave_unit[yr]
-                    # Set the lifetime of the baseline technology for
-                    # comparison with measure lifetime
-                    life_base = markets_uc["lifetime"]["baseline"][yr]
-                    # Ensure that baseline lifetime is at least 1 year
-                    if type(life_base) == numpy.ndarray and any(life_base) < 1:
-                        life_base[numpy.where(life_base) < 1] = 1
-                    elif type(life_base) != numpy.ndarray and life_base < 1:
-                        life_base = 1
-                    # Set lifetime of the measure
-                    life_meas = markets_uc["lifetime"]["measure"]
-                    # Ensure that measure lifetime is at least 1 year
-                    if type(life_meas) == numpy.ndarray and any(life_meas) < 1:
-                        life_meas[numpy.where(life_meas) < 1] = 1
-                    elif type(life_meas) != numpy.ndarray and life_meas < 1:
-                        life_meas = 1
-
-                    # Calculate measure financial metrics
-
-                    # If the total baseline stock is zero or no measure units
-                    # have been captured for a given year, set finance metrics
-                    # to 999
-                    if nunits_tot == 0 or (
-                        type(nunits_meas_tot) != numpy.ndarray and
-                        nunits_meas_tot < 1 or
-                            type(nunits_meas_tot) == numpy.ndarray and all(
-                                nunits_meas_tot) < 1):
-                        if yr == self.handyvars.aeo_years[0]:
-                            stock_unit_cost_res[yr], \
-                                energy_unit_cost_res[yr], \
-                                carb_unit_cost_res[yr], \
-                                stock_unit_cost_com[yr], \
-                                energy_unit_cost_com[yr], \
-                                carb_unit_cost_com[yr], \
-                                irr_e[yr], irr_ec[yr], payback_e[yr], \
-                                payback_ec[yr], cce[yr], cce_bens[yr], \
-                                ccc[yr], ccc_bens[yr] = [
-                                    None for n in range(6)] + [
-                                    999 for n in range(8)]
-                        else:
-                            yr_prev = str(int(yr) - 1)
-                            stock_unit_cost_res[yr], \
-                                energy_unit_cost_res[yr], \
-                                carb_unit_cost_res[yr], \
-                                stock_unit_cost_com[yr], \
-                                energy_unit_cost_com[yr], \
-                                carb_unit_cost_com[yr], \
-                                irr_e[yr], irr_ec[yr], \
-                                payback_e[yr], payback_ec[yr], \
-                                cce[yr], cce_bens[yr], \
-                                ccc[yr], ccc_bens[yr] = [x[yr_prev] for x in [
-                                    stock_unit_cost_res, energy_unit_cost_res,
-                                    carb_unit_cost_res, stock_unit_cost_com,
-                                    energy_unit_cost_com, carb_unit_cost_com,
-                                    irr_e, irr_ec, payback_e, payback_ec, cce,
-                                    cce_bens, ccc, ccc_bens]]
-                    # Otherwise, check whether any financial metric calculation
-                    # inputs that can be arrays are in fact arrays
-                    elif any(type(x) == numpy.ndarray for x in [
-                            scostmeas_delt_unit[yr], esave_unit[yr],
-                            life_meas]):
-                        # Make copies of the above stock, energy/carbon/cost
-                        # variables for possible further manipulation below
-                        # before using as inputs to "metric update" function
-                        scostmeas_delt_unit_tmp, esave_tmp_unit, \
-                            ecostsave_tmp_unit, csave_tmp_unit, \
-                            ccostsave_tmp_unit, life_meas_tmp, \
-                            scost_meas_tmp, ecost_meas_tmp, ccost_meas_tmp = [
-                                scostmeas_delt_unit[yr], esave_unit[yr],
-                                ecostsave_unit[yr], csave_unit[yr],
-                                ccostsave_unit[yr], life_meas,
-                                scostmeas_unit[yr],
-                                ecost_meas_unit[yr],
-                                ccost_meas_unit[yr]]
-
-                        # Ensure consistency in length of all "metric_update"
-                        # inputs that can be arrays
-
-                        # Determine the length that any array inputs to
-                        # "metric_update" should consistently have
-                        len_arr = next((len(item) for item in [
+    def calc_financial_metrics(self, measures):
+        """Calculate measure financial metrics across all projection years.
+
+        Notes:
+            Per unit capital costs and energy/carbon/cost savings are found
+            for each measure and year (and for each sampled value of any
+            uncertain inputs); the financial metrics for all of these inputs
+            are then calculated at once (see 'metric_update_batch').
+
+        Args:
+            measures (list): Measures requiring financial metrics updates.
+        """
+        # Initialize inputs to the financial metrics calculations, one row
+        # of inputs per measure, year, and sampled value of any uncertain
+        # inputs (in the order of the 'metric_update' function arguments)
+        row_inputs = [[] for n in range(12)]
+
+        # Queue a row of inputs for the financial metrics calculations and
+        # return its position
+        def add_row(*args):
+            for x, arg in zip(row_inputs, args):
+                x.append(arg)
+            return len(row_inputs[0]) - 1
+
+        # Rows of inputs for each measure and year (None for years in which
+        # the financial metrics of the previous year apply)
+        meas_rows = []
+        for m in measures:
+            # Shorthand for data used to determine financial metrics (since
+            # these data do not vary based on competition or adoption
+            # scheme, use only uncompeted data for the calculations)
+            markets_uc = m.markets[self.handyvars.adopt_schemes[0]][
+                "uncompeted"]["master_mseg"]
+
+            # Initialize per unit measure stock, energy, and carbon costs;
+            # per unit energy and carbon cost savings; per unit energy and
+            # carbon savings; and rows of inputs for each year
+            scostbase_unit, scostmeas_delt_unit, scostmeas_unit, \
+                ecost_meas_unit, ccost_meas_unit, \
+                ecostsave_unit, ccostsave_unit, esave_unit, \
+                csave_unit, yr_rows = ({
+                    yr: None for yr in self.handyvars.aeo_years} for
+                    n in range(10))
+
+            # Calculate per unit stock costs, energy and carbon savings,
+            # and energy and carbon cost savings for each projection year;
+            # base calculations on competed stock in each year
+            for yr in self.handyvars.aeo_years:
+
+                # Baseline capital cost
+                stock_base_cost_tot = \
+                    markets_uc["cost"]["stock"]["total"]["baseline"][yr]
+                # Measure capital cost
+                stock_meas_cost_tot = markets_uc["cost"]["stock"][
+                    "total"]["efficient"][yr]
+                # Energy savings
+                esave_tot = \
+                    markets_uc["energy"]["total"]["baseline"][yr] - \
+                    markets_uc["energy"]["total"]["efficient"][yr]
+                # Carbon savings
+                csave_tot = \
+                    markets_uc["carbon"]["total"]["baseline"][yr] - \
+                    markets_uc["carbon"]["total"]["efficient"][yr]
+                # Energy cost savings
+                ecostsave_tot = markets_uc["cost"]["energy"]["total"][
+                    "baseline"][yr] - markets_uc["cost"]["energy"][
+                    "total"]["efficient"][yr]
+                # Carbon cost savings
+                ccostsave_tot = markets_uc["cost"]["carbon"]["total"][
+                    "baseline"][yr] - markets_uc["cost"]["carbon"][
+                    "total"]["efficient"][yr]
+                # Number of applicable baseline stock units
+                nunits_tot = \
+                    markets_uc["stock"]["total"]["all"][yr]
+                # Number of applicable stock units capt. by measure
+                nunits_meas_tot = \
+                    markets_uc["stock"]["total"]["measure"][yr]
+
+                # Calculate per unit baseline capital cost and incremental
+                # measure capital cost (used in financial metrics
+                # calculations below); set these values to zero for
+                # years in which total number of base/meas units is zero
+                if nunits_tot != 0 and (
+                    type(nunits_meas_tot) != numpy.ndarray and
+                    nunits_meas_tot >= 1 or
+                        type(nunits_meas_tot) == numpy.ndarray and all(
+                            nunits_meas_tot) >= 1):
+                    # Per unit baseline capital cost; note that these costs
+                    # are aggregated as a baseline counterfactual for all
+                    # units captured by the measure and therefore must be
+                    # normalized by the number of measure-captured units
+                    scostbase_unit[yr] = \
+                        stock_base_cost_tot / nunits_meas_tot
+                    # Per unit measure total capital cost
+                    scostmeas_unit[yr] = \
+                        stock_meas_cost_tot / nunits_meas_tot
+                    # Per unit measure incremental capital cost
+                    scostmeas_delt_unit[yr] = (
+                        scostbase_unit[yr] - scostmeas_unit[yr])
+                    # Per unit measure energy savings
+                    esave_unit[yr] = esave_tot / nunits_meas_tot
+                    # Per unit measure carbon savings
+                    csave_unit[yr] = csave_tot / nunits_meas_tot
+                    # Per unit measure energy cost savings
+                    ecostsave_unit[yr] = ecostsave_tot / nunits_meas_tot
+                    # Per unit measure carbon cost savings
+                    ccostsave_unit[yr] = ccostsave_tot / nunits_meas_tot
+                    # Per unit measure energy costs
+                    ecost_meas_unit[yr] = (
+                        markets_uc["cost"]["energy"]["total"][
+                            "baseline"][yr] / nunits_tot) - \
+                        ecostsave_unit[yr]
+                    # Per unit measure carbon costs
+                    ccost_meas_unit[yr] = (
+                        markets_uc["cost"]["carbon"]["total"][
+                            "baseline"][yr] / nunits_tot) - \
+                        ccostsave_unit[yr]
+                # Set the lifetime of the baseline technology for
+                # comparison with measure lifetime
+                life_base = markets_uc["lifetime"]["baseline"][yr]
+                # Ensure that baseline lifetime is at least 1 year
+                if type(life_base) == numpy.ndarray and any(life_base) < 1:
+                    life_base[numpy.where(life_base) < 1] = 1
+                elif type(life_base) != numpy.ndarray and life_base < 1:
+                    life_base = 1
+                # Set lifetime of the measure
+                life_meas = markets_uc["lifetime"]["measure"]
+                # Ensure that measure lifetime is at least 1 year
+                if type(life_meas) == numpy.ndarray and any(life_meas) < 1:
+                    life_meas[numpy.where(life_meas) < 1] = 1
+                elif type(life_meas) != numpy.ndarray and life_meas < 1:
+                    life_meas = 1
+
+                # Queue the inputs to the measure financial metrics
+
+                # If the total baseline stock is zero or no measure units
+                # have been captured for a given year, set finance metrics
+                # to those of the previous year (or to 999 in the first year)
+                if nunits_tot == 0 or (
+                    type(nunits_meas_tot) != numpy.ndarray and
+                    nunits_meas_tot < 1 or
+                        type(nunits_meas_tot) == numpy.ndarray and all(
+                            nunits_meas_tot) < 1):
+                    yr_rows[yr] = None
+                # Otherwise, check whether any financial metric calculation
+                # inputs that can be arrays are in fact arrays
+                elif any(type(x) == numpy.ndarray for x in [
+                        scostmeas_delt_unit[yr], esave_unit[yr],
+                        life_meas]):
+                    # Make copies of the above stock, energy/carbon/cost
+                    # variables for possible further manipulation below
+                    # before using as inputs to "metric update" function
+                    scostmeas_delt_unit_tmp, esave_tmp_unit, \
+                        ecostsave_tmp_unit, csave_tmp_unit, \
+                        ccostsave_tmp_unit, life_meas_tmp, \
+                        scost_meas_tmp, ecost_meas_tmp, ccost_meas_tmp = [
                             scostmeas_delt_unit[yr], esave_unit[yr],
-                            life_meas] if type(item) == numpy.ndarray), None)
-
-                        # Ensure all array inputs to "metric_update" are of the
-                        # above length
-
-                        # Check capital cost inputs
-                        if type(scostmeas_delt_unit_tmp) != numpy.ndarray:
-                            scostmeas_delt_unit_tmp = numpy.repeat(
-                                scostmeas_delt_unit_tmp, len_arr)
-                            scost_meas_tmp = numpy.repeat(
-                                scost_meas_tmp, len_arr)
-                        # Check energy/energy cost and carbon/cost savings
-                        # inputs
-                        if type(esave_tmp_unit) != numpy.ndarray:
-                            esave_tmp_unit = numpy.repeat(
-                                esave_tmp_unit, len_arr)
-                            ecostsave_tmp_unit = \
-                                numpy.repeat(ecostsave_tmp_unit, len_arr)
-                            csave_tmp_unit = numpy.repeat(
-                                csave_tmp_unit, len_arr)
-                            ccostsave_tmp_unit = \
-                                numpy.repeat(ccostsave_tmp_unit, len_arr)
-                            ecost_meas_tmp = numpy.repeat(
-                                ecost_meas_tmp, len_arr)
-                            ccost_meas_tmp = numpy.repeat(
-                                ccost_meas_tmp, len_arr)
-                        # Check measure lifetime input
-                        if type(life_meas_tmp) != numpy.ndarray:
-                            life_meas_tmp = numpy.repeat(
-                                life_meas_tmp, len_arr)
-
-                        # Initialize numpy arrays for financial metrics outputs
-                        stock_unit_cost_res[yr], energy_unit_cost_res[yr], \
-                            carb_unit_cost_res[yr], stock_unit_cost_com[yr], \
-                            energy_unit_cost_com[yr], carb_unit_cost_com[yr], \
-                            irr_e[yr], irr_ec[yr], payback_e[yr], \
-                            payback_ec[yr], cce[yr], cce_bens[yr], ccc[yr], \
-                            ccc_bens[yr] = (numpy.repeat(None, len(
-                                scostmeas_delt_unit_tmp)) for v in range(14))
-
-                        # Run measure energy/carbon/cost savings and lifetime
-                        # inputs through "metric_update" function to yield
-                        # financial metric outputs. To handle inputs that are
-                        # arrays, use a for loop to generate an output for each
-                        # input array element one-by-one and append it to the
-                        # appropriate output list. Note that lifetime float
-                        # values are translated to integers, and all
-                        # energy, carbon, and energy/carbon cost savings values
-                        # are normalized by total applicable stock units
-                        for x in range(0, len(scostmeas_delt_unit_tmp)):
-                            stock_unit_cost_res[yr][x], \
-                                energy_unit_cost_res[yr][x], \
-                                carb_unit_cost_res[yr][x], \
-                                stock_unit_cost_com[yr][x], \
-                                energy_unit_cost_com[yr][x], \
-                                carb_unit_cost_com[yr][x], \
-                                irr_e[yr][x], irr_ec[yr][x], \
-                                payback_e[yr][x], payback_ec[yr][x], \
-                                cce[yr][x], cce_bens[yr][x], ccc[yr][x], \
-                                ccc_bens[yr][x] = self.metric_update(
-                                    m, int(round(life_base)),
-                                    int(round(life_meas_tmp[x])),
-                                    scostbase_unit[yr],
-                                    scostmeas_delt_unit_tmp[x],
-                                    esave_tmp_unit[x], ecostsave_tmp_unit[x],
-                                    csave_tmp_unit[x], ccostsave_tmp_unit[x],
-                                    scost_meas_tmp[x], ecost_meas_tmp[x],
-                                    ccost_meas_tmp[x])
+                            ecostsave_unit[yr], csave_unit[yr],
+                            ccostsave_unit[yr], life_meas,
+                            scostmeas_unit[yr],
+                            ecost_meas_unit[yr],
+                            ccost_meas_unit[yr]]
+
+                    # Ensure consistency in length of all "metric_update"
+                    # inputs that can be arrays
+
+                    # Determine the length that any array inputs to
+                    # "metric_update" should consistently have
+                    len_arr = next((len(item) for item in [
+                        scostmeas_delt_unit[yr], esave_unit[yr],
+                        life_meas] if type(item) == numpy.ndarray), None)
+
+                    # Ensure all array inputs to "metric_update" are of the
+                    # above length
+
+                    # Check capital cost inputs
+                    if type(scostmeas_delt_unit_tmp) != numpy.ndarray:
+                        scostmeas_delt_unit_tmp = numpy.repeat(
+                            scostmeas_delt_unit_tmp, len_arr)
+                        scost_meas_tmp = numpy.repeat(
+                            scost_meas_tmp, len_arr)
+                    # Check energy/energy cost and carbon/cost savings
+                    # inputs
+                    if type(esave_tmp_unit) != numpy.ndarray:
+                        esave_tmp_unit = numpy.repeat(
+                            esave_tmp_unit, len_arr)
+                        ecostsave_tmp_unit = \
+                            numpy.repeat(ecostsave_tmp_unit, len_arr)
+                        csave_tmp_unit = numpy.repeat(
+                            csave_tmp_unit, len_arr)
+                        ccostsave_tmp_unit = \
+                            numpy.repeat(ccostsave_tmp_unit, len_arr)
+                        ecost_meas_tmp = numpy.repeat(
+                            ecost_meas_tmp, len_arr)
+                        ccost_meas_tmp = numpy.repeat(
+                            ccost_meas_tmp, len_arr)
+                    # Check measure lifetime input
+                    if type(life_meas_tmp) != numpy.ndarray:
+                        life_meas_tmp = numpy.repeat(
+                            life_meas_tmp, len_arr)
+
+                    # Queue a row of inputs for each array input element;
+                    # note that lifetime float values are translated to
+                    # integers
+                    yr_rows[yr] = [add_row(
+                        m, int(round(life_base)),
+                        int(round(life_meas_tmp[x])),
+                        scostbase_unit[yr], scostmeas_delt_unit_tmp[x],
+                        esave_tmp_unit[x], ecostsave_tmp_unit[x],
+                        csave_tmp_unit[x], ccostsave_tmp_unit[x],
+                        scost_meas_tmp[x], ecost_meas_tmp[x],
+                        ccost_meas_tmp[x]) for x in range(
+                            0, len(scostmeas_delt_unit_tmp))]
+                else:
+                    # Queue a single row of inputs; note that lifetime float
+                    # values are translated to integers
+                    yr_rows[yr] = add_row(
+                        m, int(round(life_base)), int(round(life_meas)),
+                        scostbase_unit[yr], scostmeas_delt_unit[yr],
+                        esave_unit[yr], ecostsave_unit[yr], csave_unit[yr],
+                        ccostsave_unit[yr], scostmeas_unit[yr],
+                        ecost_meas_unit[yr], ccost_meas_unit[yr])
+            meas_rows.append(yr_rows)
+
+        # Calculate financial metrics for all rows of inputs at once
+        row_metrics = self.metric_update_batch(*row_inputs)
+
+        # Record the financial metrics of each measure and year
+        for m, yr_rows in zip(measures, meas_rows):
+            # Initialize unit stock, energy, and carbon costs to use in
+            # residential and commercial competition calculations and
+            # financial metrics (irr, payback, cce, ccc), in the order of
+            # the 'metric_update' function outputs
+            metrics = stock_unit_cost_res, energy_unit_cost_res, \
+                carb_unit_cost_res, stock_unit_cost_com, \
+                energy_unit_cost_com, carb_unit_cost_com, irr_e, irr_ec, \
+                payback_e, payback_ec, cce, cce_bens, ccc, ccc_bens = [{
+                    yr: None for yr in self.handyvars.aeo_years} for
+                    n in range(14)]
+            for yr in self.handyvars.aeo_years:
+                # Set finance metrics for years without captured measure
+                # units to 999 in the first year and to those of the previous
+                # year thereafter
+                if yr_rows[yr] is None:
+                    if yr == self.handyvars.aeo_years[0]:
+                        vals = [None for n in range(6)] + [
+                            999 for n in range(8)]
                     else:
-                        # Run measure energy/carbon/cost savings and lifetime
-                        # inputs through "metric_update" function to yield
-                        # financial metric outputs. Note that lifetime float
-                        # values are translated to integers, and all
-                        # energy, carbon, and energy/carbon cost savings values
-                        # are normalized by total applicable stock units
-                        stock_unit_cost_res[yr], energy_unit_cost_res[yr], \
-                            carb_unit_cost_res[yr], stock_unit_cost_com[yr], \
-                            energy_unit_cost_com[yr], carb_unit_cost_com[yr], \
-                            irr_e[yr], irr_ec[yr], payback_e[yr], \
-                            payback_ec[yr], cce[yr], cce_bens[yr], ccc[yr], \
-                            ccc_bens[yr] = \
-                            self.metric_update(
-                                m, int(round(life_base)),
-                                int(round(life_meas)), scostbase_unit[yr],
-                                scostmeas_delt_unit[yr], esave_unit[yr],
-                                ecostsave_unit[yr], csave_unit[yr],
-                                ccostsave_unit[yr],
-                                scostmeas_unit[yr],
-                                ecost_meas_unit[yr],
-                                ccost_meas_unit[yr])
-
-                # Set measure financial metrics dict to update (across years)
-                metrics_finance = m.financial_metrics
-                # Update unit capital and operating costs
-                metrics_finance["unit cost"]["stock cost"]["residential"], \
-                    metrics_finance["unit cost"]["stock cost"][
-                    "commercial"] = [stock_unit_cost_res, stock_unit_cost_com]
-                metrics_finance["unit cost"]["energy cost"]["residential"], \
-                    metrics_finance["unit cost"]["energy cost"][
-                    "commercial"] = [energy_unit_cost_res,
-                                     energy_unit_cost_com]
-                metrics_finance["unit cost"]["carbon cost"]["residential"], \
-                    metrics_finance["unit cost"]["carbon cost"][
-                    "commercial"] = [carb_unit_cost_res, carb_unit_cost_com]
-                # Update internal rate of return
-                metrics_finance["irr (w/ energy costs)"] = irr_e
-                metrics_finance["irr (w/ energy and carbon costs)"] = irr_ec
-                # Update payback period
-                metrics_finance["payback (w/ energy costs)"] = payback_e
-                metrics_finance["payback (w/ energy and carbon costs)"] = \
-                    payback_ec
-                # Update cost of conserved energy
-                metrics_finance["cce"] = cce
-                metrics_finance["cce (w/ carbon cost benefits)"] = cce_bens
-                # Update cost of conserved carbon
-                metrics_finance["ccc"] = ccc
-                metrics_finance["ccc (w/ energy cost benefits)"] = ccc_bens
-
-                # Set measure consumer-level metrics to finalized status
-                m.update_results["financial metrics"] = False
+                        yr_prev = str(int(yr) - 1)
+                        vals = [x[yr_prev] for x in metrics]
+                # Collect finance metrics for array inputs in arrays
+                elif isinstance(yr_rows[yr], list):
+                    vals = [numpy.repeat(None, len(yr_rows[yr])) for
+                            v in range(14)]
+                    for x, row in enumerate(yr_rows[yr]):
+                        for v in range(14):
+                            vals[v][x] = row_metrics[row][v]
+                else:
+                    vals = row_metrics[yr_rows[yr]]
+                for x, val in zip(metrics, vals):
+                    x[yr] = val
+
+            # Set measure financial metrics dict to update (across years)
+            metrics_finance = m.financial_metrics
+            # Update unit capital and operating costs
+            metrics_finance["unit cost"]["stock cost"]["residential"], \
+                metrics_finance["unit cost"]["stock cost"][
+                "commercial"] = [stock_unit_cost_res, stock_unit_cost_com]
+            metrics_finance["unit cost"]["energy cost"]["residential"], \
+                metrics_finance["unit cost"]["energy cost"][
+                "commercial"] = [energy_unit_cost_res,
+                                 energy_unit_cost_com]
+            metrics_finance["unit cost"]["carbon cost"]["residential"], \
+                metrics_finance["unit cost"]["carbon cost"][
+                "commercial"] = [carb_unit_cost_res, carb_unit_cost_com]
+            # Update internal rate of return
+            metrics_finance["irr (w/ energy costs)"] = irr_e
+            metrics_finance["irr (w/ energy and carbon costs)"] = irr_ec
+            # Update payback period
+            metrics_finance["payback (w/ energy costs)"] = payback_e
+            metrics_finance["payback (w/ energy and carbon costs)"] = \
+                payback_ec
+            # Update cost of conserved energy
+            metrics_finance["cce"] = cce
+            metrics_finance["cce (w/ carbon cost benefits)"] = cce_bens
+            # Update cost of conserved carbon
+            metrics_finance["ccc"] = ccc
+            metrics_finance["ccc (w/ energy cost benefits)"] = ccc_bens
+
+            # Set measure consumer-level metrics to finalized status
+            m.update_results["financial metrics"] = False
 
     def metric_update(self, m, life_base, life_meas, scost_base,
                       scost_meas_delt, esave, ecostsave, csave, ccostsave,
@@ -834,7 +823,11 @@ class Engine(object):
             conserved energy/carbon from cash flows and energy/carbon
             savings across the measure lifetime. In the cash flows, represent
             the benefits of longer lifetimes for lighting equipment ECMs over
-            comparable baseline technologies.
+            comparable baseline technologies. 'metric_update_batch' calls
+            this function for rows with sampled baseline capital costs,
+            whose avoided baseline capital cost cash flows hold more than one
+            value per year and cannot be stacked with other rows; the batch
+            outputs are tested against this function's outputs.
 
         Args:
             m (object): Measure object.
@@ -1046,7 +1039,11 @@ class Engine(object):
 
         Notes:
             Calculate the simple payback period given an input list of
-            cash flows, which may be uneven.
+            cash flows, which may be uneven. 'payback_batch' calls this
+            function for cash flows with zero payback year flows or non-finite
+            values, for which the exceptions raised or values returned here
+            are kept as is; the batch outputs are tested against this
+            function's outputs.
 
         Args:
             cashflows (list): Cash flows across measure lifetime.
@@ -1096,7 +1093,357 @@ class Engine(object):
         # Return updated payback period value in years
         return payback_val
 
-    def compete_measures(self, adopt_scheme, htcl_totals):
+    def metric_update_batch(
+            self, meas, life_base, life_meas, scost_base, scost_meas_delt,
+            esave, ecostsave, csave, ccostsave, scost_meas, ecost_meas,
+            ccost_meas):
+        """Calculate measure financial metrics for many sets of inputs.
+
+        Notes:
+            Each argument lists one value per row of inputs, where a row
+            corresponds to a given measure, year, and (for uncertain inputs)
+            sampled input value; the outputs for each row are those of the
+            'metric_update' function given the same inputs. Rows with the
+            same measure lifetime have cash flows of the same length, and the
+            cash flows, net present values, internal rates of return, and
+            paybacks for all such rows are calculated at once, as arrays of
+            rows by years of measure life.
+
+        Args:
+            meas (list): Measure object for each row.
+            life_base (list): Baseline technology lifetime for each row.
+            life_meas (list): Measure lifetime for each row.
+            scost_base (list): Per unit baseline capital cost for each row.
+            scost_meas_delt (list): Per unit incremental capital cost for
+                each row.
+            esave (list): Per unit annual energy savings for each row.
+            ecostsave (list): Per unit annual energy cost savings for
+                each row.
+            csave (list): Per unit annual avoided carbon emissions for
+                each row.
+            ccostsave (list): Per unit annual carbon cost savings for
+                each row.
+            scost_meas (list): Per unit measure capital cost for each row.
+            ecost_meas (list): Per unit measure energy cost for each row.
+            ccost_meas (list): Per unit measure carbon cost for each row.
+
+        Returns:
+            List with a tuple of consumer and portfolio-level financial
+            metrics for each row, ordered as the 'metric_update' outputs.
+        """
+        outputs = [None for n in range(len(meas))]
+        # Rows with sampled baseline capital costs yield avoided baseline
+        # capital cost cash flows with more than one value per year of
+        # measure life; calculate the metrics for these rows one at a time
+        batch_rows = []
+        for x in range(len(meas)):
+            if isinstance(scost_base[x], numpy.ndarray):
+                outputs[x] = self.metric_update(
+                    meas[x], life_base[x], life_meas[x], scost_base[x],
+                    scost_meas_delt[x], esave[x], ecostsave[x], csave[x],
+                    ccostsave[x], scost_meas[x], ecost_meas[x],
+                    ccost_meas[x])
+            else:
+                batch_rows.append(x)
+        if len(batch_rows) == 0:
+            return outputs
+
+        # Determine which measures apply to the residential and commercial
+        # sectors, and which represent the benefits of longer lifetimes
+        # for lighting equipment over comparable baseline technologies
+        meas_flags, light_flags = {}, {}
+        for m in [meas[x] for x in batch_rows]:
+            if m.name not in meas_flags:
+                meas_flags[m.name] = [
+                    any([x in ["single family home", "multi family home",
+                               "mobile home"] for x in m.bldg_type]),
+                    any([x not in ["single family home", "multi family home",
+                                   "mobile home"] for x in m.bldg_type])]
+        res, com = [numpy.array([
+            meas_flags[meas[x].name][n] for x in batch_rows]) for n in
+            range(2)]
+        # Set lifetimes, and flag rows that gain avoided purchases of the
+        # baseline lighting technology over the measure lifetime (measure
+        # attributes are only checked for rows with a longer measure than
+        # baseline lifetime, as in 'metric_update')
+        life_b, life_m = [numpy.array(
+            [y[x] for x in batch_rows], dtype=int) for y in [
+            life_base, life_meas]]
+        light = numpy.zeros(len(batch_rows), dtype=bool)
+        for ind in numpy.nonzero(life_m > life_b)[0]:
+            m = meas[batch_rows[ind]]
+            if m.name not in light_flags:
+                light_flags[m.name] = ("lighting" in m.end_use[
+                    "primary"]) and (m.measure_type == "full service") and (
+                        m.technology_type["primary"] == "supply")
+            light[ind] = light_flags[m.name]
+        # If the measure lifetime is less than 1 year, set it to 1 year
+        # (a minimum for measure lifetime to work in below calculations)
+        life_m = numpy.maximum(life_m, 1)
+        # Set remaining inputs as arrays across rows
+        scost_base, scost_meas_delt, esave, ecostsave, csave, ccostsave, \
+            scost_meas_f, ecost_meas_f, ccost_meas_f = [numpy.array(
+                [y[x] for x in batch_rows], dtype=float) for y in [
+                scost_base, scost_meas_delt, esave, ecostsave, csave,
+                ccostsave, scost_meas, ecost_meas, ccost_meas]]
+
+        # Calculate metrics for all rows with the same measure lifetime
+        for life in numpy.unique(life_m):
+            inds = numpy.flatnonzero(life_m == life)
+            # Years of measure life; the first year is reserved for the
+            # initial investment
+            yrs = numpy.arange(0, life + 1)
+
+            # Construct incremental and total capital cost cash flows across
+            # measure life, starting with the upfront incremental and total
+            # capital cost, and adding avoided capital costs of the baseline
+            # technology as appropriate (e.g., for an LED lighting measure
+            # with a longer lifetime than the comparable baseline lighting
+            # technology); avoided costs are realized in each year of measure
+            # life that ends a baseline technology lifetime
+            gain_yrs = light[inds, None] & (yrs >= 1) & (yrs < life) & (
+                yrs % numpy.maximum(life_b[inds, None], 1) == 0)
+            scost_life = numpy.where(
+                gain_yrs, scost_base[inds, None], 0.0)
+            cashflows_s_delt, cashflows_s_tot = [numpy.concatenate(
+                [x[inds, None], scost_life[:, 1:]], axis=1) for x in [
+                scost_meas_delt, scost_meas_f]]
+            # Construct complete incremental and total energy and carbon
+            # cash flows, and energy and carbon savings, across measure
+            # lifetime. First term (reserved for initial investment) is zero
+            cashflows_e_delt, cashflows_c_delt, cashflows_e_tot, \
+                cashflows_c_tot, esave_array, csave_array = [numpy.where(
+                    yrs == 0, 0.0, x[inds, None]) for x in [
+                    ecostsave, ccostsave, ecost_meas_f, ccost_meas_f, esave,
+                    csave]]
+
+            # Calculate net present values (NPVs) using the above cashflows
+            # and savings
+            disc = (1 + self.handyvars.discount_rate) ** yrs
+            npv_s_delt, npv_e_delt, npv_c_delt, npv_esave, npv_csave = [
+                (x / disc).sum(axis=1) for x in [
+                    cashflows_s_delt, cashflows_e_delt, cashflows_c_delt,
+                    esave_array, csave_array]]
+
+            # Calculate cost of conserved energy w/ and w/o carbon cost
+            # savings benefits and cost of conserved carbon w/ and w/o energy
+            # cost savings benefits. Restrict denominator values less than or
+            # equal to zero
+            cce, cce_bens, ccc, ccc_bens = [numpy.divide(
+                x, y, out=numpy.zeros(len(inds)), where=(z > 0)) for
+                x, y, z in [
+                    (-npv_s_delt, npv_esave, npv_esave),
+                    (-(npv_s_delt + npv_c_delt), npv_esave, npv_esave),
+                    (-npv_s_delt, npv_csave * 1000000, npv_csave),
+                    (-(npv_s_delt + npv_e_delt), npv_csave * 1000000,
+                     npv_csave)]]
+
+            # Calculate internal rate of return and simple payback for
+            # capital + energy and capital + energy + carbon cash flows
+            cashflows_se = cashflows_s_delt + cashflows_e_delt
+            cashflows_sec = cashflows_se + cashflows_c_delt
+            irr_e, irr_ec = [self.irr_batch(x) for x in [
+                cashflows_se, cashflows_sec]]
+            payback_e, payback_ec = [self.payback_batch(x) for x in [
+                cashflows_se, cashflows_sec]]
+
+            # Translate unit capital and operating costs to life cycle costs
+            # across the measure lifetime using multiple discount rate
+            # levels for commercial sector measures (see 'metric_update')
+            unit_costs_com = []
+            for tps in self.handyvars.com_timeprefs["rates"]:
+                disc_tps = (1 + tps) ** yrs
+                unit_costs_com.append([(x / disc_tps).sum(axis=1) for x in [
+                    cashflows_s_tot, cashflows_e_tot, cashflows_c_tot]])
+            com_ok = numpy.all([numpy.isfinite(x) for rate_costs in
+                                unit_costs_com for x in rate_costs], axis=0)
+
+            # Record the metrics for each row
+            for n, ind in enumerate(inds):
+                x = batch_rows[ind]
+                # Populate unit costs for residential sector
+                if res[ind]:
+                    unit_cost_s_res, unit_cost_e_res, unit_cost_c_res = [
+                        scost_meas[x], ecost_meas[x], ccost_meas[x]]
+                else:
+                    unit_cost_s_res, unit_cost_e_res, unit_cost_c_res = (
+                        None for n in range(3))
+                # Populate unit costs for commercial sector under each
+                # discount rate category
+                if com[ind] and com_ok[n]:
+                    unit_cost_s_com, unit_cost_e_com, unit_cost_c_com = [{
+                        "rate " + str(r + 1): unit_costs_com[r][v][n] for
+                        r in range(len(unit_costs_com))} for v in range(3)]
+                else:
+                    unit_cost_s_com, unit_cost_e_com, unit_cost_c_com = (
+                        None for n in range(3))
+                outputs[x] = (
+                    unit_cost_s_res, unit_cost_e_res, unit_cost_c_res,
+                    unit_cost_s_com, unit_cost_e_com, unit_cost_c_com,
+                    irr_e[n], irr_ec[n], payback_e[n], payback_ec[n],
+                    cce[n] if npv_esave[n] > 0 else 999,
+                    cce_bens[n] if npv_esave[n] > 0 else 999,
+                    ccc[n] if npv_csave[n] > 0 else 999,
+                    ccc_bens[n] if npv_csave[n] > 0 else 999)
+
+        return outputs
+
+    def irr_batch(self, cashflows):
+        """Calculate internal rates of return for many sets of cash flows.
+
+        Notes:
+            The 'irr' function of numpy_financial finds the roots of the
+            polynomial in 1 / (1 + rate) with the cash flows as coefficients,
+            and returns the rate that is closest to zero among all real
+            positive roots. When the nonzero cash flows change sign exactly
+            once, there is a single such root, which is found here for all
+            cash flows at once by bisection; when they never change sign,
+            there is no such root. All other cash flows are passed to the
+            numpy_financial 'irr' function one set at a time.
+
+        Args:
+            cashflows (numpy.ndarray): Cash flows (rows) across measure
+                lifetime (columns).
+
+        Returns:
+            List of internal rates of return, with 999 for cash flows that
+            do not yield a finite rate (as in 'metric_update').
+        """
+        n_rows, n_yrs = cashflows.shape
+        irr = numpy.full(n_rows, numpy.nan)
+        yrs = numpy.arange(0, n_yrs)
+        # Find sign changes between each nonzero cash flow and the previous
+        # nonzero cash flow
+        nonzero = (cashflows != 0)
+        last_nonzero = numpy.maximum.accumulate(
+            numpy.where(nonzero, yrs, -1), axis=1)
+        prev_nonzero = numpy.concatenate([
+            numpy.full((n_rows, 1), -1), last_nonzero[:, :-1]], axis=1)
+        sign_change = nonzero & (prev_nonzero >= 0) & (
+            numpy.sign(cashflows) != numpy.take_along_axis(numpy.sign(
+                cashflows), numpy.maximum(prev_nonzero, 0), axis=1))
+        n_changes = sign_change.sum(axis=1)
+        single = numpy.flatnonzero((n_changes == 1) & numpy.all(
+            numpy.isfinite(cashflows), axis=1))
+
+        if len(single) > 0:
+            cf = cashflows[single]
+            # For a single sign change in year j, the polynomial divided by
+            # x ** j (with x = 1 / (1 + rate)) is strictly monotonic in x;
+            # bisect on log(x), within bounds on the positive roots
+            pwr = yrs - numpy.argmax(sign_change[single], axis=1)[:, None]
+            cf_max = numpy.abs(cf).max(axis=1)
+            first, last = [numpy.abs(numpy.take_along_axis(
+                cf, x[:, None], axis=1)[:, 0]) for x in [
+                numpy.argmax(nonzero[single], axis=1),
+                last_nonzero[single, -1]]]
+            with numpy.errstate(all="ignore"):
+                # Evaluate the sign of the polynomial divided by x ** j
+                def poly_sign(log_x):
+                    return numpy.sign(numpy.where(
+                        nonzero[single], cf * numpy.exp(
+                            pwr * log_x[:, None]), 0).sum(axis=1))
+                lo, hi = [numpy.clip(x, -700, 700) for x in [
+                    -numpy.log1p(cf_max / first),
+                    numpy.log1p(cf_max / last)]]
+                sign_lo, sign_hi = poly_sign(lo), poly_sign(hi)
+                bracket = (sign_lo * sign_hi < 0)
+                for n in range(200):
+                    mid = (lo + hi) / 2
+                    sign_mid = poly_sign(mid)
+                    lo_mid = (sign_mid == sign_lo)
+                    lo, hi = numpy.where(lo_mid, mid, lo), numpy.where(
+                        lo_mid, hi, mid)
+                    if numpy.all(hi - lo <= 2 * numpy.finfo(float).eps *
+                                 numpy.maximum(1, numpy.abs(mid))):
+                        break
+                rate = 1 / numpy.exp((lo + hi) / 2) - 1
+            irr[single[bracket]] = rate[bracket]
+            # Cash flows with a root beyond the bounds of the bisection are
+            # passed to the numpy_financial 'irr' function
+            single = single[bracket]
+
+        # Find the rates for all other cash flows with sign changes one set
+        # at a time
+        for x in numpy.flatnonzero(n_changes > 0):
+            if x not in single:
+                try:
+                    irr[x] = npf.irr(cashflows[x])
+                except ValueError:
+                    irr[x] = numpy.nan
+
+        return [x if math.isfinite(x) else 999 for x in irr.tolist()]
+
+    def payback_batch(self, cashflows):
+        """Calculate simple payback periods for many sets of cash flows.
+
+        Notes:
+            Yields the same payback periods as the 'payback' function for
+            each set of cash flows.
+
+        Args:
+            cashflows (numpy.ndarray): Cash flows (rows) across measure
+                lifetime (columns).
+
+        Returns:
+            List of simple payback periods, with 999 for cash flows that do
+            not pay back (as in 'metric_update').
+        """
+        # Find the sets of cash flows with an initial investment and finite
+        # values, for which payback periods are calculated together; all
+        # other sets of cash flows are handled as in 'payback'
+        batch = (cashflows[:, 0] < 0) & numpy.isfinite(cashflows).all(axis=1)
+        batch_rows = numpy.cumsum(batch) - 1
+        # Separate initial investment and subsequent cash flows
+        # from "cashflows" input; extend cashflows up until 100 years
+        # out to ensure calculation of all paybacks under 100 years
+        investment = -cashflows[batch, 0]
+        flows = cashflows[batch, 1:]
+        if flows.shape[1] < 100:
+            flows = numpy.concatenate([flows, numpy.repeat(
+                cashflows[batch, -1:], 100 - flows.shape[1], axis=1)], axis=1)
+        # Find cumulative cash flows and the number of years in which these
+        # are less than the initial investment (very large cash flows may
+        # overflow, as in 'payback')
+        with numpy.errstate(over="ignore", invalid="ignore"):
+            cumulative = numpy.cumsum(flows, axis=1)
+            years = (cumulative < investment[:, None]).sum(axis=1)
+            pays = years < flows.shape[1]
+            # Find the remaining investment at the start of the payback year
+            # and the cash flow in that year
+            cum_prev, cum_yr = [numpy.take_along_axis(
+                cumulative, numpy.clip(x, 0, flows.shape[1] - 1)[:, None],
+                axis=1)[:, 0] for x in [years - 1, years]]
+            b = numpy.where(years == 0, investment, investment - cum_prev)
+            c = numpy.where(years == 0, cum_yr, cum_yr - cum_prev)
+
+        paybacks = []
+        for x in range(len(cashflows)):
+            # Row of the batched calculations for the set of cash flows
+            y = batch_rows[x]
+            # If initial investment is positive, payback = 0
+            if cashflows[x, 0] >= 0:
+                paybacks.append(0)
+            # If investment pays back within the measure lifetime,
+            # calculate this payback period in years
+            elif batch[x] and pays[y] and c[y] != 0:
+                paybacks.append(years[y] + (b[y] / c[y]))
+            # If investment does not pay back within measure lifetime,
+            # set payback period to artifically high number
+            elif batch[x] and not pays[y]:
+                paybacks.append(999)
+            # Handle zero payback year or non-finite cash flows as in
+            # 'payback'
+            else:
+                try:
+                    paybacks.append(self.payback(cashflows[x]))
+                except (ValueError, LinAlgError):
+                    paybacks.append(999)
+
+        return paybacks
+
+    def compete_measures(
+            self, adopt_scheme, htcl_totals, workers=1, measures=None):
         """Compete/apportion total stock/energy/carbon/cost across measures.
 
         Notes:
@@ -1106,12 +1453,30 @@ class Engine(object):
 
         Args:
             adopt_scheme (string): Assumed consumer adoption scenario.
+            htcl_totals (dict): Heating/cooling energy totals by region,
+                building type, structure type, fuel type, and end use.
+            workers (int): Number of processes to compete independent groups
+                of measures across.
+            measures (list): Subset of active measures to compete (all
+                active measures by default).
         """
+        # Compete groups of measures that share no contributing microsegments
+        # (or heating/cooling supply-demand overlaps) in separate processes,
+        # if required by the user and if there is more than one such group
+        if measures is None:
+            if workers > 1:
+                groups = self.compete_groups(adopt_scheme)
+                if len(groups) > 1:
+                    self.compete_groups_parallel(
+                        groups, adopt_scheme, htcl_totals, workers)
+                    return
+            measures = self.measures
+
         # Establish list of key chains and supporting competition data for all
         # stock/energy/carbon/cost microsegments that contribute to a measure's
         # total stock/energy/carbon/cost microsegments, across active measures
         mseg_keys, mkts_adj = ([] for n in range(2))
-        for x in self.measures:
+        for x in measures:
             mseg_keys.extend(x.markets[adopt_scheme]["competed"][
                 "mseg_adjust"]["contributing mseg keys and values"].keys())
             mkts_adj.append(x.markets[adopt_scheme]["competed"]["mseg_adjust"])
@@ -1120,30 +1485,45 @@ class Engine(object):
         # ensuring that all 'primary' microsegments (e.g., relating to direct
         # equipment replacement) are ordered and updated before 'secondary'
         # microsegments (e.g., relating to indirect effects of equipment
-        # replacement, such as reduced waste heat from changes in lighting)
-        msegs = sorted(numpy.unique(mseg_keys))
+        # replacement, such as reduced waste heat from changes in lighting);
+        # parse each key chain once, looking up its attributes thereafter
+        msegs = [self.key_chains.get(x) for x in sorted(set(mseg_keys))]
 
         # Initialize a dict used to store data on overlaps between supply-side
         # heating/cooling ECMs (e.g., HVAC equipment) and demand-side
         # heating/cooling ECMs (e.g., envelope). If the current set of ECMs
         # does not affect both supply-side and demand-side heating/cooling
         # markets, this dict is set to None
-        if any(["supply" in x for x in msegs]) and \
-           any(["demand" in x for x in msegs]):
-            htcl_adj_data = {"supply": {}, "demand": {}}
+        if any([x.htcl_type == "supply" for x in msegs]) and \
+           any([x.htcl_type == "demand" for x in msegs]):
+            htcl_adj_data = htcl_overlaps.HtclOverlaps(
+                self.handyvars.aeo_years)
         else:
             htcl_adj_data = None
 
+        # If required by the user, calculate the market shares of competing
+        # measures for all primary microsegments that share the same set of
+        # competing measures at once, before making any adjustments (market
+        # shares depend only on measure costs, choice parameters, and
+        # years on the market, none of which are adjusted by the competition)
+        if self.batch_compete is True:
+            batch_mkt_fracs = self.batch_mkt_fracs(
+                measures, msegs, mkts_adj, adopt_scheme)
+        else:
+            batch_mkt_fracs = {}
+
         # Run through all unique contributing microsegments in the above list,
         # determining how the initial measure stock/energy/carbon/cost data
         # associated with each should be adjusted to reflect the effects of
         # measure competition
-        for msu in msegs:
+        for kc in msegs:
+            # Set the key chain string that keys competition data
+            msu = kc.key
 
             # Determine the subset of measures that pertain to the current
             # contributing microsegment
-            measures_adj = [self.measures[x] for x in range(
-                0, len(self.measures)) if msu in mkts_adj[x][
+            measures_adj = [measures[x] for x in range(
+                0, len(measures)) if msu in mkts_adj[x][
                 "contributing mseg keys and values"].keys()]
             # Create short name for all ECM competition data pertaining to
             # current contributing microsegment
@@ -1154,38 +1534,36 @@ class Engine(object):
             # If the current contributing microsegment is of the 'primary'
             # type, directly compete the microsegment across applicable
             # measures
-            if "primary" in msu:
+            if kc.mseg_type == "primary":
                 # If multiple measures are competing for the primary
                 # microsegment, determine the market shares of each competing
                 # measure and adjust primary stock/energy/carbon/cost
                 # totals for each measure accordingly, using separate market
                 # share modeling routines for residential/commercial sectors.
-                if len(measures_adj) > 1 and any(x in msu for x in (
-                        'single family home', 'multi family home',
-                        'mobile home')):
-                    self.compete_res_primary(measures_adj, msu, adopt_scheme)
-                elif len(measures_adj) > 1 and all(x not in msu for x in (
-                        'single family home', 'multi family home',
-                        'mobile home')):
-                    self.compete_com_primary(measures_adj, msu, adopt_scheme)
+                if len(measures_adj) > 1 and kc.bldg_sect == "residential":
+                    self.compete_res_primary(
+                        measures_adj, msu, adopt_scheme,
+                        batch_mkt_fracs.get(msu))
+                elif len(measures_adj) > 1 and kc.bldg_sect == "commercial":
+                    self.compete_com_primary(
+                        measures_adj, msu, adopt_scheme,
+                        batch_mkt_fracs.get(msu))
             # If the current contributing microsegment is of the 'secondary'
             # type, adjust the microsegment across applicable measures as
             # needed to reflect competition of associated primary
             # contributing microsegment(s) for each measure
-            elif "secondary" in msu:
+            elif kc.mseg_type == "secondary":
                 # Determine the climate zone, building type, and structure type
-                # needed to link the secondary microsegment and associated3
+                # needed to link the secondary microsegment and associated
                 # primary microsegment(s)
-                cz_bldg_struct = literal_eval(msu)
-                secnd_mseg_adjkey = str((
-                    cz_bldg_struct[1], cz_bldg_struct[2], cz_bldg_struct[-1]))
+                secnd_mseg_adjkey = kc.secnd_adj_key
                 # Determine the subset of measures pertaining to the given
                 # secondary microsegment that require total energy/carbon/cost
                 # adjustments due to changes in associated primary
                 # microsegment(s) (note that secondary microsegments do not
                 # affect stock totals, only energy/carbon and associated costs)
-                measures_adj_scnd = [self.measures[x] for x in range(
-                    0, len(self.measures)) if self.measures[x] in
+                measures_adj_scnd = [measures[x] for x in range(
+                    0, len(measures)) if measures[x] in
                     measures_adj and any(
                     [(y[1] > 0) for y in mkts_adj[x][
                         "secondary mseg adjustments"]["market share"][
@@ -1209,11 +1587,8 @@ class Engine(object):
             # Ensure the current contributing microsegment pertains to
             # heating or cooling (marked by 'supply' or 'demand' keys) and
             # that both supply and demand-side ECMs are present in the analysis
-            if ('primary' in msu and
-                ('supply' in msu or 'demand' in msu)) and \
-                    htcl_adj_data is not None:
-                htcl_adj_data = self.htcl_adj_rec(
-                    htcl_adj_data, msu, msu_mkts, htcl_totals)
+            if kc.primary_htcl and htcl_adj_data is not None:
+                htcl_adj_data.record(kc, msu_mkts, htcl_totals)
 
         # Once all direct competition is finished, remove all recorded
         # overlapping energy use and associated carbon/costs between
@@ -1221,7 +1596,7 @@ class Engine(object):
         # are present in the analysis
         if htcl_adj_data is not None:
             # Find the subset of ECMs that applies to heating and cooling
-            measures_htcl_adj = [m for m in self.measures if any([
+            measures_htcl_adj = [m for m in measures if any([
                 z[0] in ["heating", "cooling", "secondary heating"] for
                 z in m.end_use.values() if z is not None])]
 
@@ -1229,7 +1604,136 @@ class Engine(object):
             # demand-side heating/cooling ECMs
             self.htcl_adj(measures_htcl_adj, adopt_scheme, htcl_adj_data)
 
-    def compete_res_primary(self, measures_adj, mseg_key, adopt_scheme):
+    def compete_groups(self, adopt_scheme):
+        """Find groups of measures that can be competed independently.
+
+        Notes:
+            Measures are grouped together when they share a contributing
+            microsegment or apply to heating/cooling supply and demand-side
+            microsegments with overlapping energy use (same climate zone,
+            building type, structure type, fuel type, and end use); measures
+            in different groups have no bearing on each other's competition.
+
+        Args:
+            adopt_scheme (string): Assumed consumer adoption scenario.
+
+        Returns:
+            List of groups of measure indices (in the original measure order
+            within each group), ordered from the group with the most
+            contributing microsegments to the group with the fewest.
+        """
+        # Initialize each measure as the root of its own group
+        roots = list(range(len(self.measures)))
+
+        # Find the root measure of a measure's group
+        def find_root(x):
+            while roots[x] != x:
+                roots[x] = roots[roots[x]]
+                x = roots[x]
+            return x
+
+        # Link each measure to the first measure found with the same
+        # contributing microsegment or heating/cooling overlap key; count
+        # each measure's contributing microsegments for load balancing
+        first_meas, n_msegs = {}, []
+        for ind, m in enumerate(self.measures):
+            mseg_keys = m.markets[adopt_scheme]["competed"]["mseg_adjust"][
+                "contributing mseg keys and values"].keys()
+            n_msegs.append(len(mseg_keys))
+            for k in mseg_keys:
+                kc = self.key_chains.get(k)
+                link_keys = [("mseg", kc.key)]
+                if kc.primary_htcl:
+                    link_keys.append(("htcl", kc.htcl_match_key))
+                for lk in link_keys:
+                    if lk not in first_meas:
+                        first_meas[lk] = ind
+                    else:
+                        roots[find_root(ind)] = find_root(first_meas[lk])
+        # Collect the measures in each group
+        groups = defaultdict(list)
+        for ind in range(len(self.measures)):
+            groups[find_root(ind)].append(ind)
+
+        return sorted(groups.values(), key=lambda g: sum(
+            [n_msegs[x] for x in g]), reverse=True)
+
+    def compete_groups_parallel(
+            self, groups, adopt_scheme, htcl_totals, workers):
+        """Compete independent groups of measures in separate processes.
+
+        Notes:
+            Only the competed master microsegments and output breakouts of
+            each measure are returned from the worker processes, as these
+            are the only competed data used in calculating competed savings,
+            metrics, and outputs; the competed contributing microsegment
+            data of each measure are left as they were prior to competition.
+
+        Args:
+            groups (list): Groups of measure indices to compete separately.
+            adopt_scheme (string): Assumed consumer adoption scenario.
+            htcl_totals (dict): Heating/cooling energy totals by region,
+                building type, structure type, fuel type, and end use.
+            workers (int): Number of processes to use.
+        """
+        # Make the Engine and input data available to the worker processes
+        # as module-level data that are inherited when the processes fork
+        global run_shared_data
+        run_shared_data = {
+            "engine": self, "adopt_scheme": adopt_scheme,
+            "htcl_totals": htcl_totals}
+        try:
+            with multiprocessing.get_context("fork").Pool(
+                    min(workers, len(groups))) as pool:
+                for meas_inds, competed in pool.imap_unordered(
+                        compete_group_worker, groups, chunksize=1):
+                    for ind, mkts in zip(meas_inds, competed):
+                        self.measures[ind].markets[adopt_scheme][
+                            "competed"].update(mkts)
+        finally:
+            run_shared_data = None
+
+    def batch_mkt_fracs(self, measures, msegs, mkts_adj, adopt_scheme):
+        """Find market shares for batches of competed primary microsegments.
+
+        Args:
+            measures (list): Measures being competed.
+            msegs (list): Parsed key chains for all contributing
+                microsegments across the measures being competed.
+            mkts_adj (list): Competition data for each measure.
+            adopt_scheme (string): Assumed consumer adoption scenario.
+
+        Returns:
+            Dict with the annual market fractions captured by each competing
+            measure, keyed by competed primary microsegment.
+        """
+        # Group competed primary microsegments by building sector and the
+        # set of competing measures
+        batches = defaultdict(list)
+        for kc in msegs:
+            if kc.mseg_type != "primary":
+                continue
+            meas_inds = tuple([x for x in range(len(measures)) if kc.key in
+                               mkts_adj[x][
+                                "contributing mseg keys and values"].keys()])
+            if len(meas_inds) > 1:
+                batches[(kc.bldg_sect, meas_inds)].append(kc.key)
+        # Calculate market shares for each batch of microsegments at once
+        batch_mkt_fracs = {}
+        for (bldg_sect, meas_inds), mseg_keys in batches.items():
+            measures_adj = [measures[x] for x in meas_inds]
+            if bldg_sect == "residential":
+                mkt_fracs = self.res_mkt_fracs(
+                    measures_adj, mseg_keys, adopt_scheme)
+            else:
+                mkt_fracs = self.com_mkt_fracs(
+                    measures_adj, mseg_keys, adopt_scheme)
+            batch_mkt_fracs.update(zip(mseg_keys, mkt_fracs))
+
+        return batch_mkt_fracs
+
+    def compete_res_primary(
+            self, measures_adj, mseg_key, adopt_scheme, mkt_fracs=None):
         """Apportion stock/energy/carbon/cost across residential measures.
 
         Notes:
@@ -1243,26 +1747,16 @@ class Engine(object):
                 (mseg type->czone->bldg->fuel->end use->technology type
                  ->structure type).
             adopt_scheme (string): Assumed consumer adoption scenario.
+            mkt_fracs (list): Annual market fractions captured by each
+                competing measure, if already calculated for a batch of
+                microsegments with the same competing measures.
         """
-        # Initialize list of dicts that each store the annual market fractions
-        # captured by competing measures; also initialize a dict that sums
-        # market fractions by year across competing measures (used to normalize
-        # the measure market fractions such that they all sum to 1)
-        mkt_fracs = [{} for meas in range(0, len(measures_adj))]
-        mkt_fracs_tot = dict.fromkeys(self.handyvars.aeo_years, 0)
-
-        # Loop through competing measures and calculate market shares for each
-        # based on their annualized capital and operating costs.
-
-        # Set abbreviated names for the dictionaries containing measure
-        # capital and operating cost values, accessed further below
-
-        # Unit capital cost dictionary
-        unit_cost_s_in = [m.financial_metrics["unit cost"]["stock cost"][
-            "residential"] for m in measures_adj]
-        # Unit operating cost dictionary
-        unit_cost_e_in = [m.financial_metrics["unit cost"]["energy cost"][
-            "residential"] for m in measures_adj]
+        # Calculate the annual market fractions captured by competing
+        # measures based on their annualized capital and operating costs,
+        # unless these have already been calculated
+        if mkt_fracs is None:
+            mkt_fracs = self.res_mkt_fracs(
+                measures_adj, [mseg_key], adopt_scheme)[0]
 
         # Find the year range in which at least one measure that applies
         # to the competed primary microsegment is on the market
@@ -1274,93 +1768,6 @@ class Engine(object):
         mkt_entry_yrs = [
             m.market_entry_year for m in measures_adj]
 
-        # Loop through competing measures and calculate market shares for
-        # each based on their annualized capital and operating costs
-        for ind, m in enumerate(measures_adj):
-            # Set measure markets and market adjustment information
-
-            # Loop through all years in time horizon
-            for yr in self.handyvars.aeo_years:
-                # Ensure measure is on the market in given year
-                if yr in m.yrs_on_mkt:
-                    # Set measure capital and operating cost inputs. * Note:
-                    # operating cost is set to just energy costs (for now), but
-                    # could be expanded to include maintenance and carbon costs
-
-                    # Set capital cost (handle as numpy array or point value)
-                    if type(unit_cost_s_in[ind][yr]) == numpy.ndarray:
-                        cap_cost = numpy.zeros(len(unit_cost_s_in[ind][yr]))
-                        for i in range(0, len(unit_cost_s_in[ind][yr])):
-                            cap_cost[i] = unit_cost_s_in[ind][yr][i]
-                    else:
-                        cap_cost = unit_cost_s_in[ind][yr]
-                    # Set operating cost (handle as numpy array or point value)
-                    if type(unit_cost_e_in[ind][yr]) == numpy.ndarray:
-                        op_cost = numpy.zeros(len(unit_cost_e_in[ind][yr]))
-                        for i in range(0, len(unit_cost_e_in[ind][yr])):
-                            op_cost[i] = unit_cost_e_in[ind][yr][i]
-                    else:
-                        op_cost = unit_cost_e_in[ind][yr]
-
-                    # Calculate measure market fraction using log-linear
-                    # regression equation that takes capital/operating
-                    # costs as inputs
-
-                    # Handle case where cost is None
-                    try:
-                        # Calculate weighted sum of incremental capital and
-                        # operating costs
-                        sum_wt = cap_cost * \
-                            m.markets[adopt_scheme]["competed"][
-                                "mseg_adjust"]["competed choice parameters"][
-                                str(mseg_key)]["b1"][yr] + op_cost * \
-                            m.markets[adopt_scheme]["competed"]["mseg_adjust"][
-                                "competed choice parameters"][
-                                str(mseg_key)]["b2"][yr]
-
-                        # Guard against cases with very low weighted sums of
-                        # incremental capital and operating costs
-                        if type(sum_wt) != numpy.ndarray and sum_wt < -500:
-                            sum_wt = -500
-                        elif type(sum_wt) == numpy.ndarray and any([
-                                x < -500 for x in sum_wt]):
-                            sum_wt = [-500 if x < -500 else x for x in sum_wt]
-
-                        # Calculate market fraction
-                        mkt_fracs[ind][yr] = numpy.exp(sum_wt)
-                    except TypeError:
-                        mkt_fracs[ind][yr] = 0
-
-                    # Add calculated market fraction to mkt fraction sum
-                    mkt_fracs_tot[yr] = \
-                        mkt_fracs_tot[yr] + mkt_fracs[ind][yr]
-
-        # Loop through competing measures to normalize their calculated
-        # market shares to the total market share sum; use normalized
-        # market shares to make adjustments to each measure's master
-        # microsegment values
-        for ind, m in enumerate(measures_adj):
-            # Calculate annual market share fraction for the measure and
-            # adjust measure's master microsegment values accordingly
-            for yr in self.handyvars.aeo_years:
-                # Ensure measure is on the market in given year; if not,
-                # the measure either splits the market with other
-                # competing measures if none of those measures is on
-                # the market either, or else has a market share of zero
-                if yr in m.yrs_on_mkt:
-                    if ((type(mkt_fracs_tot[yr]) != numpy.ndarray and
-                         mkt_fracs_tot[yr] != 0) or (
-                        type(mkt_fracs_tot[yr]) == numpy.ndarray and all(
-                            mkt_fracs_tot[yr] != 0))):
-                        mkt_fracs[ind][yr] = \
-                            mkt_fracs[ind][yr] / mkt_fracs_tot[yr]
-                    else:
-                        mkt_fracs[ind][yr] = 1 / len(measures_adj)
-                elif yr not in years_on_mkt_all:
-                    mkt_fracs[ind][yr] = 1 / len(measures_adj)
-                else:
-                    mkt_fracs[ind][yr] = 0
-
         # Check for competing ECMs that apply to but a fraction of the competed
         # market, and apportion the remaining fraction of this market across
         # the other competing ECMs
@@ -1388,7 +1795,120 @@ class Engine(object):
                     adj_list_eff, adj_list_base, yr, mseg_key, m, adopt_scheme,
                     mkt_entry_yrs, adj_stk_trk)
 
-    def compete_com_primary(self, measures_adj, mseg_key, adopt_scheme):
+    def res_mkt_fracs(self, measures_adj, mseg_keys, adopt_scheme):
+        """Find residential market shares across competing measures.
+
+        Notes:
+            Market fractions are calculated at once for all competing
+            measures, years, and (if applicable) cost samples, and for a
+            batch of one or more competed microsegments that share the same
+            competing measures. Each measure's market fraction is found from
+            its annualized capital and operating costs using a log-linear
+            regression equation, and is normalized to the sum of market
+            fractions across competing measures.
+
+        Args:
+            measures_adj (list): Competing residential measure objects.
+            mseg_keys (list): Competed market microsegments.
+            adopt_scheme (string): Assumed consumer adoption scenario.
+
+        Returns:
+            List (by competed microsegment) of lists (by competing measure)
+            of dicts with the annual market fractions captured by each
+            measure.
+        """
+        # Set shorthand for the years in the time horizon
+        yrs = self.handyvars.aeo_years
+        # Flag the years in which each measure is on the market and in which
+        # at least one measure is on the market
+        on_mkt = numpy.array([[yr in m.yrs_on_mkt for yr in yrs] for
+                              m in measures_adj])
+        on_mkt_any = on_mkt.any(axis=0)
+        # Set measure capital and operating costs (measures x years x cost
+        # samples). * Note: operating cost is set to just energy costs (for
+        # now), but could be expanded to include maintenance and carbon costs
+        cap_cost, op_cost, cost_samp, cost_ok = self.unit_cost_arrays(
+            measures_adj, "residential")
+
+        # Set log-linear regression coefficients on capital and operating
+        # costs (microsegments x measures x years); coefficients are only
+        # needed in years when the measure is on the market
+        b1, b2 = (numpy.zeros((len(mseg_keys),) + on_mkt.shape) for
+                  n in range(2))
+        b_ok = numpy.ones(b1.shape, dtype=bool)
+        for ind_g, mseg_key in enumerate(mseg_keys):
+            for ind, m in enumerate(measures_adj):
+                if not on_mkt[ind].any():
+                    continue
+                choice_params = m.markets[adopt_scheme]["competed"][
+                    "mseg_adjust"]["competed choice parameters"][
+                    str(mseg_key)]
+                for ind_l, yr in enumerate(yrs):
+                    if on_mkt[ind, ind_l]:
+                        b_yr = [choice_params["b1"][yr],
+                                choice_params["b2"][yr]]
+                        # Handle case where a coefficient is None
+                        if any([x is None for x in b_yr]):
+                            b_ok[ind_g, ind, ind_l] = False
+                        else:
+                            b1[ind_g, ind, ind_l], b2[ind_g, ind, ind_l] = \
+                                b_yr
+
+        # Flag the measures/years that capture a share of the market (on the
+        # market and with valid costs and coefficients; others capture none)
+        valid = on_mkt & cost_ok & b_ok
+        # Calculate weighted sum of incremental capital and operating costs
+        sum_wt = numpy.where(
+            valid[..., None], cap_cost * b1[..., None] +
+            op_cost * b2[..., None], 0)
+        # Guard against cases with very low weighted sums of incremental
+        # capital and operating costs
+        sum_wt = numpy.where(sum_wt < -500, -500, sum_wt)
+        # Calculate market fractions
+        mkt_fracs = numpy.where(valid[..., None], numpy.exp(sum_wt), 0)
+        # Sum market fractions across competing measures (in measure order)
+        mkt_fracs_tot = numpy.zeros(
+            (mkt_fracs.shape[0],) + mkt_fracs.shape[2:])
+        for ind in range(len(measures_adj)):
+            mkt_fracs_tot = mkt_fracs_tot + mkt_fracs[:, ind]
+        # Flag microsegments/years where the market fraction sum is non-zero
+        # (across all cost samples) and where market fractions are broken out
+        # by cost samples
+        tot_ok = (mkt_fracs_tot != 0).all(axis=-1)
+        samp_yr = (valid & cost_samp).any(axis=1)
+        # Normalize the measure market fractions to the market fraction sum
+        mkt_fracs = numpy.divide(
+            mkt_fracs, mkt_fracs_tot[:, None], out=numpy.zeros(
+                mkt_fracs.shape), where=tot_ok[:, None, :, None])
+
+        # Set the market fractions for each microsegment, measure, and year;
+        # if the measure is not on the market in a given year, it either
+        # splits the market with other competing measures if none of those
+        # measures is on the market either, or else has a market share of zero
+        mkt_fracs_out = []
+        for ind_g in range(len(mseg_keys)):
+            mkt_fracs_out.append([{} for m in measures_adj])
+            for ind in range(len(measures_adj)):
+                for ind_l, yr in enumerate(yrs):
+                    if on_mkt[ind, ind_l]:
+                        if not tot_ok[ind_g, ind_l]:
+                            mkt_fracs_out[ind_g][ind][yr] = \
+                                1 / len(measures_adj)
+                        elif samp_yr[ind_g, ind_l]:
+                            mkt_fracs_out[ind_g][ind][yr] = \
+                                mkt_fracs[ind_g, ind, ind_l].copy()
+                        else:
+                            mkt_fracs_out[ind_g][ind][yr] = \
+                                mkt_fracs[ind_g, ind, ind_l, 0]
+                    elif not on_mkt_any[ind_l]:
+                        mkt_fracs_out[ind_g][ind][yr] = 1 / len(measures_adj)
+                    else:
+                        mkt_fracs_out[ind_g][ind][yr] = 0
+
+        return mkt_fracs_out
+
+    def compete_com_primary(
+            self, measures_adj, mseg_key, adopt_scheme, mkt_fracs=None):
         """Apportion stock/energy/carbon/cost across commercial measures.
 
         Notes:
@@ -1402,27 +1922,16 @@ class Engine(object):
                 (mseg type->czone->bldg->fuel->end use->technology type
                  ->structure type).
             adopt_scheme (string): Assumed consumer adoption scenario.
+            mkt_fracs (list): Annual market fractions captured by each
+                competing measure, if already calculated for a batch of
+                microsegments with the same competing measures.
         """
-        # Initialize list of dicts that each store the annual market fractions
-        # captured by competing measures; also initialize a dict that records
-        # the total annualized capital + operating costs for each measure
-        # and discount rate level (used to choose which measure is adopted
-        # under each discount rate level)
-        mkt_fracs = [{} for meas in range(0, len(measures_adj))]
-        tot_cost = [{} for meas in range(0, len(measures_adj))]
-
-        # Calculate the total annualized cost (capital + operating) needed to
-        # determine market shares below
-
-        # Set abbreviated names for the dictionaries containing measure
-        # capital and operating cost values, accessed further below
-
-        # Unit stock cost dictionary
-        unit_cost_s_in = [m.financial_metrics["unit cost"]["stock cost"][
-                     "commercial"] for m in measures_adj]
-        # Unit operating cost dictionary
-        unit_cost_e_in = [m.financial_metrics["unit cost"]["energy cost"][
-            "commercial"] for m in measures_adj]
+        # Calculate the annual market fractions captured by competing
+        # measures based on their total annualized capital and operating
+        # costs, unless these have already been calculated
+        if mkt_fracs is None:
+            mkt_fracs = self.com_mkt_fracs(
+                measures_adj, [mseg_key], adopt_scheme)[0]
 
         # Find the year range in which at least one measure that applies
         # to the competed primary microsegment is on the market
@@ -1434,209 +1943,6 @@ class Engine(object):
         mkt_entry_yrs = [
             m.market_entry_year for m in measures_adj]
 
-        # Initialize a flag that indicates whether any competing measures
-        # have arrays of annualized capital and/or operating costs rather
-        # than point values (resultant of distributions on measure inputs),
-        # for each year in the range above
-        length_array = numpy.repeat(0, len(self.handyvars.aeo_years))
-
-        # Loop through all years in time horizon
-        for ind_l, yr in enumerate(self.handyvars.aeo_years):
-            # Determine whether any of the competing measures have
-            # arrays of annualized capital and/or operating costs for
-            # the given year; if so, find the array length. * Note: all
-            # array lengths should be equal to the 'nsamples' variable
-            # defined in 'ecm_prep.py'
-            if any([type(x[yr]) == numpy.ndarray or
-                    type(y[yr]) == numpy.ndarray for
-                    x, y in zip(unit_cost_s_in, unit_cost_e_in)]) is True:
-                length_array[ind_l] = next(
-                    (len(x[yr]) or len(y[yr]) for x, y in
-                     zip(unit_cost_s_in, unit_cost_e_in) if type(x[yr]) ==
-                     numpy.ndarray or type(y[yr]) == numpy.ndarray),
-                    length_array[ind_l])
-
-        # Loop through competing measures and calculate market shares for
-        # each based on their annualized capital and operating costs
-        for ind, m in enumerate(measures_adj):
-            # Set measure markets and market adjustment information
-            # Loop through all years in time horizon
-            for ind_l, yr in enumerate(self.handyvars.aeo_years):
-                # Ensure measure is on the market in given year
-                if yr in m.yrs_on_mkt:
-                    # Set measure capital and operating cost inputs. * Note:
-                    # operating cost is set to just energy costs (for now), but
-                    # could be expanded to include maintenance and carbon costs
-
-                    # Handle cases where capital and/or operating cost inputs
-                    # are specified as arrays for at least one of the competing
-                    # measures. In this case, the capital and operating costs
-                    # for all measures must be formatted consistently as arrays
-                    # of the same length
-                    if length_array[ind_l] > 0:
-                        cap_cost, op_cost = ([
-                            {} for n in range(length_array[ind_l])] for
-                            n in range(2))
-                        for i in range(length_array[ind_l]):
-                            # Set capital cost input array
-                            if type(unit_cost_s_in[ind][yr]) == numpy.ndarray:
-                                cap_cost[i] = unit_cost_s_in[ind][yr][i]
-                            else:
-                                cap_cost[i] = unit_cost_s_in[ind][yr]
-                            # Set operating cost input array
-                            if type(unit_cost_e_in[ind][yr]) == numpy.ndarray:
-                                op_cost[i] = unit_cost_e_in[ind][yr][i]
-                            else:
-                                op_cost[i] = unit_cost_e_in[ind][yr]
-                        # Sum capital and operating cost arrays and add to the
-                        # total cost dict entry for the given measure
-                        tot_cost[ind][yr] = [
-                            [] for n in range(length_array[ind_l])]
-                        # Handle case where cost is None
-                        try:
-                            for c_l in range(0, len(tot_cost[ind][yr])):
-                                for dr in sorted(cap_cost[c_l].keys()):
-                                    tot_cost[ind][yr][c_l].append(
-                                        cap_cost[c_l][dr] + op_cost[c_l][dr])
-                        except AttributeError:
-                            pass
-                    # Handle cases where capital and/or operating cost inputs
-                    # are specified as point values for all competing measures
-                    else:
-                        # Set capital cost point value
-                        cap_cost = unit_cost_s_in[ind][yr]
-                        # Set operating cost point value
-                        op_cost = unit_cost_e_in[ind][yr]
-
-                        # Sum capital and operating cost point values and add
-                        # to the total cost dict entry for the given measure
-                        tot_cost[ind][yr] = []
-                        # Handle case where cost is None
-                        try:
-                            for dr in sorted(cap_cost.keys()):
-                                tot_cost[ind][yr].append(
-                                    cap_cost[dr] + op_cost[dr])
-                        except AttributeError:
-                            pass
-
-        # Loop through competing measures and use total annualized capital
-        # + operating costs to determine the overall share of the market
-        # that is captured by each measure; use market shares to make
-        # adjustments to each measure's master microsegment values
-        for ind, m in enumerate(measures_adj):
-            # Calculate annual market share fraction for the measure and
-            # adjust measure's master microsegment values accordingly
-
-            # Loop through all years in time horizon
-            for ind_l, yr in enumerate(self.handyvars.aeo_years):
-                # Ensure measure is on the market in given year; if not,
-                # the measure either splits the market with other
-                # competing measures if none of those measures is on
-                # the market either, or else has a market share of zero
-                if yr in m.yrs_on_mkt:
-                    # Set the fractions of commericial adopters who fall into
-                    # each discount rate category for this particular
-                    # microsegment
-                    mkt_dists = m.markets[adopt_scheme]["competed"][
-                        "mseg_adjust"]["competed choice parameters"][
-                            str(mseg_key)]["rate distribution"][yr]
-                    # For each discount rate category, find which measure has
-                    # the lowest annualized cost and assign that measure the
-                    # share of commercial market adopters defined for that
-                    # category above
-
-                    # Handle cases where capital and/or operating cost inputs
-                    # are specified as lists for at least one of the competing
-                    # measures.
-                    if length_array[ind_l] > 0 and len(
-                            tot_cost[ind][yr][0]) != 0:
-                        mkt_fracs[ind][yr] = [
-                            [] for n in range(length_array[ind_l])]
-                        for c_l in range(length_array[ind_l]):
-                            for ind2, dr in enumerate(
-                                    tot_cost[ind][yr][c_l]):
-                                # Find the lowest annualized cost for the
-                                # set of competing measures/discount bin
-                                min_val = min([
-                                    tot_cost[x][yr][c_l][ind2] for x in
-                                    range(0, len(measures_adj)) if
-                                    (yr in tot_cost[x].keys() and
-                                     len(tot_cost[x][yr][0]) != 0)])
-                                # Determine how many competing measures
-                                # have the lowest annualized cost under
-                                # the given discount rate bin
-                                min_val_ecms = [
-                                    x for x in range(0, len(measures_adj)) if
-                                    (yr in tot_cost[x].keys() and
-                                     len(tot_cost[x][yr][0]) != 0) and
-                                    tot_cost[x][yr][c_l][ind2] == min_val]
-                                # If the current measure has the lowest
-                                # annualized cost, assign it appropriate
-                                # market share for current discount rate
-                                # category being looped through, divided by
-                                # total number of competing measures that
-                                # share the lowest annualized cost
-                                if tot_cost[ind][yr][c_l][ind2] == min_val:
-                                    mkt_fracs[ind][yr][c_l].append(
-                                        mkt_dists[ind2] /
-                                        len(min_val_ecms))
-                                # Otherwise, set its market share for that
-                                # discount rate bin to zero
-                                else:
-                                    mkt_fracs[ind][yr][c_l].append(0)
-                            mkt_fracs[ind][yr][c_l] = sum(
-                                mkt_fracs[ind][yr][c_l])
-                        # Convert market fractions list to numpy array for
-                        # use in compete_adj function below
-                        mkt_fracs[ind][yr] = numpy.array(
-                            mkt_fracs[ind][yr])
-                    # Handle cases where capital and/or operating cost inputs
-                    # are specified as point values for all competing measures
-                    elif length_array[ind_l] == 0:
-                        if len(tot_cost[ind][yr]) != 0:
-                            mkt_fracs[ind][yr] = []
-                            for ind2, dr in enumerate(tot_cost[ind][yr]):
-                                # Find the lowest annualized cost for the given
-                                # set of competing measures and discount bin
-                                min_val = min([
-                                    tot_cost[x][yr][ind2] for x in
-                                    range(0, len(measures_adj)) if (
-                                        yr in tot_cost[x].keys() and
-                                        len(tot_cost[x][yr]) != 0)])
-                                # Determine how many of the competing measures
-                                # have the lowest annualized cost under
-                                # the given discount rate bin
-                                min_val_ecms = [
-                                    x for x in range(0, len(measures_adj)) if
-                                    (yr in tot_cost[x].keys() and
-                                     len(tot_cost[x][yr]) != 0) and
-                                    tot_cost[x][yr][ind2] == min_val]
-                                # If the current measure has the lowest
-                                # annualized cost, assign it the appropriate
-                                # market share for the current discount rate
-                                # category being looped through, divided by the
-                                # total number of competing measures that share
-                                # the lowest annualized cost
-                                if tot_cost[ind][yr][ind2] == min_val:
-                                    mkt_fracs[ind][yr].append(
-                                        mkt_dists[ind2] / len(min_val_ecms))
-                                # Otherwise, set its market share for that
-                                # discount rate bin to zero
-                                else:
-                                    mkt_fracs[ind][yr].append(0)
-                            mkt_fracs[ind][yr] = sum(mkt_fracs[ind][yr])
-                        else:
-                            mkt_fracs[ind][yr] = 0
-                    else:
-                        mkt_fracs[ind][yr] = 0
-                elif yr not in years_on_mkt_all:
-                    if len(measures_adj) > 1:
-                        mkt_fracs[ind][yr] = 1 / len(measures_adj)
-                    else:
-                        mkt_fracs[ind][yr] = 0
-                else:
-                    mkt_fracs[ind][yr] = 0
-
         # Check for competing ECMs that apply to but a fraction of the competed
         # market, and apportion the remaining fraction of this market across
         # the other competing ECMs
@@ -1664,6 +1970,199 @@ class Engine(object):
                     adj_list_eff, adj_list_base, yr, mseg_key, m, adopt_scheme,
                     mkt_entry_yrs, adj_stk_trk)
 
+    def com_mkt_fracs(self, measures_adj, mseg_keys, adopt_scheme):
+        """Find commercial market shares across competing measures.
+
+        Notes:
+            Market fractions are calculated at once for all competing
+            measures, years, cost samples (if applicable), and discount rate
+            categories, and for a batch of one or more competed microsegments
+            that share the same competing measures. Under each discount rate
+            category, the measure(s) with the lowest total annualized capital
+            and operating cost capture the share of commercial adopters that
+            fall into that category.
+
+        Args:
+            measures_adj (list): Competing commercial measure objects.
+            mseg_keys (list): Competed market microsegments.
+            adopt_scheme (string): Assumed consumer adoption scenario.
+
+        Returns:
+            List (by competed microsegment) of lists (by competing measure)
+            of dicts with the annual market fractions captured by each
+            measure.
+        """
+        # Set shorthand for the years in the time horizon
+        yrs = self.handyvars.aeo_years
+        # Flag the years in which each measure is on the market and in which
+        # at least one measure is on the market
+        on_mkt = numpy.array([[yr in m.yrs_on_mkt for yr in yrs] for
+                              m in measures_adj])
+        on_mkt_any = on_mkt.any(axis=0)
+
+        # Unit stock cost dictionary
+        unit_cost_s_in = [m.financial_metrics["unit cost"]["stock cost"][
+                     "commercial"] for m in measures_adj]
+        # Unit operating cost dictionary
+        unit_cost_e_in = [m.financial_metrics["unit cost"]["energy cost"][
+            "commercial"] for m in measures_adj]
+
+        # Initialize a flag that indicates whether any competing measures
+        # have arrays of annualized capital and/or operating costs rather
+        # than point values (resultant of distributions on measure inputs),
+        # for each year in the range above
+        length_array = numpy.repeat(0, len(yrs))
+        # Loop through all years in time horizon
+        for ind_l, yr in enumerate(yrs):
+            # Determine whether any of the competing measures have
+            # arrays of annualized capital and/or operating costs for
+            # the given year; if so, find the array length. * Note: all
+            # array lengths should be equal to the 'nsamples' variable
+            # defined in 'ecm_prep.py'
+            if any([type(x[yr]) == numpy.ndarray or
+                    type(y[yr]) == numpy.ndarray for
+                    x, y in zip(unit_cost_s_in, unit_cost_e_in)]) is True:
+                length_array[ind_l] = next(
+                    (len(x[yr]) or len(y[yr]) for x, y in
+                     zip(unit_cost_s_in, unit_cost_e_in) if type(x[yr]) ==
+                     numpy.ndarray or type(y[yr]) == numpy.ndarray),
+                    length_array[ind_l])
+
+        # Set the total annualized cost (capital + operating) for each
+        # measure, year, cost sample, and discount rate category, flagging
+        # measures/years with missing costs (cost is None). * Note: operating
+        # cost is set to just energy costs (for now), but could be expanded to
+        # include maintenance and carbon costs
+        tot_cost, cost_ok, n_dr = None, numpy.zeros(on_mkt.shape, bool), 0
+        for ind in range(len(measures_adj)):
+            for ind_l, yr in enumerate(yrs):
+                if not on_mkt[ind, ind_l]:
+                    continue
+                # Handle case where cost is None
+                try:
+                    for c_l in range(max(length_array[ind_l], 1)):
+                        # Set capital and operating cost inputs for the
+                        # current cost sample (if applicable)
+                        cap_cost, op_cost = [
+                            x[c_l] if type(x) == numpy.ndarray else x for x in
+                            [unit_cost_s_in[ind][yr],
+                             unit_cost_e_in[ind][yr]]]
+                        tot_cost_dr = [cap_cost[dr] + op_cost[dr] for
+                                       dr in sorted(cap_cost.keys())]
+                        # Initialize total costs once the number of discount
+                        # rate categories is known
+                        if tot_cost is None:
+                            n_dr = len(tot_cost_dr)
+                            tot_cost = numpy.zeros(on_mkt.shape + (
+                                max(max(length_array), 1), n_dr))
+                        tot_cost[ind, ind_l, c_l] = tot_cost_dr
+                    cost_ok[ind, ind_l] = True
+                except AttributeError:
+                    pass
+        if tot_cost is None:
+            tot_cost = numpy.zeros(on_mkt.shape + (1, 0))
+        valid = on_mkt & cost_ok
+
+        # For each discount rate category, find the lowest total annualized
+        # cost across measures that are on the market with valid costs, the
+        # measures with that cost, and how many measures share that cost
+        min_val = numpy.where(
+            valid[..., None, None], tot_cost, numpy.inf).min(axis=0)
+        min_val_ecms = valid[..., None, None] & (tot_cost == min_val)
+        n_min_val_ecms = numpy.maximum(min_val_ecms.sum(axis=0), 1)
+
+        # Set the fractions of commercial adopters who fall into each discount
+        # rate category for each microsegment, measure, and year
+        mkt_dists = numpy.zeros((len(mseg_keys),) + on_mkt.shape + (n_dr,))
+        for ind_g, mseg_key in enumerate(mseg_keys):
+            for ind, m in enumerate(measures_adj):
+                if not valid[ind].any():
+                    continue
+                rate_dists = m.markets[adopt_scheme]["competed"][
+                    "mseg_adjust"]["competed choice parameters"][
+                    str(mseg_key)]["rate distribution"]
+                for ind_l, yr in enumerate(yrs):
+                    if valid[ind, ind_l]:
+                        mkt_dists[ind_g, ind, ind_l] = rate_dists[yr]
+        # Assign measures with the lowest annualized cost in a discount rate
+        # category the share of adopters in that category, divided by the
+        # number of measures that share the lowest annualized cost, summing
+        # across categories (in category order)
+        mkt_fracs = numpy.zeros((len(mseg_keys),) + tot_cost.shape[:-1])
+        for ind_dr in range(n_dr):
+            mkt_fracs = mkt_fracs + numpy.where(
+                min_val_ecms[None, ..., ind_dr],
+                mkt_dists[..., ind_dr, None] /
+                n_min_val_ecms[None, None, ..., ind_dr], 0)
+
+        # Set the market fractions for each microsegment, measure, and year;
+        # if the measure is not on the market in a given year, it either
+        # splits the market with other competing measures if none of those
+        # measures is on the market either, or else has a market share of zero
+        mkt_fracs_out = []
+        for ind_g in range(len(mseg_keys)):
+            mkt_fracs_out.append([{} for m in measures_adj])
+            for ind in range(len(measures_adj)):
+                for ind_l, yr in enumerate(yrs):
+                    if valid[ind, ind_l]:
+                        # Cost inputs are specified as arrays for at least
+                        # one of the competing measures
+                        if length_array[ind_l] > 0:
+                            mkt_fracs_out[ind_g][ind][yr] = numpy.array(
+                                mkt_fracs[ind_g, ind, ind_l,
+                                          :length_array[ind_l]])
+                        # Cost inputs are specified as point values for all
+                        # competing measures
+                        else:
+                            mkt_fracs_out[ind_g][ind][yr] = \
+                                mkt_fracs[ind_g, ind, ind_l, 0].item()
+                    elif on_mkt[ind, ind_l]:
+                        mkt_fracs_out[ind_g][ind][yr] = 0
+                    elif not on_mkt_any[ind_l] and len(measures_adj) > 1:
+                        mkt_fracs_out[ind_g][ind][yr] = 1 / len(measures_adj)
+                    else:
+                        mkt_fracs_out[ind_g][ind][yr] = 0
+
+        return mkt_fracs_out
+
+    def unit_cost_arrays(self, measures_adj, bldg_sect):
+        """Set competing measures' unit capital and operating cost arrays.
+
+        Args:
+            measures_adj (list): Competing measure objects.
+            bldg_sect (string): Building sector of the competed microsegment.
+
+        Returns:
+            Arrays of unit capital and operating costs (measures x years x
+            cost samples, with point value costs repeated across samples),
+            and arrays flagging measures/years with cost samples and with
+            valid (not None) costs.
+        """
+        # Set shorthand for the years in the time horizon
+        yrs = self.handyvars.aeo_years
+        # Set unit capital and operating cost dictionaries for each measure
+        unit_costs = [[m.financial_metrics["unit cost"][x][bldg_sect] for
+                       x in ["stock cost", "energy cost"]] for
+                      m in measures_adj]
+        # Find the number of cost samples (1 if all costs are point values)
+        n_samples = max([len(c[yr]) for m_c in unit_costs for c in m_c for
+                         yr in yrs if type(c[yr]) == numpy.ndarray] or [1])
+        costs = numpy.zeros((2, len(measures_adj), len(yrs), n_samples))
+        cost_samp = numpy.zeros((len(measures_adj), len(yrs)), dtype=bool)
+        cost_ok = numpy.ones((len(measures_adj), len(yrs)), dtype=bool)
+        for ind, m_c in enumerate(unit_costs):
+            for ind_c, c in enumerate(m_c):
+                for ind_l, yr in enumerate(yrs):
+                    if type(c[yr]) == numpy.ndarray:
+                        cost_samp[ind, ind_l] = True
+                    # Handle case where cost is None
+                    if c[yr] is None:
+                        cost_ok[ind, ind_l] = False
+                    else:
+                        costs[ind_c, ind, ind_l] = c[yr]
+
+        return costs[0], costs[1], cost_samp, cost_ok
+
     def find_added_sbmkt_fracs(
             self, mkt_fracs, measures_adj, mseg_key, adopt_scheme,
             years_on_mkt_all):
@@ -1701,7 +2200,7 @@ class Engine(object):
                 "sub-market scaling"] for yr in self.handyvars.aeo_years}
             if not isinstance(m.markets[adopt_scheme]["competed"][
                 "mseg_adjust"]["contributing mseg keys and values"][mseg_key][
-                "sub-market scaling"], dict)
+                "sub-market scaling"], Mapping)
             else {yr: 1 - m.markets[adopt_scheme]["competed"]["mseg_adjust"][
                 "contributing mseg keys and values"][mseg_key][
                 "sub-market scaling"][yr] for yr in self.handyvars.aeo_years}
@@ -2023,87 +2522,6 @@ class Engine(object):
                         adj["carbon"]["competed"][x][yr] = [
                             (x[yr] * adj_frac_comp) for x in adjlist[6:]]
 
-    def htcl_adj_rec(self, htcl_adj_data, msu, msu_mkts, htcl_totals):
-        """Record overlaps in heating/cooling supply and demand-side energy.
-
-        Args:
-            htcl_adj_data (dict): Overlapping supply or demand-side heating/
-                cooling energy use data to update with energy data for current
-                contributing microsegment.
-            msu (string): Current contributing microsegment key chain.
-            msu_mkts (dict): Energy, carbon, and cost data for the current
-                contributing microsegment, across all ECMs that apply to
-                this microsegment.
-            htcl_totals: Energy use totals for all possible climate zone,
-                building type, and structure type combinations.
-
-        Returns:
-            Updated supply or demand-side heating/cooling overlap data that
-            include overlapping energy use data from the current contributing
-            microsegment.
-        """
-        # Establish criteria for matching a supply-side heating/
-        # cooling microsegment with a demand-side heating/cooling
-        # microsegment (same climate zone, building type, and structure
-        # type)
-
-        # Convert contributing microsegment key chain string to a list
-        keys = literal_eval(msu)
-        # Pull out climate zone, building type, structure type, fuel type,
-        # and end use
-        msu_split = [str(x) for x in [keys[1], keys[2], keys[-1],
-                                      keys[3], keys[4]]]
-        # Convert climate zone, building type, structure type, fuel type,
-        # and end use data into a string, to be used as a dict key below
-        msu_split_key = str(msu_split)
-        # Set the technology type of the current heating/cooling microsegment
-        # ('supply' or 'demand')
-        tech_typ = keys[-3]
-
-        # Determine whether overlapping heating/cooling energy use
-        # data have already been initialized for the given climate
-        # zone, building type, structure type, fuel type, and end use
-        # combination; if not, initialize with overlapping energy use data for
-        # all ECMs that apply to the current contributing microsegment; if
-        # so, add the overlapping data to what is already there
-        if msu_split_key not in htcl_adj_data[tech_typ].keys():
-            htcl_adj_data[tech_typ][msu_split_key] = {
-                # Record total potential overlapping supply-side
-                # and demand-side heating/cooling energy use for
-                # the given climate zone, building type,
-                # structure type, fuel type, and end use combination
-                "total": htcl_totals[msu_split[0]][msu_split[1]][
-                    msu_split[2]][msu_split[3]][msu_split[4]],
-                # Record the overlapping energy use that is actually
-                # affected by the current contributing microsegment,
-                # across all ECMs that apply to this microsegment
-                "total affected": {yr: sum([(
-                    m["energy"]["total"]["baseline"][yr]) for
-                    m in msu_mkts]) for
-                    yr in self.handyvars.aeo_years},
-                # Record the savings in the overlapping energy use
-                # affected by the current contributing microsegment,
-                # across all ECMs that apply to this microsegment
-                "affected savings": {yr: sum([(
-                    m["energy"]["total"]["baseline"][yr] -
-                    m["energy"]["total"]["efficient"][yr]) for
-                    m in msu_mkts]) for yr in self.handyvars.aeo_years}}
-        else:
-            for yr in self.handyvars.aeo_years:
-                # Add to affected overlapping energy use
-                htcl_adj_data[tech_typ][msu_split_key][
-                    "total affected"][yr] += sum([(
-                        m["energy"]["total"]["baseline"][yr]) for
-                        m in msu_mkts])
-                # Add to affected overlapping energy use savings
-                htcl_adj_data[tech_typ][msu_split_key][
-                    "affected savings"][yr] += sum([(
-                        m["energy"]["total"]["baseline"][yr] -
-                        m["energy"]["total"]["efficient"][yr]) for
-                        m in msu_mkts])
-
-        return htcl_adj_data
-
     def htcl_adj(self, measures_htcl_adj, adopt_scheme, htcl_adj_data):
         """Remove heating/cooling supply-demand energy/carbon/cost overlaps.
 
@@ -2115,9 +2533,9 @@ class Engine(object):
             measures_adj (list): Measures requiring supply-demand
                 adjustments to energy/carbon/cost totals.
             adopt_scheme (string): Assumed consumer adoption scenario.
-            htcl_adj_data (dict): Overlapping supply or demand-side heating/
-                cooling energy use data to use in scaling down energy/carbon/
-                cost overlaps.
+            htcl_adj_data (object): Overlapping supply and demand-side
+                heating/cooling energy use data to use in scaling down
+                energy/carbon/cost overlaps.
         """
         # Loop through all ECMs requiring additional energy/carbon/cost
         # adjustments
@@ -2128,49 +2546,22 @@ class Engine(object):
             # REASONABLE APPROACH FOR ADJUSTING THESE IS IMPLEMENTED
             htcl_keys = [k for k in m.markets[adopt_scheme]["competed"][
                 "mseg_adjust"]["contributing mseg keys and values"].keys() if
-                "primary" in k and ("supply" in k or "demand" in k)]
+                self.key_chains.get(k).primary_htcl]
             # Loop through the ECM's supply-side or demand-side heating/cooling
             # contributing microsegments and scale down energy, carbon, and
             # cost data for that microsegment to remove previously recorded
             # overlaps across the heating/cooling supply-side and demand-side
             for mseg in htcl_keys:
-                # Convert contributing microsegment key chain string to a list
-                keys = literal_eval(mseg)
-                # Pull out climate zone, building type, structure type,
-                # fuel type, and end use
-                msu_split = [str(x) for x in [keys[1], keys[2], keys[-1],
-                                              keys[3], keys[4]]]
-                # Convert climate zone, building type, structure type, fuel
-                # type, and end use data into a string, to be used as a dict
-                # key below
-                msu_split_key = str(msu_split)
-                # Set the technology type of the current microsegment, as well
-                # as the technology types of overlapping microsegments (e.g.,
-                # if the current microsegment is on the supply-side of
-                # heating/cooling, overlapping microsegments are on the demand
-                # side, and vice versa)
-                if 'supply' in mseg:
-                    tech_typ, tech_typ_overlp = ["supply", "demand"]
-                else:
-                    tech_typ, tech_typ_overlp = ["demand", "supply"]
-                # If no overlapping energy use data exist for the current
-                # microsegment's climate zone, building type, structure
-                # type, fuel type, and end use combination, move to next
-                # contributing microsegment
-                if msu_split_key not in htcl_adj_data[tech_typ].keys():
-                    continue
-
-                # If overlapping energy use data do exist for the current
-                # microsegment's climate zone, building type, structure
-                # type, fuel type, and end use combination, create short name
-                # for current microsegment energy data dict and overlapping
-                # energy data dict; Note: if no overlapping energy data dict
-                # can be found, move to next heating/cooling contributing
-                # microsegment in for loop
-                tech_data = htcl_adj_data[tech_typ][msu_split_key]
-                try:
-                    overlp_data = htcl_adj_data[tech_typ_overlp][msu_split_key]
-                except KeyError:
+                # Find the baseline and efficient adjustment fractions for
+                # the current microsegment's climate zone, building type,
+                # structure type, fuel type, and end use combination and
+                # technology type (supply or demand), which are shared by all
+                # ECMs that apply to the combination; if no overlapping
+                # energy use data exist for the combination on both the
+                # supply and demand side, move to next contributing
+                # microsegment
+                fracs = htcl_adj_data.adj_fracs(self.key_chains.get(mseg))
+                if fracs is None:
                     continue
                 # Establish set of dicts used to adjust the contributing
                 # microsegment energy, carbon, and cost data and master energy,
@@ -2180,83 +2571,10 @@ class Engine(object):
                     self.compete_adj_dicts(m, mseg, adopt_scheme)
                 # Adjust contributing and master energy/carbon/cost
                 # data to remove recorded supply-demand overlaps
-                for yr in self.handyvars.aeo_years:
-                    # Find the fraction of total possibly overlapping
-                    # heating/cooling energy for the given climate zone,
-                    # building type, and structure type combination that is
-                    # actually affected by ECMs in the analysis (e.g., if
-                    # looping through a supply-side contributing microsegment,
-                    # this is the portion of total energy affected by demand-
-                    # side microsegments in the analysis, and vice versa)
-                    if overlp_data["total"][yr] != 0:
-                        affected_frac = (overlp_data["total affected"][yr] /
-                                         overlp_data["total"][yr])
-                    else:
-                        affected_frac = 0
-                    # Find overall relative performance for the technology
-                    # type of the current contributing microsegment in the
-                    # given climate zone, building type, and structure type
-                    # combination
-                    if (type(tech_data["total affected"][yr]) !=
-                        numpy.ndarray and
-                        tech_data["total affected"][yr] != 0) or (
-                        type(tech_data[
-                            "total affected"][yr]) == numpy.ndarray and
-                        all([x != 0 for x in
-                             tech_data["total affected"][yr]])):
-                        rel_perf_tech = (1 - (
-                            tech_data["affected savings"][yr] /
-                            tech_data["total affected"][yr]))
-                    else:
-                        rel_perf_tech = 1
-                    # Find overall relative performance for the overlapping
-                    # technology type in the given climate zone, building
-                    # type, and structure type combination
-                    if (type(overlp_data["total affected"][yr]) !=
-                        numpy.ndarray and
-                        overlp_data["total affected"][yr] != 0) or (
-                        type(overlp_data[
-                            "total affected"][yr]) == numpy.ndarray and
-                        all([x != 0 for x in
-                             overlp_data["total affected"][yr]])):
-                        rel_perf_tech_overlp = (1 - (
-                            overlp_data["affected savings"][yr] /
-                            overlp_data["total affected"][yr]))
-                    else:
-                        rel_perf_tech_overlp = 1
-                    # Calculate the ratio of relative performances between the
-                    # current microsegment and overlapping microsegments'
-                    # technology types in the given climate zone, building
-                    # type, and structure type combination; ensure that
-                    # neither performance value is negative for the comparison
-                    if (all([type(x) != numpy.ndarray for x in [
-                        rel_perf_tech, rel_perf_tech_overlp]]) and
-                        (abs(1 - rel_perf_tech) +
-                         abs(1 - rel_perf_tech_overlp) != 0)) or (
-                        any([type(x) == numpy.ndarray for x in [
-                            rel_perf_tech, rel_perf_tech_overlp]]) and
-                        all([x != 0 for x in (
-                            abs(1 - rel_perf_tech) +
-                            abs(1 - rel_perf_tech_overlp))])):
-                        save_ratio = abs(1 - rel_perf_tech) / (abs(
-                            1 - rel_perf_tech) + abs(1 - rel_perf_tech_overlp))
-                    else:
-                        save_ratio = 0.5
-
-                    # Calculate baseline and efficient adjustment fractions
-
-                    # Adjust baseline data to reflect the fraction of energy
-                    # use affected by the overlapping microsegments, plus the
-                    # portion of affected energy use saved by the overlapping
-                    # microsegments
-                    adj_frac_base = (1 - affected_frac) + \
-                        affected_frac * save_ratio
-
-                    # Adjust efficient data in the same way as baseline data,
-                    # but with additional consideration for the energy savings
-                    # benefits of the overlapping microsegments
-                    adj_frac_eff = (1 - affected_frac) + \
-                        affected_frac * save_ratio * rel_perf_tech_overlp
+                for ind, yr in enumerate(self.handyvars.aeo_years):
+                    # Set the baseline and efficient adjustment fractions for
+                    # the current year
+                    adj_frac_base, adj_frac_eff = [x[ind] for x in fracs]
 
                     # Use the baseline/efficient adjustment fractions above to
                     # adjust the ECM's current contributing and master energy,
@@ -2423,85 +2741,24 @@ class Engine(object):
         # to which the current microsegment applies (uncompeted data in this
         # combination of categories will be adjusted to reflect competition)
 
-        # Convert microsegment string to a list
-        key_list = literal_eval(mseg_key)
-        # Establish applicable climate zone breakout
-        for cz in self.handyvars.out_break_czones.items():
-            if key_list[1] in cz[1]:
-                out_cz = cz[0]
-        # Establish applicable building type breakout
-        for bldg in self.handyvars.out_break_bldgtypes.items():
-            if all([x in bldg[1] for x in [
-                    key_list[2], key_list[-1]]]):
-                out_bldg = bldg[0]
-        # Establish applicable end use breakout
-        for eu in self.handyvars.out_break_enduses.items():
-            # * Note: The 'other' microsegment end
-            # use may map to either the 'Refrigeration' output
-            # breakout or the 'Other' output breakout, depending on
-            # the technology type specified in the measure
-            # definition. Also note that 'supply' side
-            # heating/cooling microsegments map to the
-            # 'Heating (Equip.)'/'Cooling (Equip.)' end uses, while
-            # 'demand' side heating/cooling microsegments map to
-            # the 'Envelope' end use, with the exception of
-            # 'demand' side heating/cooling microsegments that
-            # represent waste heat from lights - these are
-            # categorized as part of the 'Lighting' end use
-            if key_list[4] == "other":
-                if key_list[5] == "freezers":
-                    out_eu = "Refrigeration"
-                else:
-                    out_eu = "Other"
-            elif key_list[4] in eu[1]:
-                if (eu[0] in ["Heating (Equip.)",
-                              "Cooling (Equip.)"] and
-                    key_list[5] == "supply") or (
-                    eu[0] in ["Heating (Env.)",
-                              "Cooling (Env.)"] and
-                    key_list[5] == "demand" and
-                    key_list[0] == "primary") or (
-                    eu[0] not in ["Heating (Equip.)",
-                                  "Cooling (Equip.)",
-                                  "Heating (Env.)",
-                                  "Cooling (Env.)"]):
-                    out_eu = eu[0]
-            elif "lighting gain" in key_list:
-                out_eu = "Lighting"
-
-        # If applicable, establish fuel type breakout
+        # Find the parsed key chain for the current microsegment
+        kc = self.key_chains.get(mseg_key)
+        key_list = kc.chain
+        # Output breakout categories that depend only on the key chain are
+        # established once per key chain and stored with the key chain
+        if kc.out_break is None:
+            # Establish applicable climate zone, building type, end use, and
+            # (if applicable) fuel type being reduced breakouts
+            kc.out_break = self.out_breaks.key_chain(key_list)
+        out_cz, out_bldg, out_eu, out_fuel_save = kc.out_break
+
+        # If applicable, establish breakout of fuel type that is being added
+        # to via fuel switching
         if len(self.handyvars.out_break_fuels.keys()) != 0 and out_eu in [
             "Heating (Equip.)", "Cooling (Equip.)", "Heating (Env.)",
                 "Cooling (Env.)", "Water Heating", "Cooking"]:
             # Flag for detailed fuel type breakout
             detail = len(self.handyvars.out_break_fuels.keys()) > 2
-            # Establish breakout of fuel type that is being
-            # reduced (e.g., through efficiency or fuel switching
-            # away from the fuel)
-            for f in self.handyvars.out_break_fuels.items():
-                if key_list[3] in f[1]:
-                    # Special handling for other fuel tech.,
-                    # under detailed fuel type breakouts; this
-                    # tech. may fit into multiple fuel cats.
-                    if detail and key_list[3] == "other fuel":
-                        # Assign coal/kerosene tech.
-                        if f[0] == "Distillate/Other" and (
-                            key_list[-2] is not None and any([
-                                x in key_list[-2] for x in [
-                                "coal", "kerosene"]])):
-                            out_fuel_save = f[0]
-                        # Assign wood tech.
-                        elif f[0] == "Biomass" and (
-                            key_list[-2] is not None and "wood" in
-                                key_list[-2]):
-                            out_fuel_save = f[0]
-                        # All other tech. goes to propane
-                        elif f[0] == "Propane":
-                            out_fuel_save = f[0]
-                    else:
-                        out_fuel_save = f[0]
-            # Establish breakout of fuel type that is being added
-            # to via fuel switching, if applicable
             if m.fuel_switch_to == "electricity" and \
                     out_fuel_save != "Electric":
                 out_fuel_gain = "Electric"
@@ -2536,7 +2793,7 @@ class Engine(object):
             else:
                 out_fuel_gain = ""
         else:
-            out_fuel_save, out_fuel_gain = ("" for n in range(2))
+            out_fuel_gain = ""
 
         # Organize relevant starting master microsegment values into a list
         mast = m.markets[adopt_scheme]["competed"]["master_mseg"]
@@ -2667,14 +2924,9 @@ class Engine(object):
                 "cooling" not in mseg_key))):
             # Decompose contributing microsegment key information into a list,
             # to be modified per comment above
-            key_list = list(literal_eval(mseg_key))
+            key_list = list(kc.chain)
             # Determine the building type of the contributing microsegment
-            if any([x in mseg_key for x in [
-                    "single family home", "mobile home",
-                    "multi family home"]]):
-                mseg_bldg_sect = "residential"
-            else:
-                mseg_bldg_sect = "commercial"
+            mseg_bldg_sect = kc.bldg_sect
             # Case 1: heating is in the measure end uses, while heating is not
             # in the current contributing microsegment
             if "heating" in m.end_use["primary"] and (
@@ -2931,6 +3183,10 @@ class Engine(object):
                         " for measure " + m.name + " using the "
                         "keys " + mseg_key_stk_trk + ", " +
                         + mseg_key_stk_trk_alt + "," or mseg_key)
+        # Copy the stock data (and any memory-mapped year values therein) to
+        # plain dicts once, as these are read for each year and weighting
+        # year in 'compete_adj'
+        adj_stk_trk = compete_arrays.to_dict(adj_stk_trk)
 
         # Set total-baseline and competed-baseline contributing microsegment
         # stock/energy/carbon/cost totals to be updated in the
@@ -3196,9 +3452,7 @@ class Engine(object):
             # type for the current contributing primary microsegment from the
             # microsegment key chain information and use as the key for linking
             # the primary and its associated secondary microsegment
-            cz_bldg_struct = literal_eval(mseg_key)
-            secnd_mseg_adjkey = str((
-                cz_bldg_struct[1], cz_bldg_struct[2], cz_bldg_struct[-1]))
+            secnd_mseg_adjkey = self.key_chains.get(mseg_key).secnd_adj_key
 
             if secnd_mseg_adjkey in measure.markets[adopt_scheme][
                 "competed"]["mseg_adjust"][
@@ -3446,7 +3700,8 @@ class Engine(object):
                     (x[yr] * adj_c) for x in adjlist[6:]]
 
     def finalize_outputs(
-            self, adopt_scheme, trim_out, trim_yrs, report_stk, report_cfs):
+            self, adopt_scheme, trim_out, trim_yrs, report_stk, report_cfs,
+            mkt_fracs=False, ecm_writer=None):
         """Prepare selected measure outputs to write to a summary JSON file.
 
         Args:
@@ -3456,6 +3711,11 @@ class Engine(object):
             trim_yrs (list): Optional list of years to focus results on.
             report_stk (boolean): Flag for stock data reporting.
             report_cfs (boolean): Flag for reporting comp. scaling fractions.
+            mkt_fracs (boolean): Flag for market penetration reporting.
+            ecm_writer (object): Writer (json_stream.JSONStreamWriter) of the
+                summary JSON file to write each measure's outputs to (and
+                remove from 'output_ecms') once finalized, if the adoption
+                scenario is the last to be finalized; None otherwise.
         """
         # Initialize markets and savings totals across all ECMs
         summary_vals_all_ecms = [{
@@ -3498,14 +3758,9 @@ class Engine(object):
                 metrics_finance["irr (w/ energy and carbon costs)"],
                 metrics_finance["payback (w/ energy costs)"],
                 metrics_finance["payback (w/ energy and carbon costs)"]]
-            # Order the year entries in the above markets, savings,
-            # and portfolio metrics outputs
-            summary_vals_init = [OrderedDict(
-                sorted(x.items())) for x in summary_vals]
             # Apply focus year range, if applicable
-            summary_vals = [{
-                yr: summary_vals_init[v][yr] for yr in focus_yrs}
-                for v in range(len(summary_vals))]
+            summary_vals = [{yr: x[yr] for yr in focus_yrs}
+                            for x in summary_vals]
             # Add ECM markets and savings totals to totals across all ECMs
             summary_vals_all_ecms = [{
                 yr: summary_vals_all_ecms[v][yr] + summary_vals[v][yr] for
@@ -3514,6 +3769,8 @@ class Engine(object):
             # Find mean and 5th/95th percentile values of each output
             # (note: if output is point value, all three of these values
             # will be the same)
+            summary_avg, summary_low, summary_high = self.summary_stats(
+                summary_vals, focus_yrs)
 
             # Mean of outputs
             energy_base_avg, carb_base_avg, energy_cost_base_avg, \
@@ -3522,27 +3779,23 @@ class Engine(object):
                 energy_costsave_avg, carb_save_avg, carb_costsave_avg, \
                 cce_avg, cce_c_avg, ccc_avg, ccc_e_avg, \
                 irr_e_avg, irr_ec_avg, payback_e_avg, \
-                payback_ec_avg = [{
-                    k: numpy.mean(v) for k, v in z.items()} for
-                    z in summary_vals]
+                payback_ec_avg = summary_avg
             # 5th percentile of outputs
             energy_base_low, carb_base_low, energy_cost_base_low, \
                 carb_cost_base_low, energy_eff_low, carb_eff_low, \
                 energy_cost_eff_low, carb_cost_eff_low, energy_save_low, \
                 energy_costsave_low, carb_save_low, carb_costsave_low, \
                 cce_low, cce_c_low, ccc_low, ccc_e_low, \
-                irr_e_low, irr_ec_low, payback_e_low, payback_ec_low = [{
-                    k: numpy.percentile(v, 5) for k, v in z.items()} for
-                    z in summary_vals]
+                irr_e_low, irr_ec_low, payback_e_low, \
+                payback_ec_low = summary_low
             # 95th percentile of outputs
             energy_base_high, carb_base_high, energy_cost_base_high, \
                 carb_cost_base_high, energy_eff_high, carb_eff_high, \
                 energy_cost_eff_high, carb_cost_eff_high, energy_save_high, \
                 energy_costsave_high, carb_save_high, carb_costsave_high, \
                 cce_high, cce_c_high, ccc_high, ccc_e_high, \
-                irr_e_high, irr_ec_high, payback_e_high, payback_ec_high = [{
-                    k: numpy.percentile(v, 95) for k, v in z.items()} for
-                    z in summary_vals]
+                irr_e_high, irr_ec_high, payback_e_high, \
+                payback_ec_high = summary_high
 
             # Record updated markets and savings in Engine 'output'
             # attribute; initialize markets/savings breakouts by category as
@@ -3696,131 +3949,75 @@ class Engine(object):
             # measure (all post-competition); this yields fractions to use
             # in apportioning energy, carbon, and cost results by category
 
-            # Energy
-            # Calculate baseline energy fractions by output breakout category
-            frac_base_energy = self.out_break_walk(
-                m.markets[adopt_scheme]["competed"]["mseg_out_break"][
-                    "energy"]["baseline"], energy_base_avg, focus_yrs,
-                divide=True)
-            # Calculate efficient energy fractions by output breakout category
-            frac_eff_energy = self.out_break_walk(
-                m.markets[adopt_scheme]["competed"]["mseg_out_break"][
-                    "energy"]["efficient"], energy_eff_avg, focus_yrs,
-                divide=True)
-            # Determine total energy savings to use as normalization factor
-            norm_save_energy = {
-                yr: (energy_base_avg[yr] - energy_eff_avg[yr]) for
-                yr in focus_yrs}
-            # Calculate energy savings fractions by output breakout category
-            frac_save_energy = self.out_break_walk(
-                m.markets[adopt_scheme]["competed"][
-                    "mseg_out_break"]["energy"]["savings"],
-                norm_save_energy, focus_yrs, divide=True)
-
-            # Cost
-            # Calculate baseline energy cost fractions by output breakout
-            # category
-            frac_base_cost = self.out_break_walk(
-                m.markets[adopt_scheme]["competed"]["mseg_out_break"][
-                    "cost"]["baseline"], energy_cost_base_avg,
-                focus_yrs, divide=True)
-            # Calculate efficient energy cost fractions by output breakout
-            # category
-            frac_eff_cost = self.out_break_walk(
-                m.markets[adopt_scheme]["competed"]["mseg_out_break"][
-                    "cost"]["efficient"], energy_cost_eff_avg,
-                focus_yrs, divide=True)
-            # Determine total energy cost savings to use as normalization
-            # factor
-            norm_save_cost = {
-                yr: (energy_cost_base_avg[yr] - energy_cost_eff_avg[yr]) for
-                yr in focus_yrs}
-            # Calculate energy cost savings fractions by output breakout
-            # category
-            frac_save_cost = self.out_break_walk(
-                m.markets[adopt_scheme]["competed"][
-                    "mseg_out_break"]["cost"]["savings"],
-                norm_save_cost, focus_yrs, divide=True)
-
-            # Carbon
-            # Calculate baseline carbon fractions by output breakout category
-            frac_base_carb = self.out_break_walk(
-                m.markets[adopt_scheme]["competed"]["mseg_out_break"][
-                    "carbon"]["baseline"], carb_base_avg, focus_yrs,
-                divide=True)
-            # Calculate efficient carbon fractions by output breakout category
-            frac_eff_carb = self.out_break_walk(
-                m.markets[adopt_scheme]["competed"]["mseg_out_break"][
-                    "carbon"]["efficient"], carb_eff_avg, focus_yrs,
-                divide=True)
-            # Determine total carbon savings to use as normalization factor
-            norm_save_carb = {
-                yr: (carb_base_avg[yr] - carb_eff_avg[yr]) for
-                yr in focus_yrs}
-            # Calculate carbon savings fractions by output breakout category
-            frac_save_carb = self.out_break_walk(
-                m.markets[adopt_scheme]["competed"][
-                    "mseg_out_break"]["carbon"]["savings"],
-                norm_save_carb, focus_yrs, divide=True)
-
+            # Set the totals to normalize the breakout of each variable's
+            # baseline, efficient, and savings results by; savings are
+            # normalized by the difference between total baseline and
+            # efficient results
+            norm_vals = {
+                "energy": [energy_base_avg, energy_eff_avg],
+                "cost": [energy_cost_base_avg, energy_cost_eff_avg],
+                "carbon": [carb_base_avg, carb_eff_avg]}
+            for var in norm_vals.keys():
+                norm_vals[var].append({yr: (
+                    norm_vals[var][0][yr] - norm_vals[var][1][yr]) for
+                    yr in focus_yrs})
             # Create shorthand variable for results by breakout category
             mkt_save_brk = self.output_ecms[m.name][
                 "Markets and Savings (by Category)"][adopt_scheme]
-
-            # Apply output breakout fractions to total energy, carbon, and cost
-            # results initialized above
+            # Set the breakout variable (energy/cost/carbon) and case
+            # (baseline/efficient/savings) that partitions each of the
+            # total energy, carbon, and cost results initialized above
+            brk_keys = {}
             for k in mkt_save_brk.keys():
-                # Apply baseline partitioning fractions to baseline values
+                if "Energy Cost" in k:
+                    var = "cost"
+                elif "Energy" in k:
+                    var = "energy"
+                else:
+                    var = "carbon"
                 if "Baseline" in k:
-                    # Energy results
-                    if "Energy Use" in k:
-                        mkt_save_brk[k] = self.out_break_walk(
-                            copy.deepcopy(frac_base_energy), mkt_save_brk[k],
-                            focus_yrs, divide=False)
-                    # Energy cost results
-                    elif "Energy Cost" in k:
-                        mkt_save_brk[k] = self.out_break_walk(
-                            copy.deepcopy(frac_base_cost), mkt_save_brk[k],
-                            focus_yrs, divide=False)
-                    # Carbon results
-                    else:
-                        mkt_save_brk[k] = self.out_break_walk(
-                            copy.deepcopy(frac_base_carb), mkt_save_brk[k],
-                            focus_yrs, divide=False)
-                # Apply efficient partitioning fractions to efficient values
+                    brk_keys[k] = (var, 0)
                 elif "Efficient" in k:
-                    # Energy results
-                    if "Energy Use" in k:
-                        mkt_save_brk[k] = self.out_break_walk(
-                            copy.deepcopy(frac_eff_energy), mkt_save_brk[k],
-                            focus_yrs, divide=False)
-                    # Energy cost results
-                    elif "Energy Cost" in k:
-                        mkt_save_brk[k] = self.out_break_walk(
-                            copy.deepcopy(frac_eff_cost), mkt_save_brk[k],
-                            focus_yrs, divide=False)
-                    # Carbon results
-                    else:
-                        mkt_save_brk[k] = self.out_break_walk(
-                            copy.deepcopy(frac_eff_carb), mkt_save_brk[k],
-                            focus_yrs, divide=False)
-                # Apply savings partitioning fractions to savings values
+                    brk_keys[k] = (var, 1)
                 else:
-                    # Energy results
-                    if ("Energy" in k and "Cost" not in k):
-                        mkt_save_brk[k] = self.out_break_walk(
-                           copy.deepcopy(frac_save_energy), mkt_save_brk[k],
-                           focus_yrs, divide=False)
-                    # Energy cost results
-                    elif "Energy Cost" in k:
-                        mkt_save_brk[k] = self.out_break_walk(
-                           copy.deepcopy(frac_save_cost), mkt_save_brk[k],
-                           focus_yrs, divide=False)
-                    # Carbon results
-                    else:
-                        mkt_save_brk[k] = self.out_break_walk(
-                           copy.deepcopy(frac_save_carb), mkt_save_brk[k],
-                           focus_yrs, divide=False)
+                    brk_keys[k] = (var, 2)
+
+            # Collect the measure's breakout data for all variables and cases
+            # into a single array of values by breakout category and year
+            out_break = m.markets[adopt_scheme]["competed"]["mseg_out_break"]
+            out_break_arr = self.out_break_arrays(out_break, focus_yrs)
+            if out_break_arr is not None:
+                out_skel, out_vals = out_break_arr
+                # Set normalization totals for each variable and case
+                norm_arr = numpy.array([[[x[yr] for yr in focus_yrs] for
+                                         x in norm_vals[var]] for var in [
+                                         "energy", "cost", "carbon"]])
+                # Calculate fractions by breakout category; categories with a
+                # zero normalization total are assigned a zero fraction
+                fracs = numpy.zeros(out_vals.shape)
+                numpy.divide(out_vals, norm_arr[:, :, None, :], out=fracs,
+                             where=(norm_arr[:, :, None, :] != 0))
+                # Apply breakout fractions to total energy, carbon, and cost
+                # results
+                var_inds = {"energy": 0, "cost": 1, "carbon": 2}
+                for k, (var, case) in brk_keys.items():
+                    mkt_save_brk[k] = self.out_break_tree(
+                        out_skel, fracs[var_inds[var], case] * numpy.array(
+                            [mkt_save_brk[k][yr] for yr in focus_yrs]),
+                        focus_yrs)
+            else:
+                # Breakout data that cannot be collected into a single array
+                # (e.g., data with sampled values) are partitioned by walking
+                # through the breakout dicts
+                fracs = {var: [self.out_break_walk(
+                    out_break[var][case], norm_vals[var][ind], focus_yrs,
+                    divide=True) for ind, case in enumerate([
+                        "baseline", "efficient", "savings"])] for
+                    var in norm_vals.keys()}
+                for k, (var, case) in brk_keys.items():
+                    mkt_save_brk[k] = self.out_break_walk(
+                        copy.deepcopy(fracs[var][case]), mkt_save_brk[k],
+                        focus_yrs, divide=False)
 
             # Record low and high estimates on markets, if available and
             # user has not specified trimmed output
@@ -3905,7 +4102,7 @@ class Engine(object):
 
             # If a user desires measure market penetration percentages as an
             # output, calculate and report these fractions
-            if opts.mkt_fracs is True:
+            if mkt_fracs is True:
                 # Calculate market penetration percentages for the current
                 # measure and scenario; divide post-competition measure stock
                 # by the total stock that the measure could possibly affect
@@ -3915,12 +4112,8 @@ class Engine(object):
                       "total"]["all"][yr]) * 100), 1) for
                     yr in focus_yrs}
                 # Calculate average and low/high penetration fractions
-                mkt_fracs_avg = {
-                    k: numpy.mean(v) for k, v in mkt_fracs.items()}
-                mkt_fracs_low = {
-                    k: numpy.percentile(v, 5) for k, v in mkt_fracs.items()}
-                mkt_fracs_high = {
-                    k: numpy.percentile(v, 95) for k, v in mkt_fracs.items()}
+                mkt_fracs_avg, mkt_fracs_low, mkt_fracs_high = [
+                    x[0] for x in self.summary_stats([mkt_fracs], focus_yrs)]
                 # Set the average market penetration fraction output
                 self.output_ecms[m.name]["Markets and Savings (Overall)"][
                     adopt_scheme]["Stock Penetration (%)"] = mkt_fracs_avg
@@ -3934,7 +4127,7 @@ class Engine(object):
                         mkt_fracs_high
             # If a user desires stock data as an output, calculate and report
             # these data for the baseline and measure cases
-            if opts.report_stk is True:
+            if report_stk is True:
                 # Determine correct units to use for stock reporting
 
                 # Envelope tech.; use units of ft^2 floor
@@ -4053,34 +4246,35 @@ class Engine(object):
                         yr: (stk_cost_meas_high[yr] - stk_meas_high[yr])
                         for yr in focus_yrs}
 
+            # If the measure's outputs are now complete for all adoption
+            # scenarios, write them out and release them
+            if ecm_writer is not None:
+                ecm_writer.write(m.name, self.output_ecms.pop(m.name))
+
         # Find mean and 5th/95th percentile values of each market/savings
         # total across all ECMs (note: if total is point value, all three of
         # these values will be the same)
 
+        summary_all_avg, summary_all_low, summary_all_high = \
+            self.summary_stats(summary_vals_all_ecms, focus_yrs)
         # Mean of outputs across all ECMs
         energy_base_all_avg, carb_base_all_avg, energy_cost_base_all_avg, \
             carb_cost_base_all_avg, energy_eff_all_avg, carb_eff_all_avg, \
             energy_cost_eff_all_avg, carb_cost_eff_all_avg, \
             energy_save_all_avg, energy_costsave_all_avg, carb_save_all_avg, \
-            carb_costsave_all_avg = [{
-                k: numpy.mean(v) for k, v in z.items()} for
-                z in summary_vals_all_ecms]
+            carb_costsave_all_avg = summary_all_avg
         # 5th percentile of outputs across all ECMs
         energy_base_all_low, carb_base_all_low, energy_cost_base_all_low, \
             carb_cost_base_all_low, energy_eff_all_low, carb_eff_all_low, \
             energy_cost_eff_all_low, carb_cost_eff_all_low, \
             energy_save_all_low, energy_costsave_all_low, carb_save_all_low, \
-            carb_costsave_all_low = [{
-                k: numpy.percentile(v, 5) for k, v in z.items()} for
-                z in summary_vals_all_ecms]
+            carb_costsave_all_low = summary_all_low
         # 95th percentile of outputs across all ECMs
         energy_base_all_high, carb_base_all_high, energy_cost_base_all_high, \
             carb_cost_base_all_high, energy_eff_all_high, carb_eff_all_high, \
             energy_cost_eff_all_high, carb_cost_eff_all_high, \
             energy_save_all_high, energy_costsave_all_high, \
-            carb_save_all_high, carb_costsave_all_high = [{
-                k: numpy.percentile(v, 95) for k, v in z.items()} for
-                z in summary_vals_all_ecms]
+            carb_save_all_high, carb_costsave_all_high = summary_all_high
 
         # Record mean markets and savings across all ECMs
         self.output_all["All ECMs"]["Markets and Savings (Overall)"][
@@ -4130,6 +4324,156 @@ class Engine(object):
             mkt_sv_all["Efficient CO2 Cost (high) (USD)".translate(sub)] = \
                 carb_cost_eff_all_high
 
+    def summary_stats(self, summary_vals, focus_yrs):
+        """Find the mean and 5th/95th percentile values of outputs by year.
+
+        Notes:
+            Outputs with point values in all years have the same mean, low,
+            and high values. Outputs with sampled values in all years are
+            stacked by number of samples into arrays of dimensions (output ×
+            year × sample), such that each stack is reduced over the sample
+            axis at once. Outputs that mix point and sampled values are
+            reduced year by year.
+
+        Args:
+            summary_vals (list): Output values by year (point values or
+                arrays of sampled values).
+            focus_yrs (list): Years to find mean and percentile values for.
+
+        Returns:
+            Lists of mean, 5th percentile, and 95th percentile values by year
+            for each output, in the order of the input outputs.
+        """
+        # Initialize mean and low/high values for each output
+        avg, low, high = ([None] * len(summary_vals) for n in range(3))
+        # Initialize stacks of outputs with sampled values, keyed by the
+        # number and data type of the samples
+        stacks = {}
+        for ind, z in enumerate(summary_vals):
+            vals = [z[yr] for yr in focus_yrs]
+            # All point values
+            if not any([isinstance(v, numpy.ndarray) for v in vals]):
+                avg[ind] = low[ind] = high[ind] = dict(zip(
+                    focus_yrs, numpy.array(vals, dtype=float)))
+            # All sampled values with the same number of samples
+            elif all([isinstance(v, numpy.ndarray) and v.ndim == 1 and
+                      v.shape == vals[0].shape and v.dtype == vals[0].dtype
+                      for v in vals]):
+                stacks.setdefault(
+                    (vals[0].shape, vals[0].dtype), []).append((ind, vals))
+            # Mixed point and sampled values
+            else:
+                avg[ind] = {yr: numpy.mean(z[yr]) for yr in focus_yrs}
+                low[ind] = {yr: numpy.percentile(z[yr], 5) for
+                            yr in focus_yrs}
+                high[ind] = {yr: numpy.percentile(z[yr], 95) for
+                             yr in focus_yrs}
+        # Reduce each stack of outputs with sampled values over the sample axis
+        for stack in stacks.values():
+            vals = numpy.array([x[1] for x in stack])
+            stack_avg = numpy.mean(vals, axis=-1)
+            stack_low, stack_high = numpy.percentile(vals, [5, 95], axis=-1)
+            for n, (ind, v) in enumerate(stack):
+                avg[ind], low[ind], high[ind] = [dict(zip(
+                    focus_yrs, x[n])) for x in [
+                    stack_avg, stack_low, stack_high]]
+
+        return avg, low, high
+
+    def out_break_arrays(self, out_break, focus_yrs):
+        """Collect a measure's output breakout data into a single array.
+
+        Notes:
+            Breakout categories without data (empty dicts) are skipped, as in
+            'out_break_walk'. Data that cannot be collected into a single
+            array (e.g., data with sampled values, or variables and cases
+            that are broken out into different categories) yield None, and
+            should be partitioned using 'out_break_walk'.
+
+        Args:
+            out_break (dict): Measure baseline, efficient, and savings results
+                for energy, cost, and carbon by climate zone, building type,
+                end use, and (optionally) fuel type.
+            focus_yrs (list): Years of focus within overall year range.
+
+        Returns:
+            Tuple of a dict with the structure of the breakout categories,
+            terminating in the row of each category in the array, and an
+            array of breakout values with dimensions (variable (energy/cost/
+            carbon) × case (baseline/efficient/savings) × category × year).
+        """
+        focus_yrs_set = set(focus_yrs)
+        # Initialize breakout category structure and rows of values for
+        # each variable and case
+        skels, rows = [], []
+
+        def walk(data, rows_vc):
+            skel = {}
+            for k, i in data.items():
+                if not isinstance(i, dict):
+                    raise ValueError
+                elif len(i.keys()) == 0:
+                    continue
+                elif all([not isinstance(x, dict) for x in i.values()]):
+                    # Breakout category data must have point values for the
+                    # focus years
+                    if [yr for yr in i.keys() if yr in focus_yrs_set] != \
+                        focus_yrs or any([
+                            isinstance(i[yr], numpy.ndarray) for
+                            yr in focus_yrs]):
+                        raise ValueError
+                    skel[k] = len(rows_vc)
+                    rows_vc.append([i[yr] for yr in focus_yrs])
+                else:
+                    skel[k] = walk(i, rows_vc)
+            return skel
+
+        try:
+            for var in ["energy", "cost", "carbon"]:
+                for case in ["baseline", "efficient", "savings"]:
+                    rows.append([])
+                    skels.append(walk(out_break[var][case], rows[-1]))
+        except ValueError:
+            return None
+
+        # Breakout fractions are applied to results through a second walk
+        # of the breakout categories, which drops any categories emptied of
+        # data by the first walk
+        def prune(skel):
+            return {k: prune(i) if isinstance(i, dict) else i for
+                    k, i in skel.items() if not (
+                        isinstance(i, dict) and len(i.keys()) == 0)}
+
+        skels = [prune(x) for x in skels]
+        # All variables and cases must be broken out into the same categories
+        if any([x != skels[0] for x in skels[1:]]):
+            return None
+        out_vals = numpy.array(rows, dtype=float).reshape(
+            3, 3, len(rows[0]), len(focus_yrs))
+
+        return skels[0], out_vals
+
+    def out_break_tree(self, skel, vals, focus_yrs):
+        """Expand breakout values into a dict of results by category.
+
+        Args:
+            skel (dict): Structure of breakout categories, terminating in
+                the row of each category's values (see 'out_break_arrays').
+            vals (numpy.ndarray): Values by breakout category and year.
+            focus_yrs (list): Years of focus within overall year range.
+
+        Returns:
+            Results by climate zone, building type, end use, and (optionally)
+            fuel type.
+        """
+        vals = vals.tolist()
+
+        def expand(skel_lvl):
+            return {k: dict(zip(focus_yrs, vals[i])) if isinstance(i, int)
+                    else expand(i) for k, i in skel_lvl.items()}
+
+        return expand(skel)
+
     def out_break_walk(self, adjust_dict, adjust_vals, focus_yrs, divide):
         """Partition measure results by climate, building sector, and end use.
 
@@ -4166,6 +4510,236 @@ class Engine(object):
                 del adjust_dict[k]
         return adjust_dict
 
+    def scheme_outputs(self, adopt_scheme):
+        """Collect the finalized outputs of a consumer adoption scenario.
+
+        Args:
+            adopt_scheme (string): Consumer adoption scenario to collect
+                outputs for.
+
+        Returns:
+            Dict of the scenario's outputs by measure and across all
+            measures, for merging into the outputs of another Engine object
+            (see 'merge_scheme_outputs').
+        """
+        outputs = {
+            "ecms": {m.name: {
+                "overall": self.output_ecms[m.name][
+                    "Markets and Savings (Overall)"][adopt_scheme],
+                "by category": self.output_ecms[m.name][
+                    "Markets and Savings (by Category)"][adopt_scheme],
+                "financial metrics": self.output_ecms[m.name][
+                    "Financial Metrics"]} for m in self.measures},
+            "all": self.output_all["All ECMs"][
+                "Markets and Savings (Overall)"][adopt_scheme],
+            "cfs": self.output_ecms_cfs}
+
+        return outputs
+
+    def merge_scheme_outputs(self, adopt_scheme, outputs, ecm_writer=None):
+        """Merge the finalized outputs of a consumer adoption scenario.
+
+        Notes:
+            Financial metrics and competition adjustment fractions do not
+            vary by adoption scenario and are overwritten by each scenario's
+            outputs, as when the scenarios are finalized in sequence.
+
+        Args:
+            adopt_scheme (string): Consumer adoption scenario to merge
+                outputs for.
+            outputs (dict): Outputs of the scenario (see 'scheme_outputs').
+            ecm_writer (object): Writer of the summary JSON file to write
+                each measure's merged outputs to (see 'finalize_outputs').
+        """
+        for m in self.measures:
+            out_m = outputs["ecms"].pop(m.name)
+            self.output_ecms[m.name]["Markets and Savings (Overall)"][
+                adopt_scheme] = out_m["overall"]
+            self.output_ecms[m.name]["Markets and Savings (by Category)"][
+                adopt_scheme] = out_m["by category"]
+            self.output_ecms[m.name]["Financial Metrics"] = \
+                out_m["financial metrics"]
+            if ecm_writer is not None:
+                ecm_writer.write(m.name, self.output_ecms.pop(m.name))
+        self.output_all["All ECMs"]["Markets and Savings (Overall)"][
+            adopt_scheme] = outputs["all"]
+        if outputs["cfs"] is not None:
+            self.output_ecms_cfs = outputs["cfs"]
+
+
+def compete_group_worker(meas_inds):
+    """Compete a group of measures in a worker process.
+
+    Args:
+        meas_inds (list): Indices of the measures in the group.
+
+    Returns:
+        Tuple of the measure indices and the competed master microsegments
+        and output breakouts of each measure.
+    """
+    # Shorthand for data inherited from the parent process
+    sd = run_shared_data
+    a_run, adopt_scheme = sd["engine"], sd["adopt_scheme"]
+    measures = [a_run.measures[x] for x in meas_inds]
+    a_run.compete_measures(
+        adopt_scheme, sd["htcl_totals"], measures=measures)
+    competed = [{k: m.markets[adopt_scheme]["competed"][k] for k in [
+        "master_mseg", "mseg_out_break"]} for m in measures]
+
+    return meas_inds, competed
+
+
+def run_adopt_scheme(a_run, adopt_scheme, htcl_totals, trim_out, trim_yrs,
+                     workers, opts, report=True, ecm_writer=None):
+    """Calculate and finalize the outputs of a consumer adoption scenario.
+
+    Args:
+        a_run (object): Engine object with the active measures.
+        adopt_scheme (string): Consumer adoption scenario to run.
+        htcl_totals (dict): Heating/cooling energy totals by region,
+            building type, structure type, fuel type, and end use.
+        trim_out (boolean): Flag for trimmed down results file.
+        trim_yrs (list): Optional list of years to focus results on.
+        workers (int): Number of processes to compete independent groups of
+            measures across.
+        opts (object): Stores user-specified execution options.
+        report (boolean): Flag to print progress updates to the console.
+        ecm_writer (object): Writer of the summary JSON file to write each
+            measure's outputs to once finalized (see 'finalize_outputs').
+    """
+    # Set function that only prints progress updates when required
+    progprint = print if report else lambda *a, **k: None
+    # Calculate each measure's uncompeted savings and metrics,
+    # and print progress update to user
+    progprint("Calculating uncompeted '" + adopt_scheme +
+              "' savings/metrics...", end="", flush=True)
+    a_run.calc_savings_metrics(adopt_scheme, "uncompeted")
+    progprint("Calculations complete")
+    # Update each measure's competed markets to reflect the
+    # removal of savings overlaps with competing measures,
+    # and print progress update to user
+    progprint("Competing ECMs for '" + adopt_scheme + "' scenario...",
+              end="", flush=True)
+    a_run.compete_measures(adopt_scheme, htcl_totals, workers)
+    progprint("Competition complete")
+    # Calculate each measure's competed measure savings and metrics
+    # using updated competed markets, and print progress update to user
+    progprint("Calculating competed '" + adopt_scheme +
+              "' savings/metrics...", end="", flush=True)
+    a_run.calc_savings_metrics(adopt_scheme, "competed")
+    progprint("Calculations complete")
+    progprint("Finalizing results...", end="", flush=True)
+    # Write selected outputs to a summary JSON file for post-processing
+    a_run.finalize_outputs(
+        adopt_scheme, trim_out, trim_yrs, opts.report_stk,
+        opts.report_cfs, opts.mkt_fracs, ecm_writer)
+    progprint("Results finalized")
+
+
+def adopt_scheme_worker(adopt_scheme, workers, opts, conn):
+    """Run a consumer adoption scenario in a worker process.
+
+    Args:
+        adopt_scheme (string): Consumer adoption scenario to run.
+        workers (int): Number of processes to compete independent groups of
+            measures across within the scenario.
+        opts (object): Stores user-specified execution options.
+        conn (object): Connection to send the scenario's outputs (or the
+            traceback of any error) back to the parent process through.
+    """
+    # Shorthand for data inherited from the parent process
+    sd = run_shared_data
+    try:
+        run_adopt_scheme(
+            sd["engine"], adopt_scheme, sd["htcl_totals"], sd["trim_out"],
+            sd["trim_yrs"], workers, opts, report=False)
+        conn.send(("outputs", sd["engine"].scheme_outputs(adopt_scheme)))
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+def run_adopt_schemes(a_run, adopt_schemes, htcl_totals, trim_out, trim_yrs,
+                      n_workers, opts, report=True, ecm_writer=None):
+    """Calculate and finalize the outputs of all consumer adoption scenarios.
+
+    Args:
+        a_run (object): Engine object with the active measures.
+        adopt_schemes (list): Consumer adoption scenarios to run.
+        htcl_totals (dict): Heating/cooling energy totals by region,
+            building type, structure type, fuel type, and end use.
+        trim_out (boolean): Flag for trimmed down results file.
+        trim_yrs (list): Optional list of years to focus results on.
+        n_workers (int): Number of processes to run the adoption scenarios
+            and compete independent groups of measures across (worker
+            processes require the 'fork' process start method).
+        opts (object): Stores user-specified execution options.
+        report (boolean): Flag to print progress updates to the console.
+        ecm_writer (object): Writer of the summary JSON file to write each
+            measure's outputs to once finalized for all of the adoption
+            scenarios (see 'finalize_outputs'), or None to keep the outputs
+            in the Engine object's 'output_ecms' attribute.
+    """
+    # Set function that only prints progress updates when required
+    progprint = print if report else lambda *a, **k: None
+    # Set the writer of measure outputs for each scenario; the outputs for
+    # each measure are complete once the last scenario is finalized
+    ecm_writers = [None] * (len(adopt_schemes) - 1) + [ecm_writer]
+    if n_workers > 1 and len(adopt_schemes) > 1:
+        # Run each adoption scenario in its own process (the scenarios are
+        # independent of one another), splitting the remaining processes
+        # across the scenarios for competing independent groups of measures
+        n_schemes = len(adopt_schemes)
+        grp_workers = max(1, n_workers // n_schemes)
+        progprint("Calculating savings/metrics for '" + "', '".join(
+            adopt_schemes) + "' scenarios in parallel...",
+            end="", flush=True)
+        global run_shared_data
+        run_shared_data = {
+            "engine": a_run, "htcl_totals": htcl_totals,
+            "trim_out": trim_out, "trim_yrs": trim_yrs}
+        ctx, procs = multiprocessing.get_context("fork"), []
+        try:
+            # Scenario processes are not daemonic, such that they may in
+            # turn start processes to compete groups of measures
+            for adopt_scheme in adopt_schemes:
+                conn_recv, conn_send = ctx.Pipe(duplex=False)
+                proc = ctx.Process(
+                    target=adopt_scheme_worker,
+                    args=(adopt_scheme, grp_workers, opts, conn_send))
+                proc.start()
+                conn_send.close()
+                procs.append((adopt_scheme, proc, conn_recv))
+            # Merge each scenario's outputs in the original scenario order
+            for (adopt_scheme, proc, conn_recv), writer in zip(
+                    procs, ecm_writers):
+                try:
+                    out_type, outputs = conn_recv.recv()
+                except EOFError:
+                    # The process exited without sending any outputs
+                    proc.join()
+                    out_type, outputs = (
+                        "error", "process exited with code " +
+                        str(proc.exitcode))
+                proc.join()
+                if out_type == "error":
+                    raise Exception(
+                        "Error calculating '" + adopt_scheme +
+                        "' scenario savings/metrics: " + outputs)
+                a_run.merge_scheme_outputs(adopt_scheme, outputs, writer)
+        finally:
+            run_shared_data = None
+            for adopt_scheme, proc, conn_recv in procs:
+                if proc.is_alive():
+                    proc.terminate()
+                proc.join()
+        progprint("Results finalized")
+    else:
+        for adopt_scheme, writer in zip(adopt_schemes, ecm_writers):
+            run_adopt_scheme(a_run, adopt_scheme, htcl_totals, trim_out,
+                             trim_yrs, n_workers, opts, report, writer)
+
 
 def main(base_dir):
     """Import, finalize, and write out measure savings and financial metrics.
@@ -4217,14 +4791,19 @@ def main(base_dir):
     else:
         trim_out, trim_yrs = (False for n in range(2))
 
-    # Import measure files
-    with open(path.join(base_dir, *handyfiles.meas_summary_data), 'r') as mjs:
-        try:
-            meas_summary = json.load(mjs)
-        except ValueError as e:
-            raise ValueError(
-                "Error reading in '" + handyfiles.meas_summary_data +
-                "': " + str(e)) from None
+    # Open store of measure summary data (reading only the index of the
+    # measures in the file; the data of active measures are read below)
+    try:
+        meas_store = summary_store.SummaryStore(
+            path.join(base_dir, *handyfiles.meas_summary_data))
+    except ValueError as e:
+        raise ValueError(
+            "Error reading in '" + path.join(*handyfiles.meas_summary_data) +
+            "': " + str(e)) from None
+    if not meas_store.exists:
+        raise FileNotFoundError(
+            "No such file: '" + path.join(*handyfiles.meas_summary_data) +
+            "'")
 
     # Import list of all unique active measures
     with open(path.join(base_dir, handyfiles.active_measures), 'r') as am:
@@ -4241,7 +4820,7 @@ def main(base_dir):
     # matching ECM definition in ./ecm_definitions; warn users about ECMs
     # that do not have a matching ECM definition, which will be excluded
     for mn in active_meas_all:
-        if mn not in [m["name"] for m in meas_summary]:
+        if mn not in meas_store:
             print("WARNING: ECM '" + mn + "' in 'run_setup.json' active " +
                   "list does not match any of the ECM names found in " +
                   "./ecm_definitions JSONs and will not be simulated")
@@ -4258,16 +4837,21 @@ def main(base_dir):
                          "found in the 'name' field for corresponding " +
                          "measure definitions in ./ecm_definitions"))
     else:
+        # Read the summary data of active measures only
+        meas_summary = meas_store.records(active_meas_all)
         measures_objlist = [
             Measure(handyvars, **m) for m in meas_summary if
             m["name"] in active_meas_all and m["remove"] is False]
 
     # Check to ensure that all active/valid measure definitions used consistent
-    # user option settings
+    # user option settings (excepting the number of processes used to prepare
+    # the measures and the output file format, which have no bearing on
+    # results)
     try:
         if not all([all([
             m.usr_opts[x] == measures_objlist[0].usr_opts[x] for
-            x in measures_objlist[0].usr_opts.keys()])
+            x in measures_objlist[0].usr_opts.keys() if x not in [
+                "workers", "compact_json"]])
                 for m in measures_objlist[1:]]):
             raise ValueError(
                 "Attempting to compete measures with different user option "
@@ -4388,14 +4972,15 @@ def main(base_dir):
         meas_file_name = m.name + ".pkl.gz"
         # Assemble folder path for measure competition data
         comp_folder_name = path.join(*handyfiles.meas_compete_data)
-        with gzip.open(path.join(
-                base_dir, comp_folder_name, meas_file_name), 'r') as zp:
-            try:
-                meas_comp_data = pickle.load(zp)
-            except Exception as e:
-                raise Exception(
-                    "Error reading in competition data of " +
-                    "ECM '" + m.name + "': " + str(e)) from None
+        # Load competition data; year values written as flat arrays are
+        # memory-mapped rather than read in full
+        try:
+            meas_comp_data = compete_arrays.load_compete_data(path.join(
+                base_dir, comp_folder_name, meas_file_name))
+        except Exception as e:
+            raise Exception(
+                "Error reading in competition data of " +
+                "ECM '" + m.name + "': " + str(e)) from None
         # Assemble folder path for measure efficient fuel split data
         fs_splt_folder_name = path.join(*handyfiles.meas_eff_fs_splt_data)
         try:
@@ -4406,30 +4991,35 @@ def main(base_dir):
             meas_eff_fs_data = None
         for adopt_scheme in handyvars.adopt_schemes:
             # Reset measure microsegment data attribute to imported values;
-            # initialize an uncompeted and post-competition copy of these data
-            # (the former of which will be used to establish a common set of
-            # stock turnover constraints in the competition, the latter of which
-            # will be adjusted by the competition)
+            # initialize an uncompeted and post-competition version of these
+            # data (the former of which will be used to establish a common set
+            # of stock turnover constraints in the competition, the latter of
+            # which will be adjusted by the competition); the post-competition
+            # version is a copy-on-write layer over the uncompeted data, such
+            # that only the data for the contributing microsegment key chains
+            # read by the competition are copied (each in full, to a plain
+            # dict, when first read)
             m.markets[adopt_scheme]["uncompeted"]["mseg_adjust"] = \
                 meas_comp_data[adopt_scheme]
             m.markets[adopt_scheme]["competed"]["mseg_adjust"] = \
-                copy.deepcopy(
-                    m.markets[adopt_scheme]["uncompeted"]["mseg_adjust"])
+                compete_arrays.CompetedLayer(
+                    m.markets[adopt_scheme]["uncompeted"]["mseg_adjust"],
+                    depth=1)
             # Reset measure fuel split attribute to imported values
             m.eff_fs_splt = meas_eff_fs_data
         # Print data import message for each ECM if in verbose mode
         verboseprint("Imported ECM '" + m.name + "' competition data")
 
-    # Import total absolute heating and cooling energy use data, used in
+    # Set the regions and building types that active measures apply to
+    czgrp = set([cz for m in measures_objlist for cz in m.climate_zone])
+    btgrp = set([bt for m in measures_objlist for bt in m.bldg_type])
+
+    # Set up total absolute heating and cooling energy use data, used in
     # removing overlaps between supply-side and demand-side heating/cooling
-    # ECMs in the analysis
-    with open(path.join(base_dir, *handyfiles.htcl_totals), 'r') as msi:
-        try:
-            htcl_totals = json.load(msi)
-        except ValueError as e:
-            raise ValueError(
-                "Error reading in '" +
-                handyfiles.htcl_totals + "': " + str(e)) from None
+    # ECMs in the analysis; the data are only read in if such overlaps are
+    # found, and only for the regions and building types of active measures
+    htcl_totals = htcl_overlaps.HtclTotals(
+        path.join(base_dir, *handyfiles.htcl_totals), czgrp, btgrp)
 
     # Print message to console; if in verbose mode, print to new line,
     # otherwise append to existing message on the console
@@ -4440,54 +5030,77 @@ def main(base_dir):
 
     # Instantiate an Engine object using active measures list
     a_run = Engine(handyvars, measures_objlist, energy_out, brkout,
-                   opts.report_cfs)
-
+                   opts.report_cfs, opts.batch_compete)
+
+    # Set the number of processes to use in running the adoption scenarios
+    # and competing measures; worker processes read the Engine object and
+    # input data from memory inherited at process creation, which requires
+    # the 'fork' start method
+    n_workers = opts.workers
+    if n_workers > 1 and \
+            "fork" not in multiprocessing.get_all_start_methods():
+        warnings.warn(
+            "WARNING: Parallel runs require the 'fork' process start "
+            "method, which is unavailable on this system; adoption "
+            "scenarios and measure competition will be run serially")
+        n_workers = 1
+    # Read in the heating/cooling energy use data before any worker
+    # processes are started if both supply-side and demand-side
+    # heating/cooling ECMs are active, such that the data are read once
+    # rather than in each process that needs them
+    if n_workers > 1 and all([any([
+        x in m.technology_type["primary"] and any([
+            eu in ["heating", "cooling", "secondary heating"] for
+            eu in m.end_use["primary"]]) for m in measures_objlist])
+            for x in ["supply", "demand"]]):
+        htcl_totals.load()
+
+    # Open the JSON file of summary outputs for individual measures; the
+    # outputs for each measure are written to the file (and released) as
+    # soon as they are finalized for all adoption scenarios, and the file
+    # replaces any previous version of the file only once fully written
+    # (such that an interrupted run leaves the previous version as is)
+    ecm_writer = json_stream.JSONStreamWriter(path.join(
+        base_dir, *handyfiles.meas_engine_out_ecms),
+        compact=opts.compact_json)
     # Calculate uncompeted and competed measure savings and financial
     # metrics, and write key outputs to JSON file
-    for adopt_scheme in handyvars.adopt_schemes:
-        # Calculate each measure's uncompeted savings and metrics,
-        # and print progress update to user
-        print("Calculating uncompeted '" + adopt_scheme +
-              "' savings/metrics...", end="", flush=True)
-        a_run.calc_savings_metrics(adopt_scheme, "uncompeted")
-        print("Calculations complete")
-        # Update each measure's competed markets to reflect the
-        # removal of savings overlaps with competing measures,
-        # and print progress update to user
-        print("Competing ECMs for '" + adopt_scheme + "' scenario...",
-              end="", flush=True)
-        a_run.compete_measures(adopt_scheme, htcl_totals)
-        print("Competition complete")
-        # Calculate each measure's competed measure savings and metrics
-        # using updated competed markets, and print progress update to user
-        print("Calculating competed '" + adopt_scheme +
-              "' savings/metrics...", end="", flush=True)
-        a_run.calc_savings_metrics(adopt_scheme, "competed")
-        print("Calculations complete")
-        print("Finalizing results...", end="", flush=True)
-        # Write selected outputs to a summary JSON file for post-processing
-        a_run.finalize_outputs(
-            adopt_scheme, trim_out, trim_yrs, opts.report_stk,
-            opts.report_cfs)
-        print("Results finalized")
+    run_adopt_schemes(a_run, handyvars.adopt_schemes, htcl_totals, trim_out,
+                      trim_yrs, n_workers, opts, ecm_writer=ecm_writer)
 
     # Notify user that all analysis engine calculations are completed
     print("All calculations complete; writing output data...", end="",
           flush=True)
 
-    # Import baseline microsegments
-    if regions in ['EMM', 'State']:  # Extract compressed EMM/state data
-        bjszip = path.join(base_dir, *handyfiles.msegs_in)
-        with gzip.GzipFile(bjszip, 'r') as zip_ref:
-            msegs = json.loads(zip_ref.read().decode('utf-8'))
-    else:
-        with open(path.join(base_dir, *handyfiles.msegs_in), 'r') as msi:
+    # Drop multi family and mobile homes from the building types used by
+    # active measures for aggregating onsite generation data; no onsite
+    # generation data are provided for these building types
+    btgrp = set([bt for bt in btgrp
+                 if bt not in ['mobile home', 'multi family home']])
+
+    # Import onsite generation energy data from the summary of the baseline
+    # microsegments file, if the summary reflects the current version of the
+    # file (see 'onsite_gen'); otherwise, import baseline microsegments
+    msegs_file = path.join(base_dir, *handyfiles.msegs_in)
+    osg_data = onsite_gen.load_summary(msegs_file)
+    if osg_data is None and regions in ['EMM', 'State']:
+        # EMM/state data are read from shards by region and building type,
+        # and only for the regions and building types of active measures
+        # (see 'mseg_shards'; the data are sharded on first use)
+        osg_data = onsite_gen.sum_onsite_gen(
+            mseg_shards.load_msegs(msegs_file), czgrp, btgrp)
+    elif osg_data is None:
+        with open(msegs_file, 'r') as msi:
             try:
                 msegs = json.load(msi)
             except ValueError as e:
                 raise ValueError(
                     "Error reading in '" +
                     handyfiles.msegs_in + "': " + str(e)) from None
+        # Summarize onsite generation data such that later runs need not
+        # read in the baseline microsegments file again
+        osg_data = onsite_gen.write_summary(msegs, msegs_file)
+        del msegs
 
     # Import site-source conversions
     with open(path.join(base_dir, *handyfiles.ss_data), 'r') as ss:
@@ -4519,19 +5132,6 @@ def main(base_dir):
         elec_cost = elec_cost_carb['electricity']['price']['data']
         fmt = False
 
-    # Determine regions and building types used by active measures for
-    # aggregating onsite generation data
-    czgrp = set([cz for m in meas_summary
-                 if m["name"] in active_meas_all and m["remove"] is False
-                 for cz in m['climate_zone']])
-    btgrp = [bt for m in meas_summary
-             if m["name"] in active_meas_all and m["remove"] is False
-             for bt in m['bldg_type']]
-    # Drop multi family and mobile homes; no onsite generation data
-    # are provided for these building types
-    btgrp = set([bt for bt in btgrp
-                 if bt not in ['mobile home', 'multi family home']])
-
     # Set up recursively extensible empty dict to populate with onsite
     # generation data
     def variable_depth_dict(): return defaultdict(variable_depth_dict)
@@ -4543,7 +5143,7 @@ def main(base_dir):
     osgcost = {k: 0 for k in handyvars.aeo_years}
     for cz in czgrp:
         for bt in btgrp:
-            z = msegs[cz][bt]['electricity']['onsite generation']['energy']
+            z = osg_data[cz][bt]
             # Get onsite generation and adjust by appropriate factor
             # unless site user opts are expected
             if not measures_objlist[0].usr_opts["site_energy"]:
@@ -4601,23 +5201,22 @@ def main(base_dir):
     osg_temp['Energy Cost (USD)']['Overall'] = osgcost
 
     # Add onsite generation data as additional measure-level data
-    # written with ECM results output
-    a_run.output_ecms['On-site Generation'] = osg_temp
-
-    # Write summary outputs for individual measures to a JSON
-    with open(path.join(
-            base_dir, *handyfiles.meas_engine_out_ecms), "w") as jso:
-        json.dump(a_run.output_ecms, jso, indent=2)
+    # written with ECM results output, completing the summary outputs for
+    # individual measures
+    ecm_writer.write('On-site Generation', osg_temp)
+    ecm_writer.close()
     # Write summary outputs across all measures to a JSON
     with open(path.join(
             base_dir, *handyfiles.meas_engine_out_agg), "w") as jso:
-        json.dump(a_run.output_all, jso, indent=2)
+        json_stream.dump(a_run.output_all, jso, compact=opts.compact_json)
     print("Data writing complete")
     # Write competition adjustment fractions to a JSON, if applicable
     if a_run.output_ecms_cfs is not None:
-        with open(path.join(
-                base_dir, *handyfiles.comp_fracs_out), "w") as jso:
-            json.dump(a_run.output_ecms_cfs, jso, indent=2)
+        with json_stream.JSONStreamWriter(path.join(
+                base_dir, *handyfiles.comp_fracs_out),
+                compact=opts.compact_json) as jso:
+            for name in list(a_run.output_ecms_cfs.keys()):
+                jso.write(name, a_run.output_ecms_cfs.pop(name))
 
     # # Plot output data in R when using AIA climate regions OR when using EMM
     # # regions to assess the public health benefits of efficiency
@@ -4740,6 +5339,19 @@ if __name__ == '__main__':
     # Optional flag to report competition adjustment fractions
     parser.add_argument("--report_cfs", action="store_true",
                         help="Report competition adjustment fractions")
+    # Optional flag to calculate competed market shares for all
+    # microsegments with the same competing measures at once
+    parser.add_argument("--batch_compete", action="store_true",
+                        help="Compete microsegments with the same competing "
+                             "measures in batches")
+    # Optional flag to run adoption scenarios and competition across
+    # multiple processes
+    parser.add_argument("--workers", required=False, type=int, default=1,
+                        help="Number of processes to run adoption scenarios "
+                             "and competition with")
+    # Optional flag to write output JSON files without indentation
+    parser.add_argument("--compact_json", action="store_true",
+                        help="Write output JSON files without indentation")
     opts = parser.parse_args()
     # Set function that only prints message when in verbose mode
     verboseprint = print if opts.verbose else lambda *a, **k: None
@@ -4,6 +4,9 @@
 
 # Import code to be tested
 import run
+import htcl_overlaps
+import compete_arrays
+import json_stream
 
 # Import needed packages
 import unittest
@@ -11,7 +14,10 @@ import numpy
 import copy
 import itertools
 import os
+import multiprocessing
+import tempfile
 import numpy_financial as npf
+from types import SimpleNamespace
 
 
 class CommonTestMeasures(object):
@@ -417,11 +423,32 @@ class OutputBreakoutDictWalkTest(unittest.TestCase, CommonMethods):
     def test_ok(self):
         """Test for correct function output given valid inputs."""
         dict1 = self.a_run.out_break_walk(
-            self.ok_partitions, self.ok_total, self.focus_yrs_test,
-            divide=False)
+            copy.deepcopy(self.ok_partitions), self.ok_total,
+            self.focus_yrs_test, divide=False)
         dict2 = self.ok_out
         self.dict_check(dict1, dict2)
 
+    def test_ok_arrays(self):
+        """Test for correct output given breakout data collected in arrays."""
+        # Use the sample partitioning fractions for each variable and case
+        out_break = {var: {case: copy.deepcopy(self.ok_partitions) for
+                           case in ["baseline", "efficient", "savings"]}
+                     for var in ["energy", "cost", "carbon"]}
+        # Add a region without data, which is dropped from the outputs
+        out_break["energy"]["baseline"]["AIA CZ3"] = {"Residential": {}}
+        focus_yrs = list(self.ok_total.keys())
+        skel, vals = self.a_run.out_break_arrays(out_break, focus_yrs)
+        self.assertEqual(vals.shape, (3, 3, 8, 2))
+        dict1 = self.a_run.out_break_tree(
+            skel, vals[0, 0] * numpy.array(
+                [self.ok_total[yr] for yr in focus_yrs]), focus_yrs)
+        dict2 = self.ok_out
+        self.dict_check(dict1, dict2)
+        # Sampled breakout data are not collected in arrays
+        out_break["cost"]["savings"]["AIA CZ1"]["Residential"]["Heating"][
+            "2009"] = numpy.array([0.1, 0.1])
+        self.assertIsNone(self.a_run.out_break_arrays(out_break, focus_yrs))
+
 
 class PrioritizationMetricsTest(unittest.TestCase, CommonMethods):
     """Test the operation of the 'calc_savings_metrics' function.
@@ -1497,6 +1524,39 @@ class MetricUpdateTest(unittest.TestCase, CommonMethods):
             else:
                 self.assertEqual(function_output[ind], x)
 
+    def test_metric_updates_batch(self):
+        """Test that batched outputs match those of 'metric_update'."""
+        # Create an Engine instance using sample_measure list
+        engine_instance = run.Engine(
+            self.handyvars, self.measure_list, energy_out=[
+                "fossil_equivalent", "NA", "NA", "NA", "NA"], brkout="basic",
+            report_cfs=False)
+        # Set rows of inputs, varying the lifetimes and savings of the
+        # valid sample inputs
+        rows = [[self.measure_list[0], base_life, meas_life,
+                 self.ok_base_scost, self.ok_meas_sdelt, esave,
+                 self.ok_ecostsave * esave, self.ok_csave,
+                 self.ok_ccostsave, self.ok_scost_meas, self.ok_ecost_meas,
+                 self.ok_ccost_meas] for base_life, meas_life, esave in [
+                    (self.ok_base_life, int(self.ok_product_lifetime), 7.5),
+                    (1, 10, -2), (5, 5, 0), (2, 1, 30)]]
+        # Add a row with sampled baseline capital costs, which is calculated
+        # separately from the other rows
+        rows.append(rows[1][:3] + [numpy.array([
+            self.ok_base_scost, self.ok_base_scost * 2])] + rows[1][4:])
+        batch_output = engine_instance.metric_update_batch(
+            *[list(x) for x in zip(*rows)])
+        for row, outputs in zip(rows, batch_output):
+            row_output = engine_instance.metric_update(*row)
+            for ind, x in enumerate(row_output):
+                if isinstance(x, numpy.ndarray):
+                    numpy.testing.assert_array_almost_equal(
+                        outputs[ind], x, decimal=7)
+                elif x is not None:
+                    self.assertAlmostEqual(outputs[ind], x, places=7)
+                else:
+                    self.assertEqual(outputs[ind], x)
+
 
 class PaybackTest(unittest.TestCase):
     """Test the operation of the 'payback' function.
@@ -1539,6 +1599,35 @@ class PaybackTest(unittest.TestCase):
             self.assertAlmostEqual(engine_instance.payback(cf),
                                    self.ok_out[idx], places=2)
 
+    def test_cashflow_paybacks_batch(self):
+        """Test for correct batched outputs given valid inputs."""
+        # Create an Engine instance using sample_measure list
+        engine_instance = run.Engine(
+            self.handyvars, self.measure_list, energy_out=[
+                "fossil_equivalent", "NA", "NA", "NA", "NA"], brkout="basic",
+            report_cfs=False)
+        # Test each set of cash flows as a batch of one row, raising
+        # floating point errors as in 'run.main'
+        with numpy.errstate(all="raise"):
+            for idx, cf in enumerate(self.ok_cashflows):
+                self.assertAlmostEqual(engine_instance.payback_batch(
+                    numpy.array([cf], dtype=float))[0], self.ok_out[idx],
+                    places=2)
+            # Test that a batch of equal length cash flows, including cash
+            # flows that are zero or not finite, yields the 'payback' outputs
+            cashflows = numpy.array(
+                [cf[:3] for cf in self.ok_cashflows] + [
+                    [-10, 0, 0], [-10, 10, 0], [-10, numpy.nan, 1],
+                    [-10, numpy.inf, 1], [5, numpy.inf, numpy.inf],
+                    [-10, 1, numpy.inf], [-numpy.inf, 1, 1]], dtype=float)
+            for cf, pb in zip(cashflows, engine_instance.payback_batch(
+                    cashflows)):
+                expected = engine_instance.payback(cf)
+                if numpy.isnan(expected):
+                    self.assertTrue(numpy.isnan(pb))
+                else:
+                    self.assertAlmostEqual(pb, expected, places=7)
+
 
 class ResCompeteTest(unittest.TestCase, CommonMethods):
     """Test 'compete_res_primary,' and 'htcl_adj'.
@@ -1551,7 +1640,7 @@ class ResCompeteTest(unittest.TestCase, CommonMethods):
     Attributes:
         handyvars (object): Useful variables across the class.
         test_adopt_scheme (string): Sample consumer adoption scheme.
-        test_htcl_adj (dict): Sample dict with supply-demand overlap data.
+        test_htcl_adj (object): Sample supply-demand overlap data.
         adjust_key1 (string): First sample string for competed demand-side and
             supply-side market microsegment key chain being tested.
         adjust_key2 (string): Second sample string for competed demand-side and
@@ -1618,27 +1707,16 @@ class ResCompeteTest(unittest.TestCase, CommonMethods):
         cls.adjust_key2 = str(
             ('primary', 'AIA_CZ1', 'single family home', 'electricity',
              'cooling', 'supply', 'ASHP', 'existing'))
-        cls.test_htcl_adj = {
-            "supply": {(
-                "['AIA_CZ1', 'single family home', 'existing', " +
-                "'electricity', 'cooling']"): {
-                    "total": {
-                        yr: 10 for yr in cls.handyvars.aeo_years},
-                    "total affected": {
-                        yr: 10 for yr in cls.handyvars.aeo_years},
-                    "affected savings": {
-                        yr: 0 for yr in cls.handyvars.aeo_years}},
-            },
-            "demand": {(
-                "['AIA_CZ1', 'single family home', 'existing', " +
-                "'electricity', 'cooling']"): {
-                    "total": {
-                        yr: 10 for yr in cls.handyvars.aeo_years},
-                    "total affected": {
-                        yr: 10 for yr in cls.handyvars.aeo_years},
-                    "affected savings": {
-                        yr: 0 for yr in cls.handyvars.aeo_years}},
-            }}
+        cls.test_htcl_adj = htcl_overlaps.HtclOverlaps(
+            cls.handyvars.aeo_years)
+        for tech_type in ["supply", "demand"]:
+            cls.test_htcl_adj.add(
+                tech_type, (
+                    "['AIA_CZ1', 'single family home', 'existing', " +
+                    "'electricity', 'cooling']"),
+                {yr: 10 for yr in cls.handyvars.aeo_years},
+                numpy.full(len(cls.handyvars.aeo_years), 10.0),
+                numpy.zeros(len(cls.handyvars.aeo_years)))
         cls.compete_meas1 = {
             "name": "sample compete measure r1",
             "climate_zone": ["AIA_CZ1"],
@@ -16079,6 +16157,34 @@ class ResCompeteTest(unittest.TestCase, CommonMethods):
                 self.a_run.measures[ind].markets[self.test_adopt_scheme][
                     "competed"]["mseg_out_break"]["energy"])
 
+    def test_compete_groups(self):
+        """Test grouping of measures that can be competed independently."""
+        # Demand and supply-side measures overlap on the same cooling energy
+        self.assertEqual(
+            self.a_run.compete_groups(self.test_adopt_scheme),
+            [[0, 1, 2, 3, 4]])
+        # Without the supply-side measures, demand-side measures form a
+        # group of their own
+        a_run_demand = run.Engine(
+            self.handyvars, self.measures_demand, energy_out=[
+                "fossil_equivalent", "NA", "NA", "NA", "NA"],
+            brkout="basic", report_cfs=False)
+        self.assertEqual(
+            a_run_demand.compete_groups(self.test_adopt_scheme), [[0, 1]])
+
+    def test_mkt_fracs_batch(self):
+        """Test that batched market shares match those of single msegs."""
+        for measures, key in [
+                (self.measures_demand_dist, self.adjust_key1),
+                (self.measures_supply_dist, self.adjust_key2)]:
+            single = self.a_run_dist.res_mkt_fracs(
+                measures, [key], self.test_adopt_scheme)[0]
+            batch = self.a_run_dist.res_mkt_fracs(
+                measures, [key, key], self.test_adopt_scheme)
+            for fracs in batch:
+                for m_s, m_b in zip(single, fracs):
+                    self.dict_check(m_s, m_b)
+
     def test_compete_res_dist(self):
         """Test outcomes given valid sample measures w/ some array inputs."""
         # Run the measure competition routine on sample demand-side measures
@@ -16109,6 +16215,180 @@ class ResCompeteTest(unittest.TestCase, CommonMethods):
                     "competed"]["master_mseg"])
 
 
+class AdoptSchemesTest(unittest.TestCase, CommonMethods):
+    """Test running all consumer adoption scenarios serially or in parallel.
+
+    Attributes:
+        handyvars (object): Useful variables across the class.
+        a_run (object): Analysis engine object incorporating the sample
+            measures used in competition tests for residential measures,
+            with markets for all adoption scenarios.
+        htcl_totals (dict): Sample heating/cooling energy totals by region,
+            building type, structure type, fuel type, and end use.
+        opts (object): Sample user-specified execution options.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Define objects/variables for use across all class functions."""
+        ResCompeteTest.setUpClass()
+        cls.handyvars = ResCompeteTest.handyvars
+        cls.a_run = copy.deepcopy(ResCompeteTest.a_run)
+        # Use the same sample markets for each adoption scenario
+        for m in cls.a_run.measures:
+            for adopt_scheme in cls.handyvars.adopt_schemes:
+                if adopt_scheme not in m.markets.keys():
+                    m.markets[adopt_scheme] = copy.deepcopy(m.markets[
+                        ResCompeteTest.test_adopt_scheme])
+        cls.htcl_totals = {"AIA_CZ1": {"single family home": {
+            struct: {"electricity": {eu: {
+                yr: 10 for yr in cls.handyvars.aeo_years} for eu in [
+                "heating", "cooling"]}} for struct in ["new", "existing"]}}}
+        cls.opts = SimpleNamespace(
+            report_stk=False, report_cfs=False, mkt_fracs=True)
+
+    @unittest.skipIf("fork" not in multiprocessing.get_all_start_methods(),
+                     "Parallel runs require the 'fork' start method")
+    def test_parallel_adopt_schemes(self):
+        """Test that parallel runs match serial runs of all scenarios."""
+        outputs = []
+        for n_workers in [1, 4]:
+            a_run = copy.deepcopy(self.a_run)
+            run.run_adopt_schemes(
+                a_run, self.handyvars.adopt_schemes, self.htcl_totals, False,
+                self.handyvars.aeo_years, n_workers, self.opts, report=False)
+            outputs.append({adopt_scheme: a_run.scheme_outputs(adopt_scheme)
+                            for adopt_scheme in self.handyvars.adopt_schemes})
+        self.assertEqual(len(outputs[0]), 2)
+        self.dict_check(outputs[0], outputs[1])
+
+    def test_stream_ecm_outputs(self):
+        """Test writing measure outputs as each measure is finalized."""
+        # Write the outputs for all measures once all scenarios are run
+        a_run = copy.deepcopy(self.a_run)
+        run.run_adopt_schemes(
+            a_run, self.handyvars.adopt_schemes, self.htcl_totals, False,
+            self.handyvars.aeo_years, 1, self.opts, report=False)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with json_stream.JSONStreamWriter(
+                    os.path.join(tmp_dir, "ecm_results.json")) as jso:
+                for name in list(a_run.output_ecms.keys()):
+                    jso.write(name, a_run.output_ecms.pop(name))
+            with open(os.path.join(tmp_dir, "ecm_results.json")) as jsi:
+                expected = jsi.read()
+        # Write the outputs for each measure as it is finalized for the last
+        # scenario (serially) or merged (in parallel); the written outputs
+        # are released from the Engine object
+        n_workers = [1]
+        if "fork" in multiprocessing.get_all_start_methods():
+            n_workers.append(4)
+        for workers in n_workers:
+            a_run = copy.deepcopy(self.a_run)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                ecm_writer = json_stream.JSONStreamWriter(
+                    os.path.join(tmp_dir, "ecm_results.json"))
+                run.run_adopt_schemes(
+                    a_run, self.handyvars.adopt_schemes, self.htcl_totals,
+                    False, self.handyvars.aeo_years, workers, self.opts,
+                    report=False, ecm_writer=ecm_writer)
+                self.assertEqual(ecm_writer.n_items, len(a_run.measures))
+                self.assertEqual(len(a_run.output_ecms), 0)
+                ecm_writer.close()
+                with open(os.path.join(tmp_dir, "ecm_results.json")) as jsi:
+                    self.assertEqual(jsi.read(), expected)
+
+
+class CompeteArraysTest(unittest.TestCase, CommonMethods):
+    """Test competing measures whose data are read from flat arrays.
+
+    Verify that residential measure competition yields the same outcomes
+    when measure competition data are written to and loaded from flat
+    arrays of year values, with the competed data set as a copy-on-write
+    layer over the loaded data (as in 'main'), as when the data are dicts.
+
+    Attributes:
+        handyvars (object): Useful variables across the class.
+        test_adopt_scheme (string): Sample consumer adoption scheme.
+        a_run (object): Analysis engine object incorporating the sample
+            measures used in competition tests for residential measures.
+        test_htcl_adj (object): Sample supply-demand overlap data.
+        measures_master_msegs_out (list): Master market microsegments that
+            should be generated for each measure following competition.
+        measures_mseg_out_break (list): Energy output breakouts that should
+            be generated for each measure following competition.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Define objects/variables for use across all class functions."""
+        ResCompeteTest.setUpClass()
+        cls.handyvars = ResCompeteTest.handyvars
+        cls.test_adopt_scheme = ResCompeteTest.test_adopt_scheme
+        cls.a_run = copy.deepcopy(ResCompeteTest.a_run)
+        cls.test_htcl_adj = copy.deepcopy(ResCompeteTest.test_htcl_adj)
+        cls.measures_master_msegs_out = \
+            ResCompeteTest.measures_master_msegs_out
+        cls.measures_mseg_out_break = ResCompeteTest.measures_mseg_out_break
+
+    def test_compete_res_arrays(self):
+        """Test outcomes given competition data read from flat arrays."""
+        def floats(data):
+            # Year values written out by 'ecm_prep.py' are floats
+            if isinstance(data, dict):
+                return {k: floats(v) for k, v in data.items()}
+            elif isinstance(data, int):
+                return float(data)
+            return data
+
+        comp_data_in = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for m in self.a_run.measures:
+                mkts = m.markets[self.test_adopt_scheme]
+                comp_data_in.append(floats(mkts["uncompeted"]["mseg_adjust"]))
+                comp_file = os.path.join(tmp_dir, m.name + ".pkl.gz")
+                compete_arrays.write_compete_data(
+                    {self.test_adopt_scheme: comp_data_in[-1]}, comp_file,
+                    self.handyvars.aeo_years)
+                mkts["uncompeted"]["mseg_adjust"] = \
+                    compete_arrays.load_compete_data(comp_file)[
+                        self.test_adopt_scheme]
+                mkts["competed"]["mseg_adjust"] = \
+                    compete_arrays.CompetedLayer(
+                        mkts["uncompeted"]["mseg_adjust"], depth=1)
+            # Run the competition on the demand-side and then supply-side
+            # measures, removing supply-demand overlaps after each
+            for measures, adjust_key in [
+                    (self.a_run.measures[0:2], ResCompeteTest.adjust_key1),
+                    (self.a_run.measures[2:5], ResCompeteTest.adjust_key2)]:
+                self.a_run.compete_res_primary(
+                    measures, adjust_key, self.test_adopt_scheme)
+                self.a_run.htcl_adj(
+                    measures, self.test_adopt_scheme, self.test_htcl_adj)
+
+            for ind, m in enumerate(self.a_run.measures):
+                mkts = m.markets[self.test_adopt_scheme]
+                # Check updated competed master microsegments and output
+                # breakout data
+                self.dict_check(self.measures_master_msegs_out[ind],
+                                mkts["competed"]["master_mseg"])
+                self.dict_check(self.measures_mseg_out_break[ind],
+                                mkts["competed"]["mseg_out_break"]["energy"])
+                # Data for the key chains read by the competition are copied
+                # from the rows of year values to plain dicts, and the loaded
+                # (uncompeted) data are unchanged
+                msu, msu_base = [mkts[x]["mseg_adjust"][
+                    "contributing mseg keys and values"] for x in [
+                    "competed", "uncompeted"]]
+                for key in msu:
+                    self.assertIsInstance(msu_base[key]["energy"]["total"][
+                        "baseline"], compete_arrays.YearRowVals)
+                    self.assertIs(type(msu[key]), dict)
+                    self.assertIs(type(msu[key]["energy"]["total"][
+                        "baseline"]), dict)
+                self.assertEqual(compete_arrays.to_dict(
+                    mkts["uncompeted"]["mseg_adjust"]), comp_data_in[ind])
+
+
 class ComCompeteTest(unittest.TestCase, CommonMethods):
     """Test 'compete_com_primary' and 'secondary_adj' functions.
 
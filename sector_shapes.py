@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+""" Sector-level hourly load shapes of prepared measures.
+
+When sector shapes are requested (the '--sect_shapes' option of ecm_prep.py),
+each measure accumulates the hourly baseline and efficient electricity use of
+the portion of the building stock it applies to, by adoption scheme, region,
+and summary year. Keeping these data as nested dicts of 8760-element lists
+means rebuilding a list of 8760 values each time the energy use of a
+contributing microsegment is added, and writing the data out as JSON inflates
+the sector shapes file with the text of every hourly value.
+
+This module instead keeps each adoption scheme's data in preallocated
+(regions x summary years x 8760) arrays of baseline and efficient loads that
+are added to in place, and writes the data of each measure out to a binary
+.npy file, with the regions and years that index the data (and the name of
+the .npy file) recorded in the measure's sector shapes JSON data.
+"""
+
+import numpy
+from os import path, makedirs, replace
+
+
+# Load cases in each measure's sector shape data
+CASES = ("baseline", "efficient")
+# Number of hours in the year of the load shapes
+N_HOURS = 8760
+
+
+class SectorShapes(object):
+    """Hourly baseline and efficient loads of a measure by region and year.
+
+    Attributes:
+        regions (list): Regions of the loads.
+        years (list): Summary years of the loads.
+        reg_ind (dict): Position of each region in the regions list.
+        yr_ind (dict): Position of each year in the years list.
+        data (dict): Array of hourly loads (regions x years x hours) for each
+            load case ('baseline' or 'efficient').
+    """
+
+    def __init__(self, regions, years, data=None):
+        self.regions = list(regions)
+        self.years = list(years)
+        self.reg_ind = {reg: n for n, reg in enumerate(self.regions)}
+        self.yr_ind = {yr: n for n, yr in enumerate(self.years)}
+        if data is None:
+            data = {s: numpy.zeros((
+                len(self.regions), len(self.years), N_HOURS)) for s in CASES}
+        self.data = data
+
+    def add(self, region, year, case, loads):
+        """Add hourly loads to the data for a region, year, and case.
+
+        Args:
+            region (str): Region of the loads.
+            year (str): Summary year of the loads.
+            case (str): Load case ('baseline' or 'efficient').
+            loads (numpy.ndarray): Hourly loads to add.
+        """
+        self.data[case][self.reg_ind[region], self.yr_ind[year]] += loads
+
+    def get(self, region, year, case):
+        """Find the hourly loads for a region, year, and case.
+
+        Args:
+            region (str): Region of the loads.
+            year (str): Summary year of the loads.
+            case (str): Load case ('baseline' or 'efficient').
+
+        Returns:
+            Array of hourly loads (a view of the data).
+        """
+        return self.data[case][self.reg_ind[region], self.yr_ind[year]]
+
+    def to_dict(self):
+        """Convert the data to nested dicts of hourly load lists.
+
+        Returns:
+            Dict of 8760-element lists of loads keyed by region, year, and
+            load case.
+        """
+        return {reg: {yr: {s: self.data[s][r, y].tolist() for s in CASES}
+                      for y, yr in enumerate(self.years)}
+                for r, reg in enumerate(self.regions)}
+
+
+def shapes_dir(shapes_file):
+    """Set the folder for binary sector shape data of a sector shapes file.
+
+    Args:
+        shapes_file (str): Path to the sector shapes JSON file (e.g.,
+            './supporting_data/ecm_prep_shapes.json').
+
+    Returns:
+        Path to the folder with the .npy files of measure sector shapes
+        (e.g., './supporting_data/ecm_prep_shapes').
+    """
+    return path.splitext(shapes_file)[0]
+
+
+def write_shapes(shapes, shapes_file):
+    """Write a measure's sector shape data to a binary .npy file.
+
+    Args:
+        shapes (dict): Measure name and sector shape data (SectorShapes) by
+            adoption scheme.
+        shapes_file (str): Path to the sector shapes JSON file that the
+            measure's data belong to.
+
+    Returns:
+        Dict with the measure name, the name of the .npy file, and the
+        adoption schemes, load cases, regions, and years that index the
+        array in the .npy file, to be written to the sector shapes JSON file.
+    """
+    adopt_schemes = [a_s for a_s in shapes.keys() if a_s != "name"]
+    regions, years = [
+        shapes[adopt_schemes[0]].regions, shapes[adopt_schemes[0]].years]
+    if any([shapes[a_s].regions != regions or shapes[a_s].years != years
+            for a_s in adopt_schemes]):
+        raise ValueError(
+            "Sector shapes for ECM '" + shapes["name"] + "' are not set "
+            "for the same regions and years across adoption schemes")
+    out_dir = shapes_dir(shapes_file)
+    makedirs(out_dir, exist_ok=True)
+    file_name = shapes["name"] + ".npy"
+    with open(path.join(out_dir, file_name + ".tmp"), "wb") as npo:
+        numpy.save(npo, numpy.stack([numpy.stack([
+            shapes[a_s].data[s] for s in CASES]) for a_s in adopt_schemes]))
+    replace(path.join(out_dir, file_name + ".tmp"),
+            path.join(out_dir, file_name))
+    return {"name": shapes["name"], "data file": file_name,
+            "adopt_schemes": adopt_schemes, "cases": list(CASES),
+            "regions": regions, "years": years}
+
+
+def load_shapes(shapes_rec, shapes_file):
+    """Load a measure's sector shape data from its binary .npy file.
+
+    Args:
+        shapes_rec (dict): Measure's data in the sector shapes JSON file (as
+            written by 'write_shapes').
+        shapes_file (str): Path to the sector shapes JSON file.
+
+    Returns:
+        Dict with the measure name and sector shape data (SectorShapes) by
+        adoption scheme.
+    """
+    vals = numpy.load(path.join(
+        shapes_dir(shapes_file), shapes_rec["data file"]), mmap_mode="r")
+    shapes = {"name": shapes_rec["name"]}
+    for a, a_s in enumerate(shapes_rec["adopt_schemes"]):
+        shapes[a_s] = SectorShapes(
+            shapes_rec["regions"], shapes_rec["years"], {
+                s: vals[a, c] for c, s in enumerate(shapes_rec["cases"])})
+    return shapes
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+""" Tests for sector-level hourly load shapes of prepared measures """
+
+# Import code to be tested
+import sector_shapes
+
+# Import needed packages
+import unittest
+import tempfile
+import numpy
+from os import path
+
+
+class SectorShapesTest(unittest.TestCase):
+    """Test accumulation and binary storage of measure sector shapes.
+
+    Attributes:
+        tmp_dir (object): Temporary folder for output files.
+        shapes_file (str): Path to a sector shapes JSON file.
+        regions (list): Sample EMM regions.
+        years (list): Sample summary years.
+        shape (numpy.ndarray): Sample hourly fractions of annual load.
+    """
+
+    def setUp(self):
+        """Set sample regions, years, and hourly load fractions."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.shapes_file = path.join(
+            self.tmp_dir.name, "ecm_prep_shapes.json")
+        self.regions = ["TRE", "FRCC"]
+        self.years = ["2020", "2030"]
+        self.shape = numpy.full(8760, 1 / 8760)
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        self.tmp_dir.cleanup()
+
+    def test_add(self):
+        """Test that loads are added in place to the matching rows."""
+        shapes = sector_shapes.SectorShapes(self.regions, self.years)
+        base = shapes.get("FRCC", "2030", "baseline")
+        shapes.add("FRCC", "2030", "baseline", self.shape * 10)
+        shapes.add("FRCC", "2030", "baseline", self.shape * 5)
+        shapes.add("TRE", "2020", "efficient", self.shape * 2)
+        numpy.testing.assert_allclose(base, self.shape * 15)
+        self.assertEqual(shapes.data["baseline"].sum(), base.sum())
+        numpy.testing.assert_allclose(
+            shapes.data["efficient"][0, 0], self.shape * 2)
+        # Nested dict version of the data
+        shapes_dict = shapes.to_dict()
+        self.assertEqual(list(shapes_dict.keys()), self.regions)
+        self.assertEqual(shapes_dict["FRCC"]["2030"]["baseline"],
+                         (self.shape * 10 + self.shape * 5).tolist())
+        self.assertEqual(shapes_dict["TRE"]["2030"]["efficient"],
+                         [0] * 8760)
+
+    def test_write_load(self):
+        """Test writing sector shape data to and loading from .npy files."""
+        shapes = {"name": "Sample Measure"}
+        for n, a_s in enumerate(["Technical potential",
+                                 "Max adoption potential"]):
+            shapes[a_s] = sector_shapes.SectorShapes(
+                self.regions, self.years)
+            shapes[a_s].add("TRE", "2030", "efficient", self.shape * (n + 1))
+        shapes_rec = sector_shapes.write_shapes(shapes, self.shapes_file)
+        self.assertEqual(shapes_rec, {
+            "name": "Sample Measure", "data file": "Sample Measure.npy",
+            "adopt_schemes": [
+                "Technical potential", "Max adoption potential"],
+            "cases": ["baseline", "efficient"], "regions": self.regions,
+            "years": self.years})
+        self.assertTrue(path.isfile(path.join(
+            self.tmp_dir.name, "ecm_prep_shapes", "Sample Measure.npy")))
+        shapes_in = sector_shapes.load_shapes(shapes_rec, self.shapes_file)
+        for a_s in ["Technical potential", "Max adoption potential"]:
+            self.assertEqual(shapes_in[a_s].to_dict(), shapes[a_s].to_dict())
+        # Data for different regions or years across adoption schemes
+        shapes["Max adoption potential"] = sector_shapes.SectorShapes(
+            self.regions[:1], self.years)
+        with self.assertRaises(ValueError):
+            sector_shapes.write_shapes(shapes, self.shapes_file)
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
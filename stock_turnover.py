@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+
+""" Stock turnover and diffusion of measure markets over the modeling years.
+
+For each contributing microsegment of a measure and each adoption scheme,
+ecm_prep.py finds the portions of the baseline stock that are competed and
+captured by the measure in each year of the modeling time horizon. The
+competed portion depends on new construction, regular replacement and early
+retrofit rates, and any exogenous rates of conversion to heat pumps, while the
+captured portion accumulates the stock captured in previous years; each year
+therefore depends on the results of the previous year, and the calculations
+cannot be done across all years at once.
+
+This module keeps these calculations in a standalone kernel that operates on
+(microsegments x years) arrays of point values, such that the turnover of
+many microsegments is found at once. The kernel is written as explicit loops
+that are compiled with numba (if installed); otherwise, the kernel either
+runs the same loops in Python (for a few microsegments) or loops over the
+years with each step vectorized across microsegments in NumPy. The energy,
+carbon, and cost markets that follow from the kernel results do not depend on
+previous years and are found across all years at once by the caller.
+
+Notes:
+    Years must be consecutive (e.g., as in the AEO modeling time horizon),
+    such that the stock of a given previous year is found by its offset from
+    the current year.
+"""
+
+import numpy
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# Stock turnover results by microsegment and year, in the order they are
+# passed to the kernel functions
+OUTPUTS = ["comp_frac_sbmkt", "diffuse_frac", "comp_frac_diffuse",
+           "comp_frac_diffuse_meas", "meas_cum_frac", "stock_total_meas"]
+# Number of microsegments at and above which the NumPy kernel is used in lieu
+# of the interpreted loops when numba is unavailable (below this number, the
+# overhead of array operations on short rows exceeds that of the loops)
+NUMPY_MIN_ROWS = 16
+
+
+def turnover(stock, life_base, retro_rate, hp_rate, on_mkt, rel_perf,
+             comp_frac_scnd, meas_cum_frac_scnd, primary, new, tech_pot,
+             hp_mode, hp_retro_all, years, entry_year, backend=None):
+    """Find the competed and captured portions of microsegment stock by year.
+
+    Args:
+        stock (numpy.ndarray): Total stock after any sub-market scaling
+            (microsegments x years).
+        life_base (numpy.ndarray): Baseline technology lifetime (microsegments
+            x years).
+        retro_rate (numpy.ndarray): Early retrofit rate of existing stock
+            (microsegments x years).
+        hp_rate (numpy.ndarray): Exogenous rate of conversion of the stock to
+            heat pumps (microsegments x years).
+        on_mkt (numpy.ndarray): Flag for whether the measure is on the market
+            (microsegments x years).
+        rel_perf (numpy.ndarray): Measure performance relative to baseline
+            (microsegments x years x performance samples).
+        comp_frac_scnd (numpy.ndarray): For secondary microsegments, the
+            competed fraction of the associated primary microsegments
+            (microsegments x years).
+        meas_cum_frac_scnd (numpy.ndarray): For secondary microsegments, the
+            fraction of the associated primary microsegments captured by the
+            measure in previous years (microsegments x years).
+        primary (numpy.ndarray): Flag for primary microsegments.
+        new (numpy.ndarray): Flag for microsegments of new structures.
+        tech_pot (numpy.ndarray): Flag for the technical potential adoption
+            scheme.
+        hp_mode (numpy.ndarray): Exogenous heat pump conversion of the stock
+            (0 = none, 1 = conversion to the microsegment, 2 = conversion
+            away from the microsegment).
+        hp_retro_all (numpy.ndarray): Flag for conversion of all retrofits
+            (rather than the heat pump rate times retrofits) to heat pumps.
+        years (numpy.ndarray): Consecutive years of the modeling time horizon.
+        entry_year (numpy.ndarray): Market entry year of the measure.
+        backend (str): Kernel to use ('jit', 'numpy', or 'python'); if None,
+            the compiled kernel is used when numba is installed, and
+            otherwise the NumPy or Python kernel, depending on the number of
+            microsegments.
+
+    Returns:
+        Dict of (microsegments x years) arrays of the competed fraction of
+        the stock after sub-market scaling ('comp_frac_sbmkt'), the fraction
+        of the stock the measure has access to after heat pump conversion
+        ('diffuse_frac'), the competed fraction of that stock overall and
+        for the measure ('comp_frac_diffuse', 'comp_frac_diffuse_meas'), the
+        fraction of uncompeted stock previously captured by the measure
+        ('meas_cum_frac'), and the total stock captured by the measure
+        ('stock_total_meas'), as well as the (microsegments x years x samples)
+        relative performance of the previously captured measure stock
+        ('rel_perf_capt').
+
+    Raises:
+        ValueError: If the compiled kernel is requested but numba is not
+            installed, or an unknown kernel is requested.
+    """
+    # Set consistent data types for the inputs, such that the compiled kernel
+    # is not recompiled for different input types
+    stock, life_base, retro_rate, hp_rate, rel_perf, comp_frac_scnd, \
+        meas_cum_frac_scnd = (numpy.asarray(x, dtype=float) for x in [
+            stock, life_base, retro_rate, hp_rate, rel_perf, comp_frac_scnd,
+            meas_cum_frac_scnd])
+    on_mkt, primary, new, tech_pot, hp_retro_all = (
+        numpy.asarray(x, dtype=bool) for x in [
+            on_mkt, primary, new, tech_pot, hp_retro_all])
+    hp_mode, years, entry_year = (
+        numpy.asarray(x, dtype=numpy.int64) for x in [
+            hp_mode, years, entry_year])
+    # Initialize outputs
+    out = {x: numpy.zeros(stock.shape) for x in OUTPUTS}
+    out["rel_perf_capt"] = numpy.zeros(rel_perf.shape)
+    # Select the kernel
+    if backend is None:
+        if turnover_jit is not None:
+            backend = "jit"
+        elif stock.shape[0] >= NUMPY_MIN_ROWS:
+            backend = "numpy"
+        else:
+            backend = "python"
+    if backend == "jit":
+        if turnover_jit is None:
+            raise ValueError(
+                "Compiled stock turnover kernel requires the numba package")
+        kernel = turnover_jit
+    elif backend == "numpy":
+        kernel = turnover_numpy
+    elif backend == "python":
+        kernel = turnover_loops
+    else:
+        raise ValueError("Unknown stock turnover kernel '" + backend + "'")
+    args = [stock, life_base, retro_rate, hp_rate, on_mkt, rel_perf,
+            comp_frac_scnd, meas_cum_frac_scnd, primary, new, tech_pot,
+            hp_mode, hp_retro_all, years, entry_year] + [
+        out[x] for x in OUTPUTS + ["rel_perf_capt"]]
+    # Interpreted loops index lists of Python floats faster than arrays
+    if backend == "python":
+        args = [x.tolist() for x in args]
+    kernel(*args)
+    if backend == "python":
+        out = {x: numpy.array(vals) for x, vals in zip(
+            OUTPUTS + ["rel_perf_capt"], args[-len(out):])}
+
+    return out
+
+
+def turnover_loops(stock, life_base, retro_rate, hp_rate, on_mkt, rel_perf,
+                   comp_frac_scnd, meas_cum_frac_scnd, primary, new, tech_pot,
+                   hp_mode, hp_retro_all, years, entry_year, comp_frac_sbmkt,
+                   diffuse_frac, comp_frac_diffuse, comp_frac_diffuse_meas,
+                   meas_cum_frac, stock_total_meas, rel_perf_capt):
+    """Find stock turnover by looping over microsegments and years.
+
+    Notes:
+        This is the kernel that is compiled when numba is installed; it
+        uses only loops, scalar arithmetic, and indexing that applies to both
+        arrays (when compiled) and nested lists (when interpreted). Inputs
+        are as in 'turnover', and outputs (named as in the dict 'turnover'
+        returns) are filled in place.
+    """
+    n_msegs, n_years = len(stock), len(years)
+    for r in range(n_msegs):
+        n_samples = len(rel_perf[r][0])
+        # Initialize the portion of the microsegment already captured by the
+        # measure and the cumulative portion of the microsegment already
+        # competed as 0, and a flag for whether full saturation with competed
+        # measures has not been achieved as True
+        meas_cum, comp_cum, turnover_cap_not_reached = 0.0, 0.0, True
+        # Initialize the cumulative stock converted to heat pumps and the
+        # total and competed stock captured through the previous year
+        hp_total_prev, stock_meas_prev, stock_comp_cum_prev = 0.0, 0.0, 0.0
+        # Initialize the relative performance of previously captured stock
+        rel_perf_prev = rel_perf[r][0].copy()
+        for t in range(n_years):
+            stk = stock[r][t]
+            # Find new, replacement, and retrofit fractions of the stock
+            # (zero for secondary microsegments)
+            new_frac, repl_frac, retro_frac = 0.0, 0.0, 0.0
+            prev_capt_turnover = False
+            if primary[r]:
+                # Flag when the stock previously captured after the start of
+                # the modeling time horizon begins to turn over
+                life = int(life_base[r][t])
+                prev_capt_turnover = life - (years[t] - years[0]) <= 0
+                # Microsegment applies to new structures
+                if new[r]:
+                    # Newly added fraction of the total new stock (all new
+                    # stock in the first year; zero if stock is shrinking)
+                    if t == 0:
+                        new_frac = 1.0
+                    elif stk != 0 and stk >= stock[r][t - 1]:
+                        new_frac = (stk - stock[r][t - 1]) / stk
+                    # Once previously captured stock turns over, replace the
+                    # stock added in the year it was captured
+                    prev_capt = years[t] - life - years[0]
+                    if prev_capt_turnover and prev_capt >= 0 and stk != 0:
+                        if prev_capt != 0 and stock[r][prev_capt] >= \
+                                stock[r][prev_capt - 1]:
+                            repl_frac = (stock[r][prev_capt] -
+                                         stock[r][prev_capt - 1]) / stk
+                        else:
+                            repl_frac = stock[r][prev_capt] / stk
+                # Microsegment applies to existing structures; allow
+                # replacements and retrofits until all existing stock is
+                # captured, and thereafter only replacements of previously
+                # captured stock that is turning over (no replacements for
+                # a zero lifetime, as in 'div')
+                elif turnover_cap_not_reached:
+                    if life_base[r][t] != 0:
+                        repl_frac = 1 / life_base[r][t]
+                    retro_frac = retro_rate[r][t]
+                elif prev_capt_turnover and life_base[r][t] != 0:
+                    repl_frac = 1 / life_base[r][t]
+
+            # Fraction of the stock post-sub-market scaling that is competed
+            if not primary[r]:
+                comp_frac = comp_frac_scnd[r][t]
+            elif tech_pot[r]:
+                comp_frac = 1.0
+            else:
+                comp_frac = new_frac + repl_frac + retro_frac
+            if comp_frac > 1:
+                comp_frac = 1.0
+
+            # Diffusion of heat pumps according to exogenous rates
+            if primary[r] and hp_mode[r] != 0:
+                # Annual fractions of the stock converted to and remaining
+                # with the baseline after conversion to heat pumps
+                if tech_pot[r]:
+                    convert_frac, remain_frac = 1.0, 0.0
+                else:
+                    if hp_retro_all[r]:
+                        retro_convert, retro_remain = retro_frac, 0.0
+                    else:
+                        retro_convert = retro_frac * hp_rate[r][t]
+                        retro_remain = retro_frac * (1 - hp_rate[r][t])
+                    convert_frac = (new_frac + repl_frac) * hp_rate[r][t] + \
+                        retro_convert
+                    remain_frac = (new_frac + repl_frac) * (
+                        1 - hp_rate[r][t]) + retro_remain
+                hp_comp_convert = convert_frac * stk
+                hp_comp_remain = remain_frac * stk
+                # Cumulative stock converted through the current year, which
+                # never exceeds the total stock
+                if t == 0:
+                    hp_total = hp_comp_convert
+                else:
+                    hp_total = hp_total_prev + hp_comp_convert
+                if hp_total > stk:
+                    hp_total = stk
+                hp_total_frac = hp_total / stk if stk != 0 else 0.0
+                # Microsegment is added to by the conversion
+                if hp_mode[r] == 1:
+                    diffuse = hp_total_frac
+                    if diffuse != 1:
+                        comp_diffuse = hp_comp_convert / hp_total if \
+                            hp_total != 0 else 0.0
+                    elif not tech_pot[r]:
+                        comp_diffuse = (hp_total - hp_total_prev) / \
+                            hp_total if hp_total_prev < hp_total else 0.0
+                    else:
+                        comp_diffuse = 1.0
+                # Microsegment is eroded by the conversion
+                else:
+                    diffuse = 1 - hp_total_frac
+                    if diffuse != 0 and (stk - hp_total) != 0:
+                        comp_diffuse = hp_comp_remain / (stk - hp_total)
+                    else:
+                        comp_diffuse = 0.0
+                hp_total_prev = hp_total
+            else:
+                diffuse, comp_diffuse = 1.0, comp_frac
+            # Ensure the competed diffusion fraction is between 0 and 1
+            if comp_diffuse > 1:
+                comp_diffuse = 1.0
+            elif comp_diffuse < 0:
+                comp_diffuse = 0.0
+            # Competed fraction captured by the measure (zero when the
+            # measure is off the market)
+            comp_diffuse_meas = comp_diffuse if on_mkt[r][t] else 0.0
+
+            # Total and competed stock, overall and for the measure
+            stk_total = stk * diffuse
+            stk_comp = stk * diffuse * comp_diffuse
+            stk_comp_sbmkt = stk * comp_frac
+            stk_comp_meas = stk * diffuse * comp_diffuse_meas
+
+            # Update the portion of stock captured in previous years
+            if primary[r] and t != 0:
+                if (stk_total - stk_comp) != 0:
+                    meas_cum = stock_meas_prev / (stk_total - stk_comp)
+                if (stk - stk_comp_sbmkt) != 0:
+                    comp_cum = stock_comp_cum_prev / (stk - stk_comp_sbmkt)
+                if meas_cum > 1:
+                    meas_cum = 1.0
+                if comp_cum > 1:
+                    comp_cum = 1.0
+                # Check for a cap on existing stock turnover
+                if not new[r] and not tech_pot[r]:
+                    turnover_cap_not_reached = comp_cum < 1
+            elif not primary[r]:
+                meas_cum = meas_cum_frac_scnd[r][t]
+
+            # Update the total stock captured by the measure; previously
+            # captured measure stock turning over while the measure is off
+            # the market is decremented by the competed stock
+            if t == 0:
+                stk_meas, stk_comp_cum = stk_comp_meas, stk_comp_sbmkt
+            elif tech_pot[r] and on_mkt[r][t]:
+                stk_meas, stk_comp_cum = stk_total, stk
+            elif not tech_pot[r]:
+                if not on_mkt[r][t] and prev_capt_turnover:
+                    stk_meas = stock_meas_prev - stk_comp
+                else:
+                    stk_meas = stock_meas_prev + stk_comp_meas
+                stk_comp_cum = stock_comp_cum_prev + stk_comp_sbmkt
+            else:
+                stk_meas, stk_comp_cum = 0.0, 0.0
+            if stk_meas > stk_total:
+                stk_meas = stk_total
+            elif stk_meas < 0:
+                stk_meas = 0.0
+
+            # Update the relative performance of the captured measure stock,
+            # weighting the current year's value by the ratio of competed
+            # to total captured measure stock after market entry
+            if years[t] <= entry_year[r]:
+                for s in range(n_samples):
+                    rel_perf_prev[s] = rel_perf[r][t][s]
+                    rel_perf_capt[r][t][s] = rel_perf_prev[s]
+            else:
+                to_m_stk = stk_comp_meas / stk_meas if stk_meas != 0 else 0.0
+                if to_m_stk > 1:
+                    to_m_stk = 1.0
+                for s in range(n_samples):
+                    rel_perf_capt[r][t][s] = rel_perf_prev[s]
+                    rel_perf_prev[s] = rel_perf[r][t][s] * to_m_stk + \
+                        rel_perf_prev[s] * (1 - to_m_stk)
+
+            # Record results for the current year
+            comp_frac_sbmkt[r][t] = comp_frac
+            diffuse_frac[r][t] = diffuse
+            comp_frac_diffuse[r][t] = comp_diffuse
+            comp_frac_diffuse_meas[r][t] = comp_diffuse_meas
+            meas_cum_frac[r][t] = meas_cum
+            stock_total_meas[r][t] = stk_meas
+            stock_meas_prev, stock_comp_cum_prev = stk_meas, stk_comp_cum
+
+
+def turnover_numpy(stock, life_base, retro_rate, hp_rate, on_mkt, rel_perf,
+                   comp_frac_scnd, meas_cum_frac_scnd, primary, new, tech_pot,
+                   hp_mode, hp_retro_all, years, entry_year, comp_frac_sbmkt,
+                   diffuse_frac, comp_frac_diffuse, comp_frac_diffuse_meas,
+                   meas_cum_frac, stock_total_meas, rel_perf_capt):
+    """Find stock turnover by looping over years across all microsegments.
+
+    Notes:
+        Each step of 'turnover_loops' is applied to all microsegments at
+        once. Inputs are as in 'turnover', and outputs (named as in the dict
+        'turnover' returns) are filled in place.
+    """
+    n_msegs, n_years = stock.shape
+    rows = numpy.arange(n_msegs)
+    existing = primary & ~new
+    hp = primary & (hp_mode != 0)
+    # Initialize state across years (see 'turnover_loops')
+    meas_cum, comp_cum, hp_total_prev, stock_meas_prev, \
+        stock_comp_cum_prev = (numpy.zeros(n_msegs) for n in range(5))
+    turnover_cap_not_reached = numpy.ones(n_msegs, dtype=bool)
+    rel_perf_prev = rel_perf[:, 0].copy()
+    for t in range(n_years):
+        stk = stock[:, t]
+        # Find new, replacement, and retrofit fractions of the stock
+        life = numpy.trunc(life_base[:, t]).astype(numpy.int64)
+        prev_capt_turnover = primary & (life - (years[t] - years[0]) <= 0)
+        # New structures
+        if t == 0:
+            new_frac = numpy.where(primary & new, 1.0, 0.0)
+        else:
+            new_frac = div(stk - stock[:, t - 1], stk, primary & new & (
+                stk != 0) & (stk >= stock[:, t - 1]))
+        prev_capt = years[t] - life - years[0]
+        stk_prev_capt = stock[rows, numpy.clip(prev_capt, 0, n_years - 1)]
+        stk_prev_capt_grow = numpy.where(
+            (prev_capt > 0) & (stk_prev_capt >= stock[
+                rows, numpy.clip(prev_capt - 1, 0, n_years - 1)]),
+            stk_prev_capt - stock[
+                rows, numpy.clip(prev_capt - 1, 0, n_years - 1)],
+            stk_prev_capt)
+        repl_frac = div(stk_prev_capt_grow, stk, primary & new & (
+            prev_capt_turnover) & (prev_capt >= 0) & (stk != 0))
+        # Existing structures
+        repl_frac = numpy.where(
+            existing & (turnover_cap_not_reached | prev_capt_turnover),
+            div(1, life_base[:, t], existing & (life_base[:, t] != 0)),
+            repl_frac)
+        retro_frac = numpy.where(
+            existing & turnover_cap_not_reached, retro_rate[:, t], 0.0)
+
+        # Fraction of the stock post-sub-market scaling that is competed
+        comp_frac = numpy.where(primary, numpy.where(
+            tech_pot, 1.0, new_frac + repl_frac + retro_frac),
+            comp_frac_scnd[:, t])
+        comp_frac = numpy.where(comp_frac > 1, 1.0, comp_frac)
+
+        # Diffusion of heat pumps according to exogenous rates
+        diffuse, comp_diffuse = numpy.ones(n_msegs), comp_frac
+        if any(hp):
+            retro_convert = numpy.where(
+                hp_retro_all, retro_frac, retro_frac * hp_rate[:, t])
+            retro_remain = numpy.where(
+                hp_retro_all, 0.0, retro_frac * (1 - hp_rate[:, t]))
+            convert_frac = numpy.where(
+                tech_pot, 1.0,
+                (new_frac + repl_frac) * hp_rate[:, t] + retro_convert)
+            remain_frac = numpy.where(tech_pot, 0.0, (new_frac + repl_frac) * (
+                1 - hp_rate[:, t]) + retro_remain)
+            hp_comp_convert = convert_frac * stk
+            hp_comp_remain = remain_frac * stk
+            if t == 0:
+                hp_total = hp_comp_convert
+            else:
+                hp_total = hp_total_prev + hp_comp_convert
+            hp_total = numpy.where(hp_total > stk, stk, hp_total)
+            hp_total_frac = div(hp_total, stk, stk != 0)
+            # Microsegment is added to by the conversion
+            comp_diffuse_add = numpy.where(
+                hp_total_frac != 1, div(
+                    hp_comp_convert, hp_total, hp_total != 0),
+                numpy.where(tech_pot, 1.0, div(
+                    hp_total - hp_total_prev, hp_total,
+                    (hp_total_prev < hp_total) & (hp_total != 0))))
+            # Microsegment is eroded by the conversion
+            comp_diffuse_erode = div(
+                hp_comp_remain, stk - hp_total,
+                ((1 - hp_total_frac) != 0) & ((stk - hp_total) != 0))
+            diffuse = numpy.where(hp, numpy.where(
+                hp_mode == 1, hp_total_frac, 1 - hp_total_frac), diffuse)
+            comp_diffuse = numpy.where(hp, numpy.where(
+                hp_mode == 1, comp_diffuse_add, comp_diffuse_erode),
+                comp_diffuse)
+            hp_total_prev = hp_total
+        # Ensure the competed diffusion fraction is between 0 and 1
+        comp_diffuse = numpy.where(comp_diffuse > 1, 1.0, numpy.where(
+            comp_diffuse < 0, 0.0, comp_diffuse))
+        comp_diffuse_meas = numpy.where(on_mkt[:, t], comp_diffuse, 0.0)
+
+        # Total and competed stock, overall and for the measure
+        stk_total = stk * diffuse
+        stk_comp = stk * diffuse * comp_diffuse
+        stk_comp_sbmkt = stk * comp_frac
+        stk_comp_meas = stk * diffuse * comp_diffuse_meas
+
+        # Update the portion of stock captured in previous years
+        if t != 0:
+            update = primary & ((stk_total - stk_comp) != 0)
+            meas_cum = numpy.where(update, div(
+                stock_meas_prev, stk_total - stk_comp, update), meas_cum)
+            update = primary & ((stk - stk_comp_sbmkt) != 0)
+            comp_cum = numpy.where(update, div(
+                stock_comp_cum_prev, stk - stk_comp_sbmkt, update), comp_cum)
+            meas_cum = numpy.where(primary & (meas_cum > 1), 1.0, meas_cum)
+            comp_cum = numpy.where(primary & (comp_cum > 1), 1.0, comp_cum)
+            turnover_cap_not_reached = numpy.where(
+                existing & ~tech_pot, comp_cum < 1, turnover_cap_not_reached)
+        meas_cum = numpy.where(primary, meas_cum, meas_cum_frac_scnd[:, t])
+
+        # Update the total stock captured by the measure
+        if t == 0:
+            stk_meas, stk_comp_cum = stk_comp_meas, stk_comp_sbmkt
+        else:
+            tech_pot_on = tech_pot & on_mkt[:, t]
+            stk_meas = numpy.where(tech_pot_on, stk_total, numpy.where(
+                ~tech_pot, numpy.where(
+                    ~on_mkt[:, t] & prev_capt_turnover,
+                    stock_meas_prev - stk_comp,
+                    stock_meas_prev + stk_comp_meas), 0.0))
+            stk_comp_cum = numpy.where(tech_pot_on, stk, numpy.where(
+                ~tech_pot, stock_comp_cum_prev + stk_comp_sbmkt, 0.0))
+        stk_meas = numpy.where(stk_meas > stk_total, stk_total, numpy.where(
+            stk_meas < 0, 0.0, stk_meas))
+
+        # Update the relative performance of the captured measure stock
+        to_m_stk = div(stk_comp_meas, stk_meas, stk_meas != 0)
+        to_m_stk = numpy.where(to_m_stk > 1, 1.0, to_m_stk)[:, None]
+        entered = (years[t] <= entry_year)[:, None]
+        rel_perf_capt[:, t] = numpy.where(
+            entered, rel_perf[:, t], rel_perf_prev)
+        rel_perf_prev = numpy.where(
+            entered, rel_perf[:, t],
+            rel_perf[:, t] * to_m_stk + rel_perf_prev * (1 - to_m_stk))
+
+        # Record results for the current year
+        comp_frac_sbmkt[:, t] = comp_frac
+        diffuse_frac[:, t] = diffuse
+        comp_frac_diffuse[:, t] = comp_diffuse
+        comp_frac_diffuse_meas[:, t] = comp_diffuse_meas
+        meas_cum_frac[:, t] = meas_cum
+        stock_total_meas[:, t] = stk_meas
+        stock_meas_prev, stock_comp_cum_prev = stk_meas, stk_comp_cum
+
+
+def div(num, den, where):
+    """Divide arrays where a condition holds, and set zero elsewhere.
+
+    Args:
+        num (numpy.ndarray): Numerator.
+        den (numpy.ndarray): Denominator.
+        where (numpy.ndarray): Flag for elements to divide.
+
+    Returns:
+        Array of quotients (zero where the condition does not hold).
+    """
+    num, den = numpy.broadcast_arrays(
+        numpy.asarray(num, dtype=float), numpy.asarray(den, dtype=float))
+    return numpy.divide(num, den, out=numpy.zeros(num.shape), where=where)
+
+
+# Compile the loop kernel if numba is installed (compilation occurs on first
+# use and is cached across runs)
+if numba is not None:
+    turnover_jit = numba.njit(cache=True)(turnover_loops)
+else:
+    turnover_jit = None
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+
+""" Tests for the stock turnover kernel of measure markets """
+
+# Import code to be tested
+import stock_turnover
+
+# Import needed packages
+import unittest
+import numpy
+
+
+def baseline_turnover(stock, life_base, retro_rate, on_mkt, new, tech_pot,
+                      years):
+    """Find stock turnover with the per-year loop the kernel replaced.
+
+    Notes:
+        Follows the year-keyed loop formerly in
+        'ecm_prep.Measure.partition_microsegment' for a primary microsegment
+        without heat pump conversion.
+
+    Args:
+        stock (list): Total stock after any sub-market scaling, by year.
+        life_base (list): Baseline technology lifetime, by year.
+        retro_rate (list): Early retrofit rate of existing stock, by year.
+        on_mkt (list): Flag for whether the measure is on the market, by year.
+        new (bool): Flag for a microsegment of new structures.
+        tech_pot (bool): Flag for the technical potential adoption scheme.
+        years (list): Consecutive years of the modeling time horizon.
+
+    Returns:
+        Dict of lists of the competed fraction of the stock, the fraction of
+        uncompeted stock previously captured by the measure, and the total
+        stock captured by the measure, by year.
+    """
+    aeo_years = [str(yr) for yr in years]
+    stock_total_sbmkt, life_base, retro_rate, on_mkt = (
+        dict(zip(aeo_years, x)) for x in [
+            stock, life_base, retro_rate, on_mkt])
+    stock_total_meas, stock_comp_cum_sbmkt = {}, {}
+    out = {"comp_frac_sbmkt": [], "meas_cum_frac": [],
+           "stock_total_meas": []}
+    meas_cum_frac, comp_cum_frac, turnover_cap_not_reached = 0, 0, True
+    for yr in aeo_years:
+        measure_on_mkt = on_mkt[yr]
+        prev_capt_turnover = int(life_base[yr]) - (
+            int(yr) - int(aeo_years[0])) <= 0
+        if new:
+            if yr != aeo_years[0] and stock_total_sbmkt[yr] != 0:
+                if stock_total_sbmkt[yr] >= stock_total_sbmkt[
+                        str(int(yr) - 1)]:
+                    new_frac = (stock_total_sbmkt[yr] - stock_total_sbmkt[
+                        str(int(yr) - 1)]) / stock_total_sbmkt[yr]
+                else:
+                    new_frac = 0
+            elif yr == aeo_years[0]:
+                new_frac = 1
+            else:
+                new_frac = 0
+            repl_frac, retro_frac = 0, 0
+            if prev_capt_turnover:
+                prev_capt_yr = int(yr) - int(life_base[yr])
+                if prev_capt_yr >= int(aeo_years[0]):
+                    if str(prev_capt_yr) != aeo_years[0] and \
+                            stock_total_sbmkt[yr] != 0:
+                        if stock_total_sbmkt[str(prev_capt_yr)] >= \
+                                stock_total_sbmkt[str(prev_capt_yr - 1)]:
+                            repl_frac = (
+                                stock_total_sbmkt[str(prev_capt_yr)] -
+                                stock_total_sbmkt[str(prev_capt_yr - 1)]) / \
+                                stock_total_sbmkt[yr]
+                        else:
+                            repl_frac = stock_total_sbmkt[
+                                str(prev_capt_yr)] / stock_total_sbmkt[yr]
+                    elif stock_total_sbmkt[yr] != 0:
+                        repl_frac = stock_total_sbmkt[
+                            str(prev_capt_yr)] / stock_total_sbmkt[yr]
+        else:
+            new_frac = 0
+            if turnover_cap_not_reached:
+                repl_frac = (1 / life_base[yr])
+                retro_frac = retro_rate[yr]
+            elif prev_capt_turnover:
+                repl_frac, retro_frac = (1 / life_base[yr]), 0
+            else:
+                repl_frac, retro_frac = 0, 0
+        if tech_pot:
+            comp_frac_sbmkt = 1
+        else:
+            comp_frac_sbmkt = new_frac + repl_frac + retro_frac
+        if comp_frac_sbmkt > 1:
+            comp_frac_sbmkt = 1
+        comp_frac_diffuse = min(max(comp_frac_sbmkt, 0), 1)
+        comp_frac_diffuse_meas = comp_frac_diffuse if measure_on_mkt else 0
+        decrmnt_meas_capt_stk = not measure_on_mkt and prev_capt_turnover
+        stock_total = stock_total_sbmkt[yr]
+        stock_compete_sbmkt = stock_total_sbmkt[yr] * comp_frac_sbmkt
+        stock_compete = stock_total_sbmkt[yr] * comp_frac_diffuse
+        stock_compete_meas = stock_total_sbmkt[yr] * comp_frac_diffuse_meas
+        if yr != aeo_years[0]:
+            prev_yr = str(int(yr) - 1)
+            if (stock_total - stock_compete) != 0:
+                meas_cum_frac = stock_total_meas[prev_yr] / (
+                    stock_total - stock_compete)
+            if (stock_total_sbmkt[yr] - stock_compete_sbmkt) != 0:
+                comp_cum_frac = stock_comp_cum_sbmkt[prev_yr] / (
+                    stock_total_sbmkt[yr] - stock_compete_sbmkt)
+            meas_cum_frac = min(meas_cum_frac, 1)
+            comp_cum_frac = min(comp_cum_frac, 1)
+            if not new and not tech_pot:
+                turnover_cap_not_reached = comp_cum_frac < 1
+        if yr == aeo_years[0]:
+            stock_total_meas[yr] = stock_compete_meas
+            stock_comp_cum_sbmkt[yr] = stock_compete_sbmkt
+        elif tech_pot and measure_on_mkt:
+            stock_total_meas[yr] = stock_total
+            stock_comp_cum_sbmkt[yr] = stock_total_sbmkt[yr]
+        elif not tech_pot:
+            if not decrmnt_meas_capt_stk:
+                stock_total_meas[yr] = stock_total_meas[
+                    str(int(yr) - 1)] + stock_compete_meas
+            else:
+                stock_total_meas[yr] = stock_total_meas[
+                    str(int(yr) - 1)] - stock_compete
+            stock_comp_cum_sbmkt[yr] = stock_comp_cum_sbmkt[
+                str(int(yr) - 1)] + stock_compete_sbmkt
+        else:
+            stock_total_meas[yr], stock_comp_cum_sbmkt[yr] = 0, 0
+        # Captured stock never exceeds the total stock or falls below zero
+        stock_total_meas[yr] = min(max(stock_total_meas[yr], 0), stock_total)
+        out["comp_frac_sbmkt"].append(comp_frac_sbmkt)
+        out["meas_cum_frac"].append(meas_cum_frac)
+        out["stock_total_meas"].append(stock_total_meas[yr])
+
+    return out
+
+
+class StockTurnoverTest(unittest.TestCase):
+    """Test stock turnover results across microsegments and kernels.
+
+    Attributes:
+        years (numpy.ndarray): Sample modeling time horizon.
+        inputs (dict): Sample stock turnover inputs for a batch of
+            microsegments covering new and existing structures, primary and
+            secondary microsegments, adoption schemes, and heat pump
+            conversion cases.
+    """
+
+    def setUp(self):
+        """Set sample stock turnover inputs for a batch of microsegments."""
+        self.years = numpy.arange(2020, 2031)
+        n_yrs, rng = len(self.years), numpy.random.RandomState(1)
+        rows = [
+            # Primary, new, tech. pot., HP mode, all retrofits to HPs
+            (True, False, False, 0, False), (True, True, False, 0, False),
+            (True, False, True, 0, False), (True, True, True, 0, False),
+            (True, False, False, 1, False), (True, True, False, 2, True),
+            (True, False, True, 1, False), (True, False, False, 2, False),
+            (False, False, False, 0, False), (False, True, True, 0, False)]
+        primary, new, tech_pot, hp_mode, hp_retro_all = (
+            numpy.array(x) for x in zip(*rows))
+        stock = rng.uniform(50, 100, (len(rows), 1)) * numpy.cumprod(
+            rng.uniform(0.9, 1.2, (len(rows), n_yrs)), axis=1)
+        # Include years without stock and a measure off the market
+        stock[1, 4] = 0
+        on_mkt = numpy.ones((len(rows), n_yrs), dtype=bool)
+        on_mkt[:, 8:] = False
+        self.inputs = {
+            "stock": stock,
+            "life_base": numpy.repeat(
+                [[3.5], [4], [6], [5], [3], [4], [20], [8], [5], [5]], n_yrs,
+                axis=1),
+            "retro_rate": numpy.full((len(rows), n_yrs), 0.05),
+            "hp_rate": rng.uniform(0, 0.5, (len(rows), n_yrs)),
+            "on_mkt": on_mkt,
+            "rel_perf": rng.uniform(0.5, 1, (len(rows), n_yrs, 3)),
+            "comp_frac_scnd": rng.uniform(0, 0.3, (len(rows), n_yrs)),
+            "meas_cum_frac_scnd": rng.uniform(0, 0.5, (len(rows), n_yrs)),
+            "primary": primary, "new": new, "tech_pot": tech_pot,
+            "hp_mode": hp_mode, "hp_retro_all": hp_retro_all,
+            "years": self.years,
+            "entry_year": numpy.full(len(rows), 2022)}
+
+    def test_existing_turnover(self):
+        """Test replacement and retrofit of existing stock by year."""
+        inputs = {k: (v[:1] if k not in ["years"] else v) for
+                  k, v in self.inputs.items()}
+        inputs["stock"] = numpy.full((1, len(self.years)), 100.0)
+        inputs["life_base"] = numpy.full((1, len(self.years)), 5.0)
+        out = stock_turnover.turnover(**inputs, backend="python")
+        # Competed fraction is the replacement plus the retrofit rate
+        numpy.testing.assert_allclose(out["comp_frac_sbmkt"][0, :3], 0.25)
+        # Captured stock accumulates the competed stock until all existing
+        # stock has been competed, then decrements once the measure is off
+        # the market and previously captured stock turns over
+        numpy.testing.assert_allclose(
+            out["stock_total_meas"][0, :5], [25, 50, 75, 100, 100])
+        numpy.testing.assert_allclose(
+            out["stock_total_meas"][0, 8:], [80, 60, 40])
+        numpy.testing.assert_allclose(
+            out["meas_cum_frac"][0, :4], [0, 25 / 75, 50 / 75, 75 / 75])
+        # Measure relative performance of captured stock is that of the
+        # current year through market entry, and a weighted average after
+        numpy.testing.assert_allclose(
+            out["rel_perf_capt"][0, :3], inputs["rel_perf"][0, :3])
+        rel_perf = inputs["rel_perf"][0]
+        numpy.testing.assert_allclose(out["rel_perf_capt"][0, 3], rel_perf[2])
+        numpy.testing.assert_allclose(
+            out["rel_perf_capt"][0, 4],
+            rel_perf[3] * (25 / 100) + rel_perf[2] * (1 - 25 / 100))
+
+    def test_kernels_agree(self):
+        """Test that all kernels yield the same results for a batch."""
+        out_py = stock_turnover.turnover(**self.inputs, backend="python")
+        out_np = stock_turnover.turnover(**self.inputs, backend="numpy")
+        for key in stock_turnover.OUTPUTS + ["rel_perf_capt"]:
+            numpy.testing.assert_allclose(
+                out_np[key], out_py[key], rtol=1e-12, err_msg=key)
+        # Results for each microsegment do not depend on the batch
+        for r in range(len(self.inputs["primary"])):
+            out_r = stock_turnover.turnover(**{
+                k: (v[r:r + 1] if k != "years" else v) for
+                k, v in self.inputs.items()})
+            for key in stock_turnover.OUTPUTS + ["rel_perf_capt"]:
+                numpy.testing.assert_allclose(
+                    out_r[key][0], out_py[key][r], rtol=1e-12, err_msg=key)
+        if stock_turnover.turnover_jit is not None:
+            out_jit = stock_turnover.turnover(**self.inputs, backend="jit")
+            for key in stock_turnover.OUTPUTS + ["rel_perf_capt"]:
+                numpy.testing.assert_allclose(
+                    out_jit[key], out_py[key], rtol=1e-12, err_msg=key)
+        else:
+            with self.assertRaises(ValueError):
+                stock_turnover.turnover(**self.inputs, backend="jit")
+
+    def test_baseline_loop(self):
+        """Test that the kernels match the per-year loop they replaced."""
+        n_yrs = len(self.years)
+        stock = [100, 120, 90, 90, 0, 130, 150, 140, 160, 170, 200]
+        on_mkt = [True] * 8 + [False] * 3
+        # New and existing structures under each adoption scheme, with
+        # fractional and zero lifetimes (a zero lifetime of existing stock
+        # is handled separately below)
+        rows = [(new, tech_pot, life) for new in [True, False] for
+                tech_pot in [False, True] for life in [2.5, 3.7, 6]] + [
+            (True, False, 0), (True, True, 0)]
+        inputs = {
+            "stock": numpy.array([stock] * len(rows), dtype=float),
+            "life_base": numpy.array([[x[2]] * n_yrs for x in rows]),
+            "retro_rate": numpy.full((len(rows), n_yrs), 0.05),
+            "hp_rate": numpy.zeros((len(rows), n_yrs)),
+            "on_mkt": numpy.array([on_mkt] * len(rows)),
+            "rel_perf": numpy.ones((len(rows), n_yrs, 1)),
+            "comp_frac_scnd": numpy.zeros((len(rows), n_yrs)),
+            "meas_cum_frac_scnd": numpy.zeros((len(rows), n_yrs)),
+            "primary": numpy.ones(len(rows), dtype=bool),
+            "new": numpy.array([x[0] for x in rows]),
+            "tech_pot": numpy.array([x[1] for x in rows]),
+            "hp_mode": numpy.zeros(len(rows), dtype=int),
+            "hp_retro_all": numpy.zeros(len(rows), dtype=bool),
+            "years": self.years,
+            "entry_year": numpy.full(len(rows), 2022)}
+        for backend in ["python", "numpy"]:
+            out = stock_turnover.turnover(**inputs, backend=backend)
+            for r, (new, tech_pot, life) in enumerate(rows):
+                expected = baseline_turnover(
+                    stock, [life] * n_yrs, [0.05] * n_yrs, on_mkt, new,
+                    tech_pot, self.years)
+                for key in expected.keys():
+                    numpy.testing.assert_allclose(
+                        out[key][r], expected[key], rtol=1e-12, atol=1e-12,
+                        err_msg=backend + " " + key + " " + str(rows[r]))
+        # The per-year loop fails for existing stock with a zero lifetime;
+        # the kernels assume no replacements of this stock
+        with self.assertRaises(ZeroDivisionError):
+            baseline_turnover(stock, [0] * n_yrs, [0.05] * n_yrs, on_mkt,
+                              False, False, self.years)
+        inputs["life_base"][:] = 0
+        for backend in ["python", "numpy"]:
+            out = stock_turnover.turnover(**inputs, backend=backend)
+            numpy.testing.assert_allclose(out["comp_frac_sbmkt"][
+                numpy.where(~inputs["new"] & ~inputs["tech_pot"])], 0.05)
+
+    def test_bounds(self):
+        """Test that competed and captured fractions stay within bounds."""
+        out = stock_turnover.turnover(**self.inputs, backend="numpy")
+        for key in ["comp_frac_sbmkt", "comp_frac_diffuse",
+                    "comp_frac_diffuse_meas", "diffuse_frac"]:
+            self.assertTrue(numpy.all(
+                (out[key] >= 0) & (out[key] <= 1 + 1e-12)), key)
+        self.assertTrue(numpy.all(out["stock_total_meas"] >= 0))
+        self.assertTrue(numpy.all(out["stock_total_meas"] <= (
+            self.inputs["stock"] * out["diffuse_frac"]) + 1e-9))
+        # Technical potential primary microsegments compete all stock
+        numpy.testing.assert_array_equal(out["comp_frac_sbmkt"][2], 1)
+        # Secondary microsegments take competed and captured fractions from
+        # the associated primary microsegments
+        numpy.testing.assert_array_equal(
+            out["comp_frac_sbmkt"][8], self.inputs["comp_frac_scnd"][8])
+        numpy.testing.assert_array_equal(
+            out["meas_cum_frac"][8], self.inputs["meas_cum_frac_scnd"][8])
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
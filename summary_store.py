@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+
+""" Keyed storage of prepared measure summary data.
+
+ecm_prep.py writes the high-level data of each prepared measure (and, if
+applicable, the measure's sector shapes) as one record of a JSON array
+(e.g., 'ecm_prep.json'). Reading and rewriting the full array each time any
+measure is prepared, and reading the full array in run.py to find the data
+of the active measures, takes time and memory in proportion to the number of
+measures ever prepared rather than the number of measures of interest.
+
+This module instead keeps each record in its own slot of the JSON array,
+padded with whitespace to leave room for the record to change in size, and
+keeps an index of the position of each slot (with a few header values of
+each record that are used to decide which measures need preparation) in a
+separate file. Records for re-prepared measures are rewritten in place within
+their slots, records for new measures are appended to the array, and single
+records are read by seeking to their slots. The file remains a valid JSON
+array throughout, and is reindexed if it is changed by other means.
+"""
+
+import json
+import re
+from collections import OrderedDict
+from os import path, stat, replace
+import json_stream
+
+
+# Record values kept in the index, such that these values are available
+# without reading the full record
+HEADER_KEYS = ["name", "remove", "contributing_ECMs", "benefits",
+               "pkg_env_costs", "usr_opts"]
+# Whitespace between JSON values
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class SummaryStore(object):
+    """Keyed store of measure records kept in a JSON array file.
+
+    Attributes:
+        file_path (str): Path to the JSON array file.
+        index_path (str): Path to the index of the records in the file.
+        exists (boolean): Flag for whether the JSON array file exists.
+        entries (list): Name, slot offset (in bytes), slot size (in bytes),
+            and header values of each record, in the order of the records
+            in the file.
+        names (dict): Positions in the entries list of each record name.
+        end (int): Offset of the end of the last record slot (or of the
+            opening bracket of the array, if there are no records).
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.index_path = path.splitext(file_path)[0] + "_index.json"
+        self.exists = path.isfile(file_path)
+        self.entries, self.names, self.end = [], {}, None
+        if self.exists:
+            # Use the index of the file if it is current; otherwise, find
+            # the positions of the records by reading the file in full
+            try:
+                with open(self.index_path, "r") as ind:
+                    index = json.load(ind)
+                current = index["header_keys"] == HEADER_KEYS and \
+                    index["stat"] == self.file_stat()
+            except (FileNotFoundError, ValueError, KeyError, TypeError):
+                current = False
+            if current:
+                self.entries, self.end = index["entries"], index["end"]
+            else:
+                self.index_file()
+                self.write_index()
+            self.names = {}
+            for pos, entry in enumerate(self.entries):
+                self.names.setdefault(entry[0], []).append(pos)
+
+    def file_stat(self):
+        """Find the size and modification time of the JSON array file.
+
+        Returns:
+            List of the file size (in bytes) and modification time (in
+            nanoseconds).
+        """
+        st = stat(self.file_path)
+        return [st.st_size, st.st_mtime_ns]
+
+    def index_file(self):
+        """Find the position and header values of each record in the file.
+
+        Raises:
+            ValueError: If the file is not a JSON array of records.
+        """
+        with open(self.file_path, "rb") as jsi:
+            text = jsi.read().decode("utf-8")
+        decoder = json.JSONDecoder()
+        # Byte offsets differ from character offsets in files with non-ASCII
+        # characters; track the byte offset of the last character offset
+        # found, such that only the text since then is encoded to find the
+        # byte offset of the next
+        last = [0, 0]
+
+        def byte_offset(pos):
+            last[1] += len(text[last[0]:pos].encode("utf-8"))
+            last[0] = pos
+            return last[1]
+
+        self.entries = []
+        pos = WHITESPACE.match(text, 0).end()
+        if text[pos:pos + 1] != "[":
+            raise ValueError("Expecting a JSON array of records")
+        self.end = byte_offset(pos + 1)
+        pos = WHITESPACE.match(text, pos + 1).end()
+        if text[pos:pos + 1] == "]":
+            return
+        while True:
+            start = pos
+            record, pos = decoder.raw_decode(text, start)
+            if not isinstance(record, dict) or "name" not in record.keys():
+                raise ValueError(
+                    "Expecting a JSON object with a 'name' key at character "
+                    + str(start))
+            # Record slots span the record and any whitespace after it
+            pos = WHITESPACE.match(text, pos).end()
+            offset = byte_offset(start)
+            self.end = byte_offset(pos)
+            self.entries.append([
+                record["name"], offset, self.end - offset,
+                self.header(record)])
+            if text[pos:pos + 1] == ",":
+                pos = WHITESPACE.match(text, pos + 1).end()
+            elif text[pos:pos + 1] == "]":
+                break
+            else:
+                raise ValueError(
+                    "Expecting ',' delimiter or ']' at character " + str(pos))
+
+    def write_index(self):
+        """Write the index of the records in the file."""
+        with open(self.index_path + ".tmp", "w") as ind:
+            json.dump({
+                "header_keys": HEADER_KEYS, "stat": self.file_stat(),
+                "end": self.end, "entries": self.entries}, ind)
+        replace(self.index_path + ".tmp", self.index_path)
+
+    def header(self, record):
+        """Set the header values of a record to keep in the index.
+
+        Args:
+            record (dict): Measure record.
+
+        Returns:
+            Dict of the record's values for the header keys it has.
+        """
+        return {k: record[k] for k in HEADER_KEYS if k in record.keys()}
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __len__(self):
+        return len(self.entries)
+
+    def headers(self):
+        """List the header values of all records, in file order.
+
+        Returns:
+            List of dicts of header values (see 'HEADER_KEYS').
+        """
+        return [entry[3] for entry in self.entries]
+
+    def read(self, jsi, offset, size):
+        """Read a single record from the file.
+
+        Args:
+            jsi (file): JSON array file object opened for reading bytes.
+            offset (int): Offset of the record slot (in bytes).
+            size (int): Size of the record slot (in bytes).
+
+        Returns:
+            Measure record.
+        """
+        jsi.seek(offset)
+        return json.loads(jsi.read(size).decode("utf-8"))
+
+    def get(self, name):
+        """Read the record of a single measure.
+
+        Args:
+            name (str): Measure name.
+
+        Returns:
+            Measure record (the first in the file, if there are several
+            records with the same name).
+
+        Raises:
+            KeyError: If there is no record for the measure.
+        """
+        with open(self.file_path, "rb") as jsi:
+            return self.read(jsi, *self.entries[self.names[name][0]][1:3])
+
+    def records(self, names):
+        """Read the records of a set of measures.
+
+        Args:
+            names: Names of the measures to read records for.
+
+        Returns:
+            List of the measures' records, in file order.
+        """
+        names = set(names)
+        if not self.exists:
+            return []
+        with open(self.file_path, "rb") as jsi:
+            return [self.read(jsi, *entry[1:3]) for entry in self.entries if
+                    entry[0] in names]
+
+    def update(self, records, compact=False, merge=True):
+        """Add measure records to the file, or update existing records.
+
+        Notes:
+            Existing records are updated with the keys of the new records
+            (as with dict.update), or replaced by the new records, and
+            rewritten in place if they fit in their slots. New records are
+            appended to the array. The file is rewritten in full only if it
+            does not exist yet or an updated record outgrows its slot.
+
+        Args:
+            records (list): Measure records to add or update.
+            compact (boolean): Flag for writing the records without
+                indentation.
+            merge (boolean): Flag for updating existing records with the
+                keys of the new records rather than replacing them.
+        """
+        indent = None if compact else 2
+        # Merge the records into any existing records of the same name
+        updates, new = {}, OrderedDict()
+        jsi = open(self.file_path, "rb") if self.exists else None
+        try:
+            for rec in records:
+                if rec["name"] in self.names:
+                    for pos in self.names[rec["name"]]:
+                        if pos not in updates.keys():
+                            updates[pos] = self.read(
+                                jsi, *self.entries[pos][1:3]) if merge \
+                                else {}
+                        updates[pos].update(rec)
+                elif merge:
+                    new.setdefault(rec["name"], {}).update(rec)
+                else:
+                    new[rec["name"]] = dict(rec)
+        finally:
+            if jsi is not None:
+                jsi.close()
+        if self.exists and len(updates) == 0 and len(new) == 0:
+            return
+        texts = {pos: self.encode(rec, indent) for pos, rec in
+                 updates.items()}
+        # Rewrite the file in full if it does not exist yet or an updated
+        # record does not fit in its slot
+        if not self.exists or any([
+                len(text) > self.entries[pos][2] for
+                pos, text in texts.items()]):
+            self.rewrite(updates, texts, list(new.values()), indent)
+            return
+        # Otherwise, rewrite updated records in place and append new records
+        # (overwriting the closing bracket of the array)
+        with open(self.file_path, "r+b") as jso:
+            for pos in sorted(texts.keys()):
+                jso.seek(self.entries[pos][1])
+                jso.write(texts[pos].ljust(self.entries[pos][2]).encode(
+                    "ascii"))
+                self.entries[pos][3] = self.header(updates[pos])
+            if len(new) > 0:
+                jso.seek(self.end)
+                for rec in new.values():
+                    self.append(jso, rec, self.slot(
+                        self.encode(rec, indent)), indent)
+                jso.write(self.close_str(indent))
+                jso.truncate()
+        self.write_index()
+
+    def encode(self, record, indent):
+        """Serialize a record as an entry of the JSON array.
+
+        Args:
+            record (dict): Measure record.
+            indent (int): Number of spaces to indent records by, or None.
+
+        Returns:
+            JSON string for the record.
+        """
+        return "".join(json_stream.iterencode(record, indent, 1))
+
+    def slot(self, text):
+        """Pad a serialized record to leave room for it to change in size.
+
+        Args:
+            text (str): Serialized record.
+
+        Returns:
+            Serialized record, padded with trailing spaces.
+        """
+        return text.ljust(len(text) + len(text) // 10 + 64)
+
+    def append(self, jso, record, text, indent):
+        """Write a record slot at the end of the array and index it.
+
+        Args:
+            jso (file): JSON array file object opened for writing bytes,
+                positioned at the end of the last record slot.
+            record (dict): Measure record.
+            text (str): Serialized record, padded to the slot size.
+            indent (int): Number of spaces to indent records by, or None.
+        """
+        sep = "," if len(self.entries) > 0 else ""
+        if indent is not None:
+            sep += "\n" + " " * indent
+        jso.write((sep + text).encode("ascii"))
+        self.names.setdefault(record["name"], []).append(len(self.entries))
+        self.entries.append([
+            record["name"], self.end + len(sep), len(text),
+            self.header(record)])
+        self.end += len(sep) + len(text)
+
+    def close_str(self, indent):
+        """Set the closing bracket of the array.
+
+        Args:
+            indent (int): Number of spaces to indent records by, or None.
+
+        Returns:
+            Closing bracket (preceded by a newline for indented records),
+            encoded as bytes.
+        """
+        return b"\n]" if indent is not None else b"]"
+
+    def rewrite(self, updates, texts, new, indent):
+        """Rewrite the file in full, with updated and new records.
+
+        Notes:
+            Records are written to a temporary file one at a time, which
+            replaces the JSON array file once all records are written.
+
+        Args:
+            updates (dict): Updated records, keyed by position in the entries
+                list.
+            texts (dict): Serialized updated records, keyed by position in
+                the entries list.
+            new (list): New records.
+            indent (int): Number of spaces to indent records by, or None.
+        """
+        entries = self.entries
+        self.entries, self.names, self.end = [], {}, 1
+        jsi = open(self.file_path, "rb") if self.exists else None
+        try:
+            with open(self.file_path + ".tmp", "wb") as jso:
+                jso.write(b"[")
+                # Write existing records (with updates) followed by new ones
+                for pos, entry in enumerate(entries):
+                    if pos in updates.keys():
+                        rec, text = updates[pos], texts[pos]
+                    else:
+                        rec = self.read(jsi, *entry[1:3])
+                        text = self.encode(rec, indent)
+                    self.append(jso, rec, self.slot(text), indent)
+                for rec in new:
+                    self.append(jso, rec, self.slot(
+                        self.encode(rec, indent)), indent)
+                jso.write(self.close_str(indent))
+        finally:
+            if jsi is not None:
+                jsi.close()
+        replace(self.file_path + ".tmp", self.file_path)
+        self.exists = True
+        self.write_index()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+""" Tests for keyed storage of prepared measure summary data """
+
+# Import code to be tested
+import summary_store
+
+# Import needed packages
+import unittest
+import tempfile
+import json
+from os import path
+
+
+class SummaryStoreTest(unittest.TestCase):
+    """Test reading and in-place updating of measure records in a JSON array.
+
+    Attributes:
+        tmp_dir (object): Temporary folder for the JSON array file.
+        file_path (str): Path to the JSON array file.
+        records (list): Sample measure records.
+    """
+
+    def setUp(self):
+        """Set sample measure records and a file to write them to."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = path.join(self.tmp_dir.name, "ecm_prep.json")
+        self.records = [
+            {"name": "Sample Measure " + str(n), "remove": False,
+             "usr_opts": {"verbose": False}, "climate_zone": ["AIA_CZ1"],
+             "markets": {"Technical potential": {
+                 "master_mseg": {"stock": {"2020": n * 1.5}}}}}
+            for n in range(3)]
+        self.records.append({
+            "name": "Sample Package", "remove": False,
+            "contributing_ECMs": ["Sample Measure 0", "Sample Measure 1"],
+            "benefits": {"energy savings increase": 0,
+                         "cost reduction": 0.1},
+            "pkg_env_costs": False, "descr": "Café"})
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        self.tmp_dir.cleanup()
+
+    def read_file(self):
+        """Read the JSON array file as bytes and as a list of records."""
+        with open(self.file_path, "rb") as jsi:
+            data = jsi.read()
+        return data, json.loads(data.decode("utf-8"))
+
+    def test_round_trip(self):
+        """Test that written records are read back as a valid JSON array."""
+        for compact in [False, True]:
+            store = summary_store.SummaryStore(self.file_path)
+            store.update(self.records, compact=compact)
+            self.assertEqual(self.read_file()[1], self.records)
+            # Read records from a new store, using the index
+            store = summary_store.SummaryStore(self.file_path)
+            self.assertEqual(len(store), 4)
+            self.assertIn("Sample Package", store)
+            self.assertNotIn("Sample Measure 3", store)
+            self.assertEqual(store.get("Sample Measure 1"), self.records[1])
+            self.assertEqual(store.records(
+                ["Sample Package", "Sample Measure 0"]),
+                [self.records[0], self.records[3]])
+            self.assertEqual(store.headers()[3], {
+                k: self.records[3][k] for k in [
+                    "name", "remove", "contributing_ECMs", "benefits",
+                    "pkg_env_costs"]})
+
+    def test_update_in_place(self):
+        """Test that updates rewrite only the slots of updated records."""
+        store = summary_store.SummaryStore(self.file_path)
+        store.update(self.records)
+        before = self.read_file()[0]
+        update = {"name": "Sample Measure 1", "remove": True}
+        store.update([update])
+        after, records = self.read_file()
+        # Bytes outside of the updated record's slot are unchanged
+        offset, size = store.entries[1][1:3]
+        self.assertEqual(len(after), len(before))
+        self.assertEqual(after[:offset], before[:offset])
+        self.assertEqual(after[offset + size:], before[offset + size:])
+        self.records[1].update(update)
+        self.assertEqual(records, self.records)
+        self.assertEqual(
+            summary_store.SummaryStore(self.file_path).headers()[1][
+                "remove"], True)
+        # Records may also be replaced rather than updated
+        store.update([update, {"name": "Sample Measure 4"}], merge=False)
+        self.assertEqual(self.read_file()[1], self.records[:1] + [update] +
+                         self.records[2:] + [{"name": "Sample Measure 4"}])
+
+    def test_append_and_grow(self):
+        """Test adding new records and updating records past their slots."""
+        store = summary_store.SummaryStore(self.file_path)
+        store.update(self.records[:2])
+        before = self.read_file()[0]
+        # New records are appended after existing slots
+        store.update(self.records[2:])
+        after, records = self.read_file()
+        self.assertEqual(after[:store.entries[1][1]],
+                         before[:store.entries[1][1]])
+        self.assertEqual(records, self.records)
+        # Records that outgrow their slots trigger a full rewrite
+        update = {"name": "Sample Measure 0", "descr": "x" * 1000}
+        store.update([update])
+        self.records[0].update(update)
+        self.assertEqual(self.read_file()[1], self.records)
+        self.assertEqual(summary_store.SummaryStore(self.file_path).get(
+            "Sample Package"), self.records[3])
+
+    def test_stale_index(self):
+        """Test reindexing of files written or changed by other means."""
+        with open(self.file_path, "w") as jso:
+            json.dump(self.records, jso, indent=2, ensure_ascii=False)
+        store = summary_store.SummaryStore(self.file_path)
+        self.assertEqual(store.get("Sample Package"), self.records[3])
+        update = {"name": "Sample Measure 2", "remove": True}
+        store.update([update, {"name": "Sample Measure 3"}])
+        self.records[2].update(update)
+        self.assertEqual(
+            self.read_file()[1], self.records + [{"name": "Sample Measure 3"}])
+        # Files changed by other means are reindexed
+        with open(self.file_path, "w") as jso:
+            json.dump(self.records[:1], jso)
+        store = summary_store.SummaryStore(self.file_path)
+        self.assertEqual(store.records(["Sample Measure 0"]),
+                         self.records[:1])
+        self.assertEqual(len(store), 1)
+        # Files that are not arrays of named records raise an error
+        with open(self.file_path, "w") as jso:
+            json.dump([{"descr": "Sample"}], jso)
+        with self.assertRaises(ValueError):
+            summary_store.SummaryStore(self.file_path)
+
+
+# Offer external code execution (include all lines below this point in all
+# test files)
+def main():
+    """Trigger default behavior of running all test fixtures in the file."""
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()